@@ -3,12 +3,16 @@ from django.contrib import admin, messages
 from django.shortcuts import render, redirect
 from django.urls import path, reverse
 from django import forms
+from django.db import transaction
 from django.utils.html import format_html
 from .models import (
     Cliente, Conversacion, Mensaje, TipoHabitacion, Habitacion, PreguntaFrecuente, Reserva, 
-    BaseConocimiento, Persona, Rol, UserProfile, UserRol, PreguntaDesconocida
+    BaseConocimiento, Persona, Rol, UserProfile, UserRol, PreguntaDesconocida,
+    GrupoPreguntasDesconocidas
 )
 from django.contrib.auth.models import User
+from . import servicio_reservas
+from .admin_rendimiento import AdminTablaGrande
 
 # --- ACCIONES PERSONALIZADAS PARA EL ADMIN ---
 @admin.action(description='Marcar seleccionados como revisados')
@@ -16,6 +20,17 @@ def marcar_como_revisado(modeladmin, request, queryset):
     queryset.update(revisada=True)
     messages.success(request, f"{queryset.count()} preguntas marcadas como revisadas.")
 
+def marcar_grupos_revisados(grupo_ids):
+    """Marca como revisadas todas las preguntas de los grupos (un UPDATE por tabla)."""
+    preguntas = PreguntaDesconocida.objects.filter(grupo_id__in=grupo_ids).update(revisada=True)
+    GrupoPreguntasDesconocidas.objects.filter(grupo_id__in=grupo_ids).update(revisado=True)
+    return preguntas
+
+@admin.action(description='Marcar grupos (y todas sus preguntas) como revisados')
+def marcar_grupo_como_revisado(modeladmin, request, queryset):
+    count = marcar_grupos_revisados(list(queryset.values_list('grupo_id', flat=True)))
+    messages.success(request, f"{count} preguntas marcadas como revisadas.")
+
 @admin.action(description='Eliminar seleccionadas permanentemente')
 def eliminar_preguntas_desconocidas(modeladmin, request, queryset):
     count = queryset.count()
@@ -61,22 +76,19 @@ class ConvertirPreguntaForm(forms.Form):
         return texto
 
 # --- ADMIN PERSONALIZADO PARA PREGUNTAS DESCONOCIDAS ---
-class PreguntaDesconocidaAdmin(admin.ModelAdmin):
+class PreguntaDesconocidaAdmin(AdminTablaGrande):
     """Administración mejorada para Preguntas Desconocidas con nuevas funcionalidades"""
     
-    list_display = ('texto_pregunta_truncado', 'cliente_info', 'fecha_recibida', 'revisada', 'acciones_personalizadas')
+    list_display = ('texto_pregunta_truncado', 'cliente_info', 'ocurrencias', 'fecha_recibida', 'fecha_ultima_vez', 'revisada', 'grupo', 'acciones_personalizadas')
     list_filter = ('revisada', 'fecha_recibida')
-    # CORREGIDO: Agregar campos de búsqueda correctos
-    search_fields = ('texto_pregunta', 'cliente__nombre_cliente', 'cliente__telefono')
+    list_select_related = ('cliente', 'grupo')
+    # texto_pregunta usa el índice trigram de la migración 0009 (PostgreSQL);
+    # teléfono con "=" para que use el índice único en vez de un LIKE
+    search_fields = ('texto_pregunta', 'cliente__nombre_cliente', '=cliente__telefono')
     actions = [marcar_como_revisado, eliminar_preguntas_desconocidas]
-    readonly_fields = ('texto_pregunta', 'fecha_recibida')
-    ordering = ['-fecha_recibida']
-    
-    def get_queryset(self, request):
-        """Optimizar consultas con select_related/prefetch_related"""
-        queryset = super().get_queryset(request)
-        # CORREGIDO: Usar la relación correcta según tu modelo
-        return queryset.select_related('cliente')
+    readonly_fields = ('texto_pregunta', 'fecha_recibida', 'ocurrencias', 'fecha_ultima_vez')
+    raw_id_fields = ('cliente', 'grupo')
+    campo_cursor = 'fecha_recibida'
     
     def texto_pregunta_truncado(self, obj):
         """Muestra los primeros 60 caracteres de la pregunta"""
@@ -160,24 +172,34 @@ class PreguntaDesconocidaAdmin(admin.ModelAdmin):
                             saludo_existente.es_saludo_inicial = False
                             saludo_existente.save()
                     
-                    # CORREGIDO: No especificar el ID, dejar que Django lo genere automáticamente
-                    nueva_faq = PreguntaFrecuente.objects.create(
-                        pregunta_larga=form.cleaned_data['pregunta_larga'],
-                        pregunta_corta_boton=form.cleaned_data['pregunta_corta_boton'],
-                        respuesta=form.cleaned_data['respuesta'],
-                        palabras_clave=form.cleaned_data['palabras_clave'],
-                        es_saludo_inicial=form.cleaned_data['es_saludo_inicial'],
-                        activo=True
-                        # NO especificar pregunta_frecuenta_id - Django lo generará automáticamente
-                    )
-                    
-                    # Eliminar la pregunta desconocida
-                    pregunta_desconocida.delete()
+                    with transaction.atomic():
+                        # CORREGIDO: No especificar el ID, dejar que Django lo genere automáticamente
+                        nueva_faq = PreguntaFrecuente.objects.create(
+                            pregunta_larga=form.cleaned_data['pregunta_larga'],
+                            pregunta_corta_boton=form.cleaned_data['pregunta_corta_boton'],
+                            respuesta=form.cleaned_data['respuesta'],
+                            palabras_clave=form.cleaned_data['palabras_clave'],
+                            es_saludo_inicial=form.cleaned_data['es_saludo_inicial'],
+                            activo=True
+                            # NO especificar pregunta_frecuenta_id - Django lo generará automáticamente
+                        )
+
+                        # Si la pregunta representa a un grupo, el grupo entero queda revisado
+                        grupo_id = pregunta_desconocida.grupo_id
+                        revisadas_grupo = marcar_grupos_revisados([grupo_id]) if grupo_id else 0
+
+                        # Eliminar la pregunta desconocida
+                        pregunta_desconocida.delete()
                     
                     messages.success(
                         request, 
                         f"✅ Pregunta convertida exitosamente a FAQ con ID {nueva_faq.pregunta_frecuenta_id} y eliminada de preguntas desconocidas."
                     )
+                    if revisadas_grupo > 1:
+                        messages.info(
+                            request,
+                            f"📦 {revisadas_grupo - 1} preguntas similares del mismo grupo marcadas como revisadas."
+                        )
                     return redirect("..")
                     
                 except Exception as e:
@@ -218,6 +240,40 @@ class PreguntaDesconocidaAdmin(admin.ModelAdmin):
         
         return redirect("..")
 
+# --- ADMIN PARA GRUPOS DE PREGUNTAS DESCONOCIDAS ---
+class GrupoPreguntasDesconocidasAdmin(admin.ModelAdmin):
+    """Grupos generados por manage.py agrupar_preguntas_desconocidas: se revisan en bloque"""
+
+    list_display = ('texto_representante_truncado', 'cantidad', 'revisado', 'fecha_creacion', 'acciones_grupo')
+    list_filter = ('revisado',)
+    search_fields = ('texto_representante',)
+    actions = [marcar_grupo_como_revisado]
+    readonly_fields = ('representante', 'texto_representante', 'cantidad', 'fecha_creacion')
+    ordering = ['-cantidad']
+
+    def has_add_permission(self, request):
+        return False
+
+    def texto_representante_truncado(self, obj):
+        if len(obj.texto_representante) > 60:
+            return f"{obj.texto_representante[:60]}..."
+        return obj.texto_representante
+    texto_representante_truncado.short_description = "Pregunta representante"
+
+    def acciones_grupo(self, obj):
+        """Ver las preguntas del grupo y convertir el representante en FAQ"""
+        preguntas_url = reverse('admin:api_preguntadesconocida_changelist') + f"?grupo__exact={obj.grupo_id}"
+        if not obj.representante_id or obj.revisado:
+            return format_html('<a href="{}">👀 Ver preguntas</a>', preguntas_url)
+        convertir_url = reverse('admin:convertir-pregunta', args=[obj.representante_id])
+        return format_html(
+            '<a href="{}">👀 Ver preguntas</a> &nbsp; '
+            '<a href="{}" class="button" style="background: #417690; color: white; padding: 5px 10px; '
+            'text-decoration: none; border-radius: 3px; font-size: 12px;">📝 Convertir a FAQ</a>',
+            preguntas_url, convertir_url
+        )
+    acciones_grupo.short_description = "Acciones"
+
 # --- ADMIN MEJORADO PARA PREGUNTAS FRECUENTES ---
 class PreguntaFrecuenteAdmin(admin.ModelAdmin):
     """Administración mejorada para Preguntas Frecuentes"""
@@ -265,20 +321,73 @@ class PreguntaFrecuenteAdmin(admin.ModelAdmin):
         
         super().save_model(request, obj, form, change)
 
+# --- ADMINS PARA TABLAS GRANDES (historial y reservas) ---
+class ConversacionAdmin(AdminTablaGrande):
+    list_display = ('conversacion_id', 'cliente', 'inicio_conversacion')
+    list_select_related = ('cliente',)
+    search_fields = ('=cliente__telefono',)
+    raw_id_fields = ('cliente',)
+    campo_cursor = 'inicio_conversacion'
+
+
+class MensajeAdmin(AdminTablaGrande):
+    list_display = ('mensaje_id', 'conversacion_id', 'remitente', 'contenido_truncado', 'timestamp')
+    list_filter = ('remitente',)
+    raw_id_fields = ('conversacion',)
+    campo_cursor = 'timestamp'
+
+    def contenido_truncado(self, obj):
+        return obj.contenido[:80]
+    contenido_truncado.short_description = "Contenido"
+
+
+# Fila por fila (con save) para que las señales actualicen estadísticas y disponibilidad;
+# la cancelación va en lote por servicio_reservas.cancelar_varias, que las actualiza a mano
+@admin.action(description='Marcar como llegada confirmada')
+def confirmar_llegada(modeladmin, request, queryset):
+    reservas = list(queryset.filter(estado__in=['pendiente', 'confirmada']).select_related('habitacion'))
+    for reserva in reservas:
+        servicio_reservas.registrar_llegada(reserva)
+    messages.success(request, f"{len(reservas)} reservas marcadas como llegada confirmada.")
+
+@admin.action(description='Marcar como completadas')
+def completar_reservas(modeladmin, request, queryset):
+    reservas = list(queryset.filter(estado='llegada_confirmada').select_related('habitacion'))
+    for reserva in reservas:
+        servicio_reservas.completar(reserva)
+    messages.success(request, f"{len(reservas)} reservas marcadas como completadas.")
+
+@admin.action(description='Cancelar reservas seleccionadas')
+def cancelar_reservas(modeladmin, request, queryset):
+    resultado = servicio_reservas.cancelar_varias(queryset.values_list('reserva_id', flat=True))
+    messages.success(request, f"{len(resultado.aplicadas)} reservas canceladas.")
+
+
+class ReservaAdmin(AdminTablaGrande):
+    list_display = ("reserva_id", "cliente", "habitacion", "fecha_hora_inicio", "fecha_hora_fin", "estado", "origen", "fecha_creacion")
+    list_filter = ("estado", "origen")
+    list_select_related = ('cliente', 'habitacion')
+    search_fields = ("habitacion__nombre_habitacion", "cliente__nombre_cliente", "=cliente__telefono")
+    raw_id_fields = ('cliente',)
+    campo_cursor = 'fecha_creacion'
+    actions = [confirmar_llegada, completar_reservas, cancelar_reservas]
+
+
 # --- REGISTRAR MODELOS EN EL ADMIN ---
 admin.site.register(Cliente)
-admin.site.register(Conversacion)
-admin.site.register(Mensaje)
+admin.site.register(Conversacion, ConversacionAdmin)
+admin.site.register(Mensaje, MensajeAdmin)
 admin.site.register(TipoHabitacion)
 # admin.site.register(Habitacion)
 admin.site.register(PreguntaFrecuente, PreguntaFrecuenteAdmin)
-# admin.site.register(Reserva)
+admin.site.register(Reserva, ReservaAdmin)
 admin.site.register(BaseConocimiento)
 admin.site.register(Persona)
 admin.site.register(Rol)
 admin.site.register(UserProfile)
 admin.site.register(UserRol)
 admin.site.register(PreguntaDesconocida, PreguntaDesconocidaAdmin)
+admin.site.register(GrupoPreguntasDesconocidas, GrupoPreguntasDesconocidasAdmin)
 
 # --- PERSONALIZACIÓN DEL SITIO DE ADMINISTRACIÓN ---
 admin.site.site_header = "Administración Pratsy Bot"
@@ -0,0 +1,104 @@
+# apps/api/admin_rendimiento.py
+"""
+Piezas del admin para tablas grandes (preguntas desconocidas, reservas, mensajes).
+
+- ``PaginadorConteoEstimado``: sin filtros, en PostgreSQL usa la estimación de
+  ``pg_class.reltuples`` en vez de ``COUNT(*)``; con filtros cuenta como máximo
+  ``MAXIMO_CONTEO`` filas.
+- ``AdminTablaGrande``: usa ese paginador, no calcula el total sin filtrar
+  (``show_full_result_count``) y agrega un enlace "Siguientes" con cursor
+  (``?despues=<pk>``) que filtra por ``(campo_cursor, pk)`` en vez de usar
+  OFFSET, así las páginas profundas cuestan lo mismo que la primera.
+"""
+from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+# Por debajo de esto se cuenta exacto; por encima se estima o se acota
+MAXIMO_CONTEO = 10000
+
+PARAMETRO_CURSOR = 'despues'
+
+
+def conteo_estimado(queryset):
+    """Filas estimadas de la tabla (solo PostgreSQL y sin filtros); None si no se puede estimar."""
+    conexion = connections[queryset.db]
+    if conexion.vendor != 'postgresql' or queryset.query.where:
+        return None
+    with conexion.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+            [queryset.model._meta.db_table],
+        )
+        fila = cursor.fetchone()
+    # reltuples es -1 si la tabla nunca se analizó
+    return fila[0] if fila and fila[0] >= 0 else None
+
+
+class PaginadorConteoEstimado(Paginator):
+    """Paginator que evita ``COUNT(*)`` sobre tablas enteras."""
+
+    @cached_property
+    def count(self):
+        estimado = conteo_estimado(self.object_list)
+        if estimado is not None and estimado > MAXIMO_CONTEO:
+            return estimado
+        # Con filtros: COUNT sobre un LIMIT, a lo sumo MAXIMO_CONTEO filas (más allá, usar el cursor)
+        return self.object_list.order_by()[:MAXIMO_CONTEO].count()
+
+
+class AdminTablaGrande(admin.ModelAdmin):
+    """
+    ModelAdmin para tablas de cientos de miles de filas.
+    Definir ``campo_cursor`` (fecha de creación o similar); el orden por defecto
+    pasa a ser ``(-campo_cursor, -pk)``, que conviene tener indexado.
+    """
+    campo_cursor = None
+    paginator = PaginadorConteoEstimado
+    show_full_result_count = False
+    change_list_template = 'admin/change_list_cursor.html'
+
+    def get_ordering(self, request):
+        if self.campo_cursor:
+            return [f'-{self.campo_cursor}', f'-{self.model._meta.pk.name}']
+        return super().get_ordering(request)
+
+    def changelist_view(self, request, extra_context=None):
+        # El ChangeList rechaza parámetros que no son filtros: se saca el cursor antes
+        cursor = request.GET.get(PARAMETRO_CURSOR)
+        if cursor is not None:
+            request.GET = request.GET.copy()
+            del request.GET[PARAMETRO_CURSOR]
+        request.cursor_admin = cursor
+
+        respuesta = super().changelist_view(request, extra_context)
+
+        contexto = getattr(respuesta, 'context_data', None)
+        if self.campo_cursor and contexto and 'cl' in contexto:
+            cl = contexto['cl']
+            resultados = list(cl.result_list)
+            # Solo con el orden por defecto (sin ordenar por columna) y si la página está llena
+            if 'o' not in cl.params and len(resultados) == cl.list_per_page:
+                contexto['url_siguiente_cursor'] = cl.get_query_string(
+                    {PARAMETRO_CURSOR: resultados[-1].pk}, remove=['p']
+                )
+        return respuesta
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        cursor = getattr(request, 'cursor_admin', None)
+        if not (cursor and self.campo_cursor):
+            return queryset
+        try:
+            pk = self.model._meta.pk.to_python(cursor)
+        except Exception:
+            return queryset
+        valor = queryset.filter(pk=pk).values_list(self.campo_cursor, flat=True).first()
+        if valor is None:
+            return queryset.filter(pk__lt=pk)
+        return queryset.filter(
+            Q(**{f'{self.campo_cursor}__lt': valor}) |
+            Q(**{self.campo_cursor: valor, 'pk__lt': pk})
+        )
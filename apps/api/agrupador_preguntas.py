@@ -0,0 +1,148 @@
+# apps/api/agrupador_preguntas.py
+"""
+Agrupación de preguntas desconocidas casi idénticas (``manage.py agrupar_preguntas_desconocidas``).
+
+1. ``normalizar``: minúsculas, sin tildes ni signos, sin palabras vacías
+   ("hola, ¿cuánto cuesta la hora?" → "cuanto cuesta hora").
+2. Los textos normalizados iguales se cuentan una sola vez (sumando sus ocurrencias).
+3. ``vectorizar``: TF-IDF disperso (dict rasgo → peso, norma 1) con palabras y
+   trigramas de caracteres, así "presio" y "precio" se parecen.
+4. ``agrupar``: un texto entra al grupo cuyo líder tenga similitud coseno
+   >= ``umbral``; si no, abre un grupo nuevo. Los candidatos salen de un
+   índice invertido con los ``RASGOS_INDICE`` rasgos de más peso de cada
+   líder (los más distintivos), así no se compara contra todos los grupos.
+
+Sin dependencias externas: para unos miles de textos distintos tarda pocos segundos.
+"""
+import hashlib
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+UMBRAL_SIMILITUD = 0.5
+# Rasgos de más peso por vector que se usan para buscar grupos candidatos,
+# y cuántos candidatos (los que más rasgos comparten) se comparan de verdad
+RASGOS_INDICE = 8
+MAXIMO_CANDIDATOS = 50
+
+PALABRAS_VACIAS = frozenset("""
+a al algo como con de del el en es esta este eso hay la las le lo los me mi muy
+no o para por que se si su sus te tu un una uno unos y ya yo hola buenas buenos
+dias tardes noches gracias porfa favor quiero quisiera saber necesito puedo
+""".split())
+
+_NO_ALFANUMERICO = re.compile(r"[^a-z0-9]+")
+
+
+def normalizar_basico(texto):
+    """Texto en minúsculas, sin tildes ni signos (conserva todas las palabras)."""
+    texto = unicodedata.normalize('NFKD', str(texto).lower())
+    texto = texto.encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(_NO_ALFANUMERICO.sub(' ', texto).split())
+
+
+def hash_texto(texto):
+    """SHA-256 del texto con ``normalizar_basico``: identifica preguntas repetidas."""
+    return hashlib.sha256(normalizar_basico(texto).encode()).hexdigest()
+
+
+def normalizar(texto):
+    """Texto en minúsculas, sin tildes, signos ni palabras vacías."""
+    return ' '.join(p for p in normalizar_basico(texto).split() if p not in PALABRAS_VACIAS)
+
+
+def _rasgos(texto_normalizado):
+    rasgos = Counter()
+    for palabra in texto_normalizado.split():
+        rasgos[palabra] += 1
+        marcada = f" {palabra} "
+        for i in range(len(marcada) - 2):
+            rasgos['#' + marcada[i:i + 3]] += 1
+    return rasgos
+
+
+def vectorizar(textos_normalizados):
+    """Vectores TF-IDF (dicts) de norma 1, en el mismo orden que los textos."""
+    conteos = [_rasgos(t) for t in textos_normalizados]
+    frecuencia_documentos = Counter()
+    for conteo in conteos:
+        frecuencia_documentos.update(conteo.keys())
+
+    total = len(conteos)
+    vectores = []
+    for conteo in conteos:
+        vector = {
+            rasgo: (1 + math.log(n)) * math.log((1 + total) / (1 + frecuencia_documentos[rasgo]))
+            for rasgo, n in conteo.items()
+        }
+        norma = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+        vectores.append({rasgo: v / norma for rasgo, v in vector.items() if v})
+    return vectores
+
+
+def agrupar(vectores, umbral=UMBRAL_SIMILITUD):
+    """
+    Agrupa vectores por líder. Devuelve una lista de grupos, cada uno una lista
+    de índices de ``vectores`` (el primero es el líder). Conviene pasar los
+    vectores ordenados de más a menos frecuente, para que el líder sea el texto más repetido.
+    """
+    grupos = []
+    lideres = []
+    indice_invertido = defaultdict(list)  # rasgo -> grupos cuyo líder lo tiene entre sus principales
+
+    for i, vector in enumerate(vectores):
+        principales = sorted(vector, key=vector.get, reverse=True)[:RASGOS_INDICE]
+        compartidos = Counter(g for rasgo in principales for g in indice_invertido.get(rasgo, ()))
+
+        mejor, mejor_similitud = None, 0.0
+        for g, _ in compartidos.most_common(MAXIMO_CANDIDATOS):
+            lider = lideres[g]
+            similitud = sum(peso * lider.get(rasgo, 0.0) for rasgo, peso in vector.items())
+            if similitud > mejor_similitud:
+                mejor, mejor_similitud = g, similitud
+
+        if mejor is not None and mejor_similitud >= umbral:
+            grupos[mejor].append(i)
+            continue
+
+        g = len(grupos)
+        grupos.append([i])
+        lideres.append(vector)
+        for rasgo in principales:
+            indice_invertido[rasgo].append(g)
+    return grupos
+
+
+def agrupar_preguntas(filas, umbral=UMBRAL_SIMILITUD):
+    """
+    Agrupa filas ``(pk, texto, ocurrencias)``. Devuelve una lista de dicts
+    ``{"representante": pk, "texto": str, "ids": [pk, ...], "ocurrencias": int}``
+    ordenada por ocurrencias, de mayor a menor. El representante es la pregunta
+    más antigua (menor pk) con el texto normalizado más repetido del grupo.
+    """
+    ids_por_texto = defaultdict(list)
+    ocurrencias = Counter()
+    original = {}
+    for pk, texto, veces in filas:
+        clave = normalizar(texto)
+        if not clave:
+            continue
+        ids_por_texto[clave].append(pk)
+        ocurrencias[clave] += veces
+        original.setdefault(clave, (pk, texto))
+        if pk < original[clave][0]:
+            original[clave] = (pk, texto)
+
+    textos = sorted(ids_por_texto, key=lambda t: -ocurrencias[t])
+    resultado = []
+    for indices in agrupar(vectorizar(textos), umbral):
+        lider = textos[indices[0]]
+        resultado.append({
+            "representante": original[lider][0],
+            "texto": original[lider][1],
+            "ids": [pk for i in indices for pk in ids_por_texto[textos[i]]],
+            "ocurrencias": sum(ocurrencias[textos[i]] for i in indices),
+        })
+    resultado.sort(key=lambda grupo: -grupo["ocurrencias"])
+    return resultado
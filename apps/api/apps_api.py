@@ -4,3 +4,27 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.api'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_init, post_save
+
+        from . import disponibilidad, estadisticas
+        from .menu_faq import invalidar_menu
+        from .models import Cliente, Habitacion, PreguntaFrecuente, Reserva
+
+        # El menú de preguntas frecuentes en caché se invalida en cualquier proceso que las modifique
+        post_save.connect(invalidar_menu, sender=PreguntaFrecuente, dispatch_uid='menu_faq_post_save')
+        post_delete.connect(invalidar_menu, sender=PreguntaFrecuente, dispatch_uid='menu_faq_post_delete')
+
+        # Totales diarios del dashboard
+        post_init.connect(estadisticas.guardar_estado_inicial, sender=Reserva, dispatch_uid='estadisticas_reserva_init')
+        post_save.connect(estadisticas.reserva_guardada, sender=Reserva, dispatch_uid='estadisticas_reserva_save')
+        post_delete.connect(estadisticas.reserva_eliminada, sender=Reserva, dispatch_uid='estadisticas_reserva_delete')
+        post_save.connect(estadisticas.cliente_guardado, sender=Cliente, dispatch_uid='estadisticas_cliente_save')
+        post_delete.connect(estadisticas.cliente_eliminado, sender=Cliente, dispatch_uid='estadisticas_cliente_delete')
+
+        # Ocupación por día en caché para la búsqueda de horarios libres
+        for modelo in (Reserva, Habitacion):
+            nombre = modelo._meta.label_lower
+            post_save.connect(disponibilidad.invalidar, sender=modelo, dispatch_uid=f'disponibilidad_{nombre}_save')
+            post_delete.connect(disponibilidad.invalidar, sender=modelo, dispatch_uid=f'disponibilidad_{nombre}_delete')
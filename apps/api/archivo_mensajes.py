@@ -0,0 +1,214 @@
+# apps/api/archivo_mensajes.py
+"""
+Retención del historial: cierre de conversaciones inactivas y archivo de
+mensajes antiguos en disco (``manage.py archivar_mensajes`` / ``leer_archivo_mensajes``).
+
+- ``cerrar_conversaciones_inactivas``: las conversaciones activas sin mensajes
+  en las últimas CONVERSACION_INACTIVA_HORAS quedan con ``activo=False`` y
+  ``fin_conversacion`` = su último mensaje. El siguiente mensaje del cliente
+  abre una conversación nueva (todas las vistas usan get_or_create(activo=True)).
+  Las sesiones del chat web de esas conversaciones se descartan de la caché
+  (historial_web.invalidar_sesiones), igual que al archivar sus mensajes.
+- ``archivar_mensajes``: los Mensaje con más de RETENCION_MENSAJES_DIAS días se
+  escriben en ``<ARCHIVO_MENSAJES_DIR>/AAAA/MM/mensajes-AAAA-MM-DD.jsonl.gz``
+  (un archivo por día del mensaje, una línea JSON por mensaje), se borran de la
+  tabla y queda una fila MensajesArchivados por conversación y día con la cantidad,
+  el rango de fechas y la ruta del archivo.
+- ``leer_archivo``: recorre los archivos de un rango de fechas línea a línea,
+  sin cargarlos enteros en memoria.
+
+Cada lote se agrega como un miembro gzip nuevo (modo "ab"), que gzip y este
+lector leen como un único archivo. Si el proceso muere entre escribir un lote y
+borrarlo de la BD, la siguiente ejecución vuelve a escribir esos mensajes:
+``leer_archivo(..., sin_repetidos=True)`` los descarta por ``mensaje_id``.
+"""
+import datetime
+import gzip
+import json
+import logging
+import os
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import historial_web
+from .models import Conversacion, Mensaje, MensajesArchivados
+
+logger = logging.getLogger(__name__)
+
+TAMANO_LOTE = 5000
+
+
+def directorio_archivo():
+    return Path(getattr(settings, 'ARCHIVO_MENSAJES_DIR', Path(settings.BASE_DIR) / 'archivo_mensajes'))
+
+
+def ruta_dia(directorio, dia):
+    """Ruta del archivo de un día: AAAA/MM/mensajes-AAAA-MM-DD.jsonl.gz"""
+    return Path(directorio) / f"{dia:%Y}" / f"{dia:%m}" / f"mensajes-{dia:%Y-%m-%d}.jsonl.gz"
+
+
+def cerrar_conversaciones_inactivas(horas=None, simular=False):
+    """Cierra las conversaciones activas sin mensajes en las últimas ``horas``. Devuelve cuántas."""
+    horas = horas if horas is not None else getattr(settings, 'CONVERSACION_INACTIVA_HORAS', 24)
+    corte = timezone.now() - datetime.timedelta(hours=horas)
+
+    ultimo_mensaje = Mensaje.objects.filter(
+        conversacion=OuterRef('pk')
+    ).order_by().values('conversacion').annotate(ultimo=Max('timestamp')).values('ultimo')
+
+    inactivas = Conversacion.objects.filter(
+        activo=True,
+        fin_conversacion__isnull=True,
+        inicio_conversacion__lt=corte,
+    ).annotate(ultimo=Subquery(ultimo_mensaje)).exclude(ultimo__gte=corte)
+
+    if simular:
+        return inactivas.count()
+
+    sesiones_web = list(
+        inactivas.filter(cliente__telefono__startswith=historial_web.PREFIJO_TELEFONO)
+        .values_list('cliente__telefono', flat=True)
+    )
+    # Un solo UPDATE: fin_conversacion = último mensaje (o el inicio, si no tiene mensajes)
+    cerradas = Conversacion.objects.filter(pk__in=inactivas.values('pk')).update(
+        activo=False,
+        fin_conversacion=Coalesce(Subquery(ultimo_mensaje), F('inicio_conversacion')),
+    )
+    historial_web.invalidar_sesiones(sesiones_web)
+    if cerradas:
+        logger.info(f"🔒 {cerradas} conversaciones inactivas cerradas")
+    return cerradas
+
+
+def _escribir_lote(directorio, mensajes):
+    """Escribe los mensajes en el archivo de su día. Devuelve {dia: ruta}."""
+    por_dia = defaultdict(list)
+    for m in mensajes:
+        por_dia[timezone.localdate(m['timestamp'])].append(m)
+
+    rutas = {}
+    for dia, del_dia in por_dia.items():
+        ruta = ruta_dia(directorio, dia)
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        with open(ruta, 'ab') as crudo:
+            with gzip.GzipFile(fileobj=crudo, mode='ab') as archivo:
+                for m in del_dia:
+                    linea = dict(m, timestamp=m['timestamp'].isoformat())
+                    archivo.write(json.dumps(linea, ensure_ascii=False).encode() + b'\n')
+            crudo.flush()
+            os.fsync(crudo.fileno())
+        rutas[dia] = ruta
+    return rutas
+
+
+def _actualizar_resumenes(directorio, mensajes, rutas):
+    resumen = {}
+    for m in mensajes:
+        dia = timezone.localdate(m['timestamp'])
+        clave = (m['conversacion_id'], dia)
+        actual = resumen.get(clave)
+        if actual is None:
+            resumen[clave] = {'cantidad': 1, 'primero': m['timestamp'], 'ultimo': m['timestamp']}
+        else:
+            actual['cantidad'] += 1
+            actual['primero'] = min(actual['primero'], m['timestamp'])
+            actual['ultimo'] = max(actual['ultimo'], m['timestamp'])
+
+    existentes = {
+        (r.conversacion_id, r.fecha): r
+        for r in MensajesArchivados.objects.filter(
+            fecha__in={dia for _, dia in resumen},
+            conversacion_id__in={c for c, _ in resumen if c is not None},
+        )
+    }
+    nuevos, modificados = [], []
+    for (conversacion_id, dia), datos in resumen.items():
+        fila = existentes.get((conversacion_id, dia))
+        if fila is None:
+            nuevos.append(MensajesArchivados(
+                conversacion_id=conversacion_id,
+                fecha=dia,
+                cantidad_mensajes=datos['cantidad'],
+                primer_mensaje=datos['primero'],
+                ultimo_mensaje=datos['ultimo'],
+                archivo=str(rutas[dia].relative_to(directorio)),
+            ))
+        else:
+            fila.cantidad_mensajes += datos['cantidad']
+            fila.primer_mensaje = min(fila.primer_mensaje, datos['primero'])
+            fila.ultimo_mensaje = max(fila.ultimo_mensaje, datos['ultimo'])
+            modificados.append(fila)
+    MensajesArchivados.objects.bulk_create(nuevos)
+    MensajesArchivados.objects.bulk_update(
+        modificados, ['cantidad_mensajes', 'primer_mensaje', 'ultimo_mensaje']
+    )
+
+
+def archivar_mensajes(dias=None, directorio=None, tamano_lote=TAMANO_LOTE, simular=False):
+    """Archiva y borra los mensajes con más de ``dias`` días. Devuelve cuántos mensajes archivó."""
+    dias = dias if dias is not None else getattr(settings, 'RETENCION_MENSAJES_DIAS', 90)
+    directorio = Path(directorio or directorio_archivo())
+    corte = timezone.now() - datetime.timedelta(days=dias)
+    antiguos = Mensaje.objects.filter(timestamp__lt=corte)
+
+    if simular:
+        return antiguos.count()
+
+    total = 0
+    ultimo_id = 0
+    while True:
+        mensajes = list(
+            antiguos.filter(mensaje_id__gt=ultimo_id).order_by('mensaje_id').values(
+                'mensaje_id', 'conversacion_id', 'remitente', 'contenido', 'timestamp',
+                cliente_id=F('conversacion__cliente_id'),
+                telefono=F('conversacion__cliente__telefono'),
+            )[:tamano_lote]
+        )
+        if not mensajes:
+            break
+        ultimo_id = mensajes[-1]['mensaje_id']
+        # El teléfono no va al archivo: solo sirve para invalidar las sesiones web
+        telefonos = [m.pop('telefono') for m in mensajes]
+
+        # Primero el disco (con fsync), después la BD: un corte deja repetidos, nunca pérdidas
+        rutas = _escribir_lote(directorio, mensajes)
+        with transaction.atomic():
+            _actualizar_resumenes(directorio, mensajes, rutas)
+            Mensaje.objects.filter(mensaje_id__in=[m['mensaje_id'] for m in mensajes]).delete()
+        historial_web.invalidar_sesiones(telefonos)
+
+        total += len(mensajes)
+        logger.info(f"🗄️ {total} mensajes archivados (hasta id {ultimo_id})")
+    return total
+
+
+def leer_archivo(desde, hasta, directorio=None, conversaciones=None, sin_repetidos=True):
+    """
+    Genera los mensajes archivados entre las fechas ``desde`` y ``hasta`` (inclusive),
+    como dicts, en orden de día. ``conversaciones``: conjunto de ids para filtrar.
+    """
+    directorio = Path(directorio or directorio_archivo())
+    dia = desde
+    while dia <= hasta:
+        ruta = ruta_dia(directorio, dia)
+        dia += datetime.timedelta(days=1)
+        if not ruta.exists():
+            continue
+        # Un mensaje repetido siempre cae en el archivo de su mismo día
+        vistos = set()
+        with gzip.open(ruta, 'rt', encoding='utf-8') as archivo:
+            for linea in archivo:
+                mensaje = json.loads(linea)
+                if conversaciones is not None and mensaje['conversacion_id'] not in conversaciones:
+                    continue
+                if sin_repetidos:
+                    if mensaje['mensaje_id'] in vistos:
+                        continue
+                    vistos.add(mensaje['mensaje_id'])
+                yield mensaje
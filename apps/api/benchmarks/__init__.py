@@ -0,0 +1,8 @@
+# apps/api/benchmarks/__init__.py
+"""
+Herramientas de benchmark para el bot Pratsy.
+
+Incluye dobles locales de la Graph API de WhatsApp y de Gemini, y un generador
+de payloads de webhook, para medir el rendimiento sin enviar mensajes reales
+ni consumir cuota de la IA.
+"""
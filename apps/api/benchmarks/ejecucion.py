@@ -0,0 +1,92 @@
+# apps/api/benchmarks/ejecucion.py
+"""
+Ejecutores de carga: uno con hilos sobre el handler WSGI (``django.test.Client``)
+y otro con corrutinas sobre el handler ASGI (``django.test.AsyncClient``).
+"""
+import asyncio
+import json
+import queue
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.test import AsyncClient, Client
+
+from .metricas import ContadorQueries
+
+
+def ejecutar_nivel(eventos, concurrencia, url, resultados):
+    """Envía todos los eventos con ``concurrencia`` hilos y devuelve la duración total."""
+    cola = queue.Queue()
+    for evento in eventos:
+        cola.put(evento)
+
+    def trabajador():
+        cliente = Client()
+        try:
+            while True:
+                try:
+                    _, payload = cola.get_nowait()
+                except queue.Empty:
+                    return
+                cuerpo = json.dumps(payload)
+                contador = ContadorQueries()
+                inicio = time.perf_counter()
+                with connection.execute_wrapper(contador):
+                    try:
+                        respuesta = cliente.post(url, data=cuerpo, content_type="application/json")
+                        ok = respuesta.status_code == 200
+                    except Exception:
+                        ok = False
+                latencia_ms = (time.perf_counter() - inicio) * 1000
+                resultados.registrar(latencia_ms, contador.total, ok)
+        finally:
+            connection.close()
+
+    hilos = [threading.Thread(target=trabajador, daemon=True) for _ in range(concurrencia)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return time.perf_counter() - inicio
+
+
+def _cerrar_conexion():
+    connection.close()
+
+
+async def _ejecutar_nivel_async(eventos, concurrencia, url, resultados):
+    from apps.api.views_async import cerrar_clientes_http
+
+    cliente = AsyncClient()
+    semaforo = asyncio.Semaphore(concurrencia)
+
+    async def enviar(payload):
+        async with semaforo:
+            cuerpo = json.dumps(payload)
+            inicio = time.perf_counter()
+            try:
+                respuesta = await cliente.post(url, data=cuerpo, content_type="application/json")
+                ok = respuesta.status_code == 200
+            except Exception:
+                ok = False
+            resultados.registrar((time.perf_counter() - inicio) * 1000, 0, ok)
+
+    inicio = time.perf_counter()
+    try:
+        await asyncio.gather(*(enviar(payload) for _, payload in eventos))
+        return time.perf_counter() - inicio
+    finally:
+        await cerrar_clientes_http()
+        # La conexión de BD vive en el hilo de sync_to_async, no en este
+        await sync_to_async(_cerrar_conexion)()
+
+
+def ejecutar_nivel_async(eventos, concurrencia, url, resultados):
+    """
+    Envía todos los eventos como corrutinas, con a lo sumo ``concurrencia``
+    requests en vuelo, en un único event loop. Devuelve la duración total.
+    """
+    return asyncio.run(_ejecutar_nivel_async(eventos, concurrencia, url, resultados))
@@ -0,0 +1,128 @@
+# apps/api/benchmarks/entorno.py
+"""
+Preparación del entorno de benchmark: base de datos de prueba aislada,
+datos mínimos del bot y reemplazo de las dependencias externas (Graph API y
+Gemini) por sus dobles locales.
+"""
+import os
+import tempfile
+import weakref
+from contextlib import contextmanager
+from decimal import Decimal
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from .payloads import PHONE_NUMBER_ID_BENCH
+
+
+@contextmanager
+def base_de_datos_de_prueba():
+    """
+    Crea una base de datos de prueba separada y la elimina al terminar.
+
+    En SQLite se usa un archivo temporal en lugar de la base en memoria, para que
+    los hilos del benchmark compartan los mismos datos.
+    """
+    setup_test_environment()
+    ruta_temporal = None
+    if connection.vendor == "sqlite":
+        descriptor, ruta_temporal = tempfile.mkstemp(prefix="pratsy_bench_", suffix=".sqlite3")
+        os.close(descriptor)
+        connection.settings_dict.setdefault("TEST", {})["NAME"] = ruta_temporal
+    nombre_original = connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False
+    )
+    try:
+        yield
+    finally:
+        from apps.api.historial_web import escritura_diferida
+
+        # Los mensajes encolados se guardan antes de borrar la base de prueba
+        escritura_diferida.vaciar()
+        connection.creation.destroy_test_db(nombre_original, verbosity=0)
+        teardown_test_environment()
+        if ruta_temporal and os.path.exists(ruta_temporal):
+            os.remove(ruta_temporal)
+
+
+def poblar_datos_minimos():
+    """
+    Crea las FAQ, habitaciones y base de conocimiento mínimas para que el bot
+    recorra sus caminos habituales. Devuelve los IDs de botones válidos.
+    """
+    from apps.api.models import BaseConocimiento, Habitacion, PreguntaFrecuente
+
+    PreguntaFrecuente.objects.create(
+        pregunta_corta_boton="Saludo",
+        pregunta_larga="Mensaje de bienvenida",
+        respuesta="¡Hola! Soy Pratsy, tu asistente virtual del Motel.",
+        palabras_clave="hola, buenas",
+        es_saludo_inicial=True,
+    )
+    faqs = [
+        PreguntaFrecuente.objects.create(
+            pregunta_corta_boton="Ver Precios",
+            pregunta_larga="¿Cuánto cuesta cada habitación?",
+            respuesta="La habitación estándar cuesta $15.000 la hora y la suite $25.000.",
+            palabras_clave="precio, precios, cuesta, valor, sale",
+        ),
+        PreguntaFrecuente.objects.create(
+            pregunta_corta_boton="Ver Horarios",
+            pregunta_larga="¿Cuál es el horario de atención?",
+            respuesta="Atendemos las 24 horas, todos los días del año.",
+            palabras_clave="horario, hora, abierto, atencion",
+        ),
+        PreguntaFrecuente.objects.create(
+            pregunta_corta_boton="Medios de pago",
+            pregunta_larga="¿Qué medios de pago aceptan?",
+            respuesta="Aceptamos efectivo, débito y tarjetas de crédito.",
+            palabras_clave="tarjeta, pago, efectivo, debito, credito",
+        ),
+    ]
+    for nombre, precio in (("Estándar 1", "15000"), ("Suite Jacuzzi", "25000"), ("Suite Premium", "32000")):
+        Habitacion.objects.create(nombre_habitacion=nombre, precio_por_hora=Decimal(precio))
+    BaseConocimiento.objects.create(
+        pregunta="¿Tienen estacionamiento?",
+        respuesta="Sí, contamos con estacionamiento privado y techado.",
+        palabras_clave="estacionamiento",
+    )
+    return [f"faq_{faq.pregunta_frecuenta_id}" for faq in faqs] + ["hacer_reserva", "info_general"]
+
+
+def reiniciar_datos():
+    """Vacía la base de prueba (y las cachés del bot) y vuelve a cargar los datos mínimos."""
+    from django.core.cache import cache
+
+    from apps.api.historial_web import escritura_diferida
+
+    escritura_diferida.vaciar()
+    cache.clear()
+    call_command("flush", interactive=False, verbosity=0)
+    return poblar_datos_minimos()
+
+
+@contextmanager
+def dependencias_externas_falsas(graph, llm):
+    """Apunta el webhook a la Graph API falsa y reemplaza el SDK de Gemini."""
+    from apps.api import llm as pasarela_llm
+    from apps.api import views
+
+    with mock.patch.multiple(
+        views,
+        WHATSAPP_API_URL=graph.url_base,
+        WHATSAPP_ACCESS_TOKEN="token-benchmark",
+        WHATSAPP_PHONE_NUMBER_ID=PHONE_NUMBER_ID_BENCH,
+        WHATSAPP_VERIFY_TOKEN="verify-benchmark",
+    ), mock.patch.multiple(
+        pasarela_llm,
+        GEMINI_API_KEY="clave-benchmark-gemini",
+        GENAI_SDK_AVAILABLE=True,
+        genai=llm.como_modulo_genai(),
+        # Clientes cacheados por la pasarela: se descartan para que usen el SDK falso
+        _cliente_sync=None,
+        _clientes_async=weakref.WeakKeyDictionary(),
+    ):
+        yield
@@ -0,0 +1,38 @@
+# apps/api/benchmarks/fechas.py
+"""
+Los bucles de ``strptime`` que había en ReservaManager (apps/reservas/utils.py)
+antes de apps/api/fechas_naturales.py. Los usan ``bench_fechas`` y el test que
+compara ambos parsers (apps/api/tests.py).
+"""
+import datetime
+
+
+# --- Versión anterior (ReservaManager._procesar_fecha / _procesar_hora_inicio) ---
+
+def fecha_legado(mensaje_usuario):
+    fecha_str = mensaje_usuario.strip()
+    formatos = ['%d/%m/%Y', '%d-%m-%Y', '%d/%m/%y', '%d-%m-%y']
+    fecha_reserva = None
+    for formato in formatos:
+        try:
+            fecha_reserva = datetime.datetime.strptime(fecha_str, formato).date()
+            break
+        except ValueError:
+            continue
+    return fecha_reserva
+
+
+def hora_legado(mensaje_usuario):
+    hora_str = mensaje_usuario.strip()
+    formatos_hora = ['%H:%M', '%H.%M', '%H %M', '%H']
+    hora_inicio = None
+    for formato in formatos_hora:
+        try:
+            if formato == '%H':
+                hora_inicio = datetime.datetime.strptime(hora_str + ':00', '%H:%M').time()
+            else:
+                hora_inicio = datetime.datetime.strptime(hora_str, formato).time()
+            break
+        except ValueError:
+            continue
+    return hora_inicio
@@ -0,0 +1,138 @@
+# apps/api/benchmarks/graph_api_falsa.py
+"""
+Servidor HTTP local que imita la Graph API de WhatsApp.
+
+Responde a GET /<version>/<phone_number_id> (prueba de conexión) y a
+POST /<version>/<phone_number_id>/messages (envío de mensajes) con la misma
+forma de respuesta que Meta, agregando latencia y fallos configurables.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _ManejadorGraph(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        # Silenciar el log por request de http.server
+        pass
+
+    def _responder(self, status, cuerpo):
+        datos = json.dumps(cuerpo).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def do_GET(self):
+        servidor = self.server.graph
+        servidor._esperar()
+        servidor._contar("get")
+        self._responder(200, {"id": self.path.rstrip("/").rsplit("/", 1)[-1]})
+
+    def do_POST(self):
+        servidor = self.server.graph
+        longitud = int(self.headers.get("Content-Length") or 0)
+        cuerpo = self.rfile.read(longitud) if longitud else b""
+        servidor._esperar()
+
+        if not self.path.endswith("/messages"):
+            servidor._contar("error")
+            self._responder(404, {"error": {"code": 100, "message": "Unsupported post request"}})
+            return
+
+        if servidor._debe_fallar():
+            servidor._contar("error")
+            self._responder(500, {"error": {"code": 131000, "message": "Something went wrong"}})
+            return
+
+        try:
+            payload = json.loads(cuerpo or b"{}")
+        except json.JSONDecodeError:
+            servidor._contar("error")
+            self._responder(400, {"error": {"code": 100, "message": "Invalid JSON"}})
+            return
+
+        servidor._contar("post")
+        servidor._registrar_envio(payload)
+        self._responder(200, {
+            "messaging_product": "whatsapp",
+            "contacts": [{"input": payload.get("to"), "wa_id": payload.get("to")}],
+            "messages": [{"id": f"wamid.FAKE{servidor.contadores['post']:010d}"}],
+        })
+
+
+class GraphAPIFalsa:
+    """
+    Doble local de la Graph API.
+
+    Uso:
+        with GraphAPIFalsa(latencia_ms=50, tasa_fallos=0.01) as graph:
+            views.WHATSAPP_API_URL = graph.url_base
+    """
+
+    def __init__(self, latencia_ms=0, variacion_ms=0, tasa_fallos=0.0, semilla=None,
+                 guardar_envios=False, host="127.0.0.1", puerto=0):
+        self.latencia_ms = latencia_ms
+        self.variacion_ms = variacion_ms
+        self.tasa_fallos = tasa_fallos
+        self.guardar_envios = guardar_envios
+        self.envios = []
+        self.contadores = {"get": 0, "post": 0, "error": 0}
+        self._rng = random.Random(semilla)
+        self._lock = threading.Lock()
+        self._servidor = ThreadingHTTPServer((host, puerto), _ManejadorGraph)
+        self._servidor.daemon_threads = True
+        self._servidor.graph = self
+        self._hilo = None
+
+    @property
+    def url_base(self):
+        host, puerto = self._servidor.server_address[:2]
+        return f"http://{host}:{puerto}/v19.0/"
+
+    def _esperar(self):
+        if not self.latencia_ms and not self.variacion_ms:
+            return
+        with self._lock:
+            variacion = self._rng.uniform(-self.variacion_ms, self.variacion_ms)
+        time.sleep(max(0.0, self.latencia_ms + variacion) / 1000.0)
+
+    def _debe_fallar(self):
+        if not self.tasa_fallos:
+            return False
+        with self._lock:
+            return self._rng.random() < self.tasa_fallos
+
+    def _contar(self, clave):
+        with self._lock:
+            self.contadores[clave] += 1
+
+    def _registrar_envio(self, payload):
+        if self.guardar_envios:
+            with self._lock:
+                self.envios.append(payload)
+
+    def reiniciar_contadores(self):
+        with self._lock:
+            self.contadores = {"get": 0, "post": 0, "error": 0}
+            self.envios = []
+
+    def iniciar(self):
+        self._hilo = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.detener()
@@ -0,0 +1,149 @@
+# apps/api/benchmarks/llm_falso.py
+"""
+Doble de Gemini con latencia y tasa de fallos configurables.
+
+Imita la superficie del SDK google-genai que usa el bot:
+``genai.Client(api_key=...).models.generate_content(model=..., contents=..., config=...)``
+y su variante ``client.aio.models.generate_content`` (await), devolviendo un
+objeto con atributo ``text``.
+"""
+import asyncio
+import random
+import threading
+import time
+
+
+class RespuestaFalsa:
+    def __init__(self, text):
+        self.text = text
+
+
+class ErrorLLMFalso(Exception):
+    """Error simulado del proveedor de IA (cuota, timeout, 5xx)."""
+
+
+class _ModelosFalsos:
+    def __init__(self, llm):
+        self._llm = llm
+
+    def generate_content(self, model=None, contents=None, config=None):
+        return self._llm.generar(model, contents)
+
+    def generate_content_stream(self, model=None, contents=None, config=None):
+        return self._llm.generar_stream(model, contents)
+
+
+class _ModelosFalsosAsync:
+    def __init__(self, llm):
+        self._llm = llm
+
+    async def generate_content(self, model=None, contents=None, config=None):
+        return await self._llm.agenerar(model, contents)
+
+    async def generate_content_stream(self, model=None, contents=None, config=None):
+        return self._llm.agenerar_stream(model, contents)
+
+
+class _AioFalso:
+    def __init__(self, llm):
+        self.models = _ModelosFalsosAsync(llm)
+
+
+class _ClienteFalso:
+    def __init__(self, llm, api_key=None, **kwargs):
+        self.models = _ModelosFalsos(llm)
+        self.aio = _AioFalso(llm)
+
+
+class LLMFalso:
+    """
+    Simula un proveedor de LLM.
+
+    ``latencia_ms`` y ``variacion_ms`` definen el tiempo de cada llamada;
+    ``tasa_fallos`` es la probabilidad de que una llamada lance ErrorLLMFalso
+    (el bot reintenta con el siguiente modelo, igual que en producción).
+    """
+
+    # Fracción de la latencia total que tarda en llegar el primer fragmento en streaming
+    FRACCION_PRIMER_FRAGMENTO = 0.2
+
+    def __init__(self, latencia_ms=300, variacion_ms=0, tasa_fallos=0.0, semilla=None):
+        self.latencia_ms = latencia_ms
+        self.variacion_ms = variacion_ms
+        self.tasa_fallos = tasa_fallos
+        self.contadores = {"llamadas": 0, "fallos": 0}
+        self._rng = random.Random(semilla)
+        self._lock = threading.Lock()
+
+    def _sortear(self):
+        with self._lock:
+            self.contadores["llamadas"] += 1
+            falla = self.tasa_fallos and self._rng.random() < self.tasa_fallos
+            if falla:
+                self.contadores["fallos"] += 1
+            variacion = self._rng.uniform(-self.variacion_ms, self.variacion_ms)
+        return falla, max(0.0, self.latencia_ms + variacion) / 1000.0
+
+    def generar(self, modelo, prompt):
+        falla, espera = self._sortear()
+        time.sleep(espera)
+        if falla:
+            raise ErrorLLMFalso(f"Fallo simulado en {modelo}")
+        return RespuestaFalsa(self.texto_respuesta(prompt))
+
+    async def agenerar(self, modelo, prompt):
+        """Igual que generar(), pero la espera no bloquea el event loop."""
+        falla, espera = self._sortear()
+        await asyncio.sleep(espera)
+        if falla:
+            raise ErrorLLMFalso(f"Fallo simulado en {modelo}")
+        return RespuestaFalsa(self.texto_respuesta(prompt))
+
+    def _plan_stream(self, modelo, prompt):
+        """Fragmentos (palabras) y esperas antes de cada uno, sumando la latencia sorteada."""
+        falla, espera = self._sortear()
+        if falla:
+            return True, [(espera, None)]
+        palabras = self.texto_respuesta(prompt).split(" ")
+        primera = espera * self.FRACCION_PRIMER_FRAGMENTO
+        resto = (espera - primera) / max(1, len(palabras) - 1)
+        plan = [(primera if i == 0 else resto, palabra if i == 0 else " " + palabra)
+                for i, palabra in enumerate(palabras)]
+        return False, plan
+
+    def generar_stream(self, modelo, prompt):
+        falla, plan = self._plan_stream(modelo, prompt)
+        for espera, fragmento in plan:
+            time.sleep(espera)
+            if falla:
+                raise ErrorLLMFalso(f"Fallo simulado en {modelo}")
+            yield RespuestaFalsa(fragmento)
+
+    async def agenerar_stream(self, modelo, prompt):
+        falla, plan = self._plan_stream(modelo, prompt)
+        for espera, fragmento in plan:
+            await asyncio.sleep(espera)
+            if falla:
+                raise ErrorLLMFalso(f"Fallo simulado en {modelo}")
+            yield RespuestaFalsa(fragmento)
+
+    def texto_respuesta(self, prompt):
+        return (
+            "¡Claro! Con gusto te ayudo 😊 Respuesta simulada por el benchmark. "
+            "Si necesitas algo más, solo escríbeme."
+        )
+
+    def reiniciar_contadores(self):
+        with self._lock:
+            self.contadores = {"llamadas": 0, "fallos": 0}
+
+    def como_modulo_genai(self):
+        """Objeto que reemplaza al módulo ``google.genai`` (expone ``Client``)."""
+        llm = self
+
+        class ModuloGenaiFalso:
+            @staticmethod
+            def Client(api_key=None, **kwargs):
+                return _ClienteFalso(llm, api_key=api_key, **kwargs)
+
+        return ModuloGenaiFalso
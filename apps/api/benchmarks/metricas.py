@@ -0,0 +1,126 @@
+# apps/api/benchmarks/metricas.py
+"""
+Utilidades de medición para los benchmarks: percentiles, conteo de queries
+por request y formato del reporte.
+"""
+import math
+import threading
+
+
+def percentil(valores_ordenados, p):
+    """Percentil por el método del rango más cercano sobre una lista ya ordenada."""
+    if not valores_ordenados:
+        return 0.0
+    rango = max(1, math.ceil(p / 100.0 * len(valores_ordenados)))
+    return valores_ordenados[rango - 1]
+
+
+class ContadorQueries:
+    """
+    Wrapper para ``connection.execute_wrapper`` que cuenta las queries ejecutadas.
+
+    Se instala por hilo, ya que cada hilo tiene su propia conexión de Django.
+    """
+
+    def __init__(self):
+        self.total = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.total += 1
+        return execute(sql, params, many, context)
+
+
+class ContadorQueriesGlobal:
+    """
+    Cuenta queries de todas las conexiones, incluidas las que abre
+    ``sync_to_async`` en sus propios hilos (donde no se puede instalar un
+    ``execute_wrapper`` por request). Se instala una vez por corrida.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.total += 1
+        return execute(sql, params, many, context)
+
+    def reiniciar(self):
+        with self._lock:
+            self.total = 0
+
+    def _instalar_en(self, connection):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+    def _al_crear_conexion(self, sender, connection, **kwargs):
+        self._instalar_en(connection)
+
+    def instalar(self):
+        from django.db import connection
+        from django.db.backends.signals import connection_created
+
+        connection_created.connect(self._al_crear_conexion, weak=False, dispatch_uid=f"bench-{id(self)}")
+        self._instalar_en(connection)
+
+
+class Resultados:
+    """Acumula latencias, queries y errores de una corrida (seguro entre hilos)."""
+
+    def __init__(self):
+        self.latencias_ms = []
+        self.queries = []
+        self.errores = 0
+        self._lock = threading.Lock()
+
+    def registrar(self, latencia_ms, queries, ok):
+        with self._lock:
+            self.latencias_ms.append(latencia_ms)
+            self.queries.append(queries)
+            if not ok:
+                self.errores += 1
+
+    def resumen(self, duracion_s, concurrencia, extra=None):
+        latencias = sorted(self.latencias_ms)
+        total = len(latencias)
+        resumen = {
+            "concurrencia": concurrencia,
+            "requests": total,
+            "errores": self.errores,
+            "duracion_s": round(duracion_s, 3),
+            "throughput_rps": round(total / duracion_s, 2) if duracion_s else 0.0,
+            "p50_ms": round(percentil(latencias, 50), 1),
+            "p95_ms": round(percentil(latencias, 95), 1),
+            "p99_ms": round(percentil(latencias, 99), 1),
+            "max_ms": round(latencias[-1], 1) if latencias else 0.0,
+            "queries_promedio": round(sum(self.queries) / total, 2) if total else 0.0,
+            "queries_max": max(self.queries) if self.queries else 0,
+        }
+        if extra:
+            resumen.update(extra)
+        return resumen
+
+
+COLUMNAS_REPORTE = [
+    ("concurrencia", "conc", 5),
+    ("requests", "reqs", 6),
+    ("errores", "err", 5),
+    ("throughput_rps", "req/s", 8),
+    ("p50_ms", "p50ms", 8),
+    ("p95_ms", "p95ms", 8),
+    ("p99_ms", "p99ms", 8),
+    ("max_ms", "maxms", 8),
+    ("queries_promedio", "q/req", 7),
+    ("queries_max", "qmax", 5),
+]
+
+
+def formatear_tabla(filas, columnas=None):
+    """Devuelve las filas de resumen como una tabla de texto alineada."""
+    columnas = columnas or COLUMNAS_REPORTE
+    encabezado = " ".join(titulo.rjust(ancho) for _, titulo, ancho in columnas)
+    lineas = [encabezado, "-" * len(encabezado)]
+    for fila in filas:
+        lineas.append(" ".join(str(fila.get(clave, "")).rjust(ancho) for clave, _, ancho in columnas))
+    return "\n".join(lineas)
@@ -0,0 +1,214 @@
+# apps/api/benchmarks/payloads.py
+"""
+Generador de payloads realistas del webhook de WhatsApp Cloud API.
+
+Produce cuerpos con la misma forma que envía Meta (entry -> changes -> value)
+para mensajes de texto, respuestas de botón, actualizaciones de estado y lotes
+con varios mensajes. La generación es determinista a partir de una semilla,
+por lo que una misma corrida se puede repetir exactamente.
+"""
+import json
+import random
+import time
+
+PHONE_NUMBER_ID_BENCH = "100000000000001"
+WABA_ID_BENCH = "200000000000001"
+NUMERO_NEGOCIO_BENCH = "56900000000"
+
+# Mensajes típicos de huéspedes, tomados del tipo de consultas que recibe el bot
+TEXTOS_CLIENTE = [
+    "hola",
+    "Hola buenas noches",
+    "buenas",
+    "cuanto cuesta la suite?",
+    "que precio tiene la habitacion con jacuzzi",
+    "tienen habitaciones disponibles hoy?",
+    "hay cuartos libres para esta noche",
+    "horario de atencion",
+    "aceptan tarjeta de credito?",
+    "tienen estacionamiento",
+    "se puede llegar sin reserva?",
+    "quiero reservar",
+    "cuanto sale por 4 horas",
+    "tienen promociones los lunes",
+    "donde estan ubicados",
+    "gracias!",
+]
+
+ESTADOS_MENSAJE = ["sent", "delivered", "read"]
+
+# Proporción por defecto de cada tipo de evento en una corrida
+MEZCLA_POR_DEFECTO = {
+    "texto": 0.55,
+    "boton": 0.20,
+    "estado": 0.15,
+    "lote": 0.10,
+}
+
+
+def _envoltorio(value):
+    """Envuelve un bloque 'value' en la estructura completa del webhook."""
+    return {
+        "object": "whatsapp_business_account",
+        "entry": [{
+            "id": WABA_ID_BENCH,
+            "changes": [{
+                "value": {
+                    "messaging_product": "whatsapp",
+                    "metadata": {
+                        "display_phone_number": NUMERO_NEGOCIO_BENCH,
+                        "phone_number_id": PHONE_NUMBER_ID_BENCH,
+                    },
+                    **value,
+                },
+                "field": "messages",
+            }],
+        }],
+    }
+
+
+class GeneradorPayloads:
+    """Genera payloads de webhook de forma reproducible."""
+
+    def __init__(self, semilla=42, numero_clientes=50, ids_botones=None, mezcla=None):
+        self.rng = random.Random(semilla)
+        self.telefonos = [f"569{80000000 + i:08d}" for i in range(numero_clientes)]
+        self.ids_botones = list(ids_botones or ["hacer_reserva", "info_general"])
+        self.mezcla = dict(mezcla or MEZCLA_POR_DEFECTO)
+        self._secuencia = 0
+        self._timestamp_base = int(time.time())
+
+    def _nuevo_wamid(self):
+        self._secuencia += 1
+        return f"wamid.BENCH{self._secuencia:010d}"
+
+    def _timestamp(self):
+        return str(self._timestamp_base + self._secuencia)
+
+    def _mensaje_texto(self, telefono):
+        return {
+            "from": telefono,
+            "id": self._nuevo_wamid(),
+            "timestamp": self._timestamp(),
+            "type": "text",
+            "text": {"body": self.rng.choice(TEXTOS_CLIENTE)},
+        }
+
+    def _mensaje_boton(self, telefono):
+        id_boton = self.rng.choice(self.ids_botones)
+        return {
+            "context": {"from": NUMERO_NEGOCIO_BENCH, "id": self._nuevo_wamid()},
+            "from": telefono,
+            "id": self._nuevo_wamid(),
+            "timestamp": self._timestamp(),
+            "type": "interactive",
+            "interactive": {
+                "type": "button_reply",
+                "button_reply": {"id": id_boton, "title": id_boton[:20]},
+            },
+        }
+
+    def _contacto(self, telefono):
+        return {"profile": {"name": f"Huesped {telefono[-4:]}"}, "wa_id": telefono}
+
+    def texto(self):
+        """Un mensaje de texto libre de un cliente."""
+        telefono = self.rng.choice(self.telefonos)
+        return _envoltorio({
+            "contacts": [self._contacto(telefono)],
+            "messages": [self._mensaje_texto(telefono)],
+        })
+
+    def boton(self):
+        """Una respuesta a un botón interactivo."""
+        telefono = self.rng.choice(self.telefonos)
+        return _envoltorio({
+            "contacts": [self._contacto(telefono)],
+            "messages": [self._mensaje_boton(telefono)],
+        })
+
+    def estado(self):
+        """Una actualización de estado (sent/delivered/read) de un mensaje saliente."""
+        telefono = self.rng.choice(self.telefonos)
+        return _envoltorio({
+            "statuses": [{
+                "id": self._nuevo_wamid(),
+                "status": self.rng.choice(ESTADOS_MENSAJE),
+                "timestamp": self._timestamp(),
+                "recipient_id": telefono,
+                "conversation": {
+                    "id": f"conv{self._secuencia}",
+                    "origin": {"type": "service"},
+                },
+                "pricing": {"billable": True, "pricing_model": "CBP", "category": "service"},
+            }],
+        })
+
+    def lote(self, minimo=2, maximo=5):
+        """Un webhook con varios mensajes encolados por Meta en una sola entrega."""
+        telefono = self.rng.choice(self.telefonos)
+        mensajes = []
+        for _ in range(self.rng.randint(minimo, maximo)):
+            if self.rng.random() < 0.75:
+                mensajes.append(self._mensaje_texto(telefono))
+            else:
+                mensajes.append(self._mensaje_boton(telefono))
+        return _envoltorio({
+            "contacts": [self._contacto(telefono)],
+            "messages": mensajes,
+        })
+
+    def siguiente(self):
+        """Devuelve (tipo, payload) elegido según la mezcla configurada."""
+        tipos = list(self.mezcla)
+        tipo = self.rng.choices(tipos, weights=[self.mezcla[t] for t in tipos])[0]
+        return tipo, getattr(self, tipo)()
+
+    def generar(self, cantidad):
+        """Genera una lista de (tipo, payload)."""
+        return [self.siguiente() for _ in range(cantidad)]
+
+    def web_chat(self):
+        """Un cuerpo del chat web: {mensaje, session_id} (una sesión por cliente simulado)."""
+        telefono = self.rng.choice(self.telefonos)
+        return {"mensaje": self.rng.choice(TEXTOS_CLIENTE), "session_id": f"bench{telefono[-6:]}"}
+
+    def generar_web_chat(self, cantidad):
+        """Genera una lista de ("web", cuerpo) para el endpoint del chat web."""
+        return [("web", self.web_chat()) for _ in range(cantidad)]
+
+
+def parsear_mezcla(texto):
+    """Convierte 'texto:0.6,boton:0.2' en un diccionario de proporciones."""
+    mezcla = {}
+    for parte in texto.split(","):
+        tipo, _, peso = parte.partition(":")
+        tipo = tipo.strip()
+        if tipo not in MEZCLA_POR_DEFECTO:
+            raise ValueError(f"Tipo de payload desconocido: {tipo}")
+        mezcla[tipo] = float(peso)
+    return mezcla
+
+
+def guardar_jsonl(eventos, ruta):
+    """Guarda (tipo, payload) en un archivo JSONL para repetir la corrida."""
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        for tipo, payload in eventos:
+            archivo.write(json.dumps({"tipo": tipo, "payload": payload}, ensure_ascii=False))
+            archivo.write("\n")
+
+
+def cargar_jsonl(ruta):
+    """Carga eventos guardados con guardar_jsonl (o capturados de producción)."""
+    eventos = []
+    with open(ruta, encoding="utf-8") as archivo:
+        for linea in archivo:
+            linea = linea.strip()
+            if not linea:
+                continue
+            dato = json.loads(linea)
+            if "payload" in dato:
+                eventos.append((dato.get("tipo", "capturado"), dato["payload"]))
+            else:
+                eventos.append(("capturado", dato))
+    return eventos
@@ -0,0 +1,234 @@
+# apps/api/benchmarks/payloads_legado.py
+"""
+Constructores de payloads tal como estaban en views.py antes de
+apps/api/payloads_whatsapp.py. Solo se usan en ``bench_payloads`` para comparar
+tiempos y verificar que los payloads nuevos son iguales.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def crear_respuesta_texto(texto):
+    """Crea una respuesta de texto simple y segura"""
+    return {
+        "type": "text",
+        "text": {
+            "body": texto
+        }
+    }
+
+
+def crear_respuesta_texto_segura(texto):
+    """Crea una respuesta de texto validada para WhatsApp"""
+    try:
+        # Limpiar el texto
+        texto_limpio = str(texto).strip()
+        
+        # Remover caracteres problemáticos
+        caracteres_problematicos = ['\u2019', '\u201c', '\u201d', '\u2013', '\u2014']
+        for char in caracteres_problematicos:
+            texto_limpio = texto_limpio.replace(char, '')
+        
+        # Limitar longitud (máximo 4096 caracteres para WhatsApp)
+        if len(texto_limpio) > 4000:
+            texto_limpio = texto_limpio[:3997] + "..."
+        
+        # Validar que no esté vacío
+        if not texto_limpio:
+            texto_limpio = "Lo siento, no pude procesar tu mensaje correctamente."
+        
+        return {
+            "type": "text",
+            "text": {
+                "body": texto_limpio
+            }
+        }
+    except Exception as e:
+        logger.error(f"❌ Error creando respuesta de texto segura: {e}")
+        return {
+            "type": "text",
+            "text": {
+                "body": "Error interno. Por favor intenta nuevamente."
+            }
+        }
+
+
+def crear_respuesta_botones_ultra_segura(texto_cuerpo, botones):
+    """Versión ultra segura para crear botones de WhatsApp"""
+    try:
+        # Limpiar texto del cuerpo
+        texto_limpio = str(texto_cuerpo).strip()
+        
+        # Remover caracteres especiales problemáticos
+        texto_limpio = texto_limpio.replace('\u2019', "'")  # Comilla curva
+        texto_limpio = texto_limpio.replace('\u201c', '"')  # Comilla doble izq
+        texto_limpio = texto_limpio.replace('\u201d', '"')  # Comilla doble der
+        texto_limpio = texto_limpio.replace('\u2013', '-')  # En dash
+        texto_limpio = texto_limpio.replace('\u2014', '-')  # Em dash
+        
+        # Limitar longitud del texto (máximo 1024 para botones interactivos)
+        if len(texto_limpio) > 900:
+            texto_limpio = texto_limpio[:897] + "..."
+        
+        # Validar y limpiar botones
+        botones_validos = []
+        
+        for i, boton in enumerate(botones[:3]):  # Máximo 3 botones
+            try:
+                if (boton.get("type") == "reply" and 
+                    boton.get("reply", {}).get("id") and 
+                    boton.get("reply", {}).get("title")):
+                    
+                    # Limpiar ID del botón
+                    id_boton = str(boton["reply"]["id"]).strip()[:50]  # Máximo 50 chars
+                    id_boton = ''.join(c for c in id_boton if c.isalnum() or c in ['_', '-'])
+                    
+                    # Limpiar título del botón
+                    titulo = str(boton["reply"]["title"]).strip()
+                    titulo = titulo.replace('\u2019', "'")
+                    titulo = titulo.replace('\u201c', '"')
+                    titulo = titulo.replace('\u201d', '"')
+                    
+                    # Limitar longitud del título (máximo 20 caracteres)
+                    if len(titulo) > 20:
+                        titulo = titulo[:17] + "..."
+                    
+                    # Validar que no esté vacío después de limpiar
+                    if titulo and id_boton:
+                        botones_validos.append({
+                            "type": "reply",
+                            "reply": {
+                                "id": id_boton,
+                                "title": titulo
+                            }
+                        })
+                        
+            except Exception as boton_error:
+                logger.error(f"❌ Error procesando botón {i}: {boton_error}")
+                continue
+        
+        # Si no hay botones válidos, usar texto simple
+        if not botones_validos:
+            logger.warning("⚠️ No se pudieron crear botones válidos - Usando texto simple")
+            return crear_respuesta_texto_segura(texto_limpio)
+        
+        # Crear respuesta final
+        respuesta = {
+            "type": "interactive",
+            "interactive": {
+                "type": "button",
+                "body": {
+                    "text": texto_limpio
+                },
+                "action": {
+                    "buttons": botones_validos
+                }
+            }
+        }
+        
+        # Log para debugging
+        logger.info(f"✅ Respuesta con botones creada:")
+        logger.info(f"   - Texto: {len(texto_limpio)} caracteres")
+        logger.info(f"   - Botones: {len(botones_validos)}")
+        for i, btn in enumerate(botones_validos):
+            logger.info(f"     {i+1}. ID: '{btn['reply']['id']}', Título: '{btn['reply']['title']}'")
+        
+        return respuesta
+        
+    except Exception as e:
+        logger.error(f"❌ Error creando respuesta con botones: {e}")
+        return crear_respuesta_texto_segura(texto_cuerpo)
+
+
+def crear_respuesta_botones_segura(texto_cuerpo, botones):
+    """Crea respuesta con botones validando el formato para WhatsApp"""
+    try:
+        # Validar que no hay más de 3 botones (límite de WhatsApp)
+        if len(botones) > 3:
+            botones = botones[:3]
+            logger.warning("⚠️ Limitando botones a 3 (máximo de WhatsApp)")
+        
+        # Validar formato de cada botón
+        botones_validos = []
+        for boton in botones:
+            if (boton.get("type") == "reply" and 
+                boton.get("reply", {}).get("id") and 
+                boton.get("reply", {}).get("title")):
+                
+                # Limpiar y validar título (máximo 20 caracteres)
+                titulo = str(boton["reply"]["title"]).strip()[:20]
+                id_boton = str(boton["reply"]["id"]).strip()
+                
+                if titulo and id_boton:
+                    botones_validos.append({
+                        "type": "reply",
+                        "reply": {
+                            "id": id_boton,
+                            "title": titulo
+                        }
+                    })
+        
+        if not botones_validos:
+            logger.warning("⚠️ No hay botones válidos - Usando texto simple")
+            return crear_respuesta_texto(texto_cuerpo)
+        
+        # Validar texto del cuerpo (máximo 1024 caracteres)
+        texto_limpio = str(texto_cuerpo).strip()[:1024]
+        
+        respuesta = {
+            "type": "interactive",
+            "interactive": {
+                "type": "button",
+                "body": {
+                    "text": texto_limpio
+                },
+                "action": {
+                    "buttons": botones_validos
+                }
+            }
+        }
+        
+        logger.info(f"✅ Respuesta con {len(botones_validos)} botones creada correctamente")
+        return respuesta
+        
+    except Exception as e:
+        logger.error(f"❌ Error creando respuesta con botones: {e}")
+        return crear_respuesta_texto(texto_cuerpo)
+
+
+def crear_respuesta_con_boton_reserva(texto, botones_adicionales=None):
+    """Crea respuesta que SIEMPRE incluye botón de reserva"""
+    try:
+        botones = botones_adicionales or []
+        
+        # Verificar si ya existe botón de reserva
+        ids_existentes = []
+        for btn in botones:
+            try:
+                id_boton = btn.get("reply", {}).get("id", "")
+                ids_existentes.append(id_boton)
+            except:
+                continue
+        
+        # Agregar botón de reserva si no existe
+        if "hacer_reserva" not in ids_existentes:
+            botones.append({
+                "type": "reply",
+                "reply": {
+                    "id": "hacer_reserva",
+                    "title": "📅 Reservar"
+                }
+            })
+        
+        # Limitar botones
+        botones = botones[:3]
+        
+        if len(botones) > 0:
+            return crear_respuesta_botones_ultra_segura(texto, botones)
+        else:
+            return crear_respuesta_texto_segura(texto)
+            
+    except Exception as e:
+        logger.error(f"❌ Error en crear_respuesta_con_boton_reserva: {e}")
+        return crear_respuesta_texto_segura(texto)
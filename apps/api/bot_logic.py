@@ -488,18 +488,6 @@ class BotLogicEngine:
             mensaje_usuario (str): Mensaje del usuario
             cliente (Cliente): Objeto Cliente
         """
-        from .models import PreguntaDesconocida
+        from . import preguntas_desconocidas
         
-        try:
-            if not PreguntaDesconocida.objects.filter(
-                cliente=cliente,
-                texto_pregunta=mensaje_usuario
-            ).exists():
-                PreguntaDesconocida.objects.create(
-                    cliente=cliente,
-                    texto_pregunta=mensaje_usuario,
-                    fecha_recibida=timezone.now()
-                )
-                logger.info("💾 Pregunta desconocida guardada")
-        except Exception as e:
-            logger.error(f"❌ Error guardando pregunta desconocida: {e}")
\ No newline at end of file
+        preguntas_desconocidas.registrar(mensaje_usuario, cliente.cliente_id if cliente else None)
\ No newline at end of file
@@ -0,0 +1,212 @@
+# apps/api/disponibilidad.py
+"""
+Búsqueda de horarios libres: las próximas N ventanas (habitación, inicio, duración)
+sin choque con reservas activas (api.Reserva, la única tabla de reservas; ver
+servicio_reservas).
+
+La ocupación de cada día se precalcula como un entero por habitación, con un bit
+por tramo de DISPONIBILIDAD_PASO_MINUTOS (30 min: 48 bits por día) en hora local;
+el bit está en 1 si alguna reserva activa toca ese tramo. Los días se guardan en la
+caché (clave con versión) y cualquier cambio de Reserva o Habitacion sube la
+versión (señales en ApiConfig.ready), así que se recalculan solo después de un
+cambio o al vencer DISPONIBILIDAD_CACHE_S.
+
+Para buscar, se concatenan los días del rango en un solo entero por habitación y
+las posiciones con ``k`` tramos libres seguidos salen de ``libre & libre>>1 & ...
+& libre>>(k-1)``; el primer bit en 1 es la ventana más temprana.
+
+La caché puede estar unos segundos atrasada entre workers: antes de crear la
+reserva se comprueba el choque contra la BD con ``hay_conflicto``.
+(Los días de cambio de horario se tratan como días de 24 horas.)
+"""
+import datetime
+import logging
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Habitacion, Reserva
+
+logger = logging.getLogger(__name__)
+
+ESTADOS_OCUPAN = ('pendiente', 'confirmada', 'en_proceso', 'llegada_confirmada')
+_CLAVE_VERSION = 'disponibilidad:version'
+_PREFIJO_ID = 'ventana_'
+
+
+def _paso():
+    return getattr(settings, 'DISPONIBILIDAD_PASO_MINUTOS', 30)
+
+
+@dataclass(frozen=True)
+class Ventana:
+    habitacion_id: int
+    habitacion_nombre: str
+    inicio: datetime.datetime
+    duracion: int  # horas
+    precio_total: Decimal
+
+    @property
+    def fin(self):
+        return self.inicio + datetime.timedelta(hours=self.duracion)
+
+    @property
+    def id_boton(self):
+        return f"{_PREFIJO_ID}{self.habitacion_id}_{timezone.localtime(self.inicio):%Y%m%d%H%M}"
+
+    @property
+    def titulo_boton(self):
+        return f"{self.habitacion_nombre[:13]} {timezone.localtime(self.inicio):%H:%M}"
+
+
+def leer_id_boton(id_boton):
+    """(habitacion_id, inicio) de un id ``ventana_<hab>_<AAAAMMDDHHMM>``; None si no lo es."""
+    if not id_boton.startswith(_PREFIJO_ID):
+        return None
+    try:
+        habitacion_id, inicio = id_boton[len(_PREFIJO_ID):].split('_')
+        inicio = timezone.make_aware(datetime.datetime.strptime(inicio, '%Y%m%d%H%M'))
+        return int(habitacion_id), inicio
+    except ValueError:
+        return None
+
+
+# --- Ocupación por día ---
+
+def invalidar(*args, **kwargs):
+    """Receptor de señales: descarta la ocupación en caché de todos los días."""
+    try:
+        cache.incr(_CLAVE_VERSION)
+    except ValueError:
+        cache.set(_CLAVE_VERSION, 1, None)
+
+
+def _local(valor):
+    """Hora local sin zona (un datetime sin zona ya se considera local)."""
+    if timezone.is_naive(valor):
+        return valor
+    return timezone.localtime(valor).replace(tzinfo=None)
+
+
+def _marcar(ocupacion, habitacion_id, inicio, fin, paso, tramos):
+    """Marca los tramos de [inicio, fin) (hora local sin zona) en los días que toca."""
+    dia = inicio.date()
+    while datetime.datetime.combine(dia, datetime.time.min) < fin:
+        base = datetime.datetime.combine(dia, datetime.time.min)
+        desde = max(0, int((inicio - base).total_seconds() // 60 // paso))
+        hasta = min(tramos, -int(-(fin - base).total_seconds() // 60 // paso))
+        if dia in ocupacion and hasta > desde:
+            mascara = ((1 << (hasta - desde)) - 1) << desde
+            ocupacion[dia][habitacion_id] = ocupacion[dia].get(habitacion_id, 0) | mascara
+        dia += datetime.timedelta(days=1)
+
+
+def _calcular(dias, paso):
+    tramos = 24 * 60 // paso
+    ocupacion = {dia: {} for dia in dias}
+    primero, ultimo = min(dias), max(dias)
+    desde = timezone.make_aware(datetime.datetime.combine(primero, datetime.time.min))
+    hasta = timezone.make_aware(datetime.datetime.combine(ultimo + datetime.timedelta(days=1), datetime.time.min))
+
+    for habitacion_id, inicio, fin in Reserva.objects.filter(
+        estado__in=ESTADOS_OCUPAN, habitacion__isnull=False,
+        fecha_hora_inicio__lt=hasta, fecha_hora_fin__gt=desde,
+    ).values_list('habitacion_id', 'fecha_hora_inicio', 'fecha_hora_fin'):
+        inicio, fin = _local(inicio), _local(fin)
+        _marcar(ocupacion, habitacion_id, max(inicio, datetime.datetime.combine(primero, datetime.time.min)),
+                fin, paso, tramos)
+    return ocupacion
+
+
+def ocupacion(dias):
+    """{dia: {habitacion_id: máscara de tramos ocupados}} para los días pedidos (con caché)."""
+    paso = _paso()
+    version = cache.get(_CLAVE_VERSION, 0)
+    claves = {f"disponibilidad:{version}:{paso}:{dia.isoformat()}": dia for dia in dias}
+    resultado = {claves[clave]: valor for clave, valor in cache.get_many(list(claves)).items()}
+    faltantes = [dia for dia in dias if dia not in resultado]
+    if faltantes:
+        calculados = _calcular(faltantes, paso)
+        resultado.update(calculados)
+        cache.set_many(
+            {clave: calculados[dia] for clave, dia in claves.items() if dia in calculados},
+            getattr(settings, 'DISPONIBILIDAD_CACHE_S', 300),
+        )
+    return resultado
+
+
+# --- Búsqueda ---
+
+def buscar_ventanas(duracion, desde=None, hasta=None, n=3, habitaciones=None, una_por_habitacion=False):
+    """
+    Las ``n`` ventanas libres más tempranas de ``duracion`` horas que empiezan en
+    [desde, hasta) (por defecto: desde ahora y durante 24 horas), ordenadas por
+    inicio y nombre de habitación. ``habitaciones``: ids para restringir la búsqueda;
+    ``una_por_habitacion``: solo la primera ventana de cada habitación.
+    """
+    paso = _paso()
+    tramos = 24 * 60 // paso
+    desde = _local(desde or timezone.now())
+    hasta = _local(hasta) if hasta else desde + datetime.timedelta(days=1)
+    largo = -(-duracion * 60 // paso)
+    if largo <= 0 or hasta <= desde:
+        return []
+
+    primero = desde.date()
+    base = datetime.datetime.combine(primero, datetime.time.min)
+    # Primer tramo en o después de ``desde`` y tramos de inicio posibles
+    inicio_tramo = -int(-(desde - base).total_seconds() // 60 // paso)
+    fin_tramo = -int(-(hasta - base).total_seconds() // 60 // paso)
+    if fin_tramo <= inicio_tramo:
+        return []
+    total_dias = (fin_tramo + largo - 1) // tramos + 1
+    dias = [primero + datetime.timedelta(days=i) for i in range(total_dias)]
+    ocupados = ocupacion(dias)
+
+    consulta = Habitacion.objects.filter(disponible=True, activo=True)
+    if habitaciones is not None:
+        consulta = consulta.filter(habitacion_id__in=habitaciones)
+    candidatas = []
+    completo = (1 << (total_dias * tramos)) - 1
+    rango = (1 << (fin_tramo - inicio_tramo)) - 1
+    for habitacion_id, nombre, precio in consulta.values_list('habitacion_id', 'nombre_habitacion', 'precio_por_hora'):
+        mascara = 0
+        for i, dia in enumerate(dias):
+            mascara |= ocupados[dia].get(habitacion_id, 0) << (i * tramos)
+        libre = ~mascara & completo
+        inicios = libre
+        for desplazamiento in range(1, largo):
+            inicios &= libre >> desplazamiento
+        inicios = (inicios >> inicio_tramo) & rango
+        encontradas = 0
+        while inicios and encontradas < (1 if una_por_habitacion else n):
+            bit = inicios & -inicios
+            candidatas.append((inicio_tramo + bit.bit_length() - 1, nombre, habitacion_id, precio))
+            inicios ^= bit
+            encontradas += 1
+
+    candidatas.sort(key=lambda c: (c[0], c[1]))
+    return [
+        Ventana(
+            habitacion_id=habitacion_id,
+            habitacion_nombre=nombre,
+            inicio=timezone.make_aware(base + datetime.timedelta(minutes=tramo * paso)),
+            duracion=duracion,
+            precio_total=precio * duracion,
+        )
+        for tramo, nombre, habitacion_id, precio in candidatas[:n]
+    ]
+
+
+def hay_conflicto(habitacion_id, inicio, fin, excluir_reserva_id=None):
+    """True si una reserva activa de la habitación se cruza con [inicio, fin). Consulta la BD, sin caché."""
+    reservas = Reserva.objects.filter(
+        habitacion_id=habitacion_id, estado__in=ESTADOS_OCUPAN,
+        fecha_hora_inicio__lt=fin, fecha_hora_fin__gt=inicio,
+    )
+    if excluir_reserva_id is not None:
+        reservas = reservas.exclude(reserva_id=excluir_reserva_id)
+    return reservas.exists()
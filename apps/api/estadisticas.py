@@ -0,0 +1,225 @@
+# apps/api/estadisticas.py
+"""
+Estadísticas del dashboard (EstadisticasSerializer) a partir de totales diarios.
+
+EstadisticaDiaria guarda, por día (fecha local de creación de la reserva o de
+registro del cliente): reservas creadas, ingresos, clientes nuevos y reservas por
+estado y por origen. Una fila extra con fecha ``FECHA_ACUMULADO`` lleva el total
+histórico, así ``obtener_estadisticas()`` lee siempre 3 filas sin importar el
+tamaño de ``reservas`` y ``clientes``.
+
+Definiciones:
+    total_reservas       todas las reservas
+    reservas_hoy         reservas creadas hoy
+    ingresos_mes         precio_total de las reservas creadas este mes, sin las canceladas
+    clientes_nuevos      clientes registrados este mes
+    reservas_por_estado  / reservas_por_origen: todas las reservas, por su estado/origen actual
+
+Las filas se actualizan con señales de Reserva y Cliente (conectadas en
+ApiConfig.ready). ``QuerySet.update()`` y ``bulk_create`` no disparan señales:
+los cambios de estado en lote aplican sus deltas con ``estado_cambiado``; para
+otros cambios masivos, o para cargar días históricos, usar
+``manage.py recalcular_estadisticas``.
+"""
+import datetime
+import logging
+from collections import Counter, defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Cliente, EstadisticaDiaria, Reserva
+
+logger = logging.getLogger(__name__)
+
+# Fila con el total histórico
+FECHA_ACUMULADO = datetime.date(1, 1, 1)
+ESTADOS_SIN_INGRESO = ('cancelada',)
+_CAMPOS_RESERVA = ('fecha_creacion', 'estado', 'origen', 'precio_total')
+
+
+# --- Aportes de una reserva a los totales ---
+
+def _aporte(reserva):
+    """(día, ingresos, estado, origen) con que la reserva suma a su día; None si no está guardada."""
+    if reserva.fecha_creacion is None:
+        return None
+    ingresos = Decimal(0) if reserva.estado in ESTADOS_SIN_INGRESO else Decimal(reserva.precio_total or 0)
+    return (timezone.localdate(reserva.fecha_creacion), ingresos, reserva.estado, reserva.origen)
+
+
+def _sumar(fecha, reservas=0, ingresos=0, clientes_nuevos=0, estados=None, origenes=None):
+    """Suma los deltas al día y a la fila acumulada (con bloqueo de fila)."""
+    with transaction.atomic():
+        for f in (fecha, FECHA_ACUMULADO):
+            fila, _ = EstadisticaDiaria.objects.select_for_update().get_or_create(fecha=f)
+            fila.reservas += reservas
+            fila.ingresos += ingresos
+            fila.clientes_nuevos += clientes_nuevos
+            for campo, deltas in (('reservas_por_estado', estados), ('reservas_por_origen', origenes)):
+                if not deltas:
+                    continue
+                conteo = getattr(fila, campo)
+                for clave, delta in deltas.items():
+                    conteo[clave] = conteo.get(clave, 0) + delta
+                    if not conteo[clave]:
+                        del conteo[clave]
+            fila.save()
+
+
+def _aplicar_aporte(aporte, signo):
+    dia, ingresos, estado, origen = aporte
+    _sumar(dia, reservas=signo, ingresos=signo * ingresos,
+           estados={estado: signo}, origenes={origen: signo})
+
+
+# --- Señales ---
+
+def guardar_estado_inicial(sender, instance, **kwargs):
+    """post_init: recuerda el aporte de la reserva tal como se cargó de la BD."""
+    # En post_init _state.adding todavía es True también para las filas leídas
+    if instance.pk is None or instance.get_deferred_fields() & set(_CAMPOS_RESERVA):
+        instance._aporte_estadistica = None
+    else:
+        instance._aporte_estadistica = _aporte(instance)
+
+
+def reserva_guardada(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    nuevo = _aporte(instance)
+    anterior = None if created else getattr(instance, '_aporte_estadistica', None)
+    if not created and anterior is None:
+        # Instancia cargada con campos diferidos: no se sabe qué cambió
+        logger.warning(f"⚠️ Estadísticas: cambio de la reserva #{instance.pk} sin estado inicial; correr recalcular_estadisticas")
+    elif anterior != nuevo:
+        if anterior is not None:
+            _aplicar_aporte(anterior, -1)
+        _aplicar_aporte(nuevo, 1)
+    instance._aporte_estadistica = nuevo
+
+
+def reserva_eliminada(sender, instance, **kwargs):
+    aporte = getattr(instance, '_aporte_estadistica', None) or _aporte(instance)
+    if aporte is not None:
+        _aplicar_aporte(aporte, -1)
+
+
+def estado_cambiado(reservas, estado):
+    """
+    Aplica el cambio de ``reservas`` (instancias cargadas antes del ``QuerySet.update()``,
+    que no dispara señales) a ``estado``: un _sumar por día de creación.
+    """
+    por_dia = defaultdict(lambda: [Decimal(0), Counter()])
+    for reserva in reservas:
+        anterior = _aporte(reserva)
+        if anterior is None or anterior[2] == estado:
+            continue
+        dia, ingresos, estado_anterior, _ = anterior
+        delta = por_dia[dia]
+        delta[0] += (Decimal(0) if estado in ESTADOS_SIN_INGRESO else Decimal(reserva.precio_total or 0)) - ingresos
+        delta[1][estado_anterior] -= 1
+        delta[1][estado] += 1
+    for dia, (ingresos, estados) in por_dia.items():
+        _sumar(dia, ingresos=ingresos, estados=estados)
+
+
+def cliente_guardado(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        _sumar(timezone.localdate(instance.fecha_registro), clientes_nuevos=1)
+
+
+def cliente_eliminado(sender, instance, **kwargs):
+    if instance.fecha_registro:
+        _sumar(timezone.localdate(instance.fecha_registro), clientes_nuevos=-1)
+
+
+# --- Lectura ---
+
+def obtener_estadisticas(hoy=None):
+    """Datos para EstadisticasSerializer (3 consultas sobre estadisticas_diarias)."""
+    hoy = hoy or timezone.localdate()
+    acumulado = EstadisticaDiaria.objects.filter(fecha=FECHA_ACUMULADO).first()
+    del_dia = EstadisticaDiaria.objects.filter(fecha=hoy).first()
+    del_mes = EstadisticaDiaria.objects.filter(
+        fecha__gte=hoy.replace(day=1), fecha__lte=hoy
+    ).aggregate(ingresos=Sum('ingresos'), clientes=Sum('clientes_nuevos'))
+    return {
+        'total_reservas': acumulado.reservas if acumulado else 0,
+        'reservas_hoy': del_dia.reservas if del_dia else 0,
+        'ingresos_mes': del_mes['ingresos'] or Decimal(0),
+        'clientes_nuevos': del_mes['clientes'] or 0,
+        'reservas_por_estado': acumulado.reservas_por_estado if acumulado else {},
+        'reservas_por_origen': acumulado.reservas_por_origen if acumulado else {},
+    }
+
+
+# --- Reconciliación / carga histórica ---
+
+def recalcular(desde, hasta, rehacer_acumulado=True):
+    """
+    Recalcula los días ``desde``..``hasta`` (inclusive) con dos GROUP BY y los
+    guarda en bloque; después rehace la fila acumulada. Devuelve los días con datos.
+    """
+    por_dia = defaultdict(lambda: {
+        'reservas': 0, 'ingresos': Decimal(0), 'clientes_nuevos': 0,
+        'reservas_por_estado': Counter(), 'reservas_por_origen': Counter(),
+    })
+
+    reservas = Reserva.objects.filter(
+        fecha_creacion__date__gte=desde, fecha_creacion__date__lte=hasta
+    ).annotate(dia=TruncDate('fecha_creacion')).values('dia', 'estado', 'origen').annotate(
+        cantidad=Count('reserva_id'),
+        ingresos=Sum('precio_total', filter=~Q(estado__in=ESTADOS_SIN_INGRESO)),
+    ).order_by()
+    for fila in reservas:
+        dia = por_dia[fila['dia']]
+        dia['reservas'] += fila['cantidad']
+        dia['ingresos'] += fila['ingresos'] or 0
+        dia['reservas_por_estado'][fila['estado']] += fila['cantidad']
+        dia['reservas_por_origen'][fila['origen']] += fila['cantidad']
+
+    clientes = Cliente.objects.filter(
+        fecha_registro__date__gte=desde, fecha_registro__date__lte=hasta
+    ).annotate(dia=TruncDate('fecha_registro')).values('dia').annotate(cantidad=Count('cliente_id')).order_by()
+    for fila in clientes:
+        por_dia[fila['dia']]['clientes_nuevos'] += fila['cantidad']
+
+    campos = ['reservas', 'ingresos', 'clientes_nuevos', 'reservas_por_estado', 'reservas_por_origen']
+    with transaction.atomic():
+        EstadisticaDiaria.objects.filter(fecha__gte=desde, fecha__lte=hasta).exclude(
+            fecha__in=list(por_dia)
+        ).exclude(fecha=FECHA_ACUMULADO).delete()
+        EstadisticaDiaria.objects.bulk_create(
+            [
+                EstadisticaDiaria(fecha=dia, **{c: dict(v) if isinstance(v, Counter) else v for c, v in datos.items()})
+                for dia, datos in por_dia.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['fecha'],
+            update_fields=campos,
+            batch_size=500,
+        )
+        if rehacer_acumulado:
+            recalcular_acumulado()
+    return len(por_dia)
+
+
+def recalcular_acumulado():
+    """Rehace la fila acumulada sumando las filas diarias."""
+    total = {'reservas': 0, 'ingresos': Decimal(0), 'clientes_nuevos': 0,
+             'reservas_por_estado': Counter(), 'reservas_por_origen': Counter()}
+    with transaction.atomic():
+        acumulado, _ = EstadisticaDiaria.objects.select_for_update().get_or_create(fecha=FECHA_ACUMULADO)
+        for fila in EstadisticaDiaria.objects.exclude(fecha=FECHA_ACUMULADO).iterator():
+            total['reservas'] += fila.reservas
+            total['ingresos'] += fila.ingresos
+            total['clientes_nuevos'] += fila.clientes_nuevos
+            total['reservas_por_estado'].update(fila.reservas_por_estado)
+            total['reservas_por_origen'].update(fila.reservas_por_origen)
+        for campo, valor in total.items():
+            setattr(acumulado, campo, {k: v for k, v in valor.items() if v} if isinstance(valor, Counter) else valor)
+        acumulado.save()
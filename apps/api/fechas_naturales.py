@@ -0,0 +1,250 @@
+# apps/api/fechas_naturales.py
+"""
+Lectura de fecha, hora de inicio y duración en español desde un solo mensaje
+("mañana a las 10", "hoy 22hrs", "viernes de 22 a 2", "el 25/12 por 4 horas").
+
+La gramática es una única expresión regular compilada al importar el módulo: una
+alternativa con nombre por tipo de fragmento (rango horario, fecha numérica,
+fecha con mes, relativa, día de la semana, hora, duración, parte del día).
+``interpretar`` normaliza el texto (minúsculas, sin tildes) y lo recorre una vez
+con ``finditer``; cada fragmento completa el campo que le corresponde (gana el
+primero). No hay bucles de ``strptime`` ni excepciones por formato.
+
+Reglas:
+- "mañana" es el día siguiente salvo en "de/en/por la mañana" (parte del día).
+- Fechas sin año ya pasadas se toman del año siguiente; un día de la semana es
+  el próximo (hoy si coincide; con "próximo", la semana siguiente).
+- Hora sin am/pm ni parte del día: de 1 a 7 se toma como de la tarde (13 a 19).
+- Un número suelto ("2") no es hora: hace falta "a las", minutos, un sufijo (h, hrs, pm)
+  o una parte del día justo antes ("en la noche 11").
+- "y media" / "y cuarto" son 30 / 15 minutos ("a las 3 y media").
+- "N horas" o "por N" / "durante N" es duración; "22hrs" es hora, salvo que ya
+  venga una hora antes ("mañana 14:30 3h": 3 horas de duración).
+"""
+import datetime
+import re
+import unicodedata
+from dataclasses import dataclass
+
+from django.utils import timezone
+
+_NUMEROS = {
+    'un': 1, 'una': 1, 'uno': 1, 'dos': 2, 'tres': 3, 'cuatro': 4, 'cinco': 5, 'seis': 6,
+    'siete': 7, 'ocho': 8, 'nueve': 9, 'diez': 10, 'once': 11, 'doce': 12,
+}
+_MESES = {
+    'enero': 1, 'febrero': 2, 'marzo': 3, 'abril': 4, 'mayo': 5, 'junio': 6, 'julio': 7,
+    'agosto': 8, 'septiembre': 9, 'setiembre': 9, 'octubre': 10, 'noviembre': 11, 'diciembre': 12,
+}
+_DIAS_SEMANA = {
+    'lunes': 0, 'martes': 1, 'miercoles': 2, 'jueves': 3, 'viernes': 4, 'sabado': 5, 'domingo': 6,
+}
+
+_NUM = r'(?:\d{1,2}|' + '|'.join(sorted(_NUMEROS, key=len, reverse=True)) + r')'
+_HORA = r'(?:\d{1,2}|una|dos|tres|cuatro|cinco|seis|siete|ocho|nueve|diez|once|doce)'
+_SUFIJO = r'(?:a\.?\s?m\.?|p\.?\s?m\.?|hrs?\b|horas\b|h\b)'
+_PREFIJO_HORA = r'(?:(?:como\s+)?a\s+las?\s+|las?\s+|tipo\s+|desde\s+las?\s+)'
+_FRACCION = r'(?:media|cuarto)'
+
+_GRAMATICA = re.compile(
+    r'\b(?:'
+    # "de 22 a 2", "desde las 10 hasta las 14"
+    rf'(?P<RANGO>(?:de|desde)\s+(?:las?\s+)?(?P<r_h1>{_HORA})(?:[:.](?P<r_m1>\d{{2}}))?\s*(?:hrs?|h)?'
+    rf'\s+(?:a|hasta)\s+(?:las?\s+)?(?P<r_h2>{_HORA})(?:[:.](?P<r_m2>\d{{2}}))?\s*(?P<r_suf>{_SUFIJO})?)'
+    # 25/12, 25-12-2025
+    r'|(?P<FECHA_NUM>(?P<f_dia>\d{1,2})[/-](?P<f_mes>\d{1,2})(?:[/-](?P<f_anio>\d{2,4}))?)'
+    # 25 de diciembre
+    rf'|(?P<FECHA_MES>(?P<fm_dia>\d{{1,2}})\s+de\s+(?P<fm_mes>{"|".join(_MESES)}))'
+    # durante 4 horas, por 2, por dos horas, 3 horas (no "por 2 personas")
+    rf'|(?P<DURACION>(?:(?:por|durante)\s+(?:unas?\s+)?(?:(?P<d_n1>\d{{1,2}})(?:\s*(?:hrs?|horas?|h))?'
+    rf'|(?P<d_n3>{_NUM})\s*(?:hrs?|horas?|h))'
+    rf'|(?P<d_n2>{_NUM})\s+horas?)\b(?!\s*(?:personas?|pers|dias?|noches?)\b))'
+    # partes del día (antes que "mañana" para no leer "de la mañana" como fecha)
+    # "en la noche 11": el número que sigue a la parte del día es la hora
+    r'|(?P<PARTE>(?:de|en|por)\s+la\s+(?P<p_parte>manana|tarde|noche|madrugada)'
+    r'(?:\s+(?P<p_h>\d{1,2})(?:[:.](?P<p_m>\d{2}))?\b(?!\s*(?:personas?|pers|hrs?|horas?|h|dias?|noches?)\b))?)'
+    r'|(?P<ESTA_NOCHE>esta\s+(?P<en_parte>noche|tarde))'
+    r'|(?P<MEDIO>(?P<m_cual>mediodia|medianoche))'
+    r'|(?P<RELATIVA>(?P<rel>pasado\s+manana|manana|hoy))'
+    r'|(?P<EN_DIAS>en\s+(?P<ed_n>' + _NUM + r')\s+dias?)'
+    rf'|(?P<SEMANA>(?:el\s+)?(?P<s_prox>proximo\s+)?(?P<s_dia>{"|".join(_DIAS_SEMANA)}))'
+    # a las 10, 22:30, 10pm, 22hrs
+    rf'|(?P<HORA>(?:(?P<h_pre>{_PREFIJO_HORA})(?P<h_h1>{_HORA})(?:[:.h](?P<h_m1>\d{{2}})|\s+y\s+(?P<h_y1>{_FRACCION}))?'
+    rf'\s*(?P<h_suf1>{_SUFIJO})?'
+    rf'|(?P<h_h5>\d{{1,2}})\s+y\s+(?P<h_y2>{_FRACCION})\b(?!\s*(?:hrs?|horas?)\b)\s*(?P<h_suf5>{_SUFIJO})?'
+    rf'|(?P<h_h2>\d{{1,2}})[:.h](?P<h_m2>\d{{2}})\s*(?P<h_suf2>{_SUFIJO})?'
+    rf'|(?P<h_h3>\d{{1,2}})\s*(?P<h_suf3>{_SUFIJO})'
+    r'|(?P<h_h4>\d{1,2})(?=\s+(?:de|en|por)\s+la\s+(?:manana|tarde|noche|madrugada))))'
+    r')'
+)
+
+_MAXIMO_DURACION = 24
+
+
+@dataclass
+class Interpretacion:
+    fecha: datetime.date = None
+    hora: datetime.time = None
+    duracion: int = None  # horas
+
+    @property
+    def vacia(self):
+        return self.fecha is None and self.hora is None and self.duracion is None
+
+
+def normalizar(texto):
+    """Minúsculas y sin tildes, conservando ':', '/', '.' y '-'."""
+    texto = unicodedata.normalize('NFKD', str(texto).lower())
+    return ' '.join(texto.encode('ascii', 'ignore').decode('ascii').split())
+
+
+def _numero(valor):
+    return int(valor) if valor.isdigit() else _NUMEROS[valor]
+
+
+def _minutos(minutos, fraccion):
+    if fraccion:
+        return 30 if fraccion == 'media' else 15
+    return int(minutos or 0)
+
+
+def _sufijo(valor):
+    """'am', 'pm' o None (h/hrs/horas no indican parte del día)."""
+    if not valor:
+        return None
+    letras = re.sub(r'[^ampm]', '', valor)
+    return letras if letras in ('am', 'pm') else None
+
+
+def _a_24h(hora, minutos, meridiano, parte):
+    if hora > 24 or minutos > 59:
+        return None
+    if hora == 24:
+        hora = 0
+    if meridiano == 'pm' and hora < 12:
+        hora += 12
+    elif meridiano == 'am' and hora == 12:
+        hora = 0
+    elif meridiano is None:
+        if parte in ('tarde', 'noche') and 1 <= hora <= 11 and not (parte == 'noche' and hora <= 4):
+            hora += 12
+        elif parte == 'noche' and hora == 12:
+            hora = 0
+        elif parte is None and 1 <= hora <= 7:
+            hora += 12
+    return datetime.time(hora, minutos)
+
+
+def _fecha(anio, mes, dia):
+    try:
+        return datetime.date(anio, mes, dia)
+    except ValueError:
+        return None
+
+
+def _fin_de_rango(inicio, hora, minutos, meridiano, parte):
+    """Hora de término de un rango: sin am/pm, la más cercana después del inicio ("de 10 a 2" = 14:00)."""
+    if meridiano or parte or hora > 12:
+        return _a_24h(hora, minutos, meridiano, parte)
+    if hora > 24 or minutos > 59:
+        return None
+    candidatas = [datetime.time(hora % 24, minutos), datetime.time((hora + 12) % 24, minutos)]
+    base = datetime.datetime.combine(datetime.date.min, inicio)
+
+    def espera(candidata):
+        fin = datetime.datetime.combine(datetime.date.min, candidata)
+        return (fin - base).total_seconds() % 86400 or 86400
+    return min(candidatas, key=espera)
+
+
+def interpretar(texto, ahora=None, numero_suelto=None):
+    """
+    Interpretacion(fecha, hora, duracion) del mensaje; los campos no encontrados
+    quedan en None. ``numero_suelto`` ('hora' o 'duracion'): cómo leer un mensaje
+    que es solo un número (la respuesta a la pregunta de ese paso).
+    """
+    ahora = timezone.localtime(ahora) if ahora else timezone.localtime()
+    hoy = ahora.date()
+    resultado = Interpretacion()
+    horas = []  # (hora, minutos, am/pm) hasta conocer la parte del día
+    parte = None
+
+    texto = normalizar(texto)
+    if numero_suelto and re.fullmatch(r'\d{1,2}', texto):
+        texto = f"a las {texto}" if numero_suelto == 'hora' else f"{texto} horas"
+    elif numero_suelto == 'hora' and re.fullmatch(r'\d{1,2} \d{2}', texto):
+        texto = texto.replace(' ', ':')  # "14 30"
+
+    for m in _GRAMATICA.finditer(texto):
+        tipo = m.lastgroup
+        if tipo == 'RANGO':
+            meridiano = _sufijo(m['r_suf'])
+            h1, h2 = _numero(m['r_h1']), _numero(m['r_h2'])
+            horas.append((h1, int(m['r_m1'] or 0), meridiano, (h2, int(m['r_m2'] or 0))))
+        elif tipo == 'FECHA_NUM' and resultado.fecha is None:
+            anio = int(m['f_anio']) if m['f_anio'] else hoy.year
+            if anio < 100:
+                anio += 2000
+            fecha = _fecha(anio, int(m['f_mes']), int(m['f_dia']))
+            if fecha and not m['f_anio'] and fecha < hoy:
+                fecha = _fecha(anio + 1, fecha.month, fecha.day)
+            resultado.fecha = fecha
+        elif tipo == 'FECHA_MES' and resultado.fecha is None:
+            fecha = _fecha(hoy.year, _MESES[m['fm_mes']], int(m['fm_dia']))
+            if fecha and fecha < hoy:
+                fecha = _fecha(hoy.year + 1, fecha.month, fecha.day)
+            resultado.fecha = fecha
+        elif tipo == 'DURACION':
+            duracion = _numero(m['d_n1'] or m['d_n2'] or m['d_n3'])
+            if m['d_n2'] and duracion > 12:
+                horas.append((duracion, 0, None, None))  # "hoy 22 horas" es una hora
+            elif resultado.duracion is None and 1 <= duracion <= _MAXIMO_DURACION:
+                resultado.duracion = duracion
+        elif tipo == 'PARTE':
+            parte = parte or m['p_parte']
+            if m['p_h']:
+                horas.append((int(m['p_h']), int(m['p_m'] or 0), None, None))
+        elif tipo == 'ESTA_NOCHE':
+            parte = parte or m['en_parte']
+            resultado.fecha = resultado.fecha or hoy
+        elif tipo == 'MEDIO':
+            horas.append((12 if m['m_cual'] == 'mediodia' else 0, 0, 'fijo', None))
+        elif tipo == 'RELATIVA' and resultado.fecha is None:
+            desplazamiento = {'hoy': 0, 'manana': 1}.get(m['rel'], 2)
+            resultado.fecha = hoy + datetime.timedelta(days=desplazamiento)
+        elif tipo == 'EN_DIAS' and resultado.fecha is None:
+            resultado.fecha = hoy + datetime.timedelta(days=_numero(m['ed_n']))
+        elif tipo == 'SEMANA' and resultado.fecha is None:
+            dias = (_DIAS_SEMANA[m['s_dia']] - hoy.weekday()) % 7
+            if m['s_prox'] and dias == 0:
+                dias = 7
+            resultado.fecha = hoy + datetime.timedelta(days=dias)
+        elif tipo == 'HORA':
+            hora = _numero(m['h_h1'] or m['h_h2'] or m['h_h3'] or m['h_h4'] or m['h_h5'])
+            minutos = _minutos(m['h_m1'] or m['h_m2'], m['h_y1'] or m['h_y2'])
+            meridiano = _sufijo(m['h_suf1'] or m['h_suf2'] or m['h_suf3'] or m['h_suf5'])
+            if m['h_h3'] and horas and meridiano is None:
+                # "mañana 14:30 3h": con la hora ya dada, "3h" es la duración
+                if resultado.duracion is None and 1 <= hora <= _MAXIMO_DURACION:
+                    resultado.duracion = hora
+            else:
+                horas.append((hora, minutos, meridiano, None))
+
+    # La hora se resuelve al final: "a las 10 de la noche" trae la parte del día después
+    if horas:
+        h, minutos, meridiano, fin = horas[0]
+        if meridiano == 'fijo':
+            resultado.hora = datetime.time(h, minutos)
+        else:
+            resultado.hora = _a_24h(h, minutos, meridiano, parte)
+            if fin is not None and resultado.hora is not None:
+                hora_fin = _fin_de_rango(resultado.hora, fin[0], fin[1], meridiano, parte)
+                if hora_fin is not None and resultado.duracion is None:
+                    inicio = datetime.datetime.combine(hoy, resultado.hora)
+                    termino = datetime.datetime.combine(hoy, hora_fin)
+                    if termino <= inicio:
+                        termino += datetime.timedelta(days=1)
+                    duracion = round((termino - inicio).total_seconds() / 3600)
+                    if 1 <= duracion <= _MAXIMO_DURACION:
+                        resultado.duracion = duracion
+    return resultado
@@ -0,0 +1,125 @@
+# apps/api/flujos.py
+"""
+Motor de flujos de conversación definidos como datos (reserva, modo funcionario...).
+
+Un ``Flujo`` es una tupla ordenada de ``Paso``; cada paso declara los campos de
+``datos_reserva`` que completa, cómo pedirlos (``preguntar``), cómo leer la
+respuesta (``leer``) y, opcionalmente, cómo revisar los datos ya completos antes
+de saltarlo (``revisar``, p. ej. que la habitación siga libre). La transición es la
+misma para todos los flujos: después de leer un mensaje se pasa al primer paso con
+campos faltantes, así que los datos que llegaron antes (reserva en un solo mensaje)
+saltan sus pasos. Un paso sin campos es una parada (confirmación, menú).
+
+El estado es una fila de EstadoConversacion por cliente (``tipo`` = flujo activo,
+``paso_actual``, ``datos_reserva`` en JSON): se carga con una consulta
+(``estado_de``) y se guarda una vez por mensaje. El paso se despacha con un
+diccionario nombre -> Paso.
+"""
+import logging
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from apps.reservas.models import EstadoConversacion
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Salida:
+    """Respuesta directa de ``leer`` (error de formato, cancelación, fin del flujo)."""
+    respuesta: dict
+    guardar: bool = False  # ``leer`` modificó los datos sin avanzar de paso
+    terminar: bool = False  # borrar el estado: el flujo terminó o se canceló
+
+
+@dataclass(frozen=True)
+class Paso:
+    nombre: str
+    # (mensaje, estado) -> campos nuevos para datos_reserva, o Salida
+    leer: Callable
+    # (datos, encabezado) -> respuesta que pide los campos del paso
+    preguntar: Callable
+    campos: tuple = ()
+    # (datos) -> None si los campos ya completos siguen valiendo, o una nota para volver a pedirlos
+    revisar: Optional[Callable] = None
+    # (datos) -> texto que confirma lo leído en este paso ("✅ Hora seleccionada: 22:00")
+    encabezado: Optional[Callable] = None
+
+    def completo(self, datos):
+        return bool(self.campos) and all(campo in datos for campo in self.campos)
+
+
+class Flujo:
+    def __init__(self, nombre, pasos):
+        self.nombre = nombre
+        self.pasos = tuple(pasos)
+        self._por_nombre = {paso.nombre: paso for paso in self.pasos}
+
+    def iniciar(self, cliente, datos=None, encabezado="", estado=None):
+        """Empieza el flujo en la fila del cliente (la crea si no tiene) con los datos ya conocidos."""
+        if estado is None:
+            # get_or_create: dos mensajes simultáneos del mismo cliente no chocan con la restricción única
+            estado, _ = EstadoConversacion.objects.select_related('cliente').get_or_create(
+                cliente=cliente, defaults={'tipo': self.nombre}
+            )
+        estado.tipo = self.nombre
+        estado.datos_reserva = dict(datos or {})
+        return self.continuar(estado, encabezado)
+
+    def continuar(self, estado, encabezado=""):
+        """Se detiene en el primer paso con campos faltantes, lo guarda y devuelve su pregunta."""
+        datos = estado.datos_reserva
+        for paso in self.pasos:
+            if paso.completo(datos):
+                nota = paso.revisar(datos) if paso.revisar else None
+                if nota is None:
+                    continue
+                for campo in paso.campos:
+                    datos.pop(campo, None)
+                encabezado = f"{encabezado}\n\n{nota}" if encabezado else nota
+            estado.paso_actual = paso.nombre
+            estado.save()
+            return paso.preguntar(datos, encabezado)
+        raise ValueError(f"El flujo '{self.nombre}' no tiene un paso final sin campos")
+
+    def procesar(self, estado, mensaje):
+        paso = self._por_nombre.get(estado.paso_actual)
+        if paso is None:
+            logger.warning(f"⚠️ Paso desconocido '{estado.paso_actual}' en el flujo '{self.nombre}'; se reinicia")
+            return self.iniciar(estado.cliente, estado=estado)
+
+        resultado = paso.leer(mensaje, estado)
+        if isinstance(resultado, Salida):
+            if resultado.terminar:
+                if estado.pk:
+                    estado.delete()
+            elif resultado.guardar:
+                estado.save()
+            return resultado.respuesta
+
+        estado.datos_reserva.update(resultado)
+        return self.continuar(estado, paso.encabezado(estado.datos_reserva) if paso.encabezado else "")
+
+
+FLUJOS = {}
+
+
+def registrar(flujo):
+    FLUJOS[flujo.nombre] = flujo
+    return flujo
+
+
+def estado_de(cliente, tipo=None):
+    """La fila de estado del cliente (una por cliente), o None."""
+    estados = EstadoConversacion.objects.select_related('cliente').filter(cliente=cliente)
+    if tipo:
+        estados = estados.filter(tipo=tipo)
+    return estados.first()
+
+
+def procesar(estado, mensaje):
+    """Despacha el mensaje al flujo activo del estado; None si su tipo no es un flujo registrado."""
+    flujo = FLUJOS.get(estado.tipo)
+    if flujo is None:
+        return None
+    return flujo.procesar(estado, mensaje)
@@ -0,0 +1,187 @@
+# apps/api/historial_web.py
+"""
+Historial del chat web en caché y escritura diferida de mensajes.
+
+Cada sesión guarda en la caché de Django un buffer circular con los últimos
+turnos, así cada request no vuelve a consultar Cliente, Conversacion y los
+últimos 10 Mensaje. Los mensajes se encolan y se insertan por lotes con
+``bulk_create`` desde un hilo en segundo plano.
+
+Notas:
+    - Con varios procesos la caché debe ser compartida (CACHE_URL=redis://...);
+      con LocMemCache cada worker tendría su propia copia del historial.
+    - Si la BD falla, el lote vuelve a la cola (delante de lo nuevo) y se
+      reintenta en el próximo vaciado.
+    - Si el proceso muere, se pierden a lo sumo los mensajes del último
+      intervalo de escritura (MENSAJES_WEB_INTERVALO_S).
+    - Cada Mensaje se guarda con la hora en que se encoló (no la del lote); la
+      respuesta del agente queda 1 µs después de la pregunta, así el orden del
+      turno no depende de los ids.
+    - ``archivo_mensajes`` invalida la caché de las sesiones cuyas conversaciones
+      cierra o archiva (``invalidar_sesiones``): la sesión vuelve a leer de la BD
+      y no escribe en una conversación cerrada.
+"""
+import atexit
+import datetime
+import logging
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import Cliente, Conversacion, Mensaje
+
+logger = logging.getLogger(__name__)
+
+TAMANO_HISTORIAL = 10
+SEGUNDOS_CACHE_HISTORIAL = 30 * 60
+PREFIJO_CLAVE = "chatweb:historial:"
+# Los clientes del chat web se guardan con telefono = "web_<session_id>"
+PREFIJO_TELEFONO = "web_"
+
+
+def _clave(session_id):
+    return f"{PREFIJO_CLAVE}{session_id}"
+
+
+def invalidar_sesiones(telefonos):
+    """Descarta de la caché las sesiones web de esos teléfonos (los que no son web se ignoran)."""
+    claves = [
+        _clave(telefono[len(PREFIJO_TELEFONO):])
+        for telefono in set(telefonos)
+        if telefono and telefono.startswith(PREFIJO_TELEFONO)
+    ]
+    if claves:
+        cache.delete_many(claves)
+    return len(claves)
+
+
+def _cargar_desde_bd(session_id):
+    """Carga conversación y últimos mensajes de la sesión (solo cuando no está en caché)."""
+    historial = deque(maxlen=TAMANO_HISTORIAL)
+    try:
+        cliente = Cliente.objects.get(telefono=f"{PREFIJO_TELEFONO}{session_id}")
+    except Cliente.DoesNotExist:
+        return {"conversacion_id": None, "historial": historial}
+
+    conversacion, _ = Conversacion.objects.get_or_create(
+        cliente=cliente,
+        activo=True
+    )
+
+    mensajes_recientes = conversacion.mensajes().order_by('-timestamp')[:TAMANO_HISTORIAL]
+
+    for msg in reversed(mensajes_recientes):
+        historial.append({
+            'remitente': msg.remitente,
+            'contenido': msg.contenido,
+            'timestamp': msg.timestamp.isoformat()
+        })
+    return {"conversacion_id": conversacion.conversacion_id, "historial": historial}
+
+
+def obtener_historial(session_id):
+    """Devuelve (conversacion_id, historial) de la sesión, desde caché si está disponible."""
+    datos = cache.get(_clave(session_id))
+    if datos is None:
+        datos = _cargar_desde_bd(session_id)
+        # Sin cliente web todavía no se cachea: se crea con su primera pregunta desconocida
+        if datos["conversacion_id"] is not None:
+            cache.set(_clave(session_id), datos, SEGUNDOS_CACHE_HISTORIAL)
+    return datos["conversacion_id"], list(datos["historial"])
+
+
+def registrar_turno(session_id, conversacion_id, mensaje, respuesta):
+    """Agrega el turno al buffer de la sesión y encola su persistencia."""
+    if not conversacion_id:
+        return
+
+    preguntado = timezone.now()
+    respondido = preguntado + datetime.timedelta(microseconds=1)
+    datos = cache.get(_clave(session_id)) or {
+        "conversacion_id": conversacion_id,
+        "historial": deque(maxlen=TAMANO_HISTORIAL),
+    }
+    datos["historial"].append({'remitente': 'cliente', 'contenido': mensaje, 'timestamp': preguntado.isoformat()})
+    datos["historial"].append({'remitente': 'agente', 'contenido': respuesta, 'timestamp': respondido.isoformat()})
+    cache.set(_clave(session_id), datos, SEGUNDOS_CACHE_HISTORIAL)
+
+    escritura_diferida.agregar(conversacion_id, 'cliente', mensaje, preguntado)
+    escritura_diferida.agregar(conversacion_id, 'agente', respuesta, respondido)
+
+
+class EscrituraDiferidaMensajes:
+    """
+    Cola de Mensaje pendientes que se insertan por lotes.
+
+    Se vacía cuando alcanza ``tamano_lote`` o cada ``intervalo_s`` segundos,
+    desde un hilo daemon que se inicia con el primer mensaje.
+    """
+
+    def __init__(self, tamano_lote=50, intervalo_s=2.0):
+        self.tamano_lote = tamano_lote
+        self.intervalo_s = intervalo_s
+        self._pendientes = []
+        self._lock = threading.Lock()
+        self._despertar = threading.Event()
+        self._hilo = None
+
+    def agregar(self, conversacion_id, remitente, contenido, timestamp=None):
+        with self._lock:
+            self._pendientes.append(Mensaje(
+                conversacion_id=conversacion_id,
+                remitente=remitente,
+                contenido=contenido,
+                timestamp=timestamp or timezone.now(),
+            ))
+            lleno = len(self._pendientes) >= self.tamano_lote
+            if self._hilo is None:
+                self._hilo = threading.Thread(
+                    target=self._bucle, name="escritura-mensajes-web", daemon=True
+                )
+                self._hilo.start()
+        if lleno:
+            self._despertar.set()
+
+    def vaciar(self):
+        """Inserta todo lo pendiente. Devuelve la cantidad de mensajes guardados."""
+        with self._lock:
+            lote, self._pendientes = self._pendientes, []
+        if not lote:
+            return 0
+        try:
+            # Todo o nada: al reintentar no se duplican los INSERT que alcanzaron a entrar
+            with transaction.atomic():
+                Mensaje.objects.bulk_create(lote, batch_size=self.tamano_lote)
+            logger.info(f"💾 {len(lote)} mensajes web guardados en lote")
+            return len(lote)
+        except Exception as e:
+            logger.error(f"❌ Error guardando lote de {len(lote)} mensajes web, se reintentará: {e}")
+            self._devolver(lote)
+            return 0
+
+    def _devolver(self, lote):
+        """Vuelve a encolar un lote fallido antes de lo que llegó mientras tanto."""
+        for mensaje in lote:
+            # bulk_create pudo asignarle id antes del rollback
+            mensaje.pk = None
+            mensaje._state.adding = True
+        with self._lock:
+            self._pendientes[:0] = lote
+
+    def _bucle(self):
+        while True:
+            self._despertar.wait(self.intervalo_s)
+            self._despertar.clear()
+            self.vaciar()
+            close_old_connections()
+
+
+escritura_diferida = EscrituraDiferidaMensajes(
+    tamano_lote=getattr(settings, 'MENSAJES_WEB_LOTE', 50),
+    intervalo_s=getattr(settings, 'MENSAJES_WEB_INTERVALO_S', 2.0),
+)
+atexit.register(escritura_diferida.vaciar)
@@ -0,0 +1,279 @@
+# apps/api/llm.py
+"""
+Pasarela única hacia el LLM (Google Gemini) usada por WhatsApp y el chat web.
+
+Expone una versión síncrona (``generar_texto``) para las vistas WSGI y una
+asíncrona (``agenerar_texto``) para las vistas ASGI, ambas con el mismo
+orden de modelos de respaldo, más sus variantes en streaming para el chat web.
+
+El SDK ``google-genai`` tarda más de medio segundo en importarse, así que se
+carga recién en la primera llamada y no en el arranque de cada worker.
+"""
+import asyncio
+import logging
+import os
+import threading
+import weakref
+
+logger = logging.getLogger(__name__)
+
+GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
+
+# Se completan en la primera llamada (ver _cargar_sdk)
+genai = None
+GENAI_SDK_AVAILABLE = None  # None: todavía no se intentó importar
+
+# Modelos disponibles (del más reciente al más antiguo)
+MODELOS_GEMINI = [
+    "models/gemini-2.0-flash-exp",
+    "models/gemini-1.5-flash",
+    "models/gemini-1.5-pro",
+]
+
+CONFIG_GENERACION = {
+    "max_output_tokens": 500,
+    "temperature": 0.7,
+}
+
+_cliente_sync = None
+_clientes_async = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+_lock_sdk = threading.Lock()
+
+
+def _cargar_sdk():
+    """Importa google-genai una sola vez; devuelve el módulo o None si no está instalado."""
+    global genai, GENAI_SDK_AVAILABLE
+    if genai is None and GENAI_SDK_AVAILABLE is not False:
+        with _lock_sdk:
+            if genai is None and GENAI_SDK_AVAILABLE is not False:
+                try:
+                    from google import genai as sdk
+                    genai = sdk
+                    GENAI_SDK_AVAILABLE = True
+                    logger.info("✅ Google GenAI SDK importado correctamente")
+                except ImportError as e:
+                    GENAI_SDK_AVAILABLE = False
+                    logger.error(f"❌ No se pudo importar Google GenAI SDK: {e}")
+                    logger.info("💡 Para instalar: pip install google-genai")
+    return genai
+
+
+def disponible():
+    """Indica si hay API Key y SDK para llamar a Gemini (importa el SDK si hace falta)."""
+    return bool(GEMINI_API_KEY) and _cargar_sdk() is not None
+
+
+def _obtener_cliente():
+    """Cliente Gemini reutilizado entre requests (antes se creaba uno por llamada)."""
+    global _cliente_sync
+    with _lock:
+        if _cliente_sync is None:
+            _cliente_sync = genai.Client(api_key=GEMINI_API_KEY)
+        return _cliente_sync
+
+
+def _obtener_cliente_async():
+    """Cliente Gemini por event loop: las conexiones async no se comparten entre loops."""
+    loop = asyncio.get_running_loop()
+    cliente = _clientes_async.get(loop)
+    if cliente is None:
+        cliente = genai.Client(api_key=GEMINI_API_KEY)
+        _clientes_async[loop] = cliente
+    return cliente
+
+
+def _extraer_texto(response):
+    if not response:
+        return None
+    texto = response.text if hasattr(response, 'text') else str(response)
+    if texto and texto.strip():
+        return texto.strip()
+    return None
+
+
+def generar_texto(prompt, config=None):
+    """
+    Genera texto probando cada modelo hasta que uno responda.
+    Devuelve None si la IA no está disponible o ningún modelo funcionó.
+    """
+    if not disponible():
+        logger.warning("⚠️ No hay API Key o SDK de Gemini - Se usará la respuesta de respaldo")
+        return None
+
+    try:
+        client = _obtener_cliente()
+    except Exception as e:
+        logger.error(f"❌ Error creando cliente de Gemini: {e}")
+        return None
+
+    for modelo in MODELOS_GEMINI:
+        try:
+            logger.info(f"🔄 Intentando con modelo: {modelo}")
+            response = client.models.generate_content(
+                model=modelo,
+                contents=prompt,
+                config=config or CONFIG_GENERACION,
+            )
+            texto = _extraer_texto(response)
+            if texto:
+                logger.info(f"✅ Modelo {modelo} funcionó correctamente")
+                return texto
+        except Exception as e:
+            logger.warning(f"⚠️ Error con modelo {modelo}: {e}")
+            continue
+
+    logger.warning("⚠️ Ningún modelo funcionó")
+    return None
+
+
+async def agenerar_texto(prompt, config=None):
+    """Versión asíncrona de generar_texto (usa el cliente HTTP async del SDK)."""
+    if not disponible():
+        logger.warning("⚠️ No hay API Key o SDK de Gemini - Se usará la respuesta de respaldo")
+        return None
+
+    try:
+        client = _obtener_cliente_async()
+    except Exception as e:
+        logger.error(f"❌ Error creando cliente async de Gemini: {e}")
+        return None
+
+    for modelo in MODELOS_GEMINI:
+        try:
+            logger.info(f"🔄 Intentando con modelo (async): {modelo}")
+            response = await client.aio.models.generate_content(
+                model=modelo,
+                contents=prompt,
+                config=config or CONFIG_GENERACION,
+            )
+            texto = _extraer_texto(response)
+            if texto:
+                logger.info(f"✅ Modelo {modelo} funcionó correctamente")
+                return texto
+        except Exception as e:
+            logger.warning(f"⚠️ Error con modelo {modelo}: {e}")
+            continue
+
+    logger.warning("⚠️ Ningún modelo funcionó")
+    return None
+
+
+def _fragmento(chunk):
+    texto = getattr(chunk, 'text', None)
+    return texto or None
+
+
+def generar_texto_stream(prompt, config=None):
+    """
+    Igual que generar_texto, pero va entregando los fragmentos a medida que el
+    modelo los produce. Solo cambia de modelo si el anterior falló antes del
+    primer fragmento; no entrega nada si la IA no está disponible.
+    """
+    if not disponible() or not prompt:
+        return
+
+    try:
+        client = _obtener_cliente()
+    except Exception as e:
+        logger.error(f"❌ Error creando cliente de Gemini: {e}")
+        return
+
+    for modelo in MODELOS_GEMINI:
+        entregado = False
+        try:
+            logger.info(f"🔄 Streaming con modelo: {modelo}")
+            for chunk in client.models.generate_content_stream(
+                model=modelo,
+                contents=prompt,
+                config=config or CONFIG_GENERACION,
+            ):
+                texto = _fragmento(chunk)
+                if texto:
+                    entregado = True
+                    yield texto
+        except Exception as e:
+            if entregado:
+                logger.warning(f"⚠️ Stream de {modelo} cortado a mitad de respuesta: {e}")
+                return
+            logger.warning(f"⚠️ Error con modelo {modelo}: {e}")
+            continue
+        if entregado:
+            return
+
+    logger.warning("⚠️ Ningún modelo funcionó (stream)")
+
+
+async def agenerar_texto_stream(prompt, config=None):
+    """Versión asíncrona de generar_texto_stream."""
+    if not disponible() or not prompt:
+        return
+
+    try:
+        client = _obtener_cliente_async()
+    except Exception as e:
+        logger.error(f"❌ Error creando cliente async de Gemini: {e}")
+        return
+
+    for modelo in MODELOS_GEMINI:
+        entregado = False
+        try:
+            logger.info(f"🔄 Streaming (async) con modelo: {modelo}")
+            stream = await client.aio.models.generate_content_stream(
+                model=modelo,
+                contents=prompt,
+                config=config or CONFIG_GENERACION,
+            )
+            async for chunk in stream:
+                texto = _fragmento(chunk)
+                if texto:
+                    entregado = True
+                    yield texto
+        except Exception as e:
+            if entregado:
+                logger.warning(f"⚠️ Stream de {modelo} cortado a mitad de respuesta: {e}")
+                return
+            logger.warning(f"⚠️ Error con modelo {modelo}: {e}")
+            continue
+        if entregado:
+            return
+
+    logger.warning("⚠️ Ningún modelo funcionó (stream)")
+
+
+class RespuestaPendienteIA:
+    """
+    Resultado del "cerebro" que todavía necesita pasar por el LLM.
+
+    Separa el trabajo de base de datos (ya resuelto, incluido el prompt) de la
+    llamada a la IA, para que la vista síncrona llame a ``completar()`` y la
+    asíncrona haga ``await acompletar()`` sin bloquear el event loop.
+    """
+
+    def __init__(self, prompt, respaldo, armar=None):
+        self.prompt = prompt
+        self.respaldo = respaldo
+        self.armar = armar or (lambda texto: texto)
+
+    def completar(self):
+        return self.armar(generar_texto(self.prompt) or self.respaldo)
+
+    async def acompletar(self):
+        return self.armar(await agenerar_texto(self.prompt) or self.respaldo)
+
+    def stream(self):
+        """Fragmentos de texto del LLM; si no llega ninguno, el respaldo completo."""
+        recibido = False
+        for fragmento in generar_texto_stream(self.prompt):
+            recibido = True
+            yield fragmento
+        if not recibido:
+            yield self.respaldo
+
+    async def astream(self):
+        recibido = False
+        async for fragmento in agenerar_texto_stream(self.prompt):
+            recibido = True
+            yield fragmento
+        if not recibido:
+            yield self.respaldo
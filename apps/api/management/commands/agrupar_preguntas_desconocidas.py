@@ -0,0 +1,76 @@
+# apps/api/management/commands/agrupar_preguntas_desconocidas.py
+"""
+Agrupa las preguntas desconocidas sin revisar (ver apps/api/agrupador_preguntas.py)
+y guarda los grupos en GrupoPreguntasDesconocidas, visibles en el admin.
+
+Cada ejecución rehace los grupos no revisados: pensado para correr de noche (cron).
+
+Ejemplos:
+    python manage.py agrupar_preguntas_desconocidas
+    python manage.py agrupar_preguntas_desconocidas --umbral 0.6 --minimo 3
+    python manage.py agrupar_preguntas_desconocidas --simular
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.api.agrupador_preguntas import UMBRAL_SIMILITUD, agrupar_preguntas
+from apps.api.models import GrupoPreguntasDesconocidas, PreguntaDesconocida
+
+# Tamaño de los lotes de UPDATE ... WHERE pk IN (...)
+LOTE_IDS = 1000
+
+
+class Command(BaseCommand):
+    help = 'Agrupa preguntas desconocidas casi idénticas para revisarlas en bloque desde el admin'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--umbral', type=float, default=UMBRAL_SIMILITUD,
+                            help='Similitud coseno mínima para entrar a un grupo (0-1)')
+        parser.add_argument('--minimo', type=int, default=2,
+                            help='Ocurrencias mínimas para guardar un grupo')
+        parser.add_argument('--simular', action='store_true',
+                            help='Muestra los grupos sin guardarlos')
+
+    def handle(self, *args, **options):
+        if not 0 < options['umbral'] <= 1:
+            raise CommandError("--umbral debe estar entre 0 y 1")
+
+        inicio = time.perf_counter()
+        filas = PreguntaDesconocida.objects.filter(revisada=False).values_list(
+            'pregunta_desconocida_id', 'texto_pregunta', 'ocurrencias'
+        ).iterator(chunk_size=2000)
+        grupos = [g for g in agrupar_preguntas(filas, options['umbral']) if g['ocurrencias'] >= options['minimo']]
+        agrupadas = sum(len(g['ids']) for g in grupos)
+        ocurrencias = sum(g['ocurrencias'] for g in grupos)
+        self.stdout.write(
+            f"🧮 {len(grupos)} grupos con {agrupadas} preguntas distintas y {ocurrencias} ocurrencias "
+            f"({time.perf_counter() - inicio:.1f}s)"
+        )
+
+        if options['simular']:
+            for g in grupos[:20]:
+                self.stdout.write(f"  {g['ocurrencias']:>5}  {g['texto'][:70]}")
+            return
+
+        with transaction.atomic():
+            # Los grupos revisados se conservan; los demás se rehacen
+            PreguntaDesconocida.objects.filter(revisada=False, grupo__isnull=False).update(grupo=None)
+            GrupoPreguntasDesconocidas.objects.filter(revisado=False).delete()
+
+            nuevos = GrupoPreguntasDesconocidas.objects.bulk_create([
+                GrupoPreguntasDesconocidas(
+                    representante_id=g['representante'],
+                    texto_representante=g['texto'],
+                    cantidad=g['ocurrencias'],
+                )
+                for g in grupos
+            ])
+            for grupo, g in zip(nuevos, grupos):
+                for i in range(0, len(g['ids']), LOTE_IDS):
+                    PreguntaDesconocida.objects.filter(
+                        pk__in=g['ids'][i:i + LOTE_IDS]
+                    ).update(grupo=grupo)
+
+        self.stdout.write(self.style.SUCCESS(f"✅ {len(nuevos)} grupos guardados"))
@@ -0,0 +1,49 @@
+# apps/api/management/commands/archivar_mensajes.py
+"""
+Retención del historial (ver apps/api/archivo_mensajes.py): cierra las
+conversaciones inactivas y mueve los mensajes antiguos a archivos
+.jsonl.gz por día en ARCHIVO_MENSAJES_DIR. Pensado para correr de noche (cron).
+
+Ejemplos:
+    python manage.py archivar_mensajes
+    python manage.py archivar_mensajes --dias 30 --horas-inactividad 12
+    python manage.py archivar_mensajes --simular
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.api import archivo_mensajes
+
+
+class Command(BaseCommand):
+    help = 'Cierra conversaciones inactivas y archiva en disco los mensajes antiguos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=settings.RETENCION_MENSAJES_DIAS,
+                            help='Archivar mensajes con más de estos días')
+        parser.add_argument('--horas-inactividad', type=int, default=settings.CONVERSACION_INACTIVA_HORAS,
+                            help='Cerrar conversaciones sin mensajes en estas horas')
+        parser.add_argument('--directorio', default=settings.ARCHIVO_MENSAJES_DIR)
+        parser.add_argument('--lote', type=int, default=archivo_mensajes.TAMANO_LOTE)
+        parser.add_argument('--simular', action='store_true',
+                            help='Solo cuenta lo que se cerraría y archivaría')
+
+    def handle(self, *args, **options):
+        if options['dias'] < 1:
+            raise CommandError("--dias debe ser al menos 1")
+
+        inicio = time.perf_counter()
+        cerradas = archivo_mensajes.cerrar_conversaciones_inactivas(
+            options['horas_inactividad'], simular=options['simular']
+        )
+        archivados = archivo_mensajes.archivar_mensajes(
+            options['dias'], options['directorio'], options['lote'], simular=options['simular']
+        )
+
+        verbo = "se cerrarían / archivarían" if options['simular'] else "cerradas / archivados"
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {cerradas} conversaciones y {archivados} mensajes {verbo} "
+            f"({time.perf_counter() - inicio:.1f}s)"
+        ))
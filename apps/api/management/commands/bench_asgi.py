@@ -0,0 +1,144 @@
+# apps/api/management/commands/bench_asgi.py
+"""
+Compara el camino síncrono (WSGI, un hilo por request) con el asíncrono (ASGI)
+del webhook de WhatsApp o del chat web, con la misma latencia simulada del LLM.
+
+El modo WSGI usa a lo sumo ``--workers-sync`` hilos (como los workers de
+gunicorn); el modo ASGI mantiene hasta ``concurrencia`` requests en vuelo en un
+solo event loop.
+
+Ejemplos:
+    python manage.py bench_asgi
+    python manage.py bench_asgi --concurrencia 8,64,256 --latencia-llm-ms 1500
+    python manage.py bench_asgi --endpoint web-chat --workers-sync 8
+"""
+import json
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from apps.api.benchmarks.ejecucion import ejecutar_nivel, ejecutar_nivel_async
+from apps.api.benchmarks.entorno import (
+    base_de_datos_de_prueba, dependencias_externas_falsas, poblar_datos_minimos, reiniciar_datos,
+)
+from apps.api.benchmarks.graph_api_falsa import GraphAPIFalsa
+from apps.api.benchmarks.llm_falso import LLMFalso
+from apps.api.benchmarks.metricas import COLUMNAS_REPORTE, ContadorQueriesGlobal, Resultados, formatear_tabla
+from apps.api.benchmarks.payloads import GeneradorPayloads
+
+RUTAS = {
+    "whatsapp": ("whatsapp_webhook", "whatsapp_webhook_async"),
+    "web-chat": ("web_chat", "web_chat_async"),
+}
+
+COLUMNAS = [("modo", "modo", 5)] + COLUMNAS_REPORTE
+
+
+class Command(BaseCommand):
+    help = 'Compara las vistas síncronas (WSGI) y asíncronas (ASGI) con el mismo LLM simulado'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', choices=sorted(RUTAS), default='whatsapp')
+        parser.add_argument('--concurrencia', default='1,16,64',
+                            help='Niveles de concurrencia separados por coma (default: 1,16,64)')
+        parser.add_argument('--workers-sync', type=int, default=4,
+                            help='Hilos máximos del modo WSGI (default: 4)')
+        parser.add_argument('--eventos', type=int, default=200,
+                            help='Cantidad de requests por nivel (default: 200)')
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--clientes', type=int, default=50)
+        parser.add_argument('--latencia-llm-ms', type=float, default=800)
+        parser.add_argument('--variacion-llm-ms', type=float, default=200)
+        parser.add_argument('--latencia-graph-ms', type=float, default=40)
+        parser.add_argument('--solo', choices=['sync', 'async'], default=None,
+                            help='Ejecuta solo uno de los dos modos')
+        parser.add_argument('--json', default=None, help='Guarda los resultados en un archivo JSON')
+
+    def handle(self, *args, **options):
+        try:
+            niveles = [int(n) for n in options['concurrencia'].split(',') if n.strip()]
+        except ValueError as e:
+            raise CommandError(f"Argumento inválido: {e}")
+
+        if options['verbosity'] < 2:
+            logging.getLogger('apps').setLevel(logging.ERROR)
+
+        ruta_sync, ruta_async = RUTAS[options['endpoint']]
+        modos = [
+            ("sync", reverse(ruta_sync)),
+            ("async", reverse(ruta_async)),
+        ]
+        if options['solo']:
+            modos = [m for m in modos if m[0] == options['solo']]
+
+        filas = []
+        contador = ContadorQueriesGlobal()
+
+        with base_de_datos_de_prueba():
+            ids_botones = poblar_datos_minimos()
+            generador = GeneradorPayloads(
+                semilla=options['semilla'], numero_clientes=options['clientes'], ids_botones=ids_botones
+            )
+            if options['endpoint'] == 'web-chat':
+                eventos = generador.generar_web_chat(options['eventos'])
+            else:
+                # Sin actualizaciones de estado: solo medimos mensajes que pasan por el LLM
+                generador.mezcla = {"texto": 0.7, "boton": 0.2, "lote": 0.1}
+                eventos = generador.generar(options['eventos'])
+
+            graph = GraphAPIFalsa(
+                latencia_ms=options['latencia_graph_ms'], variacion_ms=0, semilla=options['semilla']
+            )
+            llm = LLMFalso(
+                latencia_ms=options['latencia_llm_ms'],
+                variacion_ms=options['variacion_llm_ms'],
+                semilla=options['semilla'],
+            )
+
+            self.stdout.write(
+                f"📦 {len(eventos)} requests a /{options['endpoint']} por nivel | "
+                f"LLM {options['latencia_llm_ms']:.0f}ms | workers WSGI {options['workers_sync']}"
+            )
+
+            contador.instalar()
+            with graph, dependencias_externas_falsas(graph, llm):
+                for concurrencia in niveles:
+                    for modo, url in modos:
+                        reiniciar_datos()
+                        graph.reiniciar_contadores()
+                        llm.reiniciar_contadores()
+                        contador.reiniciar()
+
+                        resultados = Resultados()
+                        if modo == "sync":
+                            hilos = max(1, min(concurrencia, options['workers_sync']))
+                            duracion = ejecutar_nivel(eventos, hilos, url, resultados)
+                        else:
+                            duracion = ejecutar_nivel_async(eventos, concurrencia, url, resultados)
+
+                        fila = resultados.resumen(duracion, concurrencia, extra={
+                            "modo": modo,
+                            "llm_llamadas": llm.contadores["llamadas"],
+                            "graph_envios": graph.contadores["post"],
+                        })
+                        if modo == "async":
+                            # En async las queries no se pueden atribuir por request: total / requests
+                            if fila["requests"]:
+                                fila["queries_promedio"] = round(contador.total / fila["requests"], 2)
+                            fila["queries_max"] = "-"
+                        filas.append(fila)
+                        self.stdout.write(
+                            f"  ✔ {modo:5} concurrencia {concurrencia}: {fila['throughput_rps']} req/s, "
+                            f"p95 {fila['p95_ms']} ms, errores {fila['errores']}"
+                        )
+
+        self.stdout.write("")
+        self.stdout.write(formatear_tabla(filas, COLUMNAS))
+
+        if options['json']:
+            with open(options['json'], 'w', encoding='utf-8') as archivo:
+                json.dump({"opciones": {k: options[k] for k in (
+                    'endpoint', 'eventos', 'semilla', 'workers_sync', 'latencia_llm_ms',
+                    'latencia_graph_ms')}, "resultados": filas}, archivo, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"✅ Resultados guardados en {options['json']}"))
@@ -0,0 +1,59 @@
+# apps/api/management/commands/bench_fechas.py
+"""
+Compara apps/api/fechas_naturales.py con los bucles de ``strptime`` anteriores
+de ReservaManager (apps/api/benchmarks/fechas.py) sobre el corpus de
+apps/api/tests.py: cobertura (mensajes entendidos por completo) y tiempo por mensaje.
+
+Que cada mensaje dé la fecha, hora y duración esperadas lo verifican los tests
+(``python manage.py test apps.api``).
+
+Ejemplos:
+    python manage.py bench_fechas
+    python manage.py bench_fechas --repeticiones 5000
+"""
+import timeit
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.api.benchmarks.fechas import fecha_legado, hora_legado
+from apps.api.fechas_naturales import interpretar
+from apps.api.tests import AHORA_FECHAS, CORPUS_FECHAS, esperado
+
+
+def _legado(texto):
+    """Lo que entendía ReservaManager: el mensaje se probaba como fecha y luego como hora."""
+    fecha = fecha_legado(texto)
+    return fecha, None if fecha else hora_legado(texto)
+
+
+class Command(BaseCommand):
+    help = 'Compara el parser de fechas en lenguaje natural con los bucles de strptime anteriores'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        ahora = timezone.make_aware(AHORA_FECHAS)
+        entendidos_antes = entendidos_ahora = con_datos = 0
+        for texto, fecha, hora, duracion in CORPUS_FECHAS:
+            objetivo = esperado(fecha, hora, duracion)
+            if not any(objetivo):
+                continue
+            con_datos += 1
+            resultado = interpretar(texto, ahora)
+            entendidos_antes += _legado(texto) == objetivo[:2] and objetivo[2] is None
+            entendidos_ahora += (resultado.fecha, resultado.hora, resultado.duracion) == objetivo
+
+        self.stdout.write(
+            f"🗓️ {len(CORPUS_FECHAS)} mensajes; entendidos por completo: "
+            f"antes {entendidos_antes}/{con_datos}, ahora {entendidos_ahora}/{con_datos}"
+        )
+
+        n = options['repeticiones']
+        textos = [texto for texto, *_ in CORPUS_FECHAS]
+        antes = timeit.timeit(lambda: [_legado(t) for t in textos], number=n) / (n * len(textos)) * 1e6
+        ahora_us = timeit.timeit(lambda: [interpretar(t, ahora) for t in textos], number=n) / (n * len(textos)) * 1e6
+        self.stdout.write(f"{'':>12} {'us/mensaje':>10}")
+        self.stdout.write(f"{'strptime':>12} {antes:>10.2f}")
+        self.stdout.write(f"{'gramática':>12} {ahora_us:>10.2f}")
@@ -0,0 +1,116 @@
+# apps/api/management/commands/bench_importtime.py
+"""
+Mide el tiempo de arranque de un worker con ``python -X importtime``: carga
+Django, las apps y las URLs (lo mismo que hace gunicorn antes del primer
+request) en un proceso nuevo y suma el tiempo de cada import.
+
+Falla si se supera el presupuesto (``--umbral-ms``), si empeora más de
+``--tolerancia`` respecto de una medición guardada, o si se importa en el
+arranque algún módulo que debería cargarse recién al usarse (SDKs pesados).
+
+Ejemplos:
+    python manage.py bench_importtime
+    python manage.py bench_importtime --umbral-ms 600 --top 30
+    python manage.py bench_importtime --guardar importtime.json
+    python manage.py bench_importtime --referencia importtime.json --tolerancia 0.2
+"""
+import json
+import os
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+CODIGO_ARRANQUE = (
+    "import django; django.setup(); "
+    "from django.urls import resolve; resolve('/api/whatsapp/')"
+)
+
+
+def medir_imports(repeticiones=1):
+    """
+    Ejecuta el arranque en un proceso nuevo y devuelve ({modulo: (propio_us, acumulado_us)},
+    módulos de primer nivel). Con varias repeticiones se queda con el mínimo de
+    cada módulo (menos ruido).
+    """
+    modulos = {}
+    primer_nivel = set()
+    for _ in range(repeticiones):
+        proceso = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", CODIGO_ARRANQUE],
+            capture_output=True, text=True, env=os.environ.copy(),
+        )
+        if proceso.returncode != 0:
+            raise CommandError(f"El arranque falló:\n{proceso.stderr[-2000:]}")
+
+        for linea in proceso.stderr.splitlines():
+            if not linea.startswith("import time:") or "self [us]" in linea:
+                continue
+            propio, acumulado, nombre = linea[len("import time:"):].split("|", 2)
+            if not nombre.startswith("  "):
+                primer_nivel.add(nombre.strip())
+            nombre = nombre.strip()
+            medicion = (int(propio), int(acumulado))
+            anterior = modulos.get(nombre)
+            modulos[nombre] = medicion if anterior is None else min(anterior, medicion)
+    return modulos, primer_nivel
+
+
+class Command(BaseCommand):
+    help = 'Mide el tiempo de imports del arranque de un worker y falla si supera el presupuesto'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--umbral-ms', type=float, default=1000,
+                            help='Presupuesto total de imports en ms (default: 1000)')
+        parser.add_argument('--prohibidos', default='google.genai,openai,requests',
+                            help='Módulos que no deben importarse al arrancar (separados por coma)')
+        parser.add_argument('--top', type=int, default=15, help='Módulos más lentos a mostrar')
+        parser.add_argument('--repeticiones', type=int, default=3)
+        parser.add_argument('--referencia', default=None,
+                            help='JSON de una medición anterior para comparar')
+        parser.add_argument('--tolerancia', type=float, default=0.25,
+                            help='Empeoramiento máximo respecto de --referencia (default: 0.25 = 25%%)')
+        parser.add_argument('--guardar', default=None, help='Guarda la medición en un archivo JSON')
+
+    def handle(self, *args, **options):
+        modulos, primer_nivel = medir_imports(max(1, options['repeticiones']))
+        # El total es la suma del tiempo propio: los acumulados se solapan entre sí
+        total_ms = sum(propio for propio, _ in modulos.values()) / 1000
+
+        self.stdout.write(f"📦 {len(modulos)} módulos importados al arrancar | total {total_ms:.0f} ms")
+        self.stdout.write(f"{'acumulado ms':>13} {'propio ms':>10}  módulo")
+        raices = sorted(
+            ((nombre, modulos[nombre]) for nombre in primer_nivel),
+            key=lambda item: item[1][1], reverse=True,
+        )
+        for nombre, (propio, acumulado) in raices[:options['top']]:
+            self.stdout.write(f"{acumulado / 1000:>13.1f} {propio / 1000:>10.1f}  {nombre}")
+
+        errores = []
+        prohibidos = [p.strip() for p in options['prohibidos'].split(',') if p.strip()]
+        cargados = [p for p in prohibidos if p in modulos]
+        if cargados:
+            errores.append(f"se importan al arrancar: {', '.join(cargados)}")
+
+        if total_ms > options['umbral_ms']:
+            errores.append(f"{total_ms:.0f} ms supera el presupuesto de {options['umbral_ms']:.0f} ms")
+
+        if options['referencia']:
+            with open(options['referencia'], encoding='utf-8') as archivo:
+                referencia_ms = json.load(archivo)['total_ms']
+            limite_ms = referencia_ms * (1 + options['tolerancia'])
+            self.stdout.write(f"📏 Referencia: {referencia_ms:.0f} ms (límite {limite_ms:.0f} ms)")
+            if total_ms > limite_ms:
+                errores.append(f"{total_ms:.0f} ms empeora más de {options['tolerancia']:.0%} la referencia")
+
+        if options['guardar']:
+            with open(options['guardar'], 'w', encoding='utf-8') as archivo:
+                json.dump({
+                    "total_ms": round(total_ms, 1),
+                    "modulos": {nombre: {"propio_us": p, "acumulado_us": a} for nombre, (p, a) in modulos.items()},
+                }, archivo, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"✅ Medición guardada en {options['guardar']}"))
+
+        if errores:
+            raise CommandError("Arranque fuera de presupuesto: " + "; ".join(errores))
+        self.stdout.write(self.style.SUCCESS(f"✅ Arranque dentro del presupuesto ({total_ms:.0f} ms)"))
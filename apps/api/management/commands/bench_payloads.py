@@ -0,0 +1,84 @@
+# apps/api/management/commands/bench_payloads.py
+"""
+Microbenchmark de los constructores de payloads de WhatsApp: versión anterior
+(apps/api/benchmarks/payloads_legado.py) contra apps/api/payloads_whatsapp.py.
+
+Antes de medir verifica que ambas versiones devuelven el mismo payload para
+cada caso (salvo crear_respuesta_botones_segura, que tenía otros límites).
+
+Ejemplos:
+    python manage.py bench_payloads
+    python manage.py bench_payloads --repeticiones 50000
+"""
+import logging
+import timeit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.api import payloads_whatsapp as nuevo
+from apps.api.benchmarks import payloads_legado as legado
+
+TEXTO_CORTO = "Perfecto, su reserva quedó registrada."
+TEXTO_IA = (
+    "¡Hola! Claro que sí “con gusto” te ayudo — nuestras habitaciones tienen jacuzzi, "
+    "estacionamiento privado y aire acondicionado. El horario de atención es 24/7 – "
+    "puedes reservar por aquí mismo. ¿Te gustaría que te ayude con una reserva? "
+) * 3
+TEXTO_LARGO = "Información del motel. " * 250
+
+BOTONES_FAQ = [
+    {"type": "reply", "reply": {"id": "faq_1", "title": "¿Cuáles son los precios por hora?"}},
+    {"type": "reply", "reply": {"id": "faq_2", "title": "Horario ‘de’ atención"}},
+    {"type": "reply", "reply": {"id": "hacer_reserva", "title": "📅 Reservar"}},
+]
+BOTONES_DURACION = [nuevo.boton(*par) for par in nuevo.BOTONES_DURACION]
+BOTONES_INVALIDOS = [{"type": "reply", "reply": {"id": "", "title": "x"}}, {"tipo": "otro"}]
+
+
+def _casos():
+    """(nombre, función anterior, función nueva, fábrica de argumentos, comparar salida)."""
+    return [
+        ("texto corto", legado.crear_respuesta_texto_segura, nuevo.texto,
+         lambda: (TEXTO_CORTO,), True),
+        ("texto IA", legado.crear_respuesta_texto_segura, nuevo.texto,
+         lambda: (TEXTO_IA,), True),
+        ("texto largo", legado.crear_respuesta_texto_segura, nuevo.texto,
+         lambda: (TEXTO_LARGO,), True),
+        ("botones FAQ", legado.crear_respuesta_botones_ultra_segura, nuevo.botones,
+         lambda: (TEXTO_IA, BOTONES_FAQ), True),
+        ("botones duración", legado.crear_respuesta_botones_ultra_segura, nuevo.botones,
+         lambda: (TEXTO_CORTO, BOTONES_DURACION), True),
+        ("menú fijo duración", legado.crear_respuesta_botones_ultra_segura,
+         lambda texto, _: nuevo.menu(texto, nuevo.BOTONES_DURACION),
+         lambda: (TEXTO_CORTO, BOTONES_DURACION), True),
+        ("botones inválidos", legado.crear_respuesta_botones_ultra_segura, nuevo.botones,
+         lambda: (TEXTO_IA, BOTONES_INVALIDOS), True),
+        ("botones_segura", legado.crear_respuesta_botones_segura, nuevo.botones,
+         lambda: (TEXTO_IA, BOTONES_FAQ), False),
+        ("con botón reserva", legado.crear_respuesta_con_boton_reserva, nuevo.con_boton_reserva,
+         lambda: (TEXTO_IA, [dict(BOTONES_FAQ[0])]), True),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Compara los constructores de payloads de WhatsApp anteriores con payloads_whatsapp'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        if options['verbosity'] < 2:
+            logging.getLogger('apps').setLevel(logging.ERROR)
+
+        casos = _casos()
+        for nombre, anterior, actual, argumentos, comparar in casos:
+            if comparar and anterior(*argumentos()) != actual(*argumentos()):
+                raise CommandError(f"El payload nuevo difiere del anterior en el caso '{nombre}'")
+
+        n = options['repeticiones']
+        self.stdout.write(f"📦 {len(casos)} casos x {n} repeticiones (payloads verificados)")
+        self.stdout.write(f"{'caso':>20} {'antes us':>9} {'ahora us':>9} {'mejora':>7}")
+        for nombre, anterior, actual, argumentos, _ in casos:
+            antes = timeit.timeit(lambda: anterior(*argumentos()), number=n) / n * 1e6
+            ahora = timeit.timeit(lambda: actual(*argumentos()), number=n) / n * 1e6
+            self.stdout.write(f"{nombre:>20} {antes:>9.2f} {ahora:>9.2f} {antes / ahora:>6.1f}x")
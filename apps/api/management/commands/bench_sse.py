@@ -0,0 +1,117 @@
+# apps/api/management/commands/bench_sse.py
+"""
+Mide la latencia percibida del chat web: respuesta JSON completa vs. primer
+fragmento del endpoint SSE, con el mismo Gemini simulado.
+
+Ejemplos:
+    python manage.py bench_sse
+    python manage.py bench_sse --mensajes 50 --latencia-llm-ms 2000 --vistas async
+"""
+import asyncio
+import json
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client
+from django.urls import reverse
+
+from apps.api.benchmarks.entorno import (
+    base_de_datos_de_prueba, dependencias_externas_falsas, poblar_datos_minimos,
+)
+from apps.api.benchmarks.graph_api_falsa import GraphAPIFalsa
+from apps.api.benchmarks.llm_falso import LLMFalso
+from apps.api.benchmarks.metricas import percentil
+from apps.api.benchmarks.payloads import GeneradorPayloads
+
+RUTAS = {
+    "sync": ("web_chat", "web_chat_stream"),
+    "async": ("web_chat_async", "web_chat_stream_async"),
+}
+
+
+def _medir_sync(cuerpos, url_json, url_sse):
+    cliente = Client()
+    mediciones = []
+    for cuerpo in cuerpos:
+        datos = json.dumps(cuerpo)
+        inicio = time.perf_counter()
+        cliente.post(url_json, data=datos, content_type="application/json")
+        json_ms = (time.perf_counter() - inicio) * 1000
+
+        inicio = time.perf_counter()
+        respuesta = cliente.post(url_sse, data=datos, content_type="application/json")
+        primer_ms = None
+        for chunk in respuesta.streaming_content:
+            if primer_ms is None and b"event: delta" in chunk:
+                primer_ms = (time.perf_counter() - inicio) * 1000
+        total_ms = (time.perf_counter() - inicio) * 1000
+        mediciones.append((json_ms, primer_ms or total_ms, total_ms))
+    return mediciones
+
+
+async def _medir_async(cuerpos, url_json, url_sse):
+    from apps.api.views_async import cerrar_clientes_http
+
+    cliente = AsyncClient()
+    mediciones = []
+    try:
+        for cuerpo in cuerpos:
+            datos = json.dumps(cuerpo)
+            inicio = time.perf_counter()
+            await cliente.post(url_json, data=datos, content_type="application/json")
+            json_ms = (time.perf_counter() - inicio) * 1000
+
+            inicio = time.perf_counter()
+            respuesta = await cliente.post(url_sse, data=datos, content_type="application/json")
+            primer_ms = None
+            async for chunk in respuesta.streaming_content:
+                if primer_ms is None and b"event: delta" in chunk:
+                    primer_ms = (time.perf_counter() - inicio) * 1000
+            total_ms = (time.perf_counter() - inicio) * 1000
+            mediciones.append((json_ms, primer_ms or total_ms, total_ms))
+    finally:
+        await cerrar_clientes_http()
+    return mediciones
+
+
+class Command(BaseCommand):
+    help = 'Compara la latencia percibida del chat web: JSON completo vs. primer fragmento SSE'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mensajes', type=int, default=30)
+        parser.add_argument('--vistas', choices=sorted(RUTAS), default='sync')
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--latencia-llm-ms', type=float, default=1500)
+        parser.add_argument('--variacion-llm-ms', type=float, default=300)
+
+    def handle(self, *args, **options):
+        if options['verbosity'] < 2:
+            logging.getLogger('apps').setLevel(logging.ERROR)
+
+        ruta_json, ruta_sse = RUTAS[options['vistas']]
+        url_json, url_sse = reverse(ruta_json), reverse(ruta_sse)
+
+        with base_de_datos_de_prueba():
+            poblar_datos_minimos()
+            generador = GeneradorPayloads(semilla=options['semilla'])
+            cuerpos = [cuerpo for _, cuerpo in generador.generar_web_chat(options['mensajes'])]
+
+            llm = LLMFalso(
+                latencia_ms=options['latencia_llm_ms'],
+                variacion_ms=options['variacion_llm_ms'],
+                semilla=options['semilla'],
+            )
+            with GraphAPIFalsa() as graph, dependencias_externas_falsas(graph, llm):
+                if options['vistas'] == 'async':
+                    mediciones = asyncio.run(_medir_async(cuerpos, url_json, url_sse))
+                else:
+                    mediciones = _medir_sync(cuerpos, url_json, url_sse)
+
+        self.stdout.write(f"📦 {len(mediciones)} mensajes | LLM {options['latencia_llm_ms']:.0f}ms | vistas {options['vistas']}")
+        self.stdout.write(f"{'métrica':>22} {'p50ms':>8} {'p95ms':>8}")
+        for indice, nombre in enumerate(("JSON completo", "SSE primer fragmento", "SSE completo")):
+            valores = sorted(m[indice] for m in mediciones)
+            self.stdout.write(
+                f"{nombre:>22} {percentil(valores, 50):>8.1f} {percentil(valores, 95):>8.1f}"
+            )
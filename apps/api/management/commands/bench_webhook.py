@@ -0,0 +1,151 @@
+# apps/api/management/commands/bench_webhook.py
+"""
+Benchmark de carga del webhook de WhatsApp.
+
+Levanta una Graph API falsa y un Gemini falso en local, crea una base de datos
+de prueba aislada y repite la misma secuencia de webhooks a concurrencia
+creciente, reportando throughput, latencia de cola y queries por request.
+
+Ejemplos:
+    python manage.py bench_webhook
+    python manage.py bench_webhook --concurrencia 1,8,32 --eventos 500 --latencia-llm-ms 800
+    python manage.py bench_webhook --guardar-eventos corrida.jsonl
+    python manage.py bench_webhook --eventos-desde corrida.jsonl --json resultados.json
+"""
+import json
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from apps.api.benchmarks.entorno import (
+    base_de_datos_de_prueba, dependencias_externas_falsas, poblar_datos_minimos, reiniciar_datos,
+)
+from apps.api.benchmarks.ejecucion import ejecutar_nivel
+from apps.api.benchmarks.graph_api_falsa import GraphAPIFalsa
+from apps.api.benchmarks.llm_falso import LLMFalso
+from apps.api.benchmarks.metricas import Resultados, formatear_tabla
+from apps.api.benchmarks.payloads import GeneradorPayloads, cargar_jsonl, guardar_jsonl, parsear_mezcla
+
+
+class Command(BaseCommand):
+    help = 'Benchmark de carga del webhook de WhatsApp con Graph API y Gemini simulados'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrencia', default='1,4,16,32',
+                            help='Niveles de concurrencia separados por coma (default: 1,4,16,32)')
+        parser.add_argument('--eventos', type=int, default=200,
+                            help='Cantidad de webhooks por nivel (default: 200)')
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--clientes', type=int, default=50,
+                            help='Cantidad de números de WhatsApp distintos (default: 50)')
+        parser.add_argument('--mezcla', default=None,
+                            help="Proporción de eventos, ej: 'texto:0.6,boton:0.2,estado:0.1,lote:0.1'")
+        parser.add_argument('--latencia-llm-ms', type=float, default=300)
+        parser.add_argument('--variacion-llm-ms', type=float, default=100)
+        parser.add_argument('--fallos-llm', type=float, default=0.0,
+                            help='Probabilidad de fallo por llamada al LLM (0-1)')
+        parser.add_argument('--latencia-graph-ms', type=float, default=40)
+        parser.add_argument('--variacion-graph-ms', type=float, default=10)
+        parser.add_argument('--fallos-graph', type=float, default=0.0,
+                            help='Probabilidad de error 5xx de la Graph API (0-1)')
+        parser.add_argument('--calentamiento', type=int, default=10,
+                            help='Eventos de calentamiento antes de cada nivel (no se miden)')
+        parser.add_argument('--guardar-eventos', default=None,
+                            help='Guarda los eventos generados en un JSONL para repetir la corrida')
+        parser.add_argument('--eventos-desde', default=None,
+                            help='Repite eventos desde un JSONL en vez de generarlos')
+        parser.add_argument('--json', default=None, help='Guarda los resultados en un archivo JSON')
+
+    def handle(self, *args, **options):
+        try:
+            niveles = [int(n) for n in options['concurrencia'].split(',') if n.strip()]
+            mezcla = parsear_mezcla(options['mezcla']) if options['mezcla'] else None
+        except ValueError as e:
+            raise CommandError(f"Argumento inválido: {e}")
+
+        if options['verbosity'] < 2:
+            # Los logs INFO/WARNING del bot distorsionan la medición
+            logging.getLogger('apps').setLevel(logging.ERROR)
+
+        url = reverse('whatsapp_webhook')
+        filas = []
+
+        with base_de_datos_de_prueba():
+            ids_botones = poblar_datos_minimos()
+
+            if options['eventos_desde']:
+                eventos = cargar_jsonl(options['eventos_desde'])
+            else:
+                generador = GeneradorPayloads(
+                    semilla=options['semilla'],
+                    numero_clientes=options['clientes'],
+                    ids_botones=ids_botones,
+                    mezcla=mezcla,
+                )
+                eventos = generador.generar(options['eventos'])
+            if options['guardar_eventos']:
+                guardar_jsonl(eventos, options['guardar_eventos'])
+
+            calentamiento = GeneradorPayloads(
+                semilla=options['semilla'] + 1, ids_botones=ids_botones
+            ).generar(options['calentamiento'])
+
+            graph = GraphAPIFalsa(
+                latencia_ms=options['latencia_graph_ms'],
+                variacion_ms=options['variacion_graph_ms'],
+                tasa_fallos=options['fallos_graph'],
+                semilla=options['semilla'],
+            )
+            llm = LLMFalso(
+                latencia_ms=options['latencia_llm_ms'],
+                variacion_ms=options['variacion_llm_ms'],
+                tasa_fallos=options['fallos_llm'],
+                semilla=options['semilla'],
+            )
+
+            self.stdout.write(
+                f"📦 {len(eventos)} eventos por nivel | LLM {options['latencia_llm_ms']:.0f}ms "
+                f"(fallos {options['fallos_llm']:.0%}) | Graph {options['latencia_graph_ms']:.0f}ms "
+                f"(fallos {options['fallos_graph']:.0%})"
+            )
+
+            with graph, dependencias_externas_falsas(graph, llm):
+                for concurrencia in niveles:
+                    reiniciar_datos()
+                    if calentamiento:
+                        ejecutar_nivel(calentamiento, min(concurrencia, len(calentamiento)), url, Resultados())
+                    graph.reiniciar_contadores()
+                    llm.reiniciar_contadores()
+
+                    resultados = Resultados()
+                    duracion = ejecutar_nivel(eventos, concurrencia, url, resultados)
+                    fila = resultados.resumen(duracion, concurrencia, extra={
+                        "graph_envios": graph.contadores["post"],
+                        "graph_pruebas_conexion": graph.contadores["get"],
+                        "graph_errores": graph.contadores["error"],
+                        "llm_llamadas": llm.contadores["llamadas"],
+                        "llm_fallos": llm.contadores["fallos"],
+                    })
+                    filas.append(fila)
+                    self.stdout.write(
+                        f"  ✔ concurrencia {concurrencia}: {fila['throughput_rps']} req/s, "
+                        f"p95 {fila['p95_ms']} ms, {fila['queries_promedio']} queries/req"
+                    )
+
+        self.stdout.write("")
+        self.stdout.write(formatear_tabla(filas))
+        self.stdout.write("")
+        for fila in filas:
+            self.stdout.write(
+                f"conc {fila['concurrencia']}: Graph POST={fila['graph_envios']} "
+                f"GET={fila['graph_pruebas_conexion']} err={fila['graph_errores']} | "
+                f"LLM llamadas={fila['llm_llamadas']} fallos={fila['llm_fallos']}"
+            )
+
+        if options['json']:
+            with open(options['json'], 'w', encoding='utf-8') as archivo:
+                json.dump({"opciones": {k: options[k] for k in (
+                    'eventos', 'semilla', 'clientes', 'latencia_llm_ms', 'fallos_llm',
+                    'latencia_graph_ms', 'fallos_graph')}, "resultados": filas}, archivo, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"✅ Resultados guardados en {options['json']}"))
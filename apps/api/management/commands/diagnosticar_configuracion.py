@@ -0,0 +1,75 @@
+# apps/api/management/commands/diagnosticar_configuracion.py
+"""
+Diagnóstico de la configuración del bot (antes se imprimía en cada arranque
+de views.py y se probaba la conexión con WhatsApp en cada webhook).
+
+Ejemplos:
+    python manage.py diagnosticar_configuracion
+    python manage.py diagnosticar_configuracion --probar-conexiones
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.api import llm, views
+
+
+def _enmascarar(clave):
+    return f"{clave[:5]}...{clave[-4:]}"
+
+
+class Command(BaseCommand):
+    help = 'Revisa API Keys, SDK de Gemini y configuración de WhatsApp (una sola vez, no en cada request)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--probar-conexiones', action='store_true',
+                            help='Además llama a la Graph API de WhatsApp y a Gemini')
+
+    def handle(self, *args, **options):
+        problemas = []
+
+        # 1. API Key de Gemini
+        if llm.GEMINI_API_KEY and len(llm.GEMINI_API_KEY) > 10:
+            self.stdout.write(f"✅ GEMINI_API_KEY cargada ({_enmascarar(llm.GEMINI_API_KEY)})")
+        else:
+            self.stdout.write("❌ NO se encontró o es inválida la API Key de Gemini (GEMINI_API_KEY en .env)")
+            problemas.append("GEMINI_API_KEY")
+
+        # 2. SDK de Gemini (se importa recién aquí, igual que en la primera llamada real)
+        inicio = time.perf_counter()
+        sdk = llm._cargar_sdk()
+        import_ms = (time.perf_counter() - inicio) * 1000
+        if sdk is not None:
+            self.stdout.write(f"✅ SDK google-genai disponible (importado en {import_ms:.0f} ms)")
+        else:
+            self.stdout.write("❌ SDK google-genai no instalado (pip install google-genai)")
+            problemas.append("google-genai")
+
+        # 3. Variables de WhatsApp
+        if views.validar_configuracion_whatsapp():
+            self.stdout.write("✅ Variables de WhatsApp configuradas")
+        else:
+            self.stdout.write("❌ Faltan variables de WhatsApp (ver el log)")
+            problemas.append("WhatsApp")
+
+        if options['probar_conexiones']:
+            self.stdout.write("🔍 Probando conexiones...")
+            if views.test_whatsapp_connection():
+                self.stdout.write("✅ Conexión con la Graph API de WhatsApp exitosa")
+            else:
+                self.stdout.write("❌ Falló la conexión con la Graph API de WhatsApp")
+                problemas.append("conexión WhatsApp")
+
+            inicio = time.perf_counter()
+            texto = llm.generar_texto("Responde solo con la palabra: OK")
+            if texto:
+                self.stdout.write(
+                    f"✅ Gemini respondió en {(time.perf_counter() - inicio) * 1000:.0f} ms: {texto.strip()[:40]}"
+                )
+            else:
+                self.stdout.write("❌ Gemini no respondió (se usarán las respuestas de respaldo)")
+                problemas.append("conexión Gemini")
+
+        if problemas:
+            raise CommandError(f"Configuración incompleta: {', '.join(problemas)}")
+        self.stdout.write(self.style.SUCCESS("✅ Configuración completa"))
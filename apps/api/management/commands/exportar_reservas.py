@@ -0,0 +1,56 @@
+# apps/api/management/commands/exportar_reservas.py
+"""
+Exporta reservas a CSV o JSONL (ver apps/api/transferencia_reservas.py para las
+columnas), en streaming y con memoria acotada.
+
+Ejemplos:
+    python manage.py exportar_reservas reservas.csv
+    python manage.py exportar_reservas contabilidad-2025.jsonl.gz --desde 2025-01-01 --hasta 2025-12-31
+    python manage.py exportar_reservas - --estado completada > completadas.csv
+"""
+import datetime
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.api import transferencia_reservas
+
+
+def _fecha(texto):
+    try:
+        return datetime.date.fromisoformat(texto)
+    except ValueError:
+        raise CommandError(f"Fecha inválida '{texto}' (formato AAAA-MM-DD)")
+
+
+class Command(BaseCommand):
+    help = 'Exporta reservas a un archivo CSV o JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help="Ruta del archivo ('-' para stdout, .gz comprimido)")
+        parser.add_argument('--esquema', choices=sorted(transferencia_reservas.ESQUEMAS), default='reserva')
+        parser.add_argument('--formato', choices=['csv', 'jsonl'], help='Por defecto, según la extensión')
+        parser.add_argument('--desde', help='Fecha de creación inicial AAAA-MM-DD')
+        parser.add_argument('--hasta', help='Fecha de creación final AAAA-MM-DD (inclusive)')
+        parser.add_argument('--estado')
+        parser.add_argument('--lote', type=int, default=transferencia_reservas.TAMANO_LOTE)
+
+    def handle(self, *args, **options):
+        filtros = {}
+        if options['desde']:
+            filtros['fecha_creacion__date__gte'] = _fecha(options['desde'])
+        if options['hasta']:
+            filtros['fecha_creacion__date__lte'] = _fecha(options['hasta'])
+        if options['estado']:
+            filtros['estado'] = options['estado']
+
+        inicio = time.perf_counter()
+        total = transferencia_reservas.exportar(
+            options['archivo'], options['esquema'], options['formato'], filtros, options['lote']
+        )
+        segundos = time.perf_counter() - inicio
+        # Con '-' los datos van a stdout: el resumen va a stderr
+        salida = self.stderr if options['archivo'] == '-' else self.stdout
+        salida.write(self.style.SUCCESS(
+            f"✅ {total} reservas exportadas ({segundos:.1f}s, {total / segundos if segundos else 0:.0f} filas/s)"
+        ))
@@ -0,0 +1,69 @@
+# apps/api/management/commands/importar_reservas.py
+"""
+Importa reservas desde CSV o JSONL (ver apps/api/transferencia_reservas.py para
+las columnas). Valida y guarda por lotes; las filas con error se informan (o se
+escriben en --errores) y no detienen la importación.
+
+Ejemplos:
+    python manage.py importar_reservas historico.csv
+    python manage.py importar_reservas pms.jsonl.gz --lote 5000
+    python manage.py importar_reservas historico.csv --simular --errores rechazadas.csv
+"""
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.api import transferencia_reservas
+
+
+class Command(BaseCommand):
+    help = 'Importa reservas masivamente desde un archivo CSV o JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help="Ruta del archivo ('-' para stdin, .gz comprimido)")
+        parser.add_argument('--esquema', choices=sorted(transferencia_reservas.ESQUEMAS), default='reserva')
+        parser.add_argument('--formato', choices=['csv', 'jsonl'], help='Por defecto, según la extensión')
+        parser.add_argument('--lote', type=int, default=transferencia_reservas.TAMANO_LOTE)
+        parser.add_argument('--errores', help='CSV donde escribir las filas rechazadas (línea, error, fila)')
+        parser.add_argument('--simular', action='store_true', help='Solo valida, no guarda nada')
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError("--lote debe ser al menos 1")
+
+        archivo_errores = open(options['errores'], 'w', encoding='utf-8', newline='') if options['errores'] else None
+        escritor_errores = csv.writer(archivo_errores) if archivo_errores else None
+        mostrados = 0
+
+        def al_rechazar(numero, fila, error):
+            nonlocal mostrados
+            if escritor_errores:
+                escritor_errores.writerow([numero, error, fila])
+            elif mostrados < 20:
+                self.stderr.write(f"❌ Línea {numero}: {error}")
+                mostrados += 1
+
+        def al_avanzar(resultado):
+            self.stderr.write(
+                f"⏳ {resultado.leidas} filas, {resultado.importadas} importadas, "
+                f"{resultado.rechazadas} rechazadas ({resultado.filas_por_segundo:.0f} filas/s)"
+            )
+
+        try:
+            resultado = transferencia_reservas.importar(
+                options['archivo'], options['esquema'], options['formato'],
+                tamano_lote=options['lote'], simular=options['simular'],
+                al_rechazar=al_rechazar, al_avanzar=al_avanzar,
+            )
+        except FileNotFoundError:
+            raise CommandError(f"No existe el archivo {options['archivo']}")
+        finally:
+            if archivo_errores:
+                archivo_errores.close()
+
+        verbo = "se importarían" if options['simular'] else "importadas"
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {resultado.leidas} filas leídas: {resultado.importadas} {verbo}, "
+            f"{resultado.rechazadas} rechazadas, {resultado.clientes_creados} clientes nuevos "
+            f"({resultado.segundos:.1f}s, {resultado.filas_por_segundo:.0f} filas/s)"
+        ))
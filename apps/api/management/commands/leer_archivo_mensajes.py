@@ -0,0 +1,70 @@
+# apps/api/management/commands/leer_archivo_mensajes.py
+"""
+Lee mensajes archivados por ``archivar_mensajes`` (auditorías). Escribe una
+línea JSON por mensaje en stdout, en orden de día, sin cargar los archivos en memoria.
+
+Ejemplos:
+    python manage.py leer_archivo_mensajes --desde 2025-01-01 --hasta 2025-01-31
+    python manage.py leer_archivo_mensajes --desde 2025-01-01 --telefono 56912345678 > cliente.jsonl
+    python manage.py leer_archivo_mensajes --desde 2025-01-01 --conversacion 42 --conversacion 43
+"""
+import datetime
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.api import archivo_mensajes
+from apps.api.models import Conversacion, MensajesArchivados
+
+
+def _fecha(texto):
+    try:
+        return datetime.date.fromisoformat(texto)
+    except ValueError:
+        raise CommandError(f"Fecha inválida '{texto}' (formato AAAA-MM-DD)")
+
+
+class Command(BaseCommand):
+    help = 'Lee mensajes archivados en disco y los escribe como JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', required=True, help='AAAA-MM-DD')
+        parser.add_argument('--hasta', help='AAAA-MM-DD (por defecto, hoy)')
+        parser.add_argument('--conversacion', type=int, action='append', default=[])
+        parser.add_argument('--telefono', help='Solo las conversaciones de este cliente')
+        parser.add_argument('--directorio', default=settings.ARCHIVO_MENSAJES_DIR)
+
+    def handle(self, *args, **options):
+        desde = _fecha(options['desde'])
+        hasta = _fecha(options['hasta']) if options['hasta'] else timezone.localdate()
+        if hasta < desde:
+            raise CommandError("--hasta es anterior a --desde")
+
+        conversaciones = set(options['conversacion']) or None
+        if options['telefono']:
+            del_cliente = set(Conversacion.objects.filter(
+                cliente__telefono=options['telefono']
+            ).values_list('conversacion_id', flat=True))
+            conversaciones = del_cliente if conversaciones is None else conversaciones & del_cliente
+            if not conversaciones:
+                raise CommandError(f"No hay conversaciones para el teléfono {options['telefono']}")
+
+        if conversaciones is not None:
+            # Con filtro por conversación, solo se abren los días que tienen mensajes de ellas
+            dias = sorted(set(MensajesArchivados.objects.filter(
+                conversacion_id__in=conversaciones, fecha__range=(desde, hasta)
+            ).values_list('fecha', flat=True)))
+        else:
+            dias = None
+
+        total = 0
+        rangos = [(d, d) for d in dias] if dias is not None else [(desde, hasta)]
+        for inicio, fin in rangos:
+            for mensaje in archivo_mensajes.leer_archivo(
+                inicio, fin, options['directorio'], conversaciones
+            ):
+                self.stdout.write(json.dumps(mensaje, ensure_ascii=False))
+                total += 1
+        self.stderr.write(f"📚 {total} mensajes leídos")
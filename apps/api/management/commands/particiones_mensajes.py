@@ -0,0 +1,68 @@
+# apps/api/management/commands/particiones_mensajes.py
+"""
+Mantenimiento de las particiones mensuales de la tabla mensajes (PostgreSQL,
+ver apps/api/particiones_mensajes.py). Pensado para correr una vez al mes (cron).
+
+Ejemplos:
+    python manage.py particiones_mensajes                      # crea las de los próximos meses
+    python manage.py particiones_mensajes --convertir          # particiona una tabla existente
+    python manage.py particiones_mensajes --separar-antes-de-meses 12
+    python manage.py particiones_mensajes --separar-antes-de-meses 12 --borrar
+    python manage.py particiones_mensajes --listar
+"""
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.api import particiones_mensajes
+
+
+class Command(BaseCommand):
+    help = 'Crea, separa o lista las particiones mensuales de la tabla mensajes (PostgreSQL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--convertir', action='store_true',
+                            help='Convierte la tabla mensajes actual en particionada')
+        parser.add_argument('--meses-futuros', type=int, default=settings.MENSAJES_PARTICIONES_FUTURAS)
+        parser.add_argument('--separar-antes-de-meses', type=int,
+                            help='Separa las particiones de más de estos meses (DETACH, conserva los datos)')
+        parser.add_argument('--borrar', action='store_true',
+                            help='Con --separar-antes-de-meses, borra las particiones separadas')
+        parser.add_argument('--listar', action='store_true')
+
+    def handle(self, *args, **options):
+        if not particiones_mensajes.disponible(connection):
+            self.stdout.write(f"ℹ️ Base {connection.vendor}: mensajes es una tabla única, no hay particiones")
+            return
+        if options['borrar'] and options['separar_antes_de_meses'] is None:
+            raise CommandError("--borrar requiere --separar-antes-de-meses")
+
+        with transaction.atomic():
+            if options['convertir']:
+                if particiones_mensajes.convertir_a_particionada(connection, options['meses_futuros']):
+                    self.stdout.write(self.style.SUCCESS("✅ Tabla mensajes convertida a particionada"))
+                else:
+                    self.stdout.write("ℹ️ La tabla mensajes ya estaba particionada")
+            elif not particiones_mensajes.esta_particionada(connection):
+                raise CommandError("La tabla mensajes no está particionada (usar --convertir)")
+
+            creadas = particiones_mensajes.crear_particiones(connection, options['meses_futuros'])
+            if creadas:
+                self.stdout.write(f"🧱 Particiones creadas: {', '.join(creadas)}")
+
+            if options['separar_antes_de_meses'] is not None:
+                hoy = timezone.now()
+                mes, anio = hoy.month - options['separar_antes_de_meses'], hoy.year
+                while mes < 1:
+                    mes, anio = mes + 12, anio - 1
+                antes_de = datetime.datetime(anio, mes, 1, tzinfo=datetime.timezone.utc)
+                separadas = particiones_mensajes.separar_particiones(connection, antes_de, options['borrar'])
+                accion = "borradas" if options['borrar'] else "separadas"
+                self.stdout.write(f"✂️ {len(separadas)} particiones {accion}: {', '.join(separadas) or '-'}")
+
+        if options['listar']:
+            for nombre, mes in particiones_mensajes.listar_particiones(connection):
+                self.stdout.write(f"  {nombre}" + (f"  ({mes:%Y-%m})" if mes else "  (por defecto)"))
@@ -0,0 +1,60 @@
+# apps/api/management/commands/recalcular_estadisticas.py
+"""
+Recalcula las estadísticas diarias del dashboard (ver apps/api/estadisticas.py)
+desde las tablas reservas y clientes. Sirve para la carga inicial (--todo) y
+para corregir desvíos después de cambios masivos que no disparan señales.
+
+Ejemplos:
+    python manage.py recalcular_estadisticas              # últimos 7 días
+    python manage.py recalcular_estadisticas --desde 2025-01-01 --hasta 2025-06-30
+    python manage.py recalcular_estadisticas --todo
+"""
+import datetime
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+
+from apps.api import estadisticas
+from apps.api.models import Cliente, Reserva
+
+
+class Command(BaseCommand):
+    help = 'Recalcula las estadísticas diarias del dashboard'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=datetime.date.fromisoformat, help='Fecha inicial AAAA-MM-DD')
+        parser.add_argument('--hasta', type=datetime.date.fromisoformat, help='Fecha final AAAA-MM-DD (por defecto hoy)')
+        parser.add_argument('--dias', type=int, default=7, help='Sin --desde: recalcular los últimos N días')
+        parser.add_argument('--todo', action='store_true', help='Desde la primera reserva o cliente')
+
+    def handle(self, *args, **options):
+        hasta = options['hasta'] or timezone.localdate()
+        if options['todo']:
+            primeras = [
+                Reserva.objects.aggregate(m=Min('fecha_creacion'))['m'],
+                Cliente.objects.aggregate(m=Min('fecha_registro'))['m'],
+            ]
+            primeras = [timezone.localdate(f) for f in primeras if f]
+            desde = min(primeras) if primeras else hasta
+        else:
+            desde = options['desde'] or hasta - datetime.timedelta(days=options['dias'] - 1)
+        if desde > hasta:
+            raise CommandError("--desde debe ser anterior a --hasta")
+
+        inicio = time.perf_counter()
+        dias = 0
+        # Por meses, para no cargar años de agrupaciones de una vez
+        tramo = desde
+        while tramo <= hasta:
+            fin_tramo = min(hasta, (tramo.replace(day=1) + datetime.timedelta(days=32)).replace(day=1)
+                            - datetime.timedelta(days=1))
+            dias += estadisticas.recalcular(tramo, fin_tramo, rehacer_acumulado=False)
+            tramo = fin_tramo + datetime.timedelta(days=1)
+        estadisticas.recalcular_acumulado()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Estadísticas recalculadas del {desde} al {hasta}: {dias} días con datos "
+            f"({time.perf_counter() - inicio:.1f}s)"
+        ))
@@ -0,0 +1,147 @@
+# apps/api/menu_faq.py
+"""
+Menú de preguntas frecuentes y saludo inicial en caché, compartido por
+WhatsApp, el chat web y PreguntasFrecuentesView.
+
+El menú se arma una vez desde la BD y se guarda en la caché de Django bajo una
+clave versionada (``faq:menu:<version>``). Guardar o borrar una
+PreguntaFrecuente cambia la versión (señales post_save/post_delete conectadas
+en ApiConfig.ready), así que la próxima lectura vuelve a la BD. Si un worker
+estaba armando el menú justo durante el cambio, lo guarda bajo la versión
+anterior y nadie lo vuelve a leer.
+
+La versión sirve también como ETag de /api/preguntas-frecuentes/ (y el máximo
+``fecha_modificacion`` de las FAQ activas, como Last-Modified).
+
+Nota: ``QuerySet.update()`` no dispara señales; después de un update masivo
+llamar a ``invalidar_menu()``.
+"""
+import logging
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+
+from .models import PreguntaFrecuente
+
+logger = logging.getLogger(__name__)
+
+CLAVE_VERSION = "faq:menu:version"
+PREFIJO_MENU = "faq:menu:"
+# Preguntas que se guardan: el máximo que muestra cualquiera de los canales
+MAXIMO_PREGUNTAS = 10
+
+
+def _version():
+    version = cache.get(CLAVE_VERSION)
+    if version is None:
+        # Primera lectura (o la caché perdió la clave): una versión nueva nunca usada
+        cache.add(CLAVE_VERSION, time.time_ns(), None)
+        version = cache.get(CLAVE_VERSION)
+    return version
+
+
+def _como_dict(p):
+    return {
+        'id': p.pregunta_frecuenta_id,
+        'pregunta_corta': p.pregunta_corta_boton,
+        'pregunta_larga': p.pregunta_larga,
+        'respuesta': p.respuesta,
+    }
+
+
+def _armar_desde_bd(version):
+    saludo = PreguntaFrecuente.objects.filter(
+        es_saludo_inicial=True,
+        activo=True
+    ).first()
+
+    preguntas = PreguntaFrecuente.objects.filter(
+        activo=True
+    ).exclude(
+        es_saludo_inicial=True
+    ).order_by('pregunta_frecuenta_id')[:MAXIMO_PREGUNTAS]
+
+    ultima_modificacion = PreguntaFrecuente.objects.filter(
+        activo=True
+    ).aggregate(ultima=Max('fecha_modificacion'))['ultima']
+
+    logger.info(f"📋 Menú de preguntas frecuentes cargado desde BD (versión {version})")
+    return {
+        "version": version,
+        "ultima_modificacion": int(ultima_modificacion.timestamp()) if ultima_modificacion else None,
+        "saludo": saludo.respuesta if saludo else None,
+        "preguntas": [_como_dict(p) for p in preguntas],
+    }
+
+
+def obtener_menu():
+    """
+    Devuelve el menú actual: ``{"version", "ultima_modificacion", "saludo", "preguntas"}``.
+    ``saludo`` es la respuesta de la pregunta marcada como saludo inicial (o None);
+    ``ultima_modificacion`` es el máximo ``fecha_modificacion`` de las FAQ activas
+    (timestamp Unix, para Last-Modified).
+    """
+    version = _version()
+    clave = f"{PREFIJO_MENU}{version}"
+    menu = cache.get(clave)
+    if menu is None:
+        menu = _armar_desde_bd(version)
+        cache.set(clave, menu, None)
+    return menu
+
+
+def etag_menu(menu=None):
+    """ETag de la versión del menú (la del menú recibido, si se pasa)."""
+    version = menu["version"] if menu else _version()
+    return f'"faq-{version}"'
+
+
+def preguntas_menu(cantidad, menu=None):
+    """Las primeras ``cantidad`` preguntas con texto de botón."""
+    menu = menu or obtener_menu()
+    return [p for p in menu["preguntas"] if p['pregunta_corta']][:cantidad]
+
+
+def botones_whatsapp(cantidad, menu=None):
+    """Botones de WhatsApp (id ``faq_<id>``) para las primeras ``cantidad`` preguntas."""
+    return [
+        {
+            "type": "reply",
+            "reply": {
+                "id": f"faq_{p['id']}",
+                "title": p['pregunta_corta'].strip()[:20]
+            }
+        }
+        for p in preguntas_menu(cantidad, menu)
+    ]
+
+
+def botones_web(cantidad, menu=None):
+    """Botones del chat web para las primeras ``cantidad`` preguntas."""
+    return [
+        {
+            'id': f"faq_{p['id']}",
+            'texto': p['pregunta_corta'],
+            'pregunta_completa': p['pregunta_larga']
+        }
+        for p in preguntas_menu(cantidad, menu)
+    ]
+
+
+def pregunta_por_id(faq_id):
+    """Pregunta activa como dict (del menú en caché o, si no está, de la BD); None si no existe."""
+    for p in obtener_menu()["preguntas"]:
+        if p['id'] == faq_id:
+            return p
+    pregunta = PreguntaFrecuente.objects.filter(pregunta_frecuenta_id=faq_id, activo=True).first()
+    return _como_dict(pregunta) if pregunta else None
+
+
+def invalidar_menu(**kwargs):
+    """Cambia la versión del menú (después del commit, para no cachear datos sin confirmar)."""
+    def _nueva_version():
+        cache.set(CLAVE_VERSION, time.time_ns(), None)
+        logger.info("🔄 Menú de preguntas frecuentes invalidado")
+    transaction.on_commit(_nueva_version)
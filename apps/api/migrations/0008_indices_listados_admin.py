@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-19 08:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_reserva_duracion_reserva_origen_reserva_precio_total_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='conversacion',
+            index=models.Index(fields=['inicio_conversacion', 'conversacion_id'], name='conv_inicio_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mensaje',
+            index=models.Index(fields=['conversacion', 'timestamp'], name='mensajes_conv_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mensaje',
+            index=models.Index(fields=['timestamp', 'mensaje_id'], name='mensajes_ts_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='preguntadesconocida',
+            index=models.Index(fields=['fecha_recibida', 'pregunta_desconocida_id'], name='preg_desc_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='preguntadesconocida',
+            index=models.Index(fields=['revisada', 'fecha_recibida'], name='preg_desc_revisada_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['fecha_creacion', 'reserva_id'], name='reservas_creacion_id_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Índice trigram para la búsqueda del admin en preguntas desconocidas (solo PostgreSQL).
+# El admin busca con icontains, que Django traduce a UPPER(col) LIKE UPPER(%texto%):
+# el índice se crea sobre UPPER(texto_pregunta) para que el planner lo pueda usar.
+import logging
+
+from django.db import migrations, transaction
+
+logger = logging.getLogger(__name__)
+
+INDICE = 'preg_desc_texto_trgm_idx'
+
+
+def crear_indice(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    except Exception as e:
+        # Sin permisos para crear la extensión: la búsqueda sigue funcionando, sin índice
+        logger.warning(f"⚠️ No se pudo habilitar pg_trgm ({e}); se omite {INDICE}")
+        return
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {INDICE} ON preguntas_desconocida '
+        f'USING gin (UPPER(texto_pregunta) gin_trgm_ops)'
+    )
+
+
+def borrar_indice(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {INDICE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_indices_listados_admin'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice, borrar_indice),
+    ]
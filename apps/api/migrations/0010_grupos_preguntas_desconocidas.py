@@ -0,0 +1,36 @@
+# Generated by Django 5.2.5 on 2026-10-19 08:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_indice_trigram_preguntas_desconocidas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GrupoPreguntasDesconocidas',
+            fields=[
+                ('grupo_id', models.AutoField(primary_key=True, serialize=False)),
+                ('texto_representante', models.TextField(verbose_name='Texto representante')),
+                ('cantidad', models.PositiveIntegerField(default=0, verbose_name='Cantidad de preguntas')),
+                ('revisado', models.BooleanField(default=False)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('representante', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.preguntadesconocida', verbose_name='Pregunta representante')),
+            ],
+            options={
+                'verbose_name': 'Grupo de Preguntas Desconocidas',
+                'verbose_name_plural': 'Grupos de Preguntas Desconocidas',
+                'db_table': 'grupos_preguntas_desconocidas',
+                'ordering': ['-cantidad'],
+            },
+        ),
+        migrations.AddField(
+            model_name='preguntadesconocida',
+            name='grupo',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='preguntas', to='api.grupopreguntasdesconocidas'),
+        ),
+    ]
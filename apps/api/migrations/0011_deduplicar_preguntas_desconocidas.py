@@ -0,0 +1,65 @@
+# Generated by Django 5.2.5 on 2026-10-19 08:45
+# Editada a mano: el índice único sobre hash_texto se crea después de calcular
+# los hashes y fusionar las filas repetidas (se conserva la más antigua de cada
+# texto, con la suma de ocurrencias y la fecha de la última).
+
+from django.db import migrations, models
+
+from apps.api.agrupador_preguntas import hash_texto
+
+
+def fusionar_repetidas(apps, schema_editor):
+    PreguntaDesconocida = apps.get_model('api', 'PreguntaDesconocida')
+    conservadas = {}
+    borrar = []
+    for pregunta in PreguntaDesconocida.objects.order_by('pregunta_desconocida_id').iterator(chunk_size=2000):
+        clave = hash_texto(pregunta.texto_pregunta)
+        original = conservadas.get(clave)
+        if original is None:
+            pregunta.hash_texto = clave
+            pregunta.fecha_ultima_vez = pregunta.fecha_recibida
+            conservadas[clave] = pregunta
+            continue
+        original.ocurrencias += 1
+        original.fecha_ultima_vez = max(original.fecha_ultima_vez, pregunta.fecha_recibida)
+        original.revisada = original.revisada and pregunta.revisada
+        borrar.append(pregunta.pregunta_desconocida_id)
+
+    for i in range(0, len(borrar), 1000):
+        PreguntaDesconocida.objects.filter(pregunta_desconocida_id__in=borrar[i:i + 1000]).delete()
+    PreguntaDesconocida.objects.bulk_update(
+        list(conservadas.values()),
+        ['hash_texto', 'ocurrencias', 'fecha_ultima_vez', 'revisada'],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_grupos_preguntas_desconocidas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='preguntadesconocida',
+            name='fecha_ultima_vez',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Última vez recibida'),
+        ),
+        migrations.AddField(
+            model_name='preguntadesconocida',
+            name='hash_texto',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='preguntadesconocida',
+            name='ocurrencias',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.RunPython(fusionar_repetidas, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='preguntadesconocida',
+            name='hash_texto',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+    ]
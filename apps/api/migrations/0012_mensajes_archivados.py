@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-19 08:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_deduplicar_preguntas_desconocidas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MensajesArchivados',
+            fields=[
+                ('mensajes_archivados_id', models.AutoField(primary_key=True, serialize=False)),
+                ('fecha', models.DateField()),
+                ('cantidad_mensajes', models.PositiveIntegerField(default=0)),
+                ('primer_mensaje', models.DateTimeField()),
+                ('ultimo_mensaje', models.DateTimeField()),
+                ('archivo', models.CharField(help_text='Ruta relativa a ARCHIVO_MENSAJES_DIR', max_length=255)),
+                ('fecha_archivado', models.DateTimeField(auto_now_add=True)),
+                ('conversacion', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archivados', to='api.conversacion')),
+            ],
+            options={
+                'verbose_name': 'Mensajes Archivados',
+                'verbose_name_plural': 'Mensajes Archivados',
+                'db_table': 'mensajes_archivados',
+                'constraints': [models.UniqueConstraint(fields=('conversacion', 'fecha'), name='mensajes_archivados_conv_fecha_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Particiona la tabla mensajes por mes si MENSAJES_PARTICIONADOS=True y la base es
+# PostgreSQL (ver apps/api/particiones_mensajes.py). En SQLite, o sin la opción,
+# no hace nada y mensajes sigue siendo una tabla normal.
+# Copia todas las filas: en tablas grandes conviene aplicarla en una ventana de mantenimiento.
+from django.conf import settings
+from django.db import migrations
+
+from apps.api import particiones_mensajes
+
+
+def particionar(apps, schema_editor):
+    if getattr(settings, 'MENSAJES_PARTICIONADOS', False):
+        particiones_mensajes.convertir_a_particionada(schema_editor.connection)
+
+
+def deshacer(apps, schema_editor):
+    particiones_mensajes.convertir_a_tabla_simple(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_mensajes_archivados'),
+    ]
+
+    operations = [
+        migrations.RunPython(particionar, deshacer),
+    ]
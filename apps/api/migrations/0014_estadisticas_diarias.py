@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-19 08:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_particionar_mensajes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticaDiaria',
+            fields=[
+                ('fecha', models.DateField(primary_key=True, serialize=False)),
+                ('reservas', models.IntegerField(default=0)),
+                ('ingresos', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('clientes_nuevos', models.IntegerField(default=0)),
+                ('reservas_por_estado', models.JSONField(default=dict)),
+                ('reservas_por_origen', models.JSONField(default=dict)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Estadística Diaria',
+                'verbose_name_plural': 'Estadísticas Diarias',
+                'db_table': 'estadisticas_diarias',
+            },
+        ),
+    ]
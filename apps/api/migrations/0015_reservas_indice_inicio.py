@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-19 08:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_estadisticas_diarias'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['fecha_hora_inicio', 'reserva_id'], name='reservas_inicio_id_idx'),
+        ),
+    ]
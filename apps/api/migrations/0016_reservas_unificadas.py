@@ -0,0 +1,100 @@
+# Generated by Django 5.2.5 on 2026-10-19 09:08
+# Editada a mano: copia cada fila de reservas_whatsapp a reservas (una sola tabla
+# de reservas; la original queda enlazada en reserva_whatsapp). Se conservan las
+# fechas de creación. bulk_create no dispara señales: después de migrar, correr
+#     python manage.py recalcular_estadisticas --todo
+
+import datetime
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def _intervalo(reserva):
+    inicio = timezone.make_aware(datetime.datetime.combine(reserva.fecha_reserva, reserva.hora_inicio))
+    if reserva.horas_reservadas:
+        return inicio, inicio + datetime.timedelta(hours=reserva.horas_reservadas)
+    fin = timezone.make_aware(datetime.datetime.combine(reserva.fecha_reserva, reserva.hora_fin))
+    if fin <= inicio:
+        fin += datetime.timedelta(days=1)  # pasa la medianoche
+    return inicio, fin
+
+
+def copiar_reservas_whatsapp(apps, schema_editor):
+    ReservaWhatsApp = apps.get_model('reservas', 'ReservaWhatsApp')
+    Reserva = apps.get_model('api', 'Reserva')
+    for campo in ('fecha', 'fecha_creacion'):
+        Reserva._meta.get_field(campo).auto_now_add = False  # modelo histórico: solo dentro de esta migración
+
+    copiadas = set(
+        Reserva.objects.filter(reserva_whatsapp__isnull=False).values_list('reserva_whatsapp_id', flat=True)
+    )
+    lote = []
+    for reserva in ReservaWhatsApp.objects.select_related('cliente').order_by('reserva_id').iterator(chunk_size=2000):
+        if reserva.reserva_id in copiadas:
+            continue
+        inicio, fin = _intervalo(reserva)
+        lote.append(Reserva(
+            cliente_id=reserva.cliente_id,
+            habitacion_id=reserva.habitacion_id,
+            fecha=reserva.fecha_creacion,
+            fecha_creacion=reserva.fecha_creacion,
+            fecha_hora_inicio=inicio,
+            fecha_hora_fin=fin,
+            estado=reserva.estado if reserva.activo else 'cancelada',
+            fecha_llegada=reserva.fecha_hora_llegada,
+            telefono=reserva.cliente.telefono,
+            duracion=reserva.horas_reservadas or round((fin - inicio).total_seconds() / 3600),
+            precio_total=reserva.precio_total,
+            origen='whatsapp',
+            numero_personas=reserva.numero_personas,
+            observaciones=reserva.observaciones,
+            confirmada_por=reserva.confirmada_por_funcionario,
+            reserva_whatsapp_id=reserva.reserva_id,
+        ))
+        if len(lote) >= 1000:
+            Reserva.objects.bulk_create(lote)
+            lote = []
+    Reserva.objects.bulk_create(lote)
+
+
+def borrar_copias(apps, schema_editor):
+    Reserva = apps.get_model('api', 'Reserva')
+    Reserva.objects.filter(reserva_whatsapp__isnull=False).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_reservas_indice_inicio'),
+        ('reservas', '0003_estado_conversacion_por_cliente'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reserva',
+            name='confirmada_por',
+            field=models.CharField(blank=True, help_text='Teléfono del funcionario que confirmó la llegada', max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='reserva',
+            name='numero_personas',
+            field=models.PositiveSmallIntegerField(default=2),
+        ),
+        migrations.AddField(
+            model_name='reserva',
+            name='observaciones',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reserva',
+            name='reserva_whatsapp',
+            field=models.OneToOneField(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reserva', to='reservas.reservawhatsapp'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['habitacion', 'fecha_hora_inicio'], name='reservas_hab_inicio_idx'),
+        ),
+        migrations.RunPython(copiar_reservas_whatsapp, borrar_copias),
+    ]
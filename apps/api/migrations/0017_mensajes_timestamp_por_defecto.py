@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-19 09:23
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_reservas_unificadas'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mensaje',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -2,6 +2,7 @@
 from django.db import models
 from django.utils import timezone # Asegúrate de que timezone esté importado
 from django.contrib.auth.models import User
+from .agrupador_preguntas import hash_texto
 
 class BaseModel(models.Model):
     """Modelo base que contiene campos comunes para todos los modelos"""
@@ -34,24 +35,63 @@ class Conversacion(BaseModel):
 
     class Meta:
         db_table = 'conversaciones' # Nombre de la tabla en plural
+        indexes = [
+            models.Index(fields=['inicio_conversacion', 'conversacion_id'], name='conv_inicio_id_idx'),
+        ]
 
     def __str__(self):
         return f"Conversación con {self.cliente.telefono} ({self.conversacion_id})"
 
+    def mensajes(self):
+        """
+        Mensajes de la conversación acotados a su inicio: con la tabla particionada
+        por mes (ver apps/api/particiones_mensajes.py) solo se leen las particiones
+        desde ese mes en adelante.
+        """
+        return Mensaje.objects.filter(conversacion=self, timestamp__gte=self.inicio_conversacion)
+
 class Mensaje(models.Model):
     mensaje_id = models.AutoField(primary_key=True)
     conversacion = models.ForeignKey(Conversacion, on_delete=models.SET_NULL, null=True)
     remitente = models.CharField(max_length=50) # 'cliente' o 'agente'
     contenido = models.TextField()
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # default (no auto_now_add): la escritura diferida del chat web guarda la hora real de cada mensaje
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         db_table = 'mensajes' # Nombre de la tabla en plural
         ordering = ['timestamp'] # Ordenar mensajes por tiempo
+        indexes = [
+            # Historial de una conversación y listado del admin (orden + cursor)
+            models.Index(fields=['conversacion', 'timestamp'], name='mensajes_conv_ts_idx'),
+            models.Index(fields=['timestamp', 'mensaje_id'], name='mensajes_ts_id_idx'),
+        ]
 
     def __str__(self):
         return f"[{self.timestamp}] {self.remitente}: {self.contenido[:50]}..."
 
+class MensajesArchivados(models.Model):
+    """Resumen de los mensajes de una conversación y día movidos al archivo en disco (ver apps/api/archivo_mensajes.py)."""
+    mensajes_archivados_id = models.AutoField(primary_key=True)
+    conversacion = models.ForeignKey(Conversacion, on_delete=models.SET_NULL, null=True, related_name='archivados')
+    fecha = models.DateField()
+    cantidad_mensajes = models.PositiveIntegerField(default=0)
+    primer_mensaje = models.DateTimeField()
+    ultimo_mensaje = models.DateTimeField()
+    archivo = models.CharField(max_length=255, help_text="Ruta relativa a ARCHIVO_MENSAJES_DIR")
+    fecha_archivado = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'mensajes_archivados'
+        verbose_name = "Mensajes Archivados"
+        verbose_name_plural = "Mensajes Archivados"
+        constraints = [
+            models.UniqueConstraint(fields=['conversacion', 'fecha'], name='mensajes_archivados_conv_fecha_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.cantidad_mensajes} mensajes de la conversación {self.conversacion_id} ({self.fecha})"
+
 class TipoHabitacion(BaseModel):
     """Representa un tipo de habitación del motel."""
     tipo_habitacion_id = models.AutoField(primary_key=True)
@@ -138,13 +178,48 @@ class Reserva(models.Model):
         ('whatsapp', 'WhatsApp'),
         ('telefono', 'Teléfono'),
     ])
+    numero_personas = models.PositiveSmallIntegerField(default=2)
+    observaciones = models.TextField(blank=True, null=True)
+    confirmada_por = models.CharField(
+        max_length=20, blank=True, null=True, help_text="Teléfono del funcionario que confirmó la llegada"
+    )
+    # Fila de reservas_whatsapp de la que se copió (migración 0016); las reservas nuevas no la tienen
+    reserva_whatsapp = models.OneToOneField(
+        'reservas.ReservaWhatsApp', on_delete=models.SET_NULL, null=True, blank=True,
+        editable=False, related_name='reserva',
+    )
     
     class Meta:
         db_table = 'reservas'
+        indexes = [
+            models.Index(fields=['fecha_creacion', 'reserva_id'], name='reservas_creacion_id_idx'),
+            # Cursor de la API de reservas (apps/api/views_api.py)
+            models.Index(fields=['fecha_hora_inicio', 'reserva_id'], name='reservas_inicio_id_idx'),
+            # Choques de horario por habitación (apps/api/disponibilidad.py)
+            models.Index(fields=['habitacion', 'fecha_hora_inicio'], name='reservas_hab_inicio_idx'),
+        ]
 
     def __str__(self):
         return f"Reserva de {self.habitacion.nombre_habitacion if self.habitacion else 'Habitación'} por {self.cliente.nombre_cliente if self.cliente else 'Cliente'}"
 
+class EstadisticaDiaria(models.Model):
+    """Totales de un día para el dashboard, mantenidos por señales (ver apps/api/estadisticas.py)."""
+    fecha = models.DateField(primary_key=True)  # 0001-01-01 = acumulado histórico
+    reservas = models.IntegerField(default=0)
+    ingresos = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    clientes_nuevos = models.IntegerField(default=0)
+    reservas_por_estado = models.JSONField(default=dict)
+    reservas_por_origen = models.JSONField(default=dict)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'estadisticas_diarias'
+        verbose_name = "Estadística Diaria"
+        verbose_name_plural = "Estadísticas Diarias"
+
+    def __str__(self):
+        return f"Estadísticas del {self.fecha}: {self.reservas} reservas"
+
 class BaseConocimiento(BaseModel):
     base_conocimiento_id = models.AutoField(primary_key=True)
     pregunta = models.TextField(unique=True)
@@ -157,6 +232,31 @@ class BaseConocimiento(BaseModel):
     def __str__(self):
         return self.pregunta[:75] + "..." if len(self.pregunta) > 75 else self.pregunta
     
+class GrupoPreguntasDesconocidas(models.Model):
+    """Preguntas desconocidas casi idénticas agrupadas por ``manage.py agrupar_preguntas_desconocidas``."""
+    grupo_id = models.AutoField(primary_key=True)
+    representante = models.ForeignKey(
+        'PreguntaDesconocida',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name="Pregunta representante"
+    )
+    texto_representante = models.TextField(verbose_name="Texto representante")
+    cantidad = models.PositiveIntegerField(default=0, verbose_name="Cantidad de preguntas")
+    revisado = models.BooleanField(default=False)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'grupos_preguntas_desconocidas'
+        verbose_name = "Grupo de Preguntas Desconocidas"
+        verbose_name_plural = "Grupos de Preguntas Desconocidas"
+        ordering = ['-cantidad']
+
+    def __str__(self):
+        return f"'{self.texto_representante[:50]}' ({self.cantidad})"
+
 class PreguntaDesconocida(models.Model):
     """Almacena preguntas que el bot no pudo responder para revisión humana."""
     pregunta_desconocida_id = models.AutoField(primary_key=True)
@@ -175,15 +275,37 @@ class PreguntaDesconocida(models.Model):
         default=False, 
         help_text="Marcar cuando la pregunta haya sido gestionada."
     )
+    grupo = models.ForeignKey(
+        GrupoPreguntasDesconocidas,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='preguntas'
+    )
+    # Deduplicación: hash del texto normalizado (ver apps/api/preguntas_desconocidas.py);
+    # una pregunta repetida suma ocurrencias en vez de crear otra fila
+    hash_texto = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
+    ocurrencias = models.PositiveIntegerField(default=1)
+    fecha_ultima_vez = models.DateTimeField(null=True, blank=True, verbose_name="Última vez recibida")
     
     class Meta:
         db_table = 'preguntas_desconocida'
         verbose_name = "Pregunta Desconocida"
         verbose_name_plural = "Preguntas Desconocidas"
         ordering = ['-fecha_recibida']
+        indexes = [
+            # Orden del admin y cursor (fecha_recibida, pk); filtro "revisada"
+            models.Index(fields=['fecha_recibida', 'pregunta_desconocida_id'], name='preg_desc_fecha_id_idx'),
+            models.Index(fields=['revisada', 'fecha_recibida'], name='preg_desc_revisada_idx'),
+        ]
         
     def __str__(self):
         return f"'{self.texto_pregunta[:50]}...' (Recibida: {self.fecha_recibida.strftime('%d-%m-%Y')})"
+
+    def save(self, *args, **kwargs):
+        if not self.hash_texto:
+            self.hash_texto = hash_texto(self.texto_pregunta)
+        super().save(*args, **kwargs)
     
 class Persona(BaseModel):
     """Modelo para personas"""
@@ -0,0 +1,133 @@
+# apps/api/notificaciones.py
+"""
+Avisos al huésped por WhatsApp (reserva confirmada, llegada registrada,
+habitación liberada), enviados desde hilos en segundo plano.
+
+Antes el funcionario que confirmaba una reserva tendría que esperar una segunda
+llamada a la Graph API antes de recibir su propia respuesta. Ahora
+``servicio_reservas`` arma el aviso con la reserva ya cargada y lo encola al
+hacer commit la transacción (si hay rollback, no se avisa). Los hilos
+``notificaciones-whatsapp-N`` (NOTIFICACIONES_HILOS) se inician con el primer
+aviso, esperan bloqueados en la cola (sin intervalo de sondeo) y envían cada
+aviso apenas llega, sin tocar la BD; los avisos de un comando en lote
+("confirmar 101 102 105") salen en paralelo.
+
+Notas:
+    - Con NOTIFICAR_HUESPEDES=False los avisos solo se registran en el log.
+    - Si el proceso muere se pierden los avisos que seguían en la cola; al salir
+      normalmente se envía lo pendiente (atexit).
+    - Fuera de la ventana de 24 h de WhatsApp la Graph API rechaza el texto libre:
+      el error queda en el log (interpretar_respuesta_whatsapp) y no se reintenta.
+"""
+import atexit
+import logging
+import queue
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def _enviar_whatsapp(telefono, payload):
+    from .views import send_whatsapp_message  # views importa servicio_reservas, que importa este módulo
+
+    return send_whatsapp_message(telefono, payload)
+
+
+class ColaNotificaciones:
+    """Cola FIFO de (teléfono, payload) que ``hilos`` hilos daemon envían en paralelo."""
+
+    def __init__(self, enviar=_enviar_whatsapp, hilos=4):
+        self.enviar = enviar
+        self.hilos = max(1, hilos)
+        self._cola = queue.Queue()
+        self._lock = threading.Lock()
+        self._iniciada = False
+
+    def agregar(self, telefono, payload):
+        self._cola.put((telefono, payload))
+        with self._lock:
+            if not self._iniciada:
+                for i in range(self.hilos):
+                    threading.Thread(
+                        target=self._bucle, name=f"notificaciones-whatsapp-{i}", daemon=True
+                    ).start()
+                self._iniciada = True
+
+    def _enviar(self, telefono, payload):
+        try:
+            if not self.enviar(telefono, payload):
+                logger.error(f"❌ No se pudo avisar al huésped {telefono}")
+        except Exception as e:
+            logger.error(f"💥 Error enviando aviso a {telefono}: {e}")
+
+    def vaciar(self):
+        """Envía en el hilo actual lo que quede en la cola. Devuelve la cantidad de avisos."""
+        enviados = 0
+        while True:
+            try:
+                telefono, payload = self._cola.get_nowait()
+            except queue.Empty:
+                return enviados
+            self._enviar(telefono, payload)
+            self._cola.task_done()
+            enviados += 1
+
+    def esperar(self):
+        """Bloquea hasta que los hilos enviaron todo lo encolado (benchmarks y scripts)."""
+        self._cola.join()
+
+    def _bucle(self):
+        while True:
+            telefono, payload = self._cola.get()
+            self._enviar(telefono, payload)
+            self._cola.task_done()
+
+
+cola = ColaNotificaciones(hilos=getattr(settings, 'NOTIFICACIONES_HILOS', 4))
+atexit.register(cola.vaciar)
+
+
+def encolar(telefono, texto):
+    """Encola un aviso de texto para cuando la transacción en curso haga commit."""
+    if not telefono:
+        return
+    if not getattr(settings, 'NOTIFICAR_HUESPEDES', True):
+        logger.info(f"🔕 Aviso a {telefono} omitido (NOTIFICAR_HUESPEDES=False)")
+        return
+    payload = {"type": "text", "text": {"body": texto}}
+    transaction.on_commit(lambda: cola.agregar(telefono, payload))
+
+
+def _habitacion(reserva):
+    return reserva.habitacion.nombre_habitacion if reserva.habitacion else "Habitación"
+
+
+def reserva_confirmada(reserva):
+    inicio = timezone.localtime(reserva.fecha_hora_inicio)
+    encolar(
+        reserva.telefono,
+        f"✅ *¡Tu reserva #{reserva.reserva_id} está confirmada!*\n\n"
+        f"📅 {inicio.strftime('%d/%m/%Y')}\n"
+        f"🕐 {inicio.strftime('%H:%M')} - {timezone.localtime(reserva.fecha_hora_fin).strftime('%H:%M')}\n"
+        f"🏠 {_habitacion(reserva)}\n\n"
+        "¡Te esperamos! 🏨",
+    )
+
+
+def llegada_registrada(reserva):
+    encolar(
+        reserva.telefono,
+        f"🚪 *¡Bienvenido!* Registramos tu llegada (reserva #{reserva.reserva_id}).\n\n"
+        f"🏠 {_habitacion(reserva)} hasta las {timezone.localtime(reserva.fecha_hora_fin).strftime('%H:%M')}.",
+    )
+
+
+def habitacion_liberada(reserva):
+    encolar(
+        reserva.telefono,
+        f"🏨 Tu estadía (reserva #{reserva.reserva_id}) terminó. ¡Gracias por elegirnos! 😊",
+    )
@@ -0,0 +1,222 @@
+# apps/api/particiones_mensajes.py
+"""
+Particionado mensual de la tabla ``mensajes`` por ``timestamp`` (solo PostgreSQL).
+
+Se activa con MENSAJES_PARTICIONADOS=True antes de migrar (migración 0013) o, en
+una base ya migrada, con ``manage.py particiones_mensajes --convertir``. En SQLite,
+o sin la opción, ``mensajes`` sigue siendo una tabla normal.
+
+Con la tabla particionada:
+- hay una partición por mes (``mensajes_pAAAA_MM``, límites en UTC) y una
+  partición por defecto (``mensajes_p_default``) para lo que quede fuera;
+- la clave primaria pasa a ser (mensaje_id, timestamp), como exige PostgreSQL;
+  ``mensaje_id`` sigue saliendo de una secuencia, así que sigue siendo único y
+  Django lo sigue usando como pk;
+- los índices y claves foráneas de la tabla se recrean con los mismos nombres,
+  así las migraciones siguientes los encuentran;
+- las lecturas de historial (``Conversacion.mensajes()``) filtran por
+  ``timestamp >= inicio_conversacion`` y el planner descarta las particiones anteriores.
+
+``particiones_mensajes`` (cron mensual) crea las particiones de los próximos
+meses y separa (DETACH) o borra las antiguas, que es mucho más barato que un DELETE.
+"""
+import datetime
+import logging
+import re
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+TABLA = 'mensajes'
+TABLA_ANTERIOR = 'mensajes_anterior'
+PARTICION_DEFECTO = 'mensajes_p_default'
+SECUENCIA = 'mensajes_id_seq'
+_NOMBRE_PARTICION = re.compile(r'^mensajes_p(\d{4})_(\d{2})$')
+
+
+def disponible(conexion):
+    return conexion.vendor == 'postgresql'
+
+
+def _mes(fecha):
+    return datetime.datetime(fecha.year, fecha.month, 1, tzinfo=datetime.timezone.utc)
+
+
+def _mes_siguiente(mes):
+    return _mes(mes + datetime.timedelta(days=32))
+
+
+def _nombre(mes):
+    return f"mensajes_p{mes:%Y_%m}"
+
+
+def esta_particionada(conexion):
+    if not disponible(conexion):
+        return False
+    with conexion.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [TABLA])
+        fila = cursor.fetchone()
+    return bool(fila) and fila[0] == 'p'
+
+
+def listar_particiones(conexion):
+    """[(nombre, mes o None para la partición por defecto)] ordenadas por nombre."""
+    with conexion.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(%s) ORDER BY c.relname",
+            [TABLA],
+        )
+        nombres = [fila[0] for fila in cursor.fetchall()]
+    particiones = []
+    for nombre in nombres:
+        coincidencia = _NOMBRE_PARTICION.match(nombre)
+        mes = datetime.datetime(int(coincidencia[1]), int(coincidencia[2]), 1,
+                                tzinfo=datetime.timezone.utc) if coincidencia else None
+        particiones.append((nombre, mes))
+    return particiones
+
+
+def _crear_particion(cursor, mes):
+    """Crea la partición del mes si no existe; mueve sus filas desde la partición por defecto."""
+    nombre, desde, hasta = _nombre(mes), mes, _mes_siguiente(mes)
+    cursor.execute("SELECT to_regclass(%s)", [nombre])
+    if cursor.fetchone()[0]:
+        return False
+
+    cursor.execute(
+        f'SELECT EXISTS (SELECT 1 FROM {PARTICION_DEFECTO} WHERE "timestamp" >= %s AND "timestamp" < %s)',
+        [desde, hasta],
+    )
+    if cursor.fetchone()[0]:
+        # PostgreSQL no deja crear la partición si la de defecto ya tiene filas de ese rango
+        cursor.execute(f'ALTER TABLE {TABLA} DETACH PARTITION {PARTICION_DEFECTO}')
+        cursor.execute(
+            f'CREATE TABLE {nombre} PARTITION OF {TABLA} FOR VALUES FROM (%s) TO (%s)', [desde, hasta]
+        )
+        cursor.execute(
+            f'INSERT INTO {TABLA} SELECT * FROM {PARTICION_DEFECTO} WHERE "timestamp" >= %s AND "timestamp" < %s',
+            [desde, hasta],
+        )
+        cursor.execute(
+            f'DELETE FROM {PARTICION_DEFECTO} WHERE "timestamp" >= %s AND "timestamp" < %s', [desde, hasta]
+        )
+        cursor.execute(f'ALTER TABLE {TABLA} ATTACH PARTITION {PARTICION_DEFECTO} DEFAULT')
+    else:
+        cursor.execute(
+            f'CREATE TABLE {nombre} PARTITION OF {TABLA} FOR VALUES FROM (%s) TO (%s)', [desde, hasta]
+        )
+    logger.info(f"🧱 Partición {nombre} creada")
+    return True
+
+
+def crear_particiones(conexion, meses_futuros=None, desde=None):
+    """Crea las particiones desde ``desde`` (por defecto, el mes actual) hasta ``meses_futuros`` meses adelante."""
+    meses_futuros = meses_futuros if meses_futuros is not None else getattr(settings, 'MENSAJES_PARTICIONES_FUTURAS', 3)
+    mes = _mes(desde or timezone.now())
+    ultimo = _mes(timezone.now())
+    for _ in range(meses_futuros):
+        ultimo = _mes_siguiente(ultimo)
+
+    creadas = []
+    with conexion.cursor() as cursor:
+        while mes <= ultimo:
+            if _crear_particion(cursor, mes):
+                creadas.append(_nombre(mes))
+            mes = _mes_siguiente(mes)
+    return creadas
+
+
+def separar_particiones(conexion, antes_de, borrar=False):
+    """
+    Separa (DETACH) las particiones de meses anteriores a ``antes_de``; quedan como
+    tablas sueltas con sus datos. Con ``borrar=True`` además se eliminan.
+    """
+    separadas = []
+    with conexion.cursor() as cursor:
+        for nombre, mes in listar_particiones(conexion):
+            if mes is None or mes >= _mes(antes_de):
+                continue
+            cursor.execute(f'ALTER TABLE {TABLA} DETACH PARTITION {nombre}')
+            if borrar:
+                cursor.execute(f'DROP TABLE {nombre}')
+            separadas.append(nombre)
+            logger.info(f"✂️ Partición {nombre} {'borrada' if borrar else 'separada'}")
+    return separadas
+
+
+def _recrear_indices(cursor, conexion, restricciones):
+    """Recrea índices y claves foráneas (no la pk) con sus nombres originales."""
+    q = conexion.ops.quote_name
+    for nombre, info in restricciones.items():
+        if info['primary_key'] or info['check']:
+            continue
+        if None in info['columns']:
+            logger.warning(f"⚠️ Índice por expresión {nombre} omitido; recrearlo a mano")
+            continue
+        columnas = ', '.join(q(c) for c in info['columns'])
+        if info['foreign_key']:
+            tabla, columna = info['foreign_key']
+            cursor.execute(
+                f'ALTER TABLE {TABLA} ADD CONSTRAINT {q(nombre)} FOREIGN KEY ({columnas}) '
+                f'REFERENCES {q(tabla)} ({q(columna)}) DEFERRABLE INITIALLY DEFERRED'
+            )
+        elif info['unique']:
+            logger.warning(f"⚠️ Restricción única {nombre} omitida (debe incluir timestamp para particionar)")
+        elif info['index']:
+            ordenes = info.get('orders') or ['ASC'] * len(info['columns'])
+            columnas = ', '.join(f'{q(c)} {o}' for c, o in zip(info['columns'], ordenes))
+            cursor.execute(f'CREATE INDEX {q(nombre)} ON {TABLA} ({columnas})')
+
+
+def _reconstruir(conexion, particionada, meses_futuros=None):
+    with conexion.cursor() as cursor:
+        restricciones = conexion.introspection.get_constraints(cursor, TABLA)
+        cursor.execute(f'SELECT min("timestamp"), coalesce(max(mensaje_id), 0) FROM {TABLA}')
+        minimo, maximo_id = cursor.fetchone()
+
+        cursor.execute(f'ALTER TABLE {TABLA} RENAME TO {TABLA_ANTERIOR}')
+        cursor.execute(f'ALTER SEQUENCE IF EXISTS {SECUENCIA} OWNED BY NONE')
+        cursor.execute(f'CREATE SEQUENCE IF NOT EXISTS {SECUENCIA}')
+        # El próximo id es maximo_id + 1 (o 1 con la tabla vacía)
+        cursor.execute("SELECT setval(%s, %s, %s)", [SECUENCIA, max(maximo_id, 1), bool(maximo_id)])
+
+        particion = ' PARTITION BY RANGE ("timestamp")' if particionada else ''
+        cursor.execute(
+            f'CREATE TABLE {TABLA} (LIKE {TABLA_ANTERIOR} INCLUDING DEFAULTS INCLUDING CONSTRAINTS){particion}'
+        )
+        cursor.execute(f"ALTER TABLE {TABLA} ALTER COLUMN mensaje_id SET DEFAULT nextval('{SECUENCIA}')")
+        cursor.execute(f'ALTER SEQUENCE {SECUENCIA} OWNED BY {TABLA}.mensaje_id')
+
+        if particionada:
+            cursor.execute(f'CREATE TABLE {PARTICION_DEFECTO} PARTITION OF {TABLA} DEFAULT')
+
+    if particionada:
+        crear_particiones(conexion, meses_futuros, desde=minimo)
+
+    with conexion.cursor() as cursor:
+        cursor.execute(f'INSERT INTO {TABLA} SELECT * FROM {TABLA_ANTERIOR}')
+        cursor.execute(f'DROP TABLE {TABLA_ANTERIOR}')
+        pk = '(mensaje_id, "timestamp")' if particionada else '(mensaje_id)'
+        cursor.execute(f'ALTER TABLE {TABLA} ADD CONSTRAINT {TABLA}_pkey PRIMARY KEY {pk}')
+        _recrear_indices(cursor, conexion, restricciones)
+
+
+def convertir_a_particionada(conexion, meses_futuros=None):
+    """Convierte ``mensajes`` en tabla particionada por mes, copiando todas las filas."""
+    if not disponible(conexion) or esta_particionada(conexion):
+        return False
+    _reconstruir(conexion, particionada=True, meses_futuros=meses_futuros)
+    logger.info("🧱 Tabla mensajes convertida a particionada por mes")
+    return True
+
+
+def convertir_a_tabla_simple(conexion):
+    """Vuelve ``mensajes`` a una tabla normal (reverso de la migración)."""
+    if not esta_particionada(conexion):
+        return False
+    _reconstruir(conexion, particionada=False)
+    logger.info("🧱 Tabla mensajes convertida a tabla simple")
+    return True
@@ -0,0 +1,152 @@
+# apps/api/payloads_whatsapp.py
+"""
+Constructores de payloads de WhatsApp (texto y botones interactivos).
+
+Reemplazan a las antiguas crear_respuesta_texto_segura / crear_respuesta_botones_ultra_segura /
+crear_respuesta_botones_segura / crear_respuesta_con_boton_reserva, que repetían la misma
+limpieza y validación y se llamaban unas a otras:
+
+- la limpieza de caracteres se hace una sola vez por texto, con las tablas de reemplazo
+  definidas aquí (``str.replace`` por carácter: en CPython es mucho más rápido que
+  ``str.translate`` para textos con tildes, ver ``manage.py bench_payloads``), y se
+  omite del todo si el texto es ASCII;
+- cada payload se valida una sola vez (la respuesta de respaldo no vuelve a limpiar el texto);
+- los botones se validan por tupla (id, título) y el resultado queda en caché, así los
+  menús fijos (reserva, duración, confirmación, ayuda) se validan una vez por proceso.
+
+Los payloads devueltos son siempre dicts nuevos: quien los reciba puede modificarlos.
+"""
+import logging
+import re
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# Límites de la Graph API (con margen, igual que antes)
+MAXIMO_TEXTO = 4000
+MAXIMO_CUERPO_BOTONES = 900
+MAXIMO_TITULO_BOTON = 20
+MAXIMO_ID_BOTON = 50
+MAXIMO_BOTONES = 3
+
+TEXTO_VACIO = "Lo siento, no pude procesar tu mensaje correctamente."
+TEXTO_ERROR = "Error interno. Por favor intenta nuevamente."
+
+# Comillas curvas y guiones largos: en texto simple se eliminan, en botones se reemplazan
+_TABLA_TEXTO = (("’", ""), ("“", ""), ("”", ""), ("–", ""), ("—", ""))
+_TABLA_CUERPO = (("’", "'"), ("“", '"'), ("”", '"'), ("–", "-"), ("—", "-"))
+_TABLA_TITULO = _TABLA_CUERPO[:3]
+# \w equivale a isalnum() más "_"
+_CARACTERES_NO_ID = re.compile(r"[^\w-]")
+
+ID_BOTON_RESERVA = "hacer_reserva"
+
+# Menús fijos como tuplas (id, título): se validan una vez y se reutilizan
+BOTON_RESERVA = ((ID_BOTON_RESERVA, "📅 Reservar"),)
+BOTONES_DURACION = (("duracion_2", "2 horas"), ("duracion_4", "4 horas"), ("duracion_8", "8 horas"))
+BOTONES_CONFIRMACION = (("confirmar_si", "✅ Si, Confirmar"), ("confirmar_no", "❌ No, Cancelar"))
+BOTONES_FECHA_EMERGENCIA = (("fecha_1", "📅 Hoy"), ("fecha_2", "📅 Mañana"))
+BOTONES_SALUDO_DEFAULT = (("info_general", "ℹ️ Información"), (ID_BOTON_RESERVA, "📅 Reservar"))
+BOTONES_AYUDA = ((ID_BOTON_RESERVA, "📅 Reservar"), ("info_general", "ℹ️ Info"))
+
+
+def boton(id_boton, titulo):
+    """Dict de un botón de respuesta (formato de la Graph API)."""
+    return {"type": "reply", "reply": {"id": id_boton, "title": titulo}}
+
+
+def _payload_texto(texto_limpio):
+    return {"type": "text", "text": {"body": texto_limpio}}
+
+
+def _reemplazar(texto, tabla):
+    if texto.isascii():
+        return texto
+    for original, reemplazo in tabla:
+        texto = texto.replace(original, reemplazo)
+    return texto
+
+
+def _limpiar_texto(texto):
+    texto_limpio = _reemplazar(str(texto).strip(), _TABLA_TEXTO)
+    if len(texto_limpio) > MAXIMO_TEXTO:
+        texto_limpio = texto_limpio[:MAXIMO_TEXTO - 3] + "..."
+    return texto_limpio or TEXTO_VACIO
+
+
+def texto(texto):
+    """Respuesta de texto validada para WhatsApp."""
+    try:
+        return _payload_texto(_limpiar_texto(texto))
+    except Exception as e:
+        logger.error(f"❌ Error creando respuesta de texto segura: {e}")
+        return _payload_texto(TEXTO_ERROR)
+
+
+@lru_cache(maxsize=512)
+def _validar_pares(pares):
+    """Limpia (id, título) de hasta 3 botones; descarta los que quedan vacíos."""
+    validos = []
+    for id_boton, titulo in pares[:MAXIMO_BOTONES]:
+        id_boton = _CARACTERES_NO_ID.sub("", id_boton.strip()[:MAXIMO_ID_BOTON])
+        titulo = _reemplazar(titulo.strip(), _TABLA_TITULO)
+        if len(titulo) > MAXIMO_TITULO_BOTON:
+            titulo = titulo[:MAXIMO_TITULO_BOTON - 3] + "..."
+        if titulo and id_boton:
+            validos.append((id_boton, titulo))
+    return tuple(validos)
+
+
+def _pares_de_botones(botones):
+    """Convierte dicts de botón a tuplas (id, título), ignorando los mal formados."""
+    pares = []
+    for b in botones[:MAXIMO_BOTONES]:
+        try:
+            reply = b.get("reply", {})
+            if b.get("type") == "reply" and reply.get("id") and reply.get("title"):
+                pares.append((str(reply["id"]), str(reply["title"])))
+        except AttributeError as e:
+            logger.error(f"❌ Error procesando botón {b!r}: {e}")
+    return tuple(pares)
+
+
+def menu(texto_cuerpo, pares):
+    """
+    Respuesta con botones a partir de tuplas (id, título).
+    Si ningún botón es válido, devuelve una respuesta de texto con el mismo cuerpo.
+    """
+    try:
+        cuerpo = _reemplazar(str(texto_cuerpo).strip(), _TABLA_CUERPO)
+        if len(cuerpo) > MAXIMO_CUERPO_BOTONES:
+            cuerpo = cuerpo[:MAXIMO_CUERPO_BOTONES - 3] + "..."
+
+        validos = _validar_pares(tuple(pares))
+        if not validos:
+            logger.warning("⚠️ No se pudieron crear botones válidos - Usando texto simple")
+            return _payload_texto(cuerpo or TEXTO_VACIO)
+
+        logger.debug("✅ Respuesta con %s botones (%s caracteres)", len(validos), len(cuerpo))
+        return {
+            "type": "interactive",
+            "interactive": {
+                "type": "button",
+                "body": {"text": cuerpo},
+                "action": {"buttons": [boton(id_boton, titulo) for id_boton, titulo in validos]},
+            },
+        }
+    except Exception as e:
+        logger.error(f"❌ Error creando respuesta con botones: {e}")
+        return texto(texto_cuerpo)
+
+
+def botones(texto_cuerpo, botones):
+    """Respuesta con botones a partir de dicts de botón (formato de la Graph API)."""
+    return menu(texto_cuerpo, _pares_de_botones(botones))
+
+
+def con_boton_reserva(texto_cuerpo, botones_adicionales=None):
+    """Respuesta con botones que siempre incluye "📅 Reservar" (sin modificar la lista recibida)."""
+    pares = _pares_de_botones(botones_adicionales or [])
+    if not any(id_boton == ID_BOTON_RESERVA for id_boton, _ in pares):
+        pares += BOTON_RESERVA
+    return menu(texto_cuerpo, pares)
@@ -0,0 +1,154 @@
+# apps/api/preguntas_desconocidas.py
+"""
+Registro diferido y deduplicado de preguntas desconocidas (WhatsApp y chat web).
+
+Antes cada canal hacía ``filter(cliente=..., texto_pregunta=...).exists()`` (igualdad
+sobre un TextField sin índice) y luego un INSERT; WhatsApp insertaba sin deduplicar.
+Ahora ``registrar(texto, cliente_id)`` solo acumula en memoria, agrupando por
+``hash_texto`` (SHA-256 del texto en minúsculas, sin tildes ni signos), y un hilo
+en segundo plano vacía el buffer cada PREGUNTAS_DESCONOCIDAS_INTERVALO_S segundos
+o al llegar a PREGUNTAS_DESCONOCIDAS_LOTE preguntas distintas:
+
+1. ``bulk_create(ignore_conflicts=True)`` con ``ocurrencias=0`` para los hashes
+   nuevos (el índice único sobre ``hash_texto`` descarta los que ya existen);
+2. un UPDATE ``ocurrencias = ocurrencias + n`` por cada par (``n``, última vez)
+   distinto del lote, que además vuelve a marcar la pregunta como no revisada.
+
+Así dos workers que vacían a la vez el mismo hash no pierden ocurrencias.
+La deduplicación es global: el cliente guardado es el primero que la hizo.
+
+Si la BD falla el lote vuelve al buffer y se reintenta en el próximo vaciado.
+Si el proceso muere se pierde a lo sumo el último intervalo (igual que
+historial_web.EscrituraDiferidaMensajes).
+"""
+import atexit
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .agrupador_preguntas import hash_texto
+from .models import PreguntaDesconocida
+
+logger = logging.getLogger(__name__)
+
+
+class RegistroPreguntasDesconocidas:
+    """
+    Buffer de preguntas desconocidas por hash de texto normalizado.
+
+    Se vacía cuando junta ``tamano_lote`` hashes distintos o cada ``intervalo_s``
+    segundos, desde un hilo daemon que se inicia con la primera pregunta.
+    """
+
+    def __init__(self, tamano_lote=100, intervalo_s=5.0):
+        self.tamano_lote = tamano_lote
+        self.intervalo_s = intervalo_s
+        self._pendientes = {}
+        self._lock = threading.Lock()
+        self._despertar = threading.Event()
+        self._hilo = None
+
+    def registrar(self, texto, cliente_id=None):
+        texto = str(texto).strip()
+        if not texto:
+            return
+        clave = hash_texto(texto)
+        ahora = timezone.now()
+        with self._lock:
+            pendiente = self._pendientes.get(clave)
+            if pendiente is None:
+                self._pendientes[clave] = {
+                    'texto': texto,
+                    'cliente_id': cliente_id,
+                    'ocurrencias': 1,
+                    'ultima_vez': ahora,
+                }
+            else:
+                pendiente['ocurrencias'] += 1
+                pendiente['ultima_vez'] = ahora
+            lleno = len(self._pendientes) >= self.tamano_lote
+            if self._hilo is None:
+                self._hilo = threading.Thread(
+                    target=self._bucle, name="registro-preguntas-desconocidas", daemon=True
+                )
+                self._hilo.start()
+        if lleno:
+            self._despertar.set()
+
+    def vaciar(self):
+        """Guarda todo lo pendiente. Devuelve la cantidad de ocurrencias guardadas."""
+        with self._lock:
+            lote, self._pendientes = self._pendientes, {}
+        if not lote:
+            return 0
+        try:
+            with transaction.atomic():
+                PreguntaDesconocida.objects.bulk_create(
+                    [
+                        PreguntaDesconocida(
+                            hash_texto=clave,
+                            texto_pregunta=p['texto'],
+                            cliente_id=p['cliente_id'],
+                            ocurrencias=0,
+                        )
+                        for clave, p in lote.items()
+                    ],
+                    batch_size=self.tamano_lote,
+                    ignore_conflicts=True,
+                )
+
+                # Agrupa por (ocurrencias, última vez) para que cada hash guarde su propia hora
+                claves_por_grupo = defaultdict(list)
+                for clave, p in lote.items():
+                    claves_por_grupo[(p['ocurrencias'], p['ultima_vez'])].append(clave)
+                for (ocurrencias, ultima_vez), claves in claves_por_grupo.items():
+                    PreguntaDesconocida.objects.filter(hash_texto__in=claves).update(
+                        ocurrencias=F('ocurrencias') + ocurrencias,
+                        fecha_ultima_vez=ultima_vez,
+                        revisada=False,
+                    )
+
+            total = sum(p['ocurrencias'] for p in lote.values())
+            logger.info(f"💾 {total} preguntas desconocidas guardadas ({len(lote)} distintas)")
+            return total
+        except Exception as e:
+            logger.error(f"❌ Error guardando lote de {len(lote)} preguntas desconocidas, se reintentará: {e}")
+            self._devolver(lote)
+            return 0
+
+    def _devolver(self, lote):
+        """Vuelve a juntar un lote fallido con lo que se registró mientras tanto."""
+        with self._lock:
+            for clave, p in lote.items():
+                pendiente = self._pendientes.get(clave)
+                if pendiente is None:
+                    self._pendientes[clave] = p
+                else:
+                    # El lote es anterior: conserva su texto y cliente, suma ocurrencias
+                    pendiente['texto'] = p['texto']
+                    pendiente['cliente_id'] = p['cliente_id']
+                    pendiente['ocurrencias'] += p['ocurrencias']
+
+    def _bucle(self):
+        while True:
+            self._despertar.wait(self.intervalo_s)
+            self._despertar.clear()
+            self.vaciar()
+            close_old_connections()
+
+
+registro_diferido = RegistroPreguntasDesconocidas(
+    tamano_lote=getattr(settings, 'PREGUNTAS_DESCONOCIDAS_LOTE', 100),
+    intervalo_s=getattr(settings, 'PREGUNTAS_DESCONOCIDAS_INTERVALO_S', 5.0),
+)
+atexit.register(registro_diferido.vaciar)
+
+
+def registrar(texto, cliente_id=None):
+    """Encola una pregunta desconocida (no consulta la BD)."""
+    registro_diferido.registrar(texto, cliente_id)
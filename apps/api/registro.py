@@ -0,0 +1,68 @@
+# apps/api/registro.py
+"""
+Utilidades de logging para el camino caliente (webhook y envío a WhatsApp).
+
+- ``Perezoso`` / ``json_perezoso``: el texto se arma recién si el logger va a
+  emitir el registro (usar con ``logger.info("... %s", json_perezoso(datos))``).
+- ``registrar_payload``: vuelca payloads completos solo en una fracción de los
+  requests (``LOG_MUESTREO_PAYLOADS``); con DEBUG activo se vuelcan todos.
+- ``FormateadorJSON``: una línea JSON por registro, con los campos pasados en
+  ``extra=...`` (se activa con ``LOG_FORMATO=json``, ver config/settings.py).
+"""
+import json
+import logging
+import random
+
+from django.conf import settings
+
+# Atributos propios de LogRecord: el resto son campos pasados con extra=...
+_ATRIBUTOS_LOGRECORD = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class Perezoso:
+    """Difiere el armado de un texto hasta que el logging lo formatea."""
+
+    __slots__ = ("funcion",)
+
+    def __init__(self, funcion):
+        self.funcion = funcion
+
+    def __str__(self):
+        return str(self.funcion())
+
+
+def json_perezoso(datos, indent=None):
+    return Perezoso(lambda: json.dumps(datos, indent=indent, ensure_ascii=False, default=str))
+
+
+def toca_muestrear(logger, nivel=logging.INFO):
+    """True si este payload se debe volcar: nivel habilitado y dentro de la muestra."""
+    if not logger.isEnabledFor(nivel):
+        return False
+    if logger.isEnabledFor(logging.DEBUG):
+        return True
+    return random.random() < getattr(settings, "LOG_MUESTREO_PAYLOADS", 0.0)
+
+
+def registrar_payload(logger, titulo, datos, nivel=logging.INFO):
+    """Vuelca ``datos`` como JSON indentado, solo si toca según el muestreo."""
+    if toca_muestrear(logger, nivel):
+        logger.log(nivel, "%s %s", titulo, json_perezoso(datos, indent=2), extra={"muestreado": True})
+
+
+class FormateadorJSON(logging.Formatter):
+    """Formatea cada registro como una línea JSON (para agregadores de logs)."""
+
+    def format(self, record):
+        datos = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensaje": record.getMessage(),
+        }
+        for clave, valor in vars(record).items():
+            if clave not in _ATRIBUTOS_LOGRECORD:
+                datos[clave] = valor
+        if record.exc_info:
+            datos["excepcion"] = self.formatException(record.exc_info)
+        return json.dumps(datos, ensure_ascii=False, default=str)
@@ -0,0 +1,93 @@
+# apps/api/reserva_rapida.py
+"""
+Reserva en un solo mensaje: "reserva para hoy a las 21 por 4 horas suite".
+
+``extraer`` saca del texto todos los datos de la reserva que trae (fecha, hora de
+inicio y duración con fechas_naturales; habitación por su nombre) en el mismo
+formato de ``EstadoConversacion.datos_reserva``. El flujo de reserva (FLUJO_RESERVA
+en views.py, ver flujos.py) salta los pasos ya respondidos: con los cuatro datos y
+el horario libre va directo a la confirmación, en un solo viaje de ida y vuelta.
+"""
+import re
+
+from . import fechas_naturales
+from .models import Habitacion
+
+# Duración máxima que se acepta escrita a mano (los botones ofrecen 2, 4 y 8 horas)
+DURACION_MAXIMA_HORAS = 12
+
+_INTENCION = re.compile(r'\b(?:reserv|agend|apart|quiero (?:una )?(?:habitacion|pieza|suite))')
+# Palabras que no distinguen una habitación de otra
+_GENERICAS = {'habitacion', 'pieza', 'cuarto', 'con', 'del', 'las', 'los', 'para'}
+
+
+def es_reserva(texto):
+    """True si el mensaje pide reservar ("reserva", "quiero agendar", "apartar una pieza"...)."""
+    return bool(_INTENCION.search(fechas_naturales.normalizar(texto)))
+
+
+def datos_de(interpretacion):
+    """Campos de datos_reserva que trae una Interpretacion (una duración fuera de rango se ignora)."""
+    datos = {}
+    if interpretacion.fecha:
+        datos["fecha"] = interpretacion.fecha.isoformat()
+    if interpretacion.hora:
+        datos["hora_inicio"] = interpretacion.hora.strftime("%H:%M")
+    if interpretacion.duracion and 1 <= interpretacion.duracion <= DURACION_MAXIMA_HORAS:
+        datos["duracion"] = interpretacion.duracion
+    return datos
+
+
+def _palabras(texto):
+    return set(re.findall(r'\w+', texto))
+
+
+def buscar_habitacion(texto):
+    """
+    Habitación disponible nombrada en el texto: primero por nombre completo (el más
+    largo que aparezca) y si no, por una palabra propia de un solo nombre
+    ("suite" si es la única habitación que la lleva). None si no hay o es ambiguo.
+    """
+    texto = f" {fechas_naturales.normalizar(texto)} "
+    habitaciones = [
+        (fechas_naturales.normalizar(nombre), habitacion_id, nombre, precio)
+        for habitacion_id, nombre, precio in Habitacion.objects.filter(disponible=True, activo=True)
+        .values_list('habitacion_id', 'nombre_habitacion', 'precio_por_hora')
+    ]
+    completas = [h for h in habitaciones if f" {h[0]} " in texto]
+    if completas:
+        return max(completas, key=lambda h: len(h[0]))[1:]
+
+    palabras_texto = _palabras(texto)
+    por_palabra = {}
+    for habitacion in habitaciones:
+        for palabra in _palabras(habitacion[0]) - _GENERICAS:
+            if len(palabra) >= 3 and not palabra.isdigit():
+                por_palabra.setdefault(palabra, []).append(habitacion)
+    candidatas = {
+        habitaciones_palabra[0][1]: habitaciones_palabra[0]
+        for palabra, habitaciones_palabra in por_palabra.items()
+        if palabra in palabras_texto and len(habitaciones_palabra) == 1
+    }
+    if len(candidatas) == 1:
+        return next(iter(candidatas.values()))[1:]
+    return None
+
+
+def extraer(texto, ahora=None, numero_suelto=None, con_habitacion=True):
+    """
+    Campos de datos_reserva presentes en el texto (fecha, hora_inicio, duracion,
+    habitación). El nombre de la habitación encontrada se quita antes de leer la
+    fecha, para que "la 101" no se entienda como una hora.
+    """
+    habitacion = buscar_habitacion(texto) if con_habitacion else None
+    if habitacion:
+        nombre = fechas_naturales.normalizar(habitacion[1])
+        texto = f" {fechas_naturales.normalizar(texto)} ".replace(f" {nombre} ", " ", 1)
+    datos = datos_de(fechas_naturales.interpretar(texto, ahora, numero_suelto=numero_suelto))
+    if habitacion:
+        habitacion_id, nombre, precio = habitacion
+        datos["habitacion_id"] = habitacion_id
+        datos["habitacion_nombre"] = nombre
+        datos["precio_por_hora"] = str(precio)
+    return datos
@@ -1,7 +1,28 @@
 # apps/api/serializers.py
 from rest_framework import serializers
+from . import servicio_reservas
 from .models import Reserva, Habitacion, Cliente
 
+
+class CamposDinamicosMixin:
+    """
+    Campos parciales: ``?campos=reserva_id,estado`` (o ``campos=[...]`` en el
+    constructor) deja solo esos campos; los nombres desconocidos se ignoran
+    (si ninguno es válido se devuelven todos).
+    """
+    parametro_campos = 'campos'
+
+    def __init__(self, *args, campos=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if campos is None:
+            request = self.context.get('request')
+            valor = request.query_params.get(self.parametro_campos) if request is not None else None
+            campos = [c.strip() for c in valor.split(',') if c.strip()] if valor else None
+        validos = set(campos or ()) & set(self.fields)
+        if validos:
+            for nombre in set(self.fields) - validos:
+                self.fields.pop(nombre)
+
 class ClienteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Cliente
@@ -12,7 +33,7 @@ class HabitacionSerializer(serializers.ModelSerializer):
         model = Habitacion
         fields = ['habitacion_id', 'nombre_habitacion', 'precio_por_hora', 'capacidad', 'disponible']
 
-class ReservaSerializer(serializers.ModelSerializer):
+class ReservaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     cliente_nombre = serializers.CharField(source='cliente.nombre_cliente', read_only=True)
     habitacion_nombre = serializers.CharField(source='habitacion.nombre_habitacion', read_only=True)
     cliente_telefono = serializers.CharField(source='cliente.telefono', read_only=True)
@@ -55,6 +76,8 @@ class ReservaCreateSerializer(serializers.ModelSerializer):
             'precio_total',
             'origen'
         ]
+        # El fin sale de la duración (servicio_reservas), igual que en el flujo de WhatsApp
+        read_only_fields = ['fecha_hora_fin']
     
     def create(self, validated_data):
         nombre_cliente = validated_data.pop('nombre_cliente')
@@ -66,10 +89,17 @@ class ReservaCreateSerializer(serializers.ModelSerializer):
             defaults={'nombre_cliente': nombre_cliente}
         )
         
-        validated_data['cliente'] = cliente
-        validated_data['estado'] = 'pendiente'
-        
-        return Reserva.objects.create(**validated_data)
+        try:
+            return servicio_reservas.crear_reserva(
+                cliente,
+                validated_data.pop('habitacion', None),
+                validated_data.pop('fecha_hora_inicio'),
+                validated_data.pop('duracion'),
+                validated_data.pop('origen', 'web'),
+                **validated_data,
+            )
+        except servicio_reservas.HorarioOcupado:
+            raise serializers.ValidationError({'habitacion': 'La habitación ya está reservada en ese horario.'})
 
 class EstadisticasSerializer(serializers.Serializer):
     """Serializer para las estadísticas del dashboard"""
@@ -0,0 +1,149 @@
+# apps/api/servicio_reservas.py
+"""
+Único camino de escritura de reservas: el flujo de WhatsApp (views.py), la API
+(ReservaCreateSerializer) y ReservaManager crean y cambian de estado las
+reservas por aquí. Todas quedan en api.Reserva (reservas_whatsapp se copió en la
+migración api 0016 y ya no se escribe), así que la disponibilidad, el panel de
+funcionarios y las estadísticas consultan una sola tabla.
+
+``crear_reserva`` bloquea la fila de la habitación (select_for_update) durante la
+comprobación de choques y el INSERT: dos clientes que piden la misma habitación y
+horario al mismo tiempo no pueden quedar ambos con la reserva.
+
+``confirmar_varias``, ``registrar_llegadas`` (comandos en lote del modo
+funcionario) y ``cancelar_varias`` (acción del admin) validan cada id y aplican un solo UPDATE; como ``update()`` no
+dispara señales, actualizan estadísticas y disponibilidad a mano.
+"""
+import datetime
+import logging
+from dataclasses import dataclass, field
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import disponibilidad, estadisticas, notificaciones
+from .models import Habitacion, Reserva
+
+logger = logging.getLogger(__name__)
+
+
+class HorarioOcupado(Exception):
+    """La habitación ya tiene una reserva activa que se cruza con el horario pedido."""
+
+
+def crear_reserva(cliente, habitacion, inicio, duracion, origen, estado='pendiente',
+                  precio_total=None, telefono=None, **campos):
+    """
+    Crea la reserva de ``duracion`` horas desde ``inicio`` (datetime con zona).
+    ``precio_total`` por defecto es el precio por hora de la habitación por la duración.
+    Lanza HorarioOcupado si choca con otra reserva activa de la habitación (la API
+    permite reservas sin habitación asignada: esas no se comprueban).
+    """
+    fin = inicio + datetime.timedelta(hours=duracion)
+    with transaction.atomic():
+        if habitacion is not None:
+            # Serializa las reservas de la misma habitación hasta el commit
+            list(Habitacion.objects.select_for_update().filter(habitacion_id=habitacion.habitacion_id).values_list('pk'))
+            if disponibilidad.hay_conflicto(habitacion.habitacion_id, inicio, fin):
+                raise HorarioOcupado(f"Habitación {habitacion.habitacion_id} ocupada entre {inicio} y {fin}")
+        reserva = Reserva.objects.create(
+            cliente=cliente,
+            habitacion=habitacion,
+            telefono=telefono or (cliente.telefono if cliente else None),
+            fecha_hora_inicio=inicio,
+            fecha_hora_fin=fin,
+            duracion=duracion,
+            precio_total=habitacion.precio_por_hora * duracion if precio_total is None and habitacion else precio_total,
+            estado=estado,
+            origen=origen,
+            **campos,
+        )
+    logger.info(f"📅 Reserva #{reserva.reserva_id} creada ({origen}): habitación {reserva.habitacion_id}, {inicio:%d/%m %H:%M}")
+    return reserva
+
+
+# Los cambios de estado avisan al huésped en segundo plano (ver notificaciones.py);
+# conviene cargar la reserva con select_related('habitacion') para armar el aviso.
+
+def confirmar(reserva):
+    reserva.estado = 'confirmada'
+    reserva.save()
+    notificaciones.reserva_confirmada(reserva)
+    return reserva
+
+
+def registrar_llegada(reserva, telefono_funcionario=None):
+    reserva.estado = 'llegada_confirmada'
+    reserva.fecha_llegada = timezone.now()
+    reserva.confirmada_por = telefono_funcionario
+    reserva.save()
+    notificaciones.llegada_registrada(reserva)
+    return reserva
+
+
+def completar(reserva):
+    """Libera la habitación: la estadía terminó."""
+    reserva.estado = 'completada'
+    reserva.save()
+    notificaciones.habitacion_liberada(reserva)
+    return reserva
+
+
+# --- Cambios de estado en lote ---
+
+@dataclass
+class ResultadoLote:
+    aplicadas: list = field(default_factory=list)  # Reservas actualizadas (ya con el estado nuevo)
+    rechazadas: dict = field(default_factory=dict)  # reserva_id -> motivo
+
+
+def _cambiar_estado_varias(reserva_ids, estados_validos, estado, notificar=None, **campos):
+    resultado = ResultadoLote()
+    reserva_ids = list(dict.fromkeys(reserva_ids))
+    with transaction.atomic():
+        reservas = {
+            reserva.reserva_id: reserva
+            for reserva in Reserva.objects.select_for_update(of=('self',))
+            .select_related('cliente', 'habitacion')
+            .filter(reserva_id__in=reserva_ids)
+        }
+        for reserva_id in reserva_ids:
+            reserva = reservas.get(reserva_id)
+            if reserva is None:
+                resultado.rechazadas[reserva_id] = "no existe"
+            elif reserva.estado not in estados_validos:
+                resultado.rechazadas[reserva_id] = f"está {reserva.estado}"
+            else:
+                resultado.aplicadas.append(reserva)
+        if not resultado.aplicadas:
+            return resultado
+
+        Reserva.objects.filter(reserva_id__in=[r.reserva_id for r in resultado.aplicadas]).update(estado=estado, **campos)
+        estadisticas.estado_cambiado(resultado.aplicadas, estado)
+        for reserva in resultado.aplicadas:
+            reserva.estado = estado
+            for campo, valor in campos.items():
+                setattr(reserva, campo, valor)
+            if notificar:
+                notificar(reserva)
+    disponibilidad.invalidar()
+    logger.info(f"📦 {len(resultado.aplicadas)} reservas pasan a '{estado}' ({len(resultado.rechazadas)} rechazadas)")
+    return resultado
+
+
+def confirmar_varias(reserva_ids):
+    """Confirma las reservas pendientes de ``reserva_ids``; las demás quedan en ``rechazadas``."""
+    return _cambiar_estado_varias(reserva_ids, ('pendiente',), 'confirmada', notificaciones.reserva_confirmada)
+
+
+def registrar_llegadas(reserva_ids, telefono_funcionario=None):
+    """Registra la llegada de las reservas confirmadas de ``reserva_ids``."""
+    return _cambiar_estado_varias(
+        reserva_ids, ('confirmada',), 'llegada_confirmada', notificaciones.llegada_registrada,
+        fecha_llegada=timezone.now(), confirmada_por=telefono_funcionario,
+    )
+
+
+def cancelar_varias(reserva_ids):
+    """Cancela las reservas pendientes o confirmadas de ``reserva_ids`` (sin aviso al huésped)."""
+    return _cambiar_estado_varias(reserva_ids, ('pendiente', 'confirmada'), 'cancelada')
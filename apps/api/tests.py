@@ -1,3 +1,772 @@
-from django.test import TestCase
+import asyncio
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from apps.reservas.models import EstadoConversacion
+
+from . import (
+    disponibilidad, estadisticas, flujos, historial_web, preguntas_desconocidas, reserva_rapida,
+    servicio_reservas, transferencia_reservas, ws_chat,
+)
+from .benchmarks.fechas import fecha_legado, hora_legado
+from .fechas_naturales import Interpretacion, interpretar
+from .models import Cliente, Conversacion, Habitacion, Mensaje, PreguntaDesconocida, Reserva
+
+# Miércoles 12/03/2025 a las 15:00 (hora local); el corpus se lee desde este momento
+AHORA_FECHAS = datetime(2025, 3, 12, 15, 0)
+
+# (texto, fecha 'AAAA-MM-DD', hora 'HH:MM', duración en horas); None = no viene en el mensaje
+CORPUS_FECHAS = [
+    # Formatos que ya aceptaba ReservaManager
+    ("25/12/2025", "2025-12-25", None, None),
+    ("25-12-2025", "2025-12-25", None, None),
+    ("25/12/25", "2025-12-25", None, None),
+    ("01/04/2025", "2025-04-01", None, None),
+    ("14:30", None, "14:30", None),
+    ("20:00", None, "20:00", None),
+    ("09.15", None, "09:15", None),
+    # Fechas relativas y días de la semana
+    ("hoy", "2025-03-12", None, None),
+    ("mañana", "2025-03-13", None, None),
+    ("manana", "2025-03-13", None, None),
+    ("pasado mañana", "2025-03-14", None, None),
+    ("viernes", "2025-03-14", None, None),
+    ("el sábado", "2025-03-15", None, None),
+    ("este miércoles", "2025-03-12", None, None),
+    ("el próximo miércoles", "2025-03-19", None, None),
+    ("el lunes", "2025-03-17", None, None),
+    ("en 3 días", "2025-03-15", None, None),
+    ("25/12", "2025-12-25", None, None),
+    ("11/03", "2026-03-11", None, None),
+    ("el 5 de abril", "2025-04-05", None, None),
+    ("1 de enero", "2026-01-01", None, None),
+    ("31/02", None, None, None),
+    # Horas
+    ("a las 10", None, "10:00", None),
+    ("a las 3", None, "15:00", None),
+    ("a la una", None, "13:00", None),
+    ("22hrs", None, "22:00", None),
+    ("22 horas", None, "22:00", None),
+    ("9pm", None, "21:00", None),
+    ("9 pm", None, "21:00", None),
+    ("10 de la noche", None, "22:00", None),
+    ("a las 10 de la noche", None, "22:00", None),
+    ("a las 3 de la madrugada", None, "03:00", None),
+    ("a las 9 de la mañana", None, "09:00", None),
+    ("mediodía", None, "12:00", None),
+    ("14h30", None, "14:30", None),
+    ("a las 25", None, None, None),
+    ("las 3 y media", None, "15:30", None),
+    ("a las 3 y cuarto", None, "15:15", None),
+    ("a las 10 y media de la noche", None, "22:30", None),
+    ("en la noche 11", None, "23:00", None),
+    ("en la tarde 2 personas", None, None, None),
+    # Duraciones
+    ("2 horas", None, None, 2),
+    ("dos horas", None, None, 2),
+    ("por 4 horas", None, None, 4),
+    ("por 3", None, None, 3),
+    ("durante 8 horas", None, None, 8),
+    ("por un rato", None, None, None),
+    ("somos 2 personas", None, None, None),
+    # Mensajes completos
+    ("mañana a las 10", "2025-03-13", "10:00", None),
+    ("hoy 22hrs", "2025-03-12", "22:00", None),
+    ("hoy 22 horas", "2025-03-12", "22:00", None),
+    ("esta noche a las 11", "2025-03-12", "23:00", None),
+    ("pasado mañana 15:30", "2025-03-14", "15:30", None),
+    ("mañana 14:30 3h", "2025-03-13", "14:30", 3),
+    ("hoy 22h 4hrs", "2025-03-12", "22:00", 4),
+    ("mañana en la mañana a las 9", "2025-03-13", "09:00", None),
+    ("viernes de 22 a 2", "2025-03-14", "22:00", 4),
+    ("el viernes de 22 a 2", "2025-03-14", "22:00", 4),
+    ("desde las 23 hasta las 3", None, "23:00", 4),
+    ("el 25/12 por 4 horas", "2025-12-25", None, 4),
+    ("el sábado a las 9pm por 3 horas", "2025-03-15", "21:00", 3),
+    ("quiero reservar para el sábado a las 9pm por 3 horas", "2025-03-15", "21:00", 3),
+    ("el 5 de abril a las 8", "2025-04-05", "08:00", None),
+    ("en 3 dias a las 20:00", "2025-03-15", "20:00", None),
+    ("proximo miercoles 21h", "2025-03-19", "21:00", None),
+    ("01/01/2026 14:00", "2026-01-01", "14:00", None),
+    ("hoy a las 3 de la madrugada por 4 horas", "2025-03-12", "03:00", 4),
+    ("mañana por 2 horas somos 2 personas", "2025-03-13", None, 2),
+    ("hola, tienen habitaciones?", None, None, None),
+]
+
+
+def esperado(fecha, hora, duracion):
+    """Tupla comparable con (interpretacion.fecha, interpretacion.hora, interpretacion.duracion)."""
+    return (
+        date.fromisoformat(fecha) if fecha else None,
+        time.fromisoformat(hora) if hora else None,
+        duracion,
+    )
+
+
+class FechasNaturalesTests(SimpleTestCase):
+    """apps/api/fechas_naturales.py contra el corpus de mensajes de reserva."""
+
+    def setUp(self):
+        self.ahora = timezone.make_aware(AHORA_FECHAS)
+
+    def test_corpus(self):
+        for texto, fecha, hora, duracion in CORPUS_FECHAS:
+            with self.subTest(texto=texto):
+                resultado = interpretar(texto, self.ahora)
+                self.assertEqual(
+                    (resultado.fecha, resultado.hora, resultado.duracion),
+                    esperado(fecha, hora, duracion),
+                )
+
+    def test_coincide_con_strptime_anterior(self):
+        """Lo que entendían los bucles de strptime de ReservaManager se sigue entendiendo igual."""
+        for texto, *_ in CORPUS_FECHAS:
+            fecha = fecha_legado(texto)
+            anterior = (fecha, None if fecha else hora_legado(texto))
+            if any(anterior):
+                with self.subTest(texto=texto):
+                    resultado = interpretar(texto, self.ahora)
+                    self.assertEqual((resultado.fecha, resultado.hora), anterior)
+
+    def test_numero_suelto(self):
+        self.assertEqual(interpretar("3", self.ahora, numero_suelto='hora').hora, time(15, 0))
+        self.assertEqual(interpretar("3", self.ahora, numero_suelto='duracion').duracion, 3)
+        self.assertEqual(interpretar("14 30", self.ahora, numero_suelto='hora').hora, time(14, 30))
+        self.assertTrue(interpretar("3", self.ahora).vacia)
+
+
+# (texto, es_reserva, fecha, hora, duración, habitación); None = no viene en el mensaje
+CORPUS_RESERVA_RAPIDA = [
+    # Habitación, fecha, hora y duración en un solo mensaje
+    ("reserva para hoy a las 21 por 4 horas suite jacuzzi", True, "2025-03-12", "21:00", 4, "Suite Jacuzzi"),
+    ("quiero reservar la matrimonial mañana a las 22 por 3 horas", True, "2025-03-13", "22:00", 3, "Matrimonial"),
+    ("reserva jacuzzi hoy 23hrs por 2 horas", True, "2025-03-12", "23:00", 2, "Suite Jacuzzi"),
+    ("reservar la tematica por 2 horas", True, None, None, 2, "Suite Temática"),
+    ("quiero agendar la 101 el viernes de 22 a 2", True, "2025-03-14", "22:00", 4, "101"),
+    ("reserva la 7 hoy a las 21 por 2 horas", True, "2025-03-12", "21:00", 2, "7"),
+    # Duración fuera de rango: se ignora y el flujo la vuelve a preguntar
+    ("reserva mañana a las 20 por 12 horas", True, "2025-03-13", "20:00", 12, None),
+    ("reserva hoy a las 21 por 13 horas", True, "2025-03-12", "21:00", None, None),
+    ("reserva la matrimonial mañana por 20 horas", True, "2025-03-13", None, None, "Matrimonial"),
+    ("reserva por 0 horas hoy", True, "2025-03-12", None, None, None),
+    # Sin habitación (o ambigua, o no disponible)
+    ("quiero reservar para el sábado a las 9pm por 3 horas", True, "2025-03-15", "21:00", 3, None),
+    ("reserva suite hoy a las 21 por 3 horas", True, "2025-03-12", "21:00", 3, None),
+    ("reserva la presidencial hoy a las 21", True, "2025-03-12", "21:00", None, None),
+    ("apartar una pieza para hoy", True, "2025-03-12", None, None, None),
+    ("quiero una suite", True, None, None, None, None),
+    # No piden reservar
+    ("hola, tienen habitaciones?", False, None, None, None, None),
+    ("cuánto cuesta la suite jacuzzi?", False, None, None, None, "Suite Jacuzzi"),
+]
+
+
+class ReservaRapidaTests(TestCase):
+    """apps/api/reserva_rapida.py contra el corpus de reservas en un solo mensaje."""
+
+    def setUp(self):
+        self.ahora = timezone.make_aware(AHORA_FECHAS)
+        for nombre, precio in (("Suite Jacuzzi", 20000), ("Suite Temática", 18000), ("101", 10000),
+                               ("7", 9000), ("Matrimonial", 12000)):
+            Habitacion.objects.create(nombre_habitacion=nombre, precio_por_hora=Decimal(precio))
+        Habitacion.objects.create(nombre_habitacion="Presidencial", precio_por_hora=Decimal("30000"), disponible=False)
+
+    def test_corpus(self):
+        for texto, intencion, fecha, hora, duracion, habitacion in CORPUS_RESERVA_RAPIDA:
+            with self.subTest(texto=texto):
+                self.assertEqual(reserva_rapida.es_reserva(texto), intencion)
+                datos = reserva_rapida.extraer(texto, self.ahora)
+                self.assertEqual(
+                    (datos.get("fecha"), datos.get("hora_inicio"), datos.get("duracion"), datos.get("habitacion_nombre")),
+                    (fecha, hora, duracion, habitacion),
+                )
+                if habitacion:
+                    precio = Habitacion.objects.get(nombre_habitacion=habitacion).precio_por_hora
+                    self.assertEqual(datos["precio_por_hora"], str(precio))
+
+    def test_datos_de_limita_la_duracion(self):
+        maxima = reserva_rapida.DURACION_MAXIMA_HORAS
+        for duracion, esperada in ((None, None), (0, None), (1, 1), (maxima, maxima), (maxima + 1, None), (48, None)):
+            with self.subTest(duracion=duracion):
+                datos = reserva_rapida.datos_de(Interpretacion(fecha=date(2025, 3, 13), duracion=duracion))
+                self.assertEqual(datos, {"fecha": "2025-03-13", **({"duracion": esperada} if esperada else {})})
+
+    def test_sin_habitacion_si_no_se_pide(self):
+        datos = reserva_rapida.extraer("reserva la 101 hoy a las 21", self.ahora, con_habitacion=False)
+        self.assertNotIn("habitacion_id", datos)
+
+
+class FlujosTests(TestCase):
+    def setUp(self):
+        self.cliente = Cliente.objects.create(telefono="56911111111")
+        self.flujo = flujos.Flujo("prueba", (
+            flujos.Paso("nombre", leer=lambda m, e: {'nombre': m}, preguntar=lambda d, e: "¿Nombre?",
+                        campos=('nombre',)),
+            flujos.Paso("fin", leer=lambda m, e: flujos.Salida("listo", terminar=True),
+                        preguntar=lambda d, e: f"Hola {d['nombre']}"),
+        ))
+
+    def test_iniciar_reutiliza_la_fila_del_cliente(self):
+        """Si otra petición ya creó la fila del cliente, iniciar la reutiliza (restricción única)."""
+        EstadoConversacion.objects.create(cliente=self.cliente, tipo="otro", paso_actual="x")
+        self.assertEqual(self.flujo.iniciar(self.cliente), "¿Nombre?")
+        estado = EstadoConversacion.objects.get(cliente=self.cliente)
+        self.assertEqual((estado.tipo, estado.paso_actual, estado.datos_reserva), ("prueba", "nombre", {}))
+
+    def test_datos_conocidos_saltan_pasos(self):
+        self.assertEqual(self.flujo.iniciar(self.cliente, {'nombre': "Ana"}), "Hola Ana")
+        self.assertEqual(EstadoConversacion.objects.get(cliente=self.cliente).paso_actual, "fin")
+
+
+class ServicioReservasTests(TestCase):
+    def setUp(self):
+        self.cliente = Cliente.objects.create(telefono="56922222222")
+        self.habitacion = Habitacion.objects.create(nombre_habitacion="101", precio_por_hora=Decimal("10000"))
+        self.inicio = timezone.make_aware(datetime(2025, 3, 14, 22, 0))
+
+    def reservar(self, inicio, duracion=2, **campos):
+        return servicio_reservas.crear_reserva(self.cliente, self.habitacion, inicio, duracion, 'whatsapp', **campos)
+
+    def test_rechaza_horario_que_se_cruza(self):
+        reserva = self.reservar(self.inicio, 4)
+        self.assertEqual(reserva.precio_total, Decimal("40000"))
+        for inicio, duracion in ((self.inicio, 1), (self.inicio - timedelta(hours=1), 2), (self.inicio + timedelta(hours=3), 3)):
+            with self.subTest(inicio=inicio, duracion=duracion), self.assertRaises(servicio_reservas.HorarioOcupado):
+                self.reservar(inicio, duracion)
+        self.assertEqual(Reserva.objects.count(), 1)
+
+    def test_acepta_horario_contiguo_o_de_reserva_cancelada(self):
+        self.reservar(self.inicio, 2)
+        self.reservar(self.inicio + timedelta(hours=2), 2)
+        self.reservar(self.inicio - timedelta(hours=2), 2, estado='cancelada')
+        self.reservar(self.inicio - timedelta(hours=2), 2)
+        self.assertEqual(Reserva.objects.count(), 4)
+
+    def test_confirmar_reserva_funcionario_no_repite_el_aviso(self):
+        from .views import confirmar_reserva_funcionario
+
+        reserva = self.reservar(self.inicio)
+        with self.captureOnCommitCallbacks() as avisos:
+            primera = confirmar_reserva_funcionario(str(reserva.reserva_id), "56900000000")
+        self.assertIn("CONFIRMADA", primera["text"]["body"])
+        self.assertEqual(len(avisos), 1)
+
+        with self.captureOnCommitCallbacks() as avisos:
+            segunda = confirmar_reserva_funcionario(str(reserva.reserva_id), "56900000000")
+        self.assertIn("está confirmada", segunda["text"]["body"])
+        self.assertEqual(avisos, [])
+        self.assertIn("No se encontró", confirmar_reserva_funcionario("999", "56900000000")["text"]["body"])
+
+    def test_estadisticas_coinciden_con_recalcular(self):
+        """Las señales y ``estado_cambiado`` (UPDATE en lote) dejan los mismos totales que recalcular."""
+        reservas = [self.reservar(self.inicio + timedelta(hours=3 * i), 2) for i in range(5)]
+        servicio_reservas.crear_reserva(self.cliente, None, self.inicio, 3, 'web', precio_total=Decimal("5000"))
+        servicio_reservas.confirmar(reservas[0])
+        servicio_reservas.confirmar_varias([reservas[1].reserva_id, reservas[2].reserva_id, reservas[0].reserva_id])
+        servicio_reservas.registrar_llegadas([reservas[1].reserva_id], "56900000000")
+        reservas[3].estado = 'cancelada'
+        reservas[3].save()
+        Reserva.objects.get(pk=reservas[4].pk).delete()
+
+        incremental = estadisticas.obtener_estadisticas()
+        self.assertEqual(incremental['total_reservas'], 5)
+        self.assertEqual(
+            incremental['reservas_por_estado'],
+            {'confirmada': 2, 'llegada_confirmada': 1, 'cancelada': 1, 'pendiente': 1},
+        )
+        hoy = timezone.localdate()
+        estadisticas.recalcular(hoy - timedelta(days=1), hoy + timedelta(days=1))
+        self.assertEqual(estadisticas.obtener_estadisticas(), incremental)
+
+    def test_cancelar_varias_desde_el_admin(self):
+        from .admin import cancelar_reservas
+
+        pendiente, confirmada, llegada = (self.reservar(self.inicio + timedelta(hours=3 * i)) for i in range(3))
+        servicio_reservas.confirmar(confirmada)
+        servicio_reservas.registrar_llegada(llegada)
+        version = cache.get('disponibilidad:version')
+
+        with mock.patch("apps.api.admin.messages") as mensajes, self.captureOnCommitCallbacks() as avisos:
+            cancelar_reservas(None, None, Reserva.objects.all())
+        mensajes.success.assert_called_once_with(None, "2 reservas canceladas.")
+        self.assertEqual(avisos, [])
+        self.assertEqual(
+            dict(Reserva.objects.values_list('reserva_id', 'estado')),
+            {pendiente.pk: 'cancelada', confirmada.pk: 'cancelada', llegada.pk: 'llegada_confirmada'},
+        )
+        self.assertNotEqual(cache.get('disponibilidad:version'), version)
+        self.assertEqual(estadisticas.obtener_estadisticas()['reservas_por_estado'],
+                         {'cancelada': 2, 'llegada_confirmada': 1})
+
+        resultado = servicio_reservas.cancelar_varias([pendiente.pk, llegada.pk, 999])
+        self.assertEqual(resultado.aplicadas, [])
+        self.assertEqual(resultado.rechazadas, {pendiente.pk: "está cancelada", llegada.pk: "está llegada_confirmada",
+                                                999: "no existe"})
+
+
+@override_settings(DISPONIBILIDAD_PASO_MINUTOS=30)
+class DisponibilidadTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.cliente = Cliente.objects.create(telefono="56988888888")
+        self.habitacion = Habitacion.objects.create(nombre_habitacion="101", precio_por_hora=Decimal("10000"))
+        self.dia = date(2025, 3, 14)
+        self.inicio = timezone.make_aware(datetime(2025, 3, 14, 22, 0))
+
+    def reservar(self, horas, duracion, estado='confirmada'):
+        inicio = self.inicio + timedelta(hours=horas)
+        return Reserva.objects.create(
+            cliente=self.cliente, habitacion=self.habitacion, estado=estado, duracion=duracion,
+            fecha_hora_inicio=inicio, fecha_hora_fin=inicio + timedelta(hours=duracion),
+            precio_total=Decimal("10000") * duracion,
+        )
+
+    @staticmethod
+    def tramos(desde, hasta):
+        return ((1 << (hasta - desde)) - 1) << desde
+
+    def test_marcar_contiguas_solapadas_y_cruzando_medianoche(self):
+        siguiente = self.dia + timedelta(days=1)
+        ocupacion = {self.dia: {}, siguiente: {}}
+
+        def marcar(desde, hasta):
+            disponibilidad._marcar(ocupacion, 1, desde, hasta, 30, 48)
+
+        marcar(datetime(2025, 3, 14, 10, 0), datetime(2025, 3, 14, 12, 0))
+        marcar(datetime(2025, 3, 14, 12, 0), datetime(2025, 3, 14, 13, 0))   # contigua
+        self.assertEqual(ocupacion[self.dia][1], self.tramos(20, 26))
+        marcar(datetime(2025, 3, 14, 11, 0), datetime(2025, 3, 14, 14, 15))  # solapada, termina a mitad de tramo
+        self.assertEqual(ocupacion[self.dia][1], self.tramos(20, 29))
+
+        marcar(datetime(2025, 3, 14, 23, 0), datetime(2025, 3, 15, 1, 30))
+        self.assertEqual(ocupacion[self.dia][1], self.tramos(20, 29) | self.tramos(46, 48))
+        self.assertEqual(ocupacion[siguiente][1], self.tramos(0, 3))
+
+    def test_ocupacion_ignora_canceladas_y_cruza_medianoche(self):
+        self.reservar(0, 4)                       # 22:00 a 02:00
+        self.reservar(-4, 2, estado='cancelada')  # 18:00 a 20:00, no ocupa
+        self.reservar(-2, 2, estado='completada')
+        siguiente = self.dia + timedelta(days=1)
+
+        ocupados = disponibilidad.ocupacion([self.dia, siguiente])
+        habitacion_id = self.habitacion.habitacion_id
+        self.assertEqual(ocupados[self.dia], {habitacion_id: self.tramos(44, 48)})
+        self.assertEqual(ocupados[siguiente], {habitacion_id: self.tramos(0, 4)})
+
+    def test_buscar_ventanas_contiguas_a_la_reserva(self):
+        self.reservar(0, 4)                       # 22:00 a 02:00
+        self.reservar(4, 2, estado='cancelada')   # 02:00 a 04:00, no ocupa
+
+        ventanas = disponibilidad.buscar_ventanas(
+            2, desde=self.inicio - timedelta(hours=2), hasta=self.inicio + timedelta(hours=6), n=3,
+        )
+        self.assertEqual(
+            [timezone.localtime(ventana.inicio).strftime("%d %H:%M") for ventana in ventanas],
+            ["14 20:00", "15 02:00", "15 02:30"],
+        )
+        self.assertEqual(ventanas[0].fin, self.inicio)
+        self.assertEqual(ventanas[0].precio_total, Decimal("20000"))
+        self.assertEqual(
+            disponibilidad.buscar_ventanas(5, desde=self.inicio - timedelta(hours=2), hasta=self.inicio + timedelta(hours=4)),
+            [],
+        )
+
+    def test_guardar_reserva_invalida_la_cache(self):
+        habitacion_id = self.habitacion.habitacion_id
+        self.assertEqual(disponibilidad.ocupacion([self.dia])[self.dia], {})
+
+        reserva = self.reservar(0, 1)
+        self.assertEqual(disponibilidad.ocupacion([self.dia])[self.dia], {habitacion_id: self.tramos(44, 46)})
+
+        reserva.estado = 'cancelada'
+        reserva.save()
+        self.assertEqual(disponibilidad.ocupacion([self.dia])[self.dia], {})
+
+
+class MigracionTestCase(TransactionTestCase):
+    """Migra hacia atrás a ``antes``, carga datos con los modelos históricos y migra a ``despues``."""
+
+    antes = despues = None
+
+    def migrar(self, destino):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(destino)
+        return executor.loader.project_state(destino).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+
+class MigracionReservasUnificadasTests(MigracionTestCase):
+    """api 0016 copia reservas_whatsapp a reservas y reservas 0004 reenlaza ProcesoReserva."""
+
+    antes = [('api', '0015_reservas_indice_inicio'), ('reservas', '0003_estado_conversacion_por_cliente')]
+    despues = [('api', '0016_reservas_unificadas'), ('reservas', '0004_procesos_reserva_unificada')]
+
+    def test_copia_reservas_whatsapp_y_procesos(self):
+        apps = self.migrar(self.antes)
+        Cliente = apps.get_model('api', 'Cliente')
+        Habitacion = apps.get_model('api', 'Habitacion')
+        ReservaWhatsApp = apps.get_model('reservas', 'ReservaWhatsApp')
+        ProcesoReserva = apps.get_model('reservas', 'ProcesoReserva')
+        cliente = Cliente.objects.create(telefono="56933333333")
+        habitacion = Habitacion.objects.create(nombre_habitacion="201", precio_por_hora=Decimal("8000"))
+        comunes = dict(cliente=cliente, habitacion=habitacion, precio_por_hora=Decimal("8000"))
+        por_horas = ReservaWhatsApp.objects.create(
+            fecha_reserva=date(2025, 3, 14), hora_inicio=time(22, 0), hora_fin=time(2, 0), horas_reservadas=4,
+            precio_total=Decimal("32000"), estado='confirmada', numero_personas=3, observaciones="aniversario",
+            confirmada_por_funcionario="56900000000", **comunes,
+        )
+        inactiva = ReservaWhatsApp.objects.create(
+            fecha_reserva=date(2025, 3, 15), hora_inicio=time(15, 0), hora_fin=time(17, 0), horas_reservadas=2,
+            precio_total=Decimal("16000"), estado='pendiente', activo=False, **comunes,
+        )
+        proceso = ProcesoReserva.objects.create(cliente=cliente, reserva_creada=por_horas)
+        sin_reserva = ProcesoReserva.objects.create(cliente=cliente)
+
+        apps = self.migrar(self.despues)
+        Reserva = apps.get_model('api', 'Reserva')
+        ProcesoReserva = apps.get_model('reservas', 'ProcesoReserva')
+        self.assertEqual(Reserva.objects.count(), 2)
+
+        copia = Reserva.objects.get(reserva_whatsapp_id=por_horas.reserva_id)
+        inicio = timezone.make_aware(datetime(2025, 3, 14, 22, 0))
+        self.assertEqual((copia.fecha_hora_inicio, copia.fecha_hora_fin), (inicio, inicio + timedelta(hours=4)))
+        self.assertEqual(
+            (copia.cliente_id, copia.habitacion_id, copia.estado, copia.duracion, copia.precio_total, copia.origen),
+            (cliente.pk, habitacion.pk, 'confirmada', 4, Decimal("32000"), 'whatsapp'),
+        )
+        self.assertEqual(
+            (copia.telefono, copia.numero_personas, copia.observaciones, copia.confirmada_por),
+            ("56933333333", 3, "aniversario", "56900000000"),
+        )
+        self.assertEqual(copia.fecha_creacion, por_horas.fecha_creacion)
+        self.assertEqual(Reserva.objects.get(reserva_whatsapp_id=inactiva.reserva_id).estado, 'cancelada')
+
+        self.assertEqual(ProcesoReserva.objects.get(pk=proceso.pk).reserva_creada_id, copia.reserva_id)
+        self.assertIsNone(ProcesoReserva.objects.get(pk=sin_reserva.pk).reserva_creada_id)
+
+
+@override_settings(ALLOWED_HOSTS=['chat.example.com'], CSRF_TRUSTED_ORIGINS=['https://*.example.org'])
+class WebSocketChatTests(SimpleTestCase):
+    """apps/api/ws_chat.py: la aplicación ASGI se prueba directamente, sin servidor."""
+
+    def setUp(self):
+        ws_chat._sesiones.clear()
+        self.addCleanup(ws_chat._sesiones.clear)
+
+    def conectar(self, query="", origen="https://chat.example.com", frames=()):
+        """Conecta, envía ``frames`` y desconecta. Devuelve los eventos ASGI enviados por el servidor."""
+        entrada = [{"type": "websocket.connect"}]
+        entrada += [{"type": "websocket.receive", "text": json.dumps(frame)} for frame in frames]
+        entrada.append({"type": "websocket.disconnect"})
+        salida = []
+
+        async def receive():
+            return entrada.pop(0)
+
+        async def send(evento):
+            salida.append(evento)
+
+        scope = {"type": "websocket", "path": "/ws/chat/", "query_string": query.encode(),
+                 "headers": [(b"origin", origen.encode())] if origen else []}
+        asyncio.run(ws_chat.aplicacion_websocket(scope, receive, send))
+        return salida
+
+    def frames(self, salida):
+        return [json.loads(e["text"]) for e in salida if e["type"] == "websocket.send"]
+
+    def test_rechaza_origen_no_permitido(self):
+        for origen in ("https://otro.com", "", "https://chat.example.com.otro.com"):
+            with self.subTest(origen=origen):
+                self.assertEqual(self.conectar(origen=origen), [{"type": "websocket.close", "code": 4403}])
+        self.assertEqual(self.conectar(origen="https://app.example.org")[0], {"type": "websocket.accept"})
+
+    def test_bienvenida_entrega_token_del_servidor_sin_guardar_la_sesion(self):
+        salida = self.conectar(frames=[{"tipo": "ping"}])
+        self.assertEqual(salida[0], {"type": "websocket.accept"})
+        bienvenida, pong = self.frames(salida)
+        self.assertEqual((bienvenida["seq"], bienvenida["tipo"], pong), (1, "bienvenida", {"tipo": "pong"}))
+        self.assertEqual(ws_chat.session_id_de(bienvenida["token"]), bienvenida["session_id"])
+        self.assertLessEqual(len("web_" + bienvenida["session_id"]), 20)
+        self.assertEqual(ws_chat._sesiones, {})  # sin mensajes no ocupa memoria
+
+    def test_primer_mensaje_registra_la_sesion(self):
+        async def turno(sesion, mensaje):
+            await sesion.enviar("respuesta", data={"respuesta": mensaje})
+
+        with mock.patch.object(ws_chat, "procesar_turno", turno):
+            salida = self.conectar(frames=[{"tipo": "mensaje", "mensaje": "hola"}, {"tipo": "ping"}])
+        session_id = self.frames(salida)[0]["session_id"]
+        self.assertEqual(list(ws_chat._sesiones), [session_id])
+        self.assertEqual(ws_chat._sesiones[session_id].conexiones, set())
+
+    def test_token_falsificado_abre_sesion_nueva(self):
+        for token in ("elegido-por-el-cliente", ws_chat.token_de("abc") + "x"):
+            with self.subTest(token=token):
+                bienvenida = self.frames(self.conectar(f"token={token}&desde=3"))[0]
+                self.assertEqual(bienvenida["tipo"], "bienvenida")
+                self.assertNotIn(bienvenida["session_id"], ("elegido-por-el-cliente", "abc"))
+
+    def test_reconexion_reenvia_frames_o_pide_resincronizar(self):
+        sesion = ws_chat.registrar_sesion(ws_chat.SesionChat(ws_chat.nuevo_session_id()))
+        for i in range(3):
+            asyncio.run(sesion.enviar("aviso", texto=f"aviso {i}"))
+        token = ws_chat.token_de(sesion.session_id)
+        self.assertEqual([f["seq"] for f in self.frames(self.conectar(f"token={token}&desde=1"))], [2, 3])
+
+        sesion.frames.popleft()
+        sesion.frames.popleft()
+        self.assertEqual(self.frames(self.conectar(f"token={token}&desde=1")), [{"tipo": "resincronizar"}])
+
+    def test_sesiones_en_memoria_con_limite_lru(self):
+        with mock.patch.object(ws_chat, "MAXIMO_SESIONES", 3):
+            sesiones = [ws_chat.registrar_sesion(ws_chat.SesionChat(str(i))) for i in range(3)]
+            ws_chat.obtener_sesion(ws_chat.token_de("0"))  # la "0" pasa a ser la más reciente
+            sesiones[1].conexiones.add(object())  # con conexión abierta no se descarta
+            ws_chat.registrar_sesion(ws_chat.SesionChat("3"))
+            ws_chat.registrar_sesion(ws_chat.SesionChat("4"))
+        # Sale la "2" (la menos usada) y después la "0"; la "1" sigue por tener conexión
+        self.assertEqual(list(ws_chat._sesiones), ["1", "3", "4"])
+
+
+class EscrituraDiferidaMensajesTests(TestCase):
+    def setUp(self):
+        cliente = Cliente.objects.create(telefono="web_abc")
+        self.conversacion = Conversacion.objects.create(cliente=cliente)
+        self.escritura = historial_web.EscrituraDiferidaMensajes(tamano_lote=2, intervalo_s=999)
+
+    def test_lote_fallido_se_reintenta_sin_perder_ni_duplicar(self):
+        ahora = timezone.now()
+        for i in range(3):
+            self.escritura.agregar(self.conversacion.pk, 'cliente', f"m{i}", ahora + timedelta(seconds=i))
+        original = Mensaje.objects.bulk_create
+
+        def falla_en_el_segundo_insert(objetos, batch_size=None):
+            original(objetos[:batch_size], batch_size=batch_size)
+            raise RuntimeError("bd caída")
+
+        with mock.patch.object(Mensaje.objects, 'bulk_create', falla_en_el_segundo_insert):
+            self.assertEqual(self.escritura.vaciar(), 0)
+        self.assertFalse(Mensaje.objects.exists())
+
+        self.escritura.agregar(self.conversacion.pk, 'agente', "m3", ahora + timedelta(seconds=3))
+        self.assertEqual(self.escritura.vaciar(), 4)
+        self.assertEqual(
+            list(Mensaje.objects.order_by('timestamp').values_list('contenido', flat=True)),
+            ["m0", "m1", "m2", "m3"],
+        )
+
+
+class RegistroPreguntasDesconocidasTests(TestCase):
+    def setUp(self):
+        self.cliente = Cliente.objects.create(telefono="56944444444")
+        self.registro = preguntas_desconocidas.RegistroPreguntasDesconocidas(intervalo_s=999)
+        self.inicio = timezone.now()
+
+    def registrar(self, texto, segundos, cliente_id=None):
+        with mock.patch.object(preguntas_desconocidas.timezone, 'now', return_value=self.inicio + timedelta(seconds=segundos)):
+            self.registro.registrar(texto, cliente_id)
+
+    def test_deduplica_y_suma_ocurrencias(self):
+        self.registrar("¿Tienen jacuzzi?", 0, self.cliente.pk)
+        self.registrar("tienen JACUZZI", 5)
+        self.registrar("¿Aceptan mascotas?", 1)
+        self.registrar("  ", 2)
+        self.assertEqual(self.registro.vaciar(), 3)
+
+        jacuzzi = PreguntaDesconocida.objects.get(hash_texto=preguntas_desconocidas.hash_texto("tienen jacuzzi"))
+        mascotas = PreguntaDesconocida.objects.get(texto_pregunta="¿Aceptan mascotas?")
+        self.assertEqual(PreguntaDesconocida.objects.count(), 2)
+        self.assertEqual(
+            (jacuzzi.texto_pregunta, jacuzzi.cliente_id, jacuzzi.ocurrencias, jacuzzi.fecha_ultima_vez),
+            ("¿Tienen jacuzzi?", self.cliente.pk, 2, self.inicio + timedelta(seconds=5)),
+        )
+        # Cada hash guarda su propia última vez, no la más reciente del lote
+        self.assertEqual((mascotas.ocurrencias, mascotas.fecha_ultima_vez), (1, self.inicio + timedelta(seconds=1)))
+
+        PreguntaDesconocida.objects.update(revisada=True)
+        self.registrar("Tienen jacuzzí", 10)
+        self.registrar("Tienen jacuzzi!!", 11)
+        self.assertEqual(self.registro.vaciar(), 2)
+        jacuzzi.refresh_from_db()
+        self.assertEqual(
+            (jacuzzi.ocurrencias, jacuzzi.fecha_ultima_vez, jacuzzi.revisada, jacuzzi.cliente_id),
+            (4, self.inicio + timedelta(seconds=11), False, self.cliente.pk),
+        )
+        self.assertTrue(PreguntaDesconocida.objects.get(pk=mascotas.pk).revisada)
+
+    def test_lote_fallido_se_junta_con_lo_nuevo(self):
+        self.registrar("¿Tienen jacuzzi?", 0, self.cliente.pk)
+        self.registrar("¿Tienen jacuzzi?", 1)
+        with mock.patch.object(PreguntaDesconocida.objects, 'bulk_create', side_effect=RuntimeError("bd caída")):
+            self.assertEqual(self.registro.vaciar(), 0)
+        self.registrar("tienen jacuzzi", 7)
+        self.assertEqual(self.registro.vaciar(), 3)
+        pregunta = PreguntaDesconocida.objects.get()
+        self.assertEqual(
+            (pregunta.texto_pregunta, pregunta.cliente_id, pregunta.ocurrencias, pregunta.fecha_ultima_vez),
+            ("¿Tienen jacuzzi?", self.cliente.pk, 3, self.inicio + timedelta(seconds=7)),
+        )
+
+
+class MigracionDeduplicarPreguntasTests(MigracionTestCase):
+    """api 0011 fusiona las preguntas desconocidas repetidas antes del índice único."""
+
+    antes = [('api', '0010_grupos_preguntas_desconocidas'), ('reservas', '0002_indices_listados_admin')]
+    despues = [('api', '0011_deduplicar_preguntas_desconocidas')]
+
+    def test_fusiona_repetidas_en_la_mas_antigua(self):
+        apps = self.migrar(self.antes)
+        PreguntaDesconocida = apps.get_model('api', 'PreguntaDesconocida')
+        inicio = timezone.now() - timedelta(days=3)
+        filas = [
+            ("¿Tienen jacuzzi?", 0, True),
+            ("¿Aceptan mascotas?", 1, True),
+            ("tienen JACUZZI", 2, False),
+            ("Tienen jacuzzí!", 3, True),
+        ]
+        ids = []
+        for texto, dias, revisada in filas:
+            pregunta = PreguntaDesconocida.objects.create(texto_pregunta=texto, revisada=revisada)
+            PreguntaDesconocida.objects.filter(pk=pregunta.pk).update(fecha_recibida=inicio + timedelta(days=dias))
+            ids.append(pregunta.pk)
+
+        apps = self.migrar(self.despues)
+        PreguntaDesconocida = apps.get_model('api', 'PreguntaDesconocida')
+        self.assertEqual(sorted(PreguntaDesconocida.objects.values_list('pk', flat=True)), ids[:2])
+        jacuzzi, mascotas = PreguntaDesconocida.objects.order_by('pk')
+        self.assertEqual(
+            (jacuzzi.texto_pregunta, jacuzzi.ocurrencias, jacuzzi.fecha_ultima_vez, jacuzzi.revisada),
+            ("¿Tienen jacuzzi?", 3, inicio + timedelta(days=3), False),
+        )
+        self.assertEqual(jacuzzi.hash_texto, preguntas_desconocidas.hash_texto("tienen jacuzzi"))
+        self.assertEqual(
+            (mascotas.ocurrencias, mascotas.fecha_ultima_vez, mascotas.revisada),
+            (1, inicio + timedelta(days=1), True),
+        )
+
+
+class ReservasApiTests(TestCase):
+    """/api/reservas/: paginación por keyset sobre (fecha_hora_inicio, reserva_id) y ETag."""
+
+    def setUp(self):
+        from django.contrib.auth.models import User
+
+        self.client.force_login(User.objects.create_user("recepcion", is_staff=True))
+        cliente = Cliente.objects.create(telefono="56955555555")
+        inicio = timezone.make_aware(datetime(2025, 3, 14, 22, 0))
+        # Empates: tres reservas a las 22:00 y tres a las 23:00
+        horas = [0, 1, 0, 1, 0, 2, 1]
+        self.reservas = [
+            Reserva.objects.create(
+                cliente=cliente, fecha_hora_inicio=inicio + timedelta(hours=h),
+                fecha_hora_fin=inicio + timedelta(hours=h + 2), duracion=2, precio_total=Decimal("1000"),
+            )
+            for h in horas
+        ]
+        self.orden = [r.reserva_id for r in sorted(self.reservas, key=lambda r: (r.fecha_hora_inicio, r.reserva_id))]
+
+    def recorrer(self, url, enlace):
+        ids, paginas = [], 0
+        while url:
+            respuesta = self.client.get(url)
+            self.assertEqual(respuesta.status_code, 200)
+            datos = respuesta.json()
+            ids.append([r['reserva_id'] for r in datos['results']])
+            url = datos[enlace]
+            paginas += 1
+            self.assertLess(paginas, 20)
+        return ids
+
+    def test_paginas_con_empates_no_saltan_ni_repiten(self):
+        for tamano in (1, 2, 3, 7):
+            with self.subTest(tamano=tamano):
+                paginas = self.recorrer(f"/api/reservas/?tamano={tamano}&campos=reserva_id", 'next')
+                self.assertEqual(sum(paginas, []), self.orden)
+                self.assertTrue(all(len(p) == tamano for p in paginas[:-1]))
+
+    def test_hacia_atras_desde_la_ultima_pagina(self):
+        url = "/api/reservas/?tamano=2&campos=reserva_id"
+        while True:
+            datos = self.client.get(url).json()
+            if not datos['next']:
+                break
+            url = datos['next']
+        anteriores = self.recorrer(datos['previous'], 'previous')
+        self.assertEqual(sum(reversed(anteriores), []) + [r['reserva_id'] for r in datos['results']], self.orden)
+
+    def test_if_none_match_responde_304(self):
+        url = "/api/reservas/?tamano=3"
+        respuesta = self.client.get(url)
+        etag = respuesta['ETag']
+        no_modificada = self.client.get(url, HTTP_IF_NONE_MATCH=f'"otro", {etag}')
+        self.assertEqual((no_modificada.status_code, no_modificada.content, no_modificada['ETag']), (304, b"", etag))
+
+        Reserva.objects.filter(pk=self.orden[0]).update(estado='confirmada')
+        cambiada = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cambiada.status_code, 200)
+        self.assertNotEqual(cambiada['ETag'], etag)
+
+    def test_crear_calcula_el_fin_desde_la_duracion(self):
+        inicio = timezone.make_aware(datetime(2025, 3, 20, 21, 0))
+        respuesta = self.client.post("/api/reservas/", {
+            'nombre_cliente': "Ana", 'telefono': "56912121212", 'fecha_hora_inicio': inicio.isoformat(),
+            'fecha_hora_fin': (inicio + timedelta(hours=9)).isoformat(), 'duracion': 3, 'precio_total': "30000",
+        }, content_type="application/json")
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+        reserva = Reserva.objects.get(telefono="56912121212")
+        self.assertIsNone(reserva.habitacion)
+        self.assertEqual(reserva.fecha_hora_fin, inicio + timedelta(hours=3))
+        self.assertEqual(reserva.cliente.nombre_cliente, "Ana")
+
+    def test_solo_staff(self):
+        self.client.logout()
+        self.assertIn(self.client.get("/api/reservas/").status_code, (401, 403))
+
+
+class ImportarReservasTests(TestCase):
+    def setUp(self):
+        self.habitacion = Habitacion.objects.create(nombre_habitacion="101", precio_por_hora=Decimal("10000"))
+        self.inicio = timezone.make_aware(datetime(2025, 3, 14, 22, 0))
+        servicio_reservas.crear_reserva(None, self.habitacion, self.inicio, 4, 'web', telefono="56966666666")
+
+    def fila(self, horas, duracion, estado='confirmada'):
+        inicio = self.inicio + timedelta(hours=horas)
+        return {
+            'cliente_telefono': "56977777777", 'habitacion': "101", 'estado': estado,
+            'fecha_hora_inicio': inicio.isoformat(),
+            'fecha_hora_fin': (inicio + timedelta(hours=duracion)).isoformat(),
+            'duracion': str(duracion), 'precio_total': "1000",
+        }
+
+    def test_rechaza_choques_con_reservas_activas(self):
+        rechazos = []
+        importador = transferencia_reservas.Importador(
+            'reserva', tamano_lote=3, al_rechazar=lambda numero, fila, error: rechazos.append(numero),
+        )
+        filas = [
+            self.fila(2, 2),                      # 1: choca con la reserva guardada
+            self.fila(1, 2, estado='cancelada'),  # 2: cancelada, no ocupa
+            self.fila(4, 2),                      # 3: contigua
+            self.fila(5, 1, estado=''),           # 4: estado por defecto (pendiente): choca con la 3 (otro lote)
+            self.fila(6, 2),                      # 5
+            self.fila(7, 2),                      # 6: choca con la 5, del mismo lote
+        ]
+        version = cache.get('disponibilidad:version')
+        resultado = importador.importar(enumerate(filas, start=1))
+
+        self.assertEqual(rechazos, [1, 4, 6])
+        self.assertEqual((resultado.importadas, resultado.rechazadas), (3, 3))
+        self.assertEqual(Reserva.objects.count(), 4)
+        self.assertNotEqual(cache.get('disponibilidad:version'), version)
@@ -0,0 +1,383 @@
+# apps/api/transferencia_reservas.py
+"""
+Importación y exportación masiva de reservas en CSV o JSONL (``manage.py
+importar_reservas`` / ``exportar_reservas``), para migrar el histórico del PMS
+anterior y para contabilidad.
+
+Esquema ``reserva`` (api.Reserva; desde la migración api 0016 también guarda las
+reservas de WhatsApp, así que reservas_whatsapp ya no se importa ni exporta).
+Las columnas son los campos del modelo con el mismo nombre, más:
+    cliente_telefono, cliente_nombre   cliente (se crea si el teléfono no existe)
+    habitacion                         nombre_habitacion (o su id)
+``reserva_id`` solo se exporta.
+
+Importación: las filas se leen de a una (el archivo nunca se carga entero) y se
+procesan en lotes; por lote se validan con los campos del modelo, se resuelven
+clientes con una consulta (y un bulk_create de los nuevos) y se hace un
+bulk_create de las reservas en una transacción (respetando la fecha_creacion
+del archivo). Clientes y habitaciones quedan
+en diccionarios en memoria para los lotes siguientes. Al final se recalculan
+las estadísticas diarias de los días importados (bulk_create no dispara señales).
+
+Como el alta por servicio_reservas, una reserva activa (estado de
+disponibilidad.ESTADOS_OCUPAN) que choca con otra activa de la misma habitación,
+ya guardada o anterior en el archivo, se rechaza (``al_rechazar``); se comprueba
+por lote con una consulta y las habitaciones del lote bloqueadas. Después de
+cada lote se invalida la caché de disponibilidad. Con ``simular`` no se ven los
+choques entre lotes distintos (no se guarda nada).
+
+Exportación: ``values()`` + ``iterator()``, sin instanciar modelos y con memoria acotada.
+
+Archivos terminados en ``.gz`` se leen/escriben comprimidos; ``-`` es stdin/stdout.
+"""
+import contextlib
+import csv
+import datetime
+import gzip
+import io
+import json
+import logging
+import sys
+import time
+from dataclasses import dataclass, field
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from . import disponibilidad, estadisticas
+from .models import Cliente, Habitacion, Reserva
+
+logger = logging.getLogger(__name__)
+
+TAMANO_LOTE = 1000
+
+
+@dataclass(frozen=True)
+class Esquema:
+    modelo: type
+    columnas: tuple
+    # Campos auto_now_add que toman la fecha_creacion del archivo
+    fechas_creacion: tuple = ('fecha_creacion',)
+    cliente_obligatorio: bool = True
+
+
+ESQUEMAS = {
+    'reserva': Esquema(
+        modelo=Reserva,
+        columnas=(
+            'cliente_telefono', 'cliente_nombre', 'habitacion', 'fecha_hora_inicio', 'fecha_hora_fin',
+            'duracion', 'precio_total', 'estado', 'origen', 'telefono', 'numero_personas', 'observaciones',
+            'fecha_llegada', 'fecha_creacion',
+        ),
+        fechas_creacion=('fecha_creacion', 'fecha'),
+        cliente_obligatorio=False,
+    ),
+}
+
+# Columnas que no son campos del modelo, y de dónde salen al exportar
+_COLUMNAS_RELACION = {
+    'cliente_telefono': 'cliente__telefono',
+    'cliente_nombre': 'cliente__nombre_cliente',
+    'habitacion': 'habitacion__nombre_habitacion',
+}
+
+
+@dataclass
+class Resultado:
+    leidas: int = 0
+    importadas: int = 0
+    rechazadas: int = 0
+    clientes_creados: int = 0
+    segundos: float = 0.0
+    dias: set = field(default_factory=set)
+
+    @property
+    def filas_por_segundo(self):
+        return self.leidas / self.segundos if self.segundos else 0.0
+
+
+# --- Archivos ---
+
+@contextlib.contextmanager
+def abrir(ruta, modo):
+    """Abre ``ruta`` en modo texto ('r' o 'w'); ``-`` es stdin/stdout y ``.gz`` se comprime."""
+    if ruta == '-':
+        flujo = io.TextIOWrapper((sys.stdin if modo == 'r' else sys.stdout).buffer, encoding='utf-8', newline='')
+        try:
+            yield flujo
+        finally:
+            flujo.flush()
+            flujo.detach()  # sin cerrar stdin/stdout
+        return
+    if str(ruta).endswith('.gz'):
+        archivo = gzip.open(ruta, modo + 't', encoding='utf-8', newline='')
+    else:
+        archivo = open(ruta, modo, encoding='utf-8', newline='')
+    with archivo:
+        yield archivo
+
+
+def formato_de(ruta, formato=None):
+    if formato:
+        return formato
+    nombre = str(ruta).removesuffix('.gz')
+    return 'jsonl' if nombre.endswith(('.jsonl', '.json')) else 'csv'
+
+
+def leer_filas(archivo, formato):
+    """Genera (número de línea, dict) del archivo; dict None si la línea JSON es inválida."""
+    if formato == 'csv':
+        lector = csv.DictReader(archivo)
+        for fila in lector:
+            yield lector.line_num, fila
+    else:
+        for numero, linea in enumerate(archivo, start=1):
+            if not linea.strip():
+                continue
+            try:
+                fila = json.loads(linea)
+            except json.JSONDecodeError:
+                fila = None
+            yield numero, fila if isinstance(fila, dict) else None
+
+
+# --- Importación ---
+
+@contextlib.contextmanager
+def _sin_auto_now_add(modelo, campos):
+    """
+    Desactiva auto_now_add en ``campos`` mientras dura el bloque, para que el
+    bulk_create respete la fecha_creacion del archivo. Cambia el campo de la
+    clase: solo para procesos dedicados (el comando de importación), no en un
+    worker que atiende requests en otros hilos.
+    """
+    campos = [modelo._meta.get_field(c) for c in campos]
+    originales = [c.auto_now_add for c in campos]
+    for campo in campos:
+        campo.auto_now_add = False
+    try:
+        yield
+    finally:
+        for campo, original in zip(campos, originales):
+            campo.auto_now_add = original
+
+
+class Importador:
+    def __init__(self, esquema, tamano_lote=TAMANO_LOTE, simular=False, al_rechazar=None, al_avanzar=None):
+        self.esquema = ESQUEMAS[esquema] if isinstance(esquema, str) else esquema
+        self.tamano_lote = tamano_lote
+        self.simular = simular
+        self.al_rechazar = al_rechazar or (lambda numero, fila, error: None)
+        self.al_avanzar = al_avanzar or (lambda resultado: None)
+        self.resultado = Resultado()
+        self._clientes = {}
+        self._habitaciones = {}
+        for pk, nombre in Habitacion.objects.values_list('habitacion_id', 'nombre_habitacion'):
+            self._habitaciones[nombre.strip().lower()] = pk
+            self._habitaciones[str(pk)] = pk
+        meta = self.esquema.modelo._meta
+        self._campos = {c: meta.get_field(c) for c in self.esquema.columnas if c not in _COLUMNAS_RELACION}
+
+    def importar(self, filas):
+        """Importa un iterable de (número de línea, dict). Devuelve el Resultado."""
+        inicio = time.perf_counter()
+        lote = []
+        for numero, fila in filas:
+            self.resultado.leidas += 1
+            lote.append((numero, fila))
+            if len(lote) >= self.tamano_lote:
+                self._procesar_lote(lote)
+                lote = []
+                self.resultado.segundos = time.perf_counter() - inicio
+                self.al_avanzar(self.resultado)
+        if lote:
+            self._procesar_lote(lote)
+        self.resultado.segundos = time.perf_counter() - inicio
+
+        if not self.simular and self.resultado.dias:
+            estadisticas.recalcular(min(self.resultado.dias), max(self.resultado.dias))
+        return self.resultado
+
+    def _valor(self, columna, crudo):
+        campo = self._campos[columna]
+        if crudo is None or (isinstance(crudo, str) and not crudo.strip()):
+            if campo.has_default() or getattr(campo, 'auto_now_add', False):
+                return None, False
+            if campo.null:
+                return None, True
+            raise ValidationError("obligatorio")
+        valor = campo.clean(crudo.strip() if isinstance(crudo, str) else crudo, None)
+        if isinstance(valor, datetime.datetime) and timezone.is_naive(valor):
+            valor = timezone.make_aware(valor)
+        return valor, True
+
+    def _validar(self, fila):
+        """Devuelve (datos del modelo, teléfono, nombre del cliente) o lanza ValidationError."""
+        if fila is None:
+            raise ValidationError("JSON inválido")
+        errores = {}
+        datos = {}
+        for columna in self._campos:
+            try:
+                valor, usar = self._valor(columna, fila.get(columna))
+                if usar:
+                    datos[columna] = valor
+            except ValidationError as e:
+                errores[columna] = '; '.join(e.messages)
+
+        telefono = str(fila.get('cliente_telefono') or '').strip()
+        if telefono and len(telefono) > Cliente._meta.get_field('telefono').max_length:
+            errores['cliente_telefono'] = "demasiado largo"
+        elif not telefono and self.esquema.cliente_obligatorio:
+            errores['cliente_telefono'] = "obligatorio"
+
+        habitacion = str(fila.get('habitacion') or '').strip()
+        if habitacion:
+            habitacion_id = self._habitaciones.get(habitacion.lower())
+            if habitacion_id is None:
+                errores['habitacion'] = f"no existe '{habitacion}'"
+            datos['habitacion_id'] = habitacion_id
+        elif self.esquema.cliente_obligatorio:
+            errores['habitacion'] = "obligatoria"
+
+        if errores:
+            raise ValidationError('; '.join(f"{c}: {m}" for c, m in errores.items()))
+        return datos, telefono, str(fila.get('cliente_nombre') or '').strip() or None
+
+    def _resolver_clientes(self, nombres_por_telefono):
+        faltantes = [t for t in nombres_por_telefono if t not in self._clientes]
+        if not faltantes:
+            return
+        self._clientes.update(Cliente.objects.filter(telefono__in=faltantes).values_list('telefono', 'cliente_id'))
+        nuevos = [t for t in faltantes if t not in self._clientes]
+        self.resultado.clientes_creados += len(nuevos)
+        if not nuevos or self.simular:
+            return
+        Cliente.objects.bulk_create(
+            [Cliente(telefono=t, nombre_cliente=nombres_por_telefono[t]) for t in nuevos],
+            ignore_conflicts=True,
+        )
+        self._clientes.update(Cliente.objects.filter(telefono__in=nuevos).values_list('telefono', 'cliente_id'))
+        self.resultado.dias.add(timezone.localdate())
+
+    def _rechazar(self, numero, fila, error):
+        self.resultado.rechazadas += 1
+        self.al_rechazar(numero, fila, error)
+
+    def _sin_choques(self, validas):
+        """
+        Quita de ``validas`` (y rechaza) las reservas activas que chocan con otra activa
+        de la misma habitación: las de la BD (una consulta, con las habitaciones
+        bloqueadas hasta el commit) o las anteriores del mismo lote.
+        """
+        estado_por_defecto = Reserva._meta.get_field('estado').get_default()
+
+        def ocupa(datos):
+            return datos.get('habitacion_id') and datos.get('estado', estado_por_defecto) in disponibilidad.ESTADOS_OCUPAN
+
+        activas = [datos for _, _, datos, _, _ in validas if ocupa(datos)]
+        if not activas:
+            return validas
+        habitaciones = {d['habitacion_id'] for d in activas}
+        list(Habitacion.objects.select_for_update().filter(habitacion_id__in=habitaciones).values_list('pk'))
+        ocupadas = {}
+        for habitacion_id, inicio, fin in Reserva.objects.filter(
+            habitacion_id__in=habitaciones, estado__in=disponibilidad.ESTADOS_OCUPAN,
+            fecha_hora_inicio__lt=max(d['fecha_hora_fin'] for d in activas),
+            fecha_hora_fin__gt=min(d['fecha_hora_inicio'] for d in activas),
+        ).values_list('habitacion_id', 'fecha_hora_inicio', 'fecha_hora_fin'):
+            ocupadas.setdefault(habitacion_id, []).append((inicio, fin))
+
+        aceptadas = []
+        for numero, fila, datos, telefono, nombre in validas:
+            if ocupa(datos):
+                inicio, fin = datos['fecha_hora_inicio'], datos['fecha_hora_fin']
+                intervalos = ocupadas.setdefault(datos['habitacion_id'], [])
+                if any(i < fin and inicio < f for i, f in intervalos):
+                    self._rechazar(numero, fila, f"habitacion: ya está reservada entre {inicio} y {fin}")
+                    continue
+                intervalos.append((inicio, fin))
+            aceptadas.append((numero, fila, datos, telefono, nombre))
+        return aceptadas
+
+    def _procesar_lote(self, lote):
+        validas = []
+        for numero, fila in lote:
+            try:
+                validas.append((numero, fila, *self._validar(fila)))
+            except ValidationError as e:
+                self._rechazar(numero, fila, '; '.join(e.messages))
+        if not validas:
+            return
+
+        modelo = self.esquema.modelo
+        with transaction.atomic():
+            if modelo is Reserva:
+                validas = self._sin_choques(validas)
+                if not validas:
+                    return
+            self._resolver_clientes({t: n for _, _, _, t, n in validas if t})
+            if self.simular:
+                self.resultado.importadas += len(validas)
+                return
+
+            ahora = timezone.now()
+            objetos = []
+            for _, _, datos, telefono, _ in validas:
+                creacion = datos.get('fecha_creacion') or ahora
+                for campo in self.esquema.fechas_creacion:
+                    datos[campo] = creacion
+                objetos.append(modelo(cliente_id=self._clientes.get(telefono) if telefono else None, **datos))
+            with _sin_auto_now_add(modelo, self.esquema.fechas_creacion):
+                modelo.objects.bulk_create(objetos, batch_size=self.tamano_lote)
+
+        self.resultado.importadas += len(objetos)
+        if modelo is Reserva:
+            self.resultado.dias.update(timezone.localdate(o.fecha_creacion) for o in objetos)
+            # bulk_create no dispara las señales que invalidan la ocupación en caché
+            disponibilidad.invalidar()
+
+
+def importar(ruta, esquema, formato=None, **opciones):
+    with abrir(ruta, 'r') as archivo:
+        return Importador(esquema, **opciones).importar(leer_filas(archivo, formato_de(ruta, formato)))
+
+
+# --- Exportación ---
+
+def _texto(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, (datetime.datetime, datetime.date, datetime.time)):
+        return valor.isoformat()
+    return str(valor)
+
+
+def exportar(ruta, esquema, formato=None, filtros=None, tamano_lote=TAMANO_LOTE):
+    """Escribe las reservas (con ``filtros`` opcionales para ``filter()``). Devuelve cuántas."""
+    esquema = ESQUEMAS[esquema] if isinstance(esquema, str) else esquema
+    formato = formato_de(ruta, formato)
+    columnas = ('reserva_id',) + esquema.columnas
+    consulta = {c: _COLUMNAS_RELACION.get(c, c) for c in columnas}
+    filas = (
+        esquema.modelo.objects.filter(**(filtros or {}))
+        .order_by('reserva_id')
+        .values(*consulta.values())
+        .iterator(chunk_size=tamano_lote)
+    )
+
+    total = 0
+    with abrir(ruta, 'w') as archivo:
+        if formato == 'csv':
+            escritor = csv.writer(archivo)
+            escritor.writerow(columnas)
+            for fila in filas:
+                escritor.writerow([_texto(fila[consulta[c]]) for c in columnas])
+                total += 1
+        else:
+            for fila in filas:
+                datos = {c: fila[consulta[c]] for c in columnas}
+                archivo.write(json.dumps(datos, ensure_ascii=False, default=_texto) + '\n')
+                total += 1
+    return total
@@ -1,8 +1,10 @@
 # backend/api/urls.py
 from django.shortcuts import render
-from django.urls import path
+from django.urls import URLResolver, path
+from django.urls.resolvers import RoutePattern
 from .views import webhook_whatsapp  # Correcto: import relativo
-from .views_web_chat import WebChatView, PreguntasFrecuentesView
+from .views_web_chat import WebChatView, WebChatStreamView, PreguntasFrecuentesView, chat_view
+from .views_async import webhook_whatsapp_async, WebChatAsyncView, WebChatStreamAsyncView
 from django.http import HttpResponse
 from django.conf import settings
 import os
@@ -19,12 +21,30 @@ import os
 #     </body>
 #     </html>
 #     """)
-def chat_view(request):
-    return render(request, 'chat/avatar-chat-page.html')
+# La página real (precomprimida y con caché HTTP) está en views_web_chat.chat_view
+
+# Con VISTAS_ASYNC=True (servidor ASGI) las rutas principales usan las vistas async.
+# El stream SSE transmite en vivo bajo ASGI en ambos casos (ver WebChatStreamView)
+if getattr(settings, 'VISTAS_ASYNC', False):
+    vista_whatsapp = webhook_whatsapp_async
+    vista_web_chat = WebChatAsyncView.as_view()
+    vista_web_chat_stream = WebChatStreamAsyncView.as_view()
+else:
+    vista_whatsapp = webhook_whatsapp
+    vista_web_chat = WebChatView.as_view()
+    vista_web_chat_stream = WebChatStreamView.as_view()
 
 urlpatterns = [
-    path('whatsapp/', webhook_whatsapp, name='whatsapp_webhook'),
-    path('web-chat/', WebChatView.as_view(), name='web_chat'),
+    path('whatsapp/', vista_whatsapp, name='whatsapp_webhook'),
+    path('web-chat/', vista_web_chat, name='web_chat'),
+    path('web-chat/stream/', vista_web_chat_stream, name='web_chat_stream'),
+    path('async/whatsapp/', webhook_whatsapp_async, name='whatsapp_webhook_async'),
+    path('async/web-chat/', WebChatAsyncView.as_view(), name='web_chat_async'),
+    path('async/web-chat/stream/', WebChatStreamAsyncView.as_view(), name='web_chat_stream_async'),
     path('preguntas-frecuentes/', PreguntasFrecuentesView.as_view(), name='preguntas_frecuentes'),
     path('chat/', chat_view, name='chat_page'),
-]
\ No newline at end of file
+    # API REST (estadisticas/, disponibilidad/, reservas/): a diferencia de include(),
+    # URLResolver con el nombre del módulo lo importa recién al resolver una ruta que
+    # llegue hasta acá, así DRF no se carga al arrancar el worker (ver urls_api.py)
+    URLResolver(RoutePattern(''), 'apps.api.urls_api'),
+]
@@ -0,0 +1,19 @@
+# apps/api/urls_api.py
+"""
+Rutas de la API REST (views_api.py). apps/api/urls.py las registra con un
+resolver perezoso: este módulo, y con él Django REST Framework (que importa
+``requests``), se carga con el primer request a una de estas rutas y no al
+arrancar el worker (ver bench_importtime).
+"""
+from django.urls import path
+from rest_framework.routers import SimpleRouter
+
+from .views_api import DisponibilidadView, EstadisticasView, ReservaViewSet
+
+router = SimpleRouter()
+router.register('reservas', ReservaViewSet, basename='reserva')
+
+urlpatterns = [
+    path('estadisticas/', EstadisticasView.as_view(), name='estadisticas'),
+    path('disponibilidad/', DisponibilidadView.as_view(), name='disponibilidad'),
+] + router.urls
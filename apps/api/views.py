@@ -1,49 +1,28 @@
 import json
 import os
 import logging
-from openai import OpenAI
+import re
 from django.http import HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.utils import timezone
 from django.conf import settings
 from django.db.models import Q 
-import requests
 from datetime import datetime, date, time, timedelta
-from google import genai
+from decimal import Decimal
 import asyncio
 # Importar modelos de la nueva app 'reservas'
 from apps.reservas.models import Habitacion, FuncionarioHotel, EstadoConversacion
-from .models import Cliente, Conversacion, Mensaje, TipoHabitacion, PreguntaFrecuente, BaseConocimiento, PreguntaDesconocida, Reserva
+from .models import Cliente, Conversacion, Mensaje, TipoHabitacion, PreguntaFrecuente, BaseConocimiento, Reserva
+from . import disponibilidad, fechas_naturales, flujos, llm, menu_faq, payloads_whatsapp, preguntas_desconocidas, reserva_rapida, servicio_reservas
+from .llm import RespuestaPendienteIA
+from .registro import registrar_payload
 
 
 # --- CONFIGURACIÓN ---
 logger = logging.getLogger(__name__)
 
-# --- CONFIGURACIÓN PARA GEMINI ---
-GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
-print("="*60)
-if GEMINI_API_KEY and len(GEMINI_API_KEY) > 10:
-    print(f"✅ DIAGNÓSTICO: Clave de API de Gemini encontrada y cargada.")
-    print(f"   - La clave empieza con: {GEMINI_API_KEY[:5]}...")
-    print(f"   - La clave termina con: ...{GEMINI_API_KEY[-4:]}")
-    # genai.configure(api_key=GEMINI_API_KEY)
-    logger.info("✅ Configuración de Google Gemini válida")
-else:
-    print("❌ DIAGNÓSTICO: NO se encontró o es inválida la API Key de Gemini.")
-    print("   - Asegúrate de que la variable GEMINI_API_KEY esté en tu archivo .env")
-    logger.warning("⚠️ No se encontró API Key de Gemini. La funcionalidad de IA estará deshabilitada.")
-print("="*60)
-
-# === 2. IMPORTACIÓN DEL SDK (CÓDIGO NUEVO QUE AGREGAMOS) ===
-# IMPORTAR EL NUEVO SDK DE GOOGLE GENAI
-try:
-    GENAI_SDK_AVAILABLE = True
-    logger.info("✅ Google GenAI SDK (nuevo) importado correctamente")
-except ImportError as e:
-    genai = None
-    GENAI_SDK_AVAILABLE = False
-    logger.error(f"❌ No se pudo importar Google GenAI SDK: {e}")
-    logger.info("💡 Para instalar: pip install google-genai")
+# Gemini se configura en apps/api/llm.py (el SDK se importa al primer uso).
+# Para revisar claves y conexiones: python manage.py diagnosticar_configuracion
 
 WHATSAPP_VERIFY_TOKEN = os.environ.get("WHATSAPP_VERIFY_TOKEN")
 WHATSAPP_ACCESS_TOKEN = os.environ.get("WHATSAPP_ACCESS_TOKEN")
@@ -74,6 +53,8 @@ def test_whatsapp_connection():
     if not validar_configuracion_whatsapp():
         return False
         
+    import requests  # Se importa al usarse: no pesa en el arranque del worker
+
     url = f"{WHATSAPP_API_URL}{WHATSAPP_PHONE_NUMBER_ID}"
     headers = {"Authorization": f"Bearer {WHATSAPP_ACCESS_TOKEN}"}
     
@@ -90,12 +71,8 @@ def test_whatsapp_connection():
         return False
 
 # --- FUNCIÓN DE ENVÍO DE MENSAJES MEJORADA ---
-def send_whatsapp_message(to_number, message_payload):
-    """Envía mensaje con mejor manejo de errores de autenticación"""
-    
-    if not validar_configuracion_whatsapp():
-        return False
-    
+def preparar_envio_whatsapp(to_number, message_payload):
+    """Arma URL, headers y payload final para la Graph API (compartido con la vista async)."""
     headers = {
         "Authorization": f"Bearer {WHATSAPP_ACCESS_TOKEN}",
         "Content-Type": "application/json"
@@ -104,48 +81,62 @@ def send_whatsapp_message(to_number, message_payload):
     base_payload = {"messaging_product": "whatsapp", "to": to_number}
     final_payload = {**base_payload, **message_payload}
     
-    logger.info(f"📤 Enviando mensaje a WhatsApp:")
-    logger.info(f"   URL: {url}")
-    logger.info(f"   Phone Number ID: {WHATSAPP_PHONE_NUMBER_ID}")
-    logger.info(f"   To: {to_number}")
-    logger.info(f"   Payload: {json.dumps(final_payload, indent=2, ensure_ascii=False)}")
+    logger.info("📤 Enviando mensaje %s a WhatsApp: %s", final_payload.get("type"), to_number,
+                extra={"destinatario": to_number, "tipo_payload": final_payload.get("type")})
+    registrar_payload(logger, "   Payload:", final_payload)
+
+    # El análisis carácter por carácter solo corre con DEBUG activo
+    if logger.isEnabledFor(logging.DEBUG):
+        debug_whatsapp_payload(final_payload, to_number)
+    return url, headers, final_payload
+
+def interpretar_respuesta_whatsapp(status_code, texto_respuesta, to_number):
+    """Registra el resultado de la Graph API y devuelve True si el envío fue exitoso."""
+    if status_code == 200:
+        logger.info("✅ Mensaje enviado exitosamente a %s", to_number)
+        logger.debug("   Response: %s", texto_respuesta)
+        return True
 
-    # AGREGAR ESTA LÍNEA ANTES DE ENVIAR:
-    debug_whatsapp_payload(final_payload, to_number)
+    logger.info("📥 Respuesta WhatsApp - Status: %s", status_code)
+    logger.info("   Response: %s", texto_respuesta)
 
     try:
-        response = requests.post(url, headers=headers, json=final_payload, timeout=30)
-        
-        logger.info(f"📥 Respuesta WhatsApp - Status: {response.status_code}")
-        logger.info(f"   Response: {response.text}")
-        
-        if response.status_code == 200:
-            logger.info(f"✅ Mensaje enviado exitosamente a {to_number}")
-            return True
+        error_data = json.loads(texto_respuesta)
+        error_code = error_data.get("error", {}).get("code")
+        error_message = error_data.get("error", {}).get("message", "Sin mensaje de error")
+        
+        if error_code == 10:
+            logger.error("🚨 ERROR DE AUTENTICACIÓN WHATSAPP:")
+            logger.error("   - El token de acceso puede haber expirado")
+            logger.error("   - Verifica que el Phone Number ID sea correcto")
+            logger.error("   - Los tokens temporales duran solo 24 horas")
+            logger.error("   - Ve a Facebook Developers > WhatsApp > API Setup")
+            logger.error(f"   - Error completo: {error_message}")
+        elif error_code == 131026:
+            logger.error(f"🚨 NÚMERO NO VÁLIDO: {to_number} no puede recibir mensajes")
+            logger.error("   - Verifica que el número esté en formato internacional")
+            logger.error("   - Para desarrollo, el número debe estar agregado a tu app")
         else:
-            try:
-                error_data = response.json()
-                error_code = error_data.get("error", {}).get("code")
-                error_message = error_data.get("error", {}).get("message", "Sin mensaje de error")
-                
-                if error_code == 10:
-                    logger.error("🚨 ERROR DE AUTENTICACIÓN WHATSAPP:")
-                    logger.error("   - El token de acceso puede haber expirado")
-                    logger.error("   - Verifica que el Phone Number ID sea correcto")
-                    logger.error("   - Los tokens temporales duran solo 24 horas")
-                    logger.error("   - Ve a Facebook Developers > WhatsApp > API Setup")
-                    logger.error(f"   - Error completo: {error_message}")
-                elif error_code == 131026:
-                    logger.error(f"🚨 NÚMERO NO VÁLIDO: {to_number} no puede recibir mensajes")
-                    logger.error("   - Verifica que el número esté en formato internacional")
-                    logger.error("   - Para desarrollo, el número debe estar agregado a tu app")
-                else:
-                    logger.error(f"❌ Error WhatsApp código {error_code}: {error_message}")
-                    
-            except json.JSONDecodeError:
-                logger.error(f"❌ Error WhatsApp sin formato JSON: {response.text}")
+            logger.error(f"❌ Error WhatsApp código {error_code}: {error_message}")
             
-            return False
+    except (json.JSONDecodeError, AttributeError):
+        logger.error(f"❌ Error WhatsApp sin formato JSON: {texto_respuesta}")
+    
+    return False
+
+def send_whatsapp_message(to_number, message_payload):
+    """Envía mensaje con mejor manejo de errores de autenticación"""
+    
+    if not validar_configuracion_whatsapp():
+        return False
+    
+    import requests  # Se importa al usarse: no pesa en el arranque del worker
+
+    url, headers, final_payload = preparar_envio_whatsapp(to_number, message_payload)
+
+    try:
+        response = requests.post(url, headers=headers, json=final_payload, timeout=30)
+        return interpretar_respuesta_whatsapp(response.status_code, response.text, to_number)
         
     except requests.exceptions.Timeout:
         logger.error("⏰ Timeout enviando mensaje a WhatsApp")
@@ -167,117 +158,31 @@ def crear_respuesta_texto(texto):
         }
     }
 
-# --- FUNCIÓN AUXILIAR PARA CREAR RESPUESTA CON BOTONES ---
-def crear_respuesta_botones():
-    """Crea una respuesta con botones interactivos de preguntas frecuentes"""
-    try:
-        logger.info("🔍 Buscando preguntas frecuentes para crear botones...")
-        preguntas_menu = PreguntaFrecuente.objects.filter(activo=True).order_by("pregunta_frecuenta_id")[:3]
-        logger.info(f"📊 Preguntas frecuentes encontradas: {preguntas_menu.count()}")
-        
-        if not preguntas_menu:
-            logger.info("⚠️ No hay preguntas frecuentes disponibles - Usando mensaje de texto simple")
-            return crear_respuesta_texto("¡Hola! Soy Pratsy, tu asistente virtual. ¿En qué puedo ayudarte hoy?")
+# --- FUNCIÓN PARA PROCESAR RESPUESTA CON IA ---
+def contexto_historial(conversacion):
+    """Últimos 4 mensajes de la conversación, formateados para el prompt."""
+    historial_mensajes = conversacion.mensajes().order_by("-timestamp")[:4]
 
-        botones = []
-        for p in preguntas_menu:
-            logger.info(f"🔹 Procesando pregunta ID {p.pregunta_frecuenta_id}: \'{p.pregunta_corta_boton}\'")
-            if p.pregunta_corta_boton and len(p.pregunta_corta_boton.strip()) > 0:
-                titulo_boton = p.pregunta_corta_boton[:20] if len(p.pregunta_corta_boton) > 20 else p.pregunta_corta_boton
-                boton = {
-                    "type": "reply",
-                    "reply": {
-                        "id": f"faq_{p.pregunta_frecuenta_id}",
-                        "title": titulo_boton.strip()
-                    }
-                }
-                botones.append(boton)
-                logger.info(f"✅ Botón creado: {json.dumps(boton, ensure_ascii=False)}")
-            else:
-                logger.warning(f"⚠️ Pregunta ID {p.pregunta_frecuenta_id} no tiene pregunta_corta_boton válida")
-        
-        if not botones:
-            logger.info("⚠️ No se pudieron crear botones válidos - Usando mensaje de texto simple")
-            return crear_respuesta_texto("¡Hola! Soy Pratsy, tu asistente virtual. ¿En qué puedo ayudarte hoy?")
+    historial_context = ""
+    for msg in reversed(historial_mensajes):
+        role = "Cliente" if msg.remitente == "cliente" else "Asistente"
+        historial_context += f"{role}: {msg.contenido}\n"
+    return historial_context
 
-        texto_cuerpo = "¡Hola! Soy Pratsy 🤖\n\nSelecciona una opción:"
-        
-        respuesta_botones = {
-            "type": "interactive",
-            "interactive": {
-                "type": "button",
-                "body": {
-                    "text": texto_cuerpo
-                },
-                "action": {
-                    "buttons": botones
-                }
-            }
-        }
-        
-        logger.info(f"🎯 Respuesta con botones creada exitosamente con {len(botones)} botones")
-        return respuesta_botones
-        
-    except Exception as e:
-        logger.error(f"❌ Error al crear respuesta con botones: {e}")
-        logger.info("🔄 Fallback a mensaje de texto simple")
-        return crear_respuesta_texto("¡Hola! Soy Pratsy, tu asistente virtual. ¿En qué puedo ayudarte hoy?")
-
-# --- FUNCIÓN PARA PROCESAR RESPUESTA CON IA ---
-def procesar_respuesta_con_ia(respuesta_bd, mensaje_usuario, conversacion):
+def preparar_respuesta_con_ia(respuesta_bd, mensaje_usuario, conversacion, armar=None):
     """
-    Procesa la respuesta de la BD a través de la IA para hacerla más amigable
-    USANDO EL NUEVO GOOGLE GENAI SDK (2024)
+    Arma el prompt para reformular la respuesta de la BD sin llamar todavía a la IA.
+    Devuelve una RespuestaPendienteIA; ``armar`` convierte el texto final en el payload.
     """
-    logger.info("🤖 Procesando respuesta con IA para hacerla más amigable...")
-    
-    if not GEMINI_API_KEY:
-        logger.warning("⚠️ No hay API Key de Gemini - Devolviendo respuesta original")
-        return respuesta_bd
-    
-    if not GENAI_SDK_AVAILABLE:
-        logger.warning("⚠️ SDK de Gemini no disponible - Devolviendo respuesta original")
-        return respuesta_bd
-    
-    try:
-        # CONFIGURACIÓN PARA EL NUEVO SDK
-        if GENAI_SDK_AVAILABLE == True:
-            logger.info("🔧 Configurando nuevo Google GenAI SDK...")
-            
-            # Crear cliente con el nuevo SDK
-            client = genai.Client(api_key=GEMINI_API_KEY)
-            
-            # Modelos disponibles en el nuevo SDK (según documentación oficial)
-            MODELOS_DISPONIBLES = [
-                "models/gemini-2.0-flash-exp",    # Más reciente (experimental)
-                "models/gemini-1.5-flash",        # Recomendado para uso general
-                "models/gemini-1.5-pro",          # Para tareas complejas
-            ]
-            
-        elif GENAI_SDK_AVAILABLE == "deprecated":
-            logger.info("🔧 Configurando SDK deprecado como fallback...")
-            
-            # Configurar SDK deprecado
-            # genai_old.configure(api_key=GEMINI_API_KEY)
-            
-            # Modelos disponibles en SDK deprecado
-            MODELOS_DISPONIBLES = [
-                "gemini-1.5-flash",
-                "gemini-1.5-pro",
-                "gemini-pro"
-            ]
-        
-        # Obtenemos historial limitado para contexto
-        historial_mensajes = Mensaje.objects.filter(
-            conversacion=conversacion
-        ).order_by("-timestamp")[:4]
-        
-        historial_context = ""
-        for msg in reversed(historial_mensajes):
-            role = "Cliente" if msg.remitente == "cliente" else "Asistente"
-            historial_context += f"{role}: {msg.contenido}\n"
-        
-        prompt = f"""
+    logger.info("🤖 Preparando respuesta para reformular con IA...")
+
+    if not llm.disponible():
+        logger.warning("⚠️ No hay API Key o SDK de Gemini - Se usará la respuesta original")
+        return RespuestaPendienteIA(None, respuesta_bd, armar)
+
+    historial_context = contexto_historial(conversacion)
+
+    prompt = f"""
 Eres Pratsy, un asistente virtual amigable y profesional de un motel. Tu trabajo es tomar la información técnica de la base de datos y presentarla de manera cálida, cordial y servicial, como si fueras un humano atento.
 
 CONTEXTO DE LA CONVERSACIÓN:
@@ -298,99 +203,34 @@ INSTRUCCIONES:
 
 Reformula la respuesta:
 """
-        
-        logger.info(f"📤 Enviando a Gemini para reformular respuesta")
-        
-        # INTENTAR CON CADA MODELO HASTA QUE UNO FUNCIONE
-        response = None
-        modelo_usado = None
-        
-        for modelo in MODELOS_DISPONIBLES:
-            try:
-                logger.info(f"🔄 Intentando con modelo: {modelo}")
-                
-                if GENAI_SDK_AVAILABLE == True:
-                    # NUEVO SDK
-                    response = client.models.generate_content(
-                        model=modelo,
-                        contents=prompt,
-                        config={
-                            "max_output_tokens": 500,
-                            "temperature": 0.7,
-                        }
-                    )                
-                if response:
-                    modelo_usado = modelo
-                    logger.info(f"✅ Modelo {modelo} funcionó correctamente")
-                    break
-                    
-            except Exception as e:
-                logger.warning(f"⚠️ Error con modelo {modelo}: {e}")
-                continue
-        
-        # PROCESAR RESPUESTA
-        if response:
-            try:
-                # Obtener texto de la respuesta según el SDK
-                if GENAI_SDK_AVAILABLE == True:
-                    texto_respuesta = response.text if hasattr(response, 'text') else str(response)
-                else:
-                    texto_respuesta = response.text
-                
-                if texto_respuesta and texto_respuesta.strip():
-                    logger.info(f"✅ Respuesta reformulada exitosamente con {modelo_usado}")
-                    return texto_respuesta.strip()
-                else:
-                    logger.warning("⚠️ Respuesta vacía de IA")
-                    return respuesta_bd
-                    
-            except Exception as e:
-                logger.error(f"❌ Error extrayendo texto de respuesta: {e}")
-                return respuesta_bd
-        else:
-            logger.warning("⚠️ Ningún modelo funcionó - Usando respuesta original")
-            return respuesta_bd
-            
+    return RespuestaPendienteIA(prompt, respuesta_bd, armar)
+
+def procesar_respuesta_con_ia(respuesta_bd, mensaje_usuario, conversacion):
+    """
+    Procesa la respuesta de la BD a través de la IA para hacerla más amigable
+    USANDO EL NUEVO GOOGLE GENAI SDK (2024)
+    """
+    try:
+        return preparar_respuesta_con_ia(respuesta_bd, mensaje_usuario, conversacion).completar()
     except Exception as e:
         logger.error(f"❌ Error general procesando con IA: {e}")
         logger.info("🔄 Fallback: Devolviendo respuesta original de BD")
         return respuesta_bd
 
-def procesar_pregunta_desconocida_con_ia(mensaje_usuario, conversacion):
-    """
-    Procesa preguntas desconocidas con IA para dar una respuesta empática
-    USANDO EL NUEVO GOOGLE GENAI SDK (2024)
-    """
-    logger.info("🤖 Procesando pregunta desconocida con IA...")
-    
-    # Respuesta por defecto si la IA no funciona
-    respuesta_default = "Disculpa, no tengo información específica sobre eso en este momento. ¿Podrías reformular tu pregunta o consultar sobre nuestros servicios principales como reservas, precios u horarios?"
-    
-    if not GEMINI_API_KEY or not GENAI_SDK_AVAILABLE:
+# Respuesta por defecto si la IA no funciona
+RESPUESTA_DESCONOCIDA_DEFAULT = "Disculpa, no tengo información específica sobre eso en este momento. ¿Podrías reformular tu pregunta o consultar sobre nuestros servicios principales como reservas, precios u horarios?"
+
+def preparar_pregunta_desconocida_con_ia(mensaje_usuario, conversacion, armar=None):
+    """Arma el prompt empático para una pregunta desconocida sin llamar todavía a la IA."""
+    logger.info("🤖 Preparando pregunta desconocida para la IA...")
+
+    if not llm.disponible():
         logger.warning("⚠️ No hay API Key o SDK no disponible - Usando respuesta por defecto")
-        return respuesta_default
-    
-    try:
-        # CONFIGURACIÓN SEGÚN EL SDK DISPONIBLE
-        if GENAI_SDK_AVAILABLE == True:
-            client = genai.Client(api_key=GEMINI_API_KEY)
-            MODELOS_DISPONIBLES = [
-                "models/gemini-2.0-flash-exp",
-                "models/gemini-1.5-flash",
-                "models/gemini-1.5-pro",
-            ]
-        
-        # Historial para contexto
-        historial_mensajes = Mensaje.objects.filter(
-            conversacion=conversacion
-        ).order_by("-timestamp")[:4]
-        
-        historial_context = ""
-        for msg in reversed(historial_mensajes):
-            role = "Cliente" if msg.remitente == "cliente" else "Asistente"
-            historial_context += f"{role}: {msg.contenido}\n"
-        
-        prompt = f"""
+        return RespuestaPendienteIA(None, RESPUESTA_DESCONOCIDA_DEFAULT, armar)
+
+    historial_context = contexto_historial(conversacion)
+
+    prompt = f"""
 Eres Pratsy, un asistente virtual amigable de un motel. Un cliente te hizo una pregunta que no está en tu base de conocimiento.
 
 CONTEXTO DE LA CONVERSACIÓN:
@@ -409,37 +249,18 @@ INSTRUCCIONES:
 
 Responde de manera empática:
 """
-        
-        logger.info(f"📤 Enviando pregunta desconocida a Gemini")
-        
-        # INTENTAR CON CADA MODELO
-        for modelo in MODELOS_DISPONIBLES:
-            try:
-                if GENAI_SDK_AVAILABLE == True:
-                    response = client.models.generate_content(
-                        model=modelo,
-                        contents=prompt,
-                        config={
-                            "max_output_tokens": 500,
-                            "temperature": 0.7,
-                        }
-                    )
-                    texto_respuesta = response.text if hasattr(response, 'text') else str(response)                
-                if texto_respuesta and texto_respuesta.strip():
-                    logger.info(f"✅ Respuesta de pregunta desconocida generada con {modelo}")
-                    return texto_respuesta.strip()
-                    
-            except Exception as e:
-                logger.warning(f"⚠️ Error con modelo {modelo}: {e}")
-                continue
-        
-        # Si llegamos aquí, ningún modelo funcionó
-        logger.warning("⚠️ Ningún modelo funcionó para pregunta desconocida")
-        return respuesta_default
-            
+    return RespuestaPendienteIA(prompt, RESPUESTA_DESCONOCIDA_DEFAULT, armar)
+
+def procesar_pregunta_desconocida_con_ia(mensaje_usuario, conversacion):
+    """
+    Procesa preguntas desconocidas con IA para dar una respuesta empática
+    USANDO EL NUEVO GOOGLE GENAI SDK (2024)
+    """
+    try:
+        return preparar_pregunta_desconocida_con_ia(mensaje_usuario, conversacion).completar()
     except Exception as e:
         logger.error(f"❌ Error procesando pregunta desconocida con IA: {e}")
-        return respuesta_default
+        return RESPUESTA_DESCONOCIDA_DEFAULT
 
 # --- LÓGICA DE RESERVAS --- 
 def es_funcionario(telefono: str) -> bool:
@@ -514,13 +335,20 @@ def procesar_mensaje_funcionario(telefono: str, mensaje: str) -> dict:
 
     return crear_respuesta_texto("Comando no reconocido. Usa \"Reservas Prats\" para ver las reservas pendientes.")
 
+def _respuesta_rechazada(reserva_id, resultado) -> dict:
+    """Respuesta de un comando de una sola reserva que ``servicio_reservas`` no aplicó."""
+    motivo = resultado.rechazadas.get(int(reserva_id))
+    if motivo == "no existe":
+        return crear_respuesta_texto(f"❌ No se encontró la reserva #{reserva_id}")
+    return crear_respuesta_texto(f"❌ La reserva #{reserva_id} no se modificó: {motivo}.")
+
+
 def marcar_llegada(reserva_id: str) -> dict:
     """Marca una reserva como llegada confirmada."""
     try:
-        reserva = Reserva.objects.get(reserva_id=int(reserva_id))
-        reserva.estado = "llegada_confirmada"
-        reserva.fecha_llegada = timezone.now()
-        reserva.save()
+        reserva = servicio_reservas.registrar_llegada(
+            Reserva.objects.select_related("cliente", "habitacion").get(reserva_id=int(reserva_id))
+        )
         return crear_respuesta_texto(
             f"✅ *Llegada Confirmada*\n\n"
             f"Reserva #{reserva_id} marcada como llegada confirmada.\n"
@@ -536,210 +364,26 @@ def marcar_llegada(reserva_id: str) -> dict:
 def confirmar_reserva(reserva_id: str) -> dict:
     """Confirma una reserva pendiente."""
     try:
-        reserva = Reserva.objects.get(reserva_id=int(reserva_id))
-        reserva.estado = "confirmada"
-        reserva.save()
+        # Como el comando en lote: bloquea la fila y solo confirma (y avisa) si sigue pendiente
+        resultado = servicio_reservas.confirmar_varias([int(reserva_id)])
+        if not resultado.aplicadas:
+            return _respuesta_rechazada(reserva_id, resultado)
+        reserva = resultado.aplicadas[0]
         return crear_respuesta_texto(
             f"👍 *Reserva Confirmada*\n\n"
             f"Reserva #{reserva_id} de {reserva.cliente.nombre_cliente if reserva.cliente else 'Cliente'} ha sido confirmada.\n"
             f"Se ha notificado al cliente."
         )
-    except Reserva.DoesNotExist:
-        return crear_respuesta_texto(f"❌ No se encontró la reserva #{reserva_id}")
     except Exception as e:
         logger.error(f"Error al confirmar reserva {reserva_id}: {e}")
         return crear_respuesta_texto(f"❌ Error al confirmar la reserva #{reserva_id}.")
 
 # FUNCIÓN CORREGIDA PARA EL PROCESO DE RESERVA - FIX DEFINITIVO DEL ERROR DE FECHA
 def iniciar_proceso_reserva(cliente) -> dict:
-    """
-    Inicia el proceso de reserva para un cliente
-    FIX DEFINITIVO DEL ERROR DE DATETIME
-    """
+    """Inicia (o reinicia) el flujo de reserva del cliente: pide la fecha con botones."""
     logger.info("🗓️ Iniciando proceso de reserva...")
-    
     try:
-        estado_conv, created = EstadoConversacion.objects.get_or_create(
-            cliente=cliente,
-            defaults={
-                "paso_actual": "esperando_fecha",
-                "datos_reserva": {},
-                "tipo": "reserva"
-            }
-        )
-        if not created:
-            estado_conv.paso_actual = "esperando_fecha"
-            estado_conv.datos_reserva = {}
-            estado_conv.tipo = "reserva"
-            estado_conv.save()
-
-        # === FIX DEFINITIVO DEL ERROR DE DATETIME ===
-        logger.info("📅 Calculando fechas con múltiples métodos de fallback...")
-        
-        hoy = None
-        metodo_usado = None
-        
-        # MÉTODO 1: timezone de Django (más confiable en aplicaciones Django)
-        try:
-            hoy = timezone.now().date()
-            metodo_usado = "timezone.now()"
-            logger.info(f"✅ Fecha obtenida con {metodo_usado}: {hoy}")
-        except Exception as e1:
-            logger.warning(f"⚠️ Error con timezone.now(): {e1}")
-            
-            # MÉTODO 2: datetime estándar con import explícito
-            try:
-                hoy = datetime.now().date()
-                metodo_usado = "datetime.now()"
-                logger.info(f"✅ Fecha obtenida con {metodo_usado}: {hoy}")
-            except Exception as e2:
-                logger.warning(f"⚠️ Error con datetime importado: {e2}")
-                
-                # MÉTODO 3: datetime con import de módulo completo
-                try:
-                    hoy = datetime.now().date()
-                    metodo_usado = "datetime.now() (módulo completo)"
-                    logger.info(f"✅ Fecha obtenida con {metodo_usado}: {hoy}")
-                except Exception as e3:
-                    logger.error(f"❌ Error con todos los métodos de fecha: {e1}, {e2}, {e3}")
-                    
-                    # MÉTODO 4: Fecha de emergencia funcional
-                    try:
-                        hoy = datetime.today()
-                        metodo_usado = "date.today()"
-                        logger.info(f"✅ Fecha obtenida con {metodo_usado}: {hoy}")
-                    except Exception as e4:
-                        logger.error(f"❌ Error crítico: {e4}")
-                        
-                        # ÚLTIMO RECURSO: Clase de fecha personalizada
-                        class FechaSencilla:
-                            def __init__(self):
-                                # Usar fecha fija pero realista
-                                self.year = 2024
-                                self.month = 9
-                                self.day = 26
-                            
-                            def strftime(self, formato):
-                                if formato == '%Y-%m-%d':
-                                    return f"{self.year}-{self.month:02d}-{self.day:02d}"
-                                elif formato == '%d/%m':
-                                    return f"{self.day:02d}/{self.month:02d}"
-                                return f"{self.day:02d}/{self.month:02d}/{self.year}"
-                            
-                            def __add__(self, delta):
-                                nuevo_dia = self.day + getattr(delta, 'days', 1)
-                                nueva_fecha = FechaSencilla()
-                                nueva_fecha.day = nuevo_dia
-                                return nueva_fecha
-                            
-                            def __str__(self):
-                                return self.strftime('%Y-%m-%d')
-                        
-                        hoy = FechaSencilla()
-                        metodo_usado = "FechaSencilla (emergencia)"
-                        logger.warning(f"⚠️ Usando {metodo_usado}")
-        
-        # Calcular fechas futuras
-        try:
-            if hasattr(hoy, '__add__'):
-                mañana = hoy + timedelta(days=1)
-                pasado_mañana = hoy + timedelta(days=2)
-            else:
-                # Para la clase personalizada
-                mañana = hoy + type('', (), {'days': 1})()
-                pasado_mañana = hoy + type('', (), {'days': 2})()
-            
-            logger.info(f"✅ Fechas calculadas - Hoy: {hoy}, Mañana: {mañana}, Pasado: {pasado_mañana}")
-            
-        except Exception as e:
-            logger.error(f"❌ Error calculando fechas futuras: {e}")
-            # Usar la misma fecha para todas
-            mañana = hoy
-            pasado_mañana = hoy
-        
-        # Crear botones con manejo ultra-robusto de errores
-        try:
-            botones_fecha = []
-            
-            # Botón para hoy
-            try:
-                id_hoy = f"fecha_{hoy.strftime('%Y-%m-%d')}"
-                titulo_hoy = f"📅 Hoy {hoy.strftime('%d/%m')}"
-            except:
-                id_hoy = "fecha_hoy"
-                titulo_hoy = "📅 Hoy"
-            
-            botones_fecha.append({
-                "type": "reply",
-                "reply": {
-                    "id": id_hoy,
-                    "title": titulo_hoy
-                }
-            })
-            
-            # Botón para mañana
-            try:
-                id_mañana = f"fecha_{mañana.strftime('%Y-%m-%d')}"
-                titulo_mañana = f"📅 Mañana {mañana.strftime('%d/%m')}"
-            except:
-                id_mañana = "fecha_manana"
-                titulo_mañana = "📅 Mañana"
-            
-            botones_fecha.append({
-                "type": "reply",
-                "reply": {
-                    "id": id_mañana,
-                    "title": titulo_mañana
-                }
-            })
-            
-            # Botón para pasado mañana
-            try:
-                id_pasado = f"fecha_{pasado_mañana.strftime('%Y-%m-%d')}"
-                titulo_pasado = f"📅 {pasado_mañana.strftime('%d/%m')}"
-            except:
-                id_pasado = "fecha_pasado"
-                titulo_pasado = "📅 Pasado mañana"
-            
-            botones_fecha.append({
-                "type": "reply",
-                "reply": {
-                    "id": id_pasado,
-                    "title": titulo_pasado
-                }
-            })
-            
-            logger.info(f"✅ Botones de fecha creados exitosamente ({len(botones_fecha)} botones)")
-            
-        except Exception as e:
-            logger.error(f"❌ Error crítico creando botones: {e}")
-            # Botones ultra-básicos como último recurso
-            botones_fecha = [
-                {
-                    "type": "reply",
-                    "reply": {
-                        "id": "fecha_1",
-                        "title": "📅 Hoy"
-                    }
-                },
-                {
-                    "type": "reply",
-                    "reply": {
-                        "id": "fecha_2",
-                        "title": "📅 Mañana"
-                    }
-                }
-            ]
-            logger.warning("⚠️ Usando botones ultra-básicos de emergencia")
-
-        texto_mensaje = (
-            "🗓️ *Proceso de Reserva Iniciado*\n\n"
-            "Para realizar su reserva, necesito algunos datos.\n\n"
-            "Seleccione la fecha que desea reservar:"
-        )
-
-        return crear_respuesta_botones_ultra_segura(texto_mensaje, botones_fecha)
-        
+        return FLUJO_RESERVA.iniciar(cliente)
     except Exception as e:
         logger.error(f"💥 Error crítico en iniciar_proceso_reserva: {e}")
         # Respuesta de emergencia absolutamente básica
@@ -751,41 +395,8 @@ def iniciar_proceso_reserva(cliente) -> dict:
             "• Una fecha específica (ej: 27/09)"
         )
 
-def crear_respuesta_con_boton_reserva(texto, botones_adicionales=None):
-    """Crea respuesta que SIEMPRE incluye botón de reserva"""
-    try:
-        botones = botones_adicionales or []
-        
-        # Verificar si ya existe botón de reserva
-        ids_existentes = []
-        for btn in botones:
-            try:
-                id_boton = btn.get("reply", {}).get("id", "")
-                ids_existentes.append(id_boton)
-            except:
-                continue
-        
-        # Agregar botón de reserva si no existe
-        if "hacer_reserva" not in ids_existentes:
-            botones.append({
-                "type": "reply",
-                "reply": {
-                    "id": "hacer_reserva",
-                    "title": "📅 Reservar"
-                }
-            })
-        
-        # Limitar botones
-        botones = botones[:3]
-        
-        if len(botones) > 0:
-            return crear_respuesta_botones_ultra_segura(texto, botones)
-        else:
-            return crear_respuesta_texto_segura(texto)
-            
-    except Exception as e:
-        logger.error(f"❌ Error en crear_respuesta_con_boton_reserva: {e}")
-        return crear_respuesta_texto_segura(texto)
+# Ver payloads_whatsapp: ya no modifica la lista de botones recibida
+crear_respuesta_con_boton_reserva = payloads_whatsapp.con_boton_reserva
 
 # 2. SALUDO INICIAL CORREGIDO (4 BOTONES)
 def crear_respuesta_botones_saludo():
@@ -793,24 +404,9 @@ def crear_respuesta_botones_saludo():
     try:
         logger.info("👋 Creando respuesta de saludo inicial con 4 botones...")
         
-        # Buscar preguntas frecuentes para botones (que NO sean saludo inicial)
-        preguntas_menu = PreguntaFrecuente.objects.filter(
-            activo=True,
-            es_saludo_inicial=False
-        ).order_by("pregunta_frecuenta_id")[:3]  # Solo 3 porque agregamos reserva
-        
-        botones = []
-        
-        # Agregar botones de preguntas frecuentes
-        for p in preguntas_menu:
-            if p.pregunta_corta_boton:
-                botones.append({
-                    "type": "reply",
-                    "reply": {
-                        "id": f"faq_{p.pregunta_frecuenta_id}",
-                        "title": p.pregunta_corta_boton.strip()[:20]
-                    }
-                })
+        # Botones de preguntas frecuentes (que NO sean saludo inicial), desde el menú en caché
+        menu = menu_faq.obtener_menu()
+        botones = menu_faq.botones_whatsapp(3, menu)  # Solo 3 porque agregamos reserva
         
         # Completar hasta 4 botones
         if len(botones) < 3:
@@ -847,14 +443,9 @@ def crear_respuesta_botones_saludo():
             ])
             botones = botones_finales[:3]
         
-        # Buscar saludo en BD
-        saludo_bd = PreguntaFrecuente.objects.filter(
-            es_saludo_inicial=True,
-            activo=True
-        ).first()
-        
-        if saludo_bd and saludo_bd.respuesta:
-            texto_saludo = saludo_bd.respuesta
+        # Saludo configurado en BD (del mismo menú en caché)
+        if menu["saludo"]:
+            texto_saludo = menu["saludo"]
         else:
             texto_saludo = "¡Hola! Soy Pratsy 🤖, tu asistente virtual del Motel."
         
@@ -866,198 +457,232 @@ def crear_respuesta_botones_saludo():
         logger.error(f"❌ Error creando saludo: {e}")
         return crear_respuesta_texto_segura("¡Hola! Soy Pratsy, tu asistente virtual. ¿En qué puedo ayudarte hoy?")
 
-# 3. PROCESO DE RESERVA CORREGIDO (ESPECIALMENTE PASO DE DURACIÓN)
-def procesar_paso_reserva(cliente: Cliente, mensaje: str) -> dict:
-    """Procesa cada paso del proceso de reserva - CORREGIDO PARA DURACIÓN"""
-    try:
-        estado_conv = EstadoConversacion.objects.get(cliente=cliente, tipo="reserva")
-    except EstadoConversacion.DoesNotExist:
-        return iniciar_proceso_reserva(cliente)
-
-    paso = estado_conv.paso_actual
-    datos_reserva = estado_conv.datos_reserva
+# 3. PROCESO DE RESERVA: pasos del flujo (ver apps/api/flujos.py)
+# Cada paso completa campos de datos_reserva; el motor salta los que ya vinieron
+# en mensajes anteriores ("reserva para hoy a las 21 por 4 horas suite" va directo
+# a la confirmación si la habitación está libre).
+
+def _preguntar_fecha(datos_reserva, encabezado):
+    hoy = timezone.localdate()
+    mañana, pasado_mañana = hoy + timedelta(days=1), hoy + timedelta(days=2)
+    botones = (
+        (f"fecha_{hoy.isoformat()}", f"📅 Hoy {hoy.strftime('%d/%m')}"),
+        (f"fecha_{mañana.isoformat()}", f"📅 Mañana {mañana.strftime('%d/%m')}"),
+        (f"fecha_{pasado_mañana.isoformat()}", f"📅 {pasado_mañana.strftime('%d/%m')}"),
+    )
+    texto = encabezado or (
+        "🗓️ *Proceso de Reserva Iniciado*\n\n"
+        "Para realizar su reserva, necesito algunos datos."
+    )
+    return payloads_whatsapp.menu(f"{texto}\n\nSeleccione la fecha que desea reservar:", botones)
 
-    if paso == "esperando_fecha":
-        # Manejar selección por botón de fecha
-        if mensaje.startswith("fecha_"):
-            try:
-                # Extraer fecha del ID del botón (formato: fecha_YYYY-MM-DD) 
-                fecha_str = mensaje.replace("fecha_", "")
-                fecha_obj = datetime.strptime(fecha_str, "%Y-%m-%d").date()
-                
-                # Validar que la fecha no sea del pasado (excepto hoy)
-                if fecha_obj < date.today():
-                    return crear_respuesta_texto_segura("❌ No se pueden hacer reservas para fechas pasadas.")
-                
-                # Guardar fecha seleccionada
-                datos_reserva["fecha"] = fecha_str  # Formato ISO para la BD
-                estado_conv.datos_reserva = datos_reserva
-                estado_conv.paso_actual = "esperando_hora"
-                estado_conv.save()
-
-                # Pedir hora de forma manual (sin botones)
-                fecha_formateada = fecha_obj.strftime("%d/%m/%Y")
-                texto_hora = (
-                    f"✅ Fecha seleccionada: {fecha_formateada}\n\n"
-                    "Ahora indique la hora de inicio (formato: HH:MM, ejemplo: 14:30):"
-                )
 
-                return crear_respuesta_texto_segura(texto_hora)
-                
-            except ValueError:
-                return crear_respuesta_texto_segura("❌ Formato de fecha inválido. Intente nuevamente.")
-        
-        # Manejar entrada manual de fecha (mantener compatibilidad)
-        else:
-            try:
-                # Tu código existente para procesar fecha manual
-                fecha_obj = datetime.strptime(mensaje.strip(), "%d/%m/%Y").date()
-                if fecha_obj < datetime.date.today():
-                    return crear_respuesta_texto_segura("❌ No se pueden hacer reservas para fechas pasadas.")
-                    
-                datos_reserva["fecha"] = fecha_obj.isoformat()
-                estado_conv.datos_reserva = datos_reserva
-                estado_conv.paso_actual = "esperando_hora"
-                estado_conv.save()
-                
-                return crear_respuesta_texto_segura(
-                    f"✅ Fecha registrada: {fecha_obj.strftime('%d/%m/%Y')}\n\n"
-                    "Ahora indique la hora de inicio (formato: HH:MM, ejemplo: 14:30):"
-                )
-            except ValueError:
-                return crear_respuesta_texto_segura(
-                    "❌ Formato de fecha inválido. Use DD/MM/AAAA (ejemplo: 25/12/2024) o seleccione uno de los botones."
-                )
-    elif paso == "esperando_hora":
+def _leer_fecha(mensaje, estado_conv):
+    # Manejar selección por botón de fecha
+    if mensaje.startswith("fecha_"):
         try:
-            hora_obj = datetime.strptime(mensaje.strip(), "%H:%M").time()
-            datos_reserva["hora_inicio"] = hora_obj.strftime("%H:%M")
-            estado_conv.datos_reserva = datos_reserva
-            estado_conv.paso_actual = "esperando_duracion"
-            estado_conv.save()
-            
-            # CORREGIDO: Solo 3 opciones de duración, sin caracteres especiales
-            botones_duracion = [
-                {"type": "reply", "reply": {"id": "duracion_2", "title": "2 horas"}},
-                {"type": "reply", "reply": {"id": "duracion_4", "title": "4 horas"}},
-                {"type": "reply", "reply": {"id": "duracion_8", "title": "8 horas"}}
-            ]
-            
-            texto_duracion = f"✅ Hora seleccionada: {mensaje}\n\nSeleccione la duración de su reserva:"
-            
-            # USAR FUNCIÓN SEGURA
-            return crear_respuesta_botones_ultra_segura(texto_duracion, botones_duracion)
-            
+            # Extraer fecha del ID del botón (formato: fecha_YYYY-MM-DD)
+            fecha_obj = datetime.strptime(mensaje.replace("fecha_", ""), "%Y-%m-%d").date()
         except ValueError:
-            return crear_respuesta_texto_segura(
-                "❌ Formato de hora inválido.\n\n"
-                "Por favor, use el formato HH:MM (ejemplo: 14:30):"
+            return flujos.Salida(crear_respuesta_texto_segura("❌ Formato de fecha inválido. Intente nuevamente."))
+        nuevos = {"fecha": fecha_obj.isoformat()}
+    else:
+        # Texto libre: fecha, hora, duración y habitación pueden venir en el mismo mensaje
+        nuevos = reserva_rapida.extraer(mensaje)
+
+    if "fecha" not in nuevos:
+        if nuevos:
+            # Lo que sí se entendió (hora, duración, habitación) se guarda para no volver a preguntarlo
+            estado_conv.datos_reserva.update(nuevos)
+            return flujos.Salida(
+                crear_respuesta_texto_segura("✅ Anotado. ¿Para qué día? (ejemplo: hoy, mañana, viernes o 25/12)"),
+                guardar=True,
             )
+        return flujos.Salida(crear_respuesta_texto_segura(
+            "❌ No pude entender la fecha. Escriba por ejemplo 'mañana a las 22', "
+            "'viernes de 22 a 2' o '25/12', o seleccione uno de los botones."
+        ))
+    # Validar que la fecha no sea del pasado (excepto hoy)
+    if nuevos["fecha"] < timezone.localdate().isoformat():
+        return flujos.Salida(crear_respuesta_texto_segura("❌ No se pueden hacer reservas para fechas pasadas."))
+    return nuevos
+
+
+def _preguntar_hora(datos_reserva, encabezado):
+    return crear_respuesta_texto_segura(f"{encabezado}\n\nAhora indique la hora de inicio (ejemplo: 14:30 o 22hrs):")
+
+
+def _leer_hora(mensaje, estado_conv):
+    nuevos = reserva_rapida.extraer(mensaje, numero_suelto="hora")
+    if "hora_inicio" not in nuevos:
+        return flujos.Salida(crear_respuesta_texto_segura(
+            "❌ Formato de hora inválido.\n\n"
+            "Por favor, indique la hora (ejemplo: 14:30, 22hrs o 10 de la noche):"
+        ))
+    # Con la hora pueden venir la duración y la habitación; la fecha ya está elegida
+    nuevos.pop("fecha", None)
+    return nuevos
+
+
+def _preguntar_duracion(datos_reserva, encabezado):
+    return payloads_whatsapp.menu(
+        f"{encabezado}\n\nSeleccione la duración de su reserva:", payloads_whatsapp.BOTONES_DURACION
+    )
 
-    elif paso == "esperando_duracion":
-        if mensaje.startswith("duracion_"):
-            try:
-                duracion = int(mensaje.replace("duracion_", ""))
-                datos_reserva["duracion"] = duracion
-                estado_conv.datos_reserva = datos_reserva
-                estado_conv.paso_actual = "esperando_habitacion"
-                estado_conv.save()
 
-                habitaciones_disponibles = Habitacion.objects.filter(disponible=True)[:3]
-                
-                if not habitaciones_disponibles.exists():
-                    return crear_respuesta_texto_segura("Lo sentimos, no hay habitaciones disponibles en este momento.")
+def _leer_duracion(mensaje, estado_conv):
+    if mensaje.startswith("duracion_"):
+        try:
+            duracion = int(mensaje.replace("duracion_", ""))
+        except ValueError:
+            return flujos.Salida(crear_respuesta_texto_segura("❌ Error procesando duración. Intente nuevamente."))
+    else:
+        duracion = fechas_naturales.interpretar(mensaje, numero_suelto="duracion").duracion
+    if not duracion or not 1 <= duracion <= reserva_rapida.DURACION_MAXIMA_HORAS:
+        # Si no indicó una duración válida, mostrar opciones nuevamente
+        return flujos.Salida(payloads_whatsapp.menu(
+            "Por favor, seleccione la duración usando los botones o escríbala (ejemplo: 3 horas):",
+            payloads_whatsapp.BOTONES_DURACION
+        ))
+    return {"duracion": duracion}
+
+
+def _inicio_pedido(datos_reserva):
+    return timezone.make_aware(datetime.combine(
+        date.fromisoformat(datos_reserva["fecha"]),
+        datetime.strptime(datos_reserva["hora_inicio"], "%H:%M").time(),
+    ))
+
+
+def ofrecer_ventanas(datos_reserva, encabezado):
+    """Próximos horarios libres desde la fecha y hora pedidas (sin choques con otras reservas)."""
+    duracion = datos_reserva["duracion"]
+    inicio_pedido = _inicio_pedido(datos_reserva)
+    ventanas = disponibilidad.buscar_ventanas(
+        duracion, desde=max(inicio_pedido, timezone.now()), n=3, una_por_habitacion=True
+    )
 
-                botones_habitaciones = []
-                texto_habitaciones = f"✅ Duración seleccionada: {duracion} horas\n\nHabitaciones disponibles:\n\n"
-                
-                for hab in habitaciones_disponibles:
-                    texto_habitaciones += f"• {hab.nombre_habitacion} - ${hab.precio_por_hora:,}/hora\n"
-                    
-                    # Nombre corto para botón
-                    nombre_corto = hab.nombre_habitacion
-                    if len(nombre_corto) > 18:
-                        nombre_corto = nombre_corto[:15] + "..."
-                    
-                    botones_habitaciones.append({
-                        "type": "reply", 
-                        "reply": {
-                            "id": f"hab_{hab.habitacion_id}", 
-                            "title": nombre_corto
-                        }
-                    })
-                
-                texto_habitaciones += "\nSeleccione una habitación:"
-                
-                return crear_respuesta_botones_ultra_segura(texto_habitaciones, botones_habitaciones)
-                
-            except ValueError:
-                return crear_respuesta_texto_segura("❌ Error procesando duración. Intente nuevamente.")
-        else:
-            # Si no seleccionó duración, mostrar opciones nuevamente
-            botones_duracion = [
-                {"type": "reply", "reply": {"id": "duracion_2", "title": "2 horas"}},
-                {"type": "reply", "reply": {"id": "duracion_4", "title": "4 horas"}},
-                {"type": "reply", "reply": {"id": "duracion_8", "title": "8 horas"}}
-            ]
-            return crear_respuesta_botones_ultra_segura(
-                "Por favor, seleccione la duración usando los botones:",
-                botones_duracion
-            )
+    if not ventanas:
+        return crear_respuesta_texto_segura(
+            "Lo sentimos, no hay habitaciones disponibles para ese horario en las próximas 24 horas."
+        )
 
-    elif paso == "esperando_habitacion":
-        if mensaje.startswith("hab_"):
-            try:
-                habitacion_id = int(mensaje.replace("hab_", ""))
-                habitacion = Habitacion.objects.get(habitacion_id=habitacion_id, disponible=True)
-                
-                datos_reserva["habitacion_id"] = habitacion.habitacion_id
-                datos_reserva["habitacion_nombre"] = habitacion.nombre_habitacion
-                datos_reserva["precio_por_hora"] = str(habitacion.precio_por_hora)
-                estado_conv.datos_reserva = datos_reserva
-                estado_conv.paso_actual = "esperando_confirmacion"
-                estado_conv.save()
-
-                # Calcular totales
-                precio_total = habitacion.precio_por_hora * datos_reserva["duracion"]
-                hora_inicio_dt = datetime.strptime(datos_reserva["hora_inicio"], "%H:%M")
-                hora_fin_dt = hora_inicio_dt + timedelta(hours=datos_reserva["duracion"])
-                
-                # Resumen SIN caracteres especiales problemáticos
-                resumen_texto = f"RESUMEN DE RESERVA\n\n"
-                resumen_texto += f"Fecha: {datetime.fromisoformat(datos_reserva['fecha']).strftime('%d/%m/%Y')}\n"
-                resumen_texto += f"Horario: {datos_reserva['hora_inicio']} - {hora_fin_dt.strftime('%H:%M')}\n"
-                resumen_texto += f"Duracion: {datos_reserva['duracion']} horas\n"
-                resumen_texto += f"Habitacion: {habitacion.nombre_habitacion}\n"
-                resumen_texto += f"Total: ${precio_total:,}\n\n"
-                resumen_texto += "¿Confirma esta reserva?"
-
-                botones_confirmacion = [
-                    {"type": "reply", "reply": {"id": "confirmar_si", "title": "✅ Si, Confirmar"}},
-                    {"type": "reply", "reply": {"id": "confirmar_no", "title": "❌ No, Cancelar"}}
-                ]
-                
-                return crear_respuesta_botones_ultra_segura(resumen_texto, botones_confirmacion)
-                
-            except (ValueError, Habitacion.DoesNotExist) as e:
-                logger.error(f"Error seleccionando habitación: {e}")
-                return crear_respuesta_texto_segura("❌ Habitación no válida. Por favor, seleccione una de la lista.")
-        else:
-            return crear_respuesta_texto_segura("Por favor, use los botones para seleccionar una habitación.")
+    texto_habitaciones = f"{encabezado}\n\nHorarios disponibles:\n\n"
+    for ventana in ventanas:
+        inicio_local = timezone.localtime(ventana.inicio)
+        fin_local = timezone.localtime(ventana.fin)
+        texto_habitaciones += (
+            f"• {ventana.habitacion_nombre}: {inicio_local.strftime('%d/%m %H:%M')} - "
+            f"{fin_local.strftime('%H:%M')} (${ventana.precio_total:,.0f})\n"
+        )
+    texto_habitaciones += "\nSeleccione un horario:"
+
+    return payloads_whatsapp.menu(
+        texto_habitaciones, [(v.id_boton, v.titulo_boton) for v in ventanas]
+    )
 
-    elif paso == "esperando_confirmacion":
-        if mensaje == "confirmar_si":
-            return crear_reserva_final(cliente, estado_conv)
-        elif mensaje == "confirmar_no":
-            estado_conv.delete()
-            return crear_respuesta_texto_segura(
-                "❌ Reserva cancelada.\n\n"
-                "Si desea realizar una nueva reserva, escriba 'reserva'."
-            )
-        else:
-            return crear_respuesta_texto_segura("Por favor, confirme o cancele usando los botones.")
 
-    return crear_respuesta_texto_segura("Error en el proceso. Escriba 'reserva' para comenzar de nuevo.")
+def _leer_habitacion(mensaje, estado_conv):
+    ventana = disponibilidad.leer_id_boton(mensaje)
+    if not (ventana or mensaje.startswith("hab_")):
+        return flujos.Salida(crear_respuesta_texto_segura("Por favor, use los botones para seleccionar un horario."))
+    try:
+        nuevos = {}
+        if ventana:
+            # El horario ofrecido puede ser posterior al pedido
+            habitacion_id, inicio = ventana
+            inicio = timezone.localtime(inicio)
+            nuevos["fecha"] = inicio.date().isoformat()
+            nuevos["hora_inicio"] = inicio.strftime("%H:%M")
+        else:
+            habitacion_id = int(mensaje.replace("hab_", ""))
+        habitacion = Habitacion.objects.get(habitacion_id=habitacion_id, disponible=True)
+    except (ValueError, Habitacion.DoesNotExist) as e:
+        logger.error(f"Error seleccionando habitación: {e}")
+        return flujos.Salida(crear_respuesta_texto_segura("❌ Habitación no válida. Por favor, seleccione una de la lista."))
+
+    nuevos["habitacion_id"] = habitacion.habitacion_id
+    nuevos["habitacion_nombre"] = habitacion.nombre_habitacion
+    nuevos["precio_por_hora"] = str(habitacion.precio_por_hora)
+    return nuevos
+
+
+def _revisar_habitacion(datos_reserva):
+    """La habitación elegida (o nombrada en el texto) debe estar libre en el horario pedido."""
+    inicio = _inicio_pedido(datos_reserva)
+    fin = inicio + timedelta(hours=datos_reserva["duracion"])
+    if inicio >= timezone.now() and not disponibilidad.hay_conflicto(datos_reserva["habitacion_id"], inicio, fin):
+        return None
+    return f"{datos_reserva['habitacion_nombre']} no está libre en ese horario."
+
+
+def pedir_confirmacion(datos_reserva, encabezado=""):
+    """Resumen de la reserva con los botones de confirmar / cancelar."""
+    precio_total = Decimal(datos_reserva["precio_por_hora"]) * datos_reserva["duracion"]
+    hora_inicio_dt = datetime.strptime(datos_reserva["hora_inicio"], "%H:%M")
+    hora_fin_dt = hora_inicio_dt + timedelta(hours=datos_reserva["duracion"])
+
+    # Resumen SIN caracteres especiales problemáticos
+    resumen_texto = f"RESUMEN DE RESERVA\n\n"
+    resumen_texto += f"Fecha: {datetime.fromisoformat(datos_reserva['fecha']).strftime('%d/%m/%Y')}\n"
+    resumen_texto += f"Horario: {datos_reserva['hora_inicio']} - {hora_fin_dt.strftime('%H:%M')}\n"
+    resumen_texto += f"Duracion: {datos_reserva['duracion']} horas\n"
+    resumen_texto += f"Habitacion: {datos_reserva['habitacion_nombre']}\n"
+    resumen_texto += f"Total: ${precio_total:,}\n\n"
+    resumen_texto += "¿Confirma esta reserva?"
+
+    return payloads_whatsapp.menu(resumen_texto, payloads_whatsapp.BOTONES_CONFIRMACION)
+
+
+def _leer_confirmacion(mensaje, estado_conv):
+    if mensaje == "confirmar_si":
+        # crear_reserva_final borra el estado de conversación
+        return flujos.Salida(crear_reserva_final(estado_conv.cliente, estado_conv))
+    if mensaje == "confirmar_no":
+        return flujos.Salida(crear_respuesta_texto_segura(
+            "❌ Reserva cancelada.\n\n"
+            "Si desea realizar una nueva reserva, escriba 'reserva'."
+        ), terminar=True)
+    return flujos.Salida(crear_respuesta_texto_segura("Por favor, confirme o cancele usando los botones."))
+
+
+FLUJO_RESERVA = flujos.registrar(flujos.Flujo("reserva", (
+    flujos.Paso(
+        "esperando_fecha", _leer_fecha, _preguntar_fecha, campos=("fecha",),
+        encabezado=lambda datos: f"✅ Fecha seleccionada: {date.fromisoformat(datos['fecha']).strftime('%d/%m/%Y')}",
+    ),
+    flujos.Paso(
+        "esperando_hora", _leer_hora, _preguntar_hora, campos=("hora_inicio",),
+        encabezado=lambda datos: f"✅ Hora seleccionada: {datos['hora_inicio']}",
+    ),
+    flujos.Paso(
+        "esperando_duracion", _leer_duracion, _preguntar_duracion, campos=("duracion",),
+        encabezado=lambda datos: f"✅ Duración seleccionada: {datos['duracion']} horas",
+    ),
+    flujos.Paso(
+        "esperando_habitacion", _leer_habitacion, ofrecer_ventanas,
+        campos=("habitacion_id", "habitacion_nombre", "precio_por_hora"), revisar=_revisar_habitacion,
+    ),
+    flujos.Paso("esperando_confirmacion", _leer_confirmacion, pedir_confirmacion),
+)))
+
+
+def iniciar_reserva_desde_texto(cliente, datos_reserva) -> dict:
+    """Reserva pedida en texto libre ("reserva para hoy a las 21 por 4 horas suite"): salta lo ya respondido."""
+    if datos_reserva.get("fecha", "") < timezone.localdate().isoformat():
+        datos_reserva.pop("fecha", None)  # fecha pasada: se vuelve a preguntar
+    encabezado = ""
+    if "fecha" in datos_reserva:
+        encabezado = f"✅ Reserva para el {date.fromisoformat(datos_reserva['fecha']).strftime('%d/%m/%Y')}"
+    return FLUJO_RESERVA.iniciar(cliente, datos_reserva, encabezado)
+
+
+def procesar_paso_reserva(cliente: Cliente, mensaje: str, estado_conv=None) -> dict:
+    """Procesa el mensaje en el paso actual del flujo de reserva (lo inicia si el cliente no tiene uno)."""
+    estado_conv = estado_conv or flujos.estado_de(cliente, tipo=FLUJO_RESERVA.nombre)
+    if estado_conv is None:
+        return iniciar_proceso_reserva(cliente)
+    return FLUJO_RESERVA.procesar(estado_conv, mensaje)
 
 # 4. MODIFICAR obtener_respuesta_del_agente PARA INCLUIR BOTÓN RESERVA CONSTANTE
 # Agregar esta lógica al final de obtener_respuesta_del_agente, antes del return final:
@@ -1105,29 +730,23 @@ def crear_reserva_final(cliente: Cliente, estado_conv: EstadoConversacion) -> di
         precio_total = habitacion.precio_por_hora * datos["duracion"]
        
         hora_inicio_dt = datetime.strptime(datos["hora_inicio"], "%H:%M")
-        hora_fin_dt = hora_inicio_dt + timedelta(hours=datos["duracion"])
+        # El fin se calcula sobre la fecha completa: una reserva puede pasar la medianoche
+        fecha_hora_inicio = timezone.make_aware(datetime.combine(
+            datetime.fromisoformat(datos["fecha"]),
+            hora_inicio_dt.time()
+        ))
 
-        reserva = Reserva.objects.create(
-            cliente=cliente,
-            # nombre=cliente.nombre_cliente, # Usar el nombre del cliente de la BD
-            telefono=cliente.telefono,
-            fecha=datetime.fromisoformat(datos["fecha"]),
-            # hora_inicio=hora_inicio_dt.time(),
-            # hora_fin=hora_fin_dt.time(),
-            fecha_hora_inicio=timezone.make_aware(datetime.combine(
-                datetime.fromisoformat(datos["fecha"]), 
-                hora_inicio_dt.time()
-            )),
-            fecha_hora_fin=timezone.make_aware(datetime.combine(
-                datetime.fromisoformat(datos["fecha"]), 
-                hora_fin_dt.time()
-            )),
-            duracion=datos["duracion"],
-            habitacion=habitacion,
-            precio_total=precio_total,
-            estado="pendiente", # Estado inicial de la reserva
-            origen="whatsapp"
-        )
+        try:
+            reserva = servicio_reservas.crear_reserva(
+                cliente, habitacion, fecha_hora_inicio, datos["duracion"],
+                origen="whatsapp", precio_total=precio_total,
+            )
+        except servicio_reservas.HorarioOcupado:
+            estado_conv.delete()
+            return crear_respuesta_texto(
+                "❌ Lo sentimos, ese horario acaba de ser reservado.\n\n"
+                "Escriba 'reserva' para ver los horarios disponibles."
+            )
         estado_conv.delete() # Eliminar estado de conversación después de crear la reserva
 
         mensaje_confirmacion = f"🎉 *¡Reserva Creada Exitosamente!*\n\n"
@@ -1150,66 +769,14 @@ def crear_reserva_final(cliente: Cliente, estado_conv: EstadoConversacion) -> di
         logger.error(f"Error inesperado al crear reserva: {e}", exc_info=True)
         return crear_respuesta_texto("❌ Ha ocurrido un error inesperado al procesar su reserva. Por favor, intente de nuevo más tarde.")
 
-def crear_respuesta_botones_segura(texto_cuerpo, botones):
-    """Crea respuesta con botones validando el formato para WhatsApp"""
-    try:
-        # Validar que no hay más de 3 botones (límite de WhatsApp)
-        if len(botones) > 3:
-            botones = botones[:3]
-            logger.warning("⚠️ Limitando botones a 3 (máximo de WhatsApp)")
-        
-        # Validar formato de cada botón
-        botones_validos = []
-        for boton in botones:
-            if (boton.get("type") == "reply" and 
-                boton.get("reply", {}).get("id") and 
-                boton.get("reply", {}).get("title")):
-                
-                # Limpiar y validar título (máximo 20 caracteres)
-                titulo = str(boton["reply"]["title"]).strip()[:20]
-                id_boton = str(boton["reply"]["id"]).strip()
-                
-                if titulo and id_boton:
-                    botones_validos.append({
-                        "type": "reply",
-                        "reply": {
-                            "id": id_boton,
-                            "title": titulo
-                        }
-                    })
-        
-        if not botones_validos:
-            logger.warning("⚠️ No hay botones válidos - Usando texto simple")
-            return crear_respuesta_texto(texto_cuerpo)
-        
-        # Validar texto del cuerpo (máximo 1024 caracteres)
-        texto_limpio = str(texto_cuerpo).strip()[:1024]
-        
-        respuesta = {
-            "type": "interactive",
-            "interactive": {
-                "type": "button",
-                "body": {
-                    "text": texto_limpio
-                },
-                "action": {
-                    "buttons": botones_validos
-                }
-            }
-        }
-        
-        logger.info(f"✅ Respuesta con {len(botones_validos)} botones creada correctamente")
-        return respuesta
-        
-    except Exception as e:
-        logger.error(f"❌ Error creando respuesta con botones: {e}")
-        return crear_respuesta_texto(texto_cuerpo)
+# Mismos límites que crear_respuesta_botones_ultra_segura (ver payloads_whatsapp)
+crear_respuesta_botones_segura = payloads_whatsapp.botones
     
 # Función para liberar habitaciones vencidas (para llamar desde el código)
 def liberar_habitaciones_vencidas():
     """Función para liberar habitaciones desde el código - llamada en cada saludo."""    
     ahora = timezone.now()
-    reservas_terminadas = Reserva.objects.filter(
+    reservas_terminadas = Reserva.objects.select_related("habitacion").filter(
         estado="llegada_confirmada",
         fecha_hora_fin__lte=ahora
     )
@@ -1217,8 +784,7 @@ def liberar_habitaciones_vencidas():
     count = 0
     for reserva in reservas_terminadas:
         try:
-            reserva.estado = "completada"
-            reserva.save()
+            servicio_reservas.completar(reserva)
             count += 1
             logger.info(f"🏠 Habitación liberada - Reserva #{reserva.reserva_id} completada")
         except Exception as e:
@@ -1228,7 +794,18 @@ def liberar_habitaciones_vencidas():
     
 # --- "CEREBRO" DEL BOT MEJORADO ---
 def obtener_respuesta_del_agente(mensaje_usuario: str, cliente: Cliente, conversacion: Conversacion):
-    """Cerebro del bot con detección de saludo corregida - adaptado desde web chat"""
+    """Cerebro del bot (versión síncrona): resuelve la respuesta y completa la llamada a la IA."""
+    respuesta = resolver_respuesta_del_agente(mensaje_usuario, cliente, conversacion)
+    if isinstance(respuesta, RespuestaPendienteIA):
+        return respuesta.completar()
+    return respuesta
+
+def resolver_respuesta_del_agente(mensaje_usuario: str, cliente: Cliente, conversacion: Conversacion):
+    """
+    Cerebro del bot con detección de saludo corregida - adaptado desde web chat.
+    Devuelve el payload final o una RespuestaPendienteIA cuando falta reformular con IA,
+    para que la vista async pueda esperar al LLM sin ocupar un hilo.
+    """
     logger.info(f"\n--- INICIO PROCESAMIENTO CEREBRO WHATSAPP ---")
     logger.info(f"💬 Mensaje del usuario: '{mensaje_usuario}'")
     logger.info(f"Debug date type: {type(date)}")
@@ -1242,26 +819,25 @@ def obtener_respuesta_del_agente(mensaje_usuario: str, cliente: Cliente, convers
         logger.info("👨‍💼 Funcionario autenticado correctamente")
         return activar_modo_funcionario(cliente.telefono)
     
-    # Si ya está en modo funcionario (verificar sesión activa)
-    if esta_en_modo_funcionario(cliente.telefono):
-        logger.info("👨‍💼 Procesando comando de funcionario autenticado")
-        return procesar_mensaje_funcionario_mejorado(cliente.telefono, mensaje_usuario)
-    
-    # --- 2. VERIFICAR SI HAY PROCESO DE RESERVA ACTIVO ---
-    try:
-        estado_conv = EstadoConversacion.objects.get(cliente=cliente, tipo="reserva")
-        logger.info(f"📝 Proceso de reserva activo - Paso: {estado_conv.paso_actual}")
-        return procesar_paso_reserva(cliente, mensaje_usuario)
-    except EstadoConversacion.DoesNotExist:
-        pass
+    # --- 2. FLUJO ACTIVO (modo funcionario o proceso de reserva): una sola consulta ---
+    estado_conv = flujos.estado_de(cliente)
+    if estado_conv and estado_conv.tipo in flujos.FLUJOS:
+        logger.info(f"📝 Flujo '{estado_conv.tipo}' activo - Paso: {estado_conv.paso_actual}")
+        return flujos.procesar(estado_conv, mensaje_usuario)
+
+    # --- 2.5. RESERVA EN UN SOLO MENSAJE ("reserva para hoy a las 21 por 4 horas suite") ---
+    if reserva_rapida.es_reserva(mensaje_usuario):
+        datos_reserva = reserva_rapida.extraer(mensaje_usuario)
+        if datos_reserva:
+            logger.info(f"⚡ Reserva en texto libre: {sorted(datos_reserva)}")
+            return iniciar_reserva_desde_texto(cliente, datos_reserva)
     
     # --- 3. DETECTAR SALUDO INICIAL ---
     palabras = set(mensaje_limpio.split())
     PALABRAS_DE_SALUDO = {'hola', 'buenas', 'hello', 'hi', 'hey', 'buenos', 'buen', 'saludos', 'holis', 'holaa'}
     
     # Obtener historial para verificar si es conversación nueva
-    mensajes_anteriores = Mensaje.objects.filter(
-        conversacion=conversacion,
+    mensajes_anteriores = conversacion.mensajes().filter(
         remitente='cliente'
     ).count()
 
@@ -1276,36 +852,13 @@ def obtener_respuesta_del_agente(mensaje_usuario: str, cliente: Cliente, convers
         except Exception as e:
             logger.error(f"❌ Error liberando habitaciones: {e}")
         
-        # Buscar saludo configurado en BD
-        saludo_configurado = PreguntaFrecuente.objects.filter(
-            es_saludo_inicial=True, 
-            activo=True
-        ).first()
+        # Saludo configurado en BD (menú en caché, ver menu_faq)
+        menu = menu_faq.obtener_menu()
+        saludo_configurado = menu["saludo"]
         
         if saludo_configurado:
-            # Procesar respuesta de saludo con IA
-            respuesta_saludo = procesar_respuesta_con_ia(
-                saludo_configurado.respuesta, 
-                mensaje_usuario, 
-                conversacion
-            )
-            
-            # Obtener preguntas frecuentes para botones (que NO sean saludo inicial)
-            preguntas_menu = PreguntaFrecuente.objects.filter(
-                activo=True,
-                es_saludo_inicial=False
-            ).order_by('pregunta_frecuenta_id')[:2]  # Solo 2 porque agregamos botón de reserva
-            
-            botones = []
-            for p in preguntas_menu:
-                if p.pregunta_corta_boton:
-                    botones.append({
-                        "type": "reply",
-                        "reply": {
-                            "id": f"faq_{p.pregunta_frecuenta_id}",
-                            "title": p.pregunta_corta_boton.strip()[:20]
-                        }
-                    })
+            # Preguntas frecuentes para botones (que NO sean saludo inicial)
+            botones = menu_faq.botones_whatsapp(2, menu)  # Solo 2 porque agregamos botón de reserva
             
             # Agregar botón de reserva
             botones.append({
@@ -1317,19 +870,23 @@ def obtener_respuesta_del_agente(mensaje_usuario: str, cliente: Cliente, convers
             })
             
             # Crear respuesta con botones
-            if botones:
-                texto_completo = respuesta_saludo + "\n\n¿En qué puedo ayudarte?"
-                return crear_respuesta_botones_ultra_segura(texto_completo, botones)
-            else:
+            def armar_saludo(respuesta_saludo):
+                if botones:
+                    texto_completo = respuesta_saludo + "\n\n¿En qué puedo ayudarte?"
+                    return crear_respuesta_botones_ultra_segura(texto_completo, botones)
                 return crear_respuesta_texto_segura(respuesta_saludo)
+            
+            # Procesar respuesta de saludo con IA
+            return preparar_respuesta_con_ia(
+                saludo_configurado,
+                mensaje_usuario,
+                conversacion,
+                armar=armar_saludo
+            )
         else:
             # Saludo por defecto si no hay configurado en BD
-            botones_default = [
-                {"type": "reply", "reply": {"id": "info_general", "title": "ℹ️ Información"}},
-                {"type": "reply", "reply": {"id": "hacer_reserva", "title": "📅 Reservar"}}
-            ]
             texto_default = "¡Hola! Soy Pratsy 🤖, tu asistente virtual del Motel.\n\n¿En qué puedo ayudarte?"
-            return crear_respuesta_botones_ultra_segura(texto_default, botones_default)
+            return payloads_whatsapp.menu(texto_default, payloads_whatsapp.BOTONES_SALUDO_DEFAULT)
     
     # --- 3.5. DETECTAR CONSULTA DE DISPONIBILIDAD ---
     if detectar_consulta_disponibilidad(mensaje_usuario):
@@ -1340,13 +897,13 @@ def obtener_respuesta_del_agente(mensaje_usuario: str, cliente: Cliente, convers
     if mensaje_usuario.startswith("faq_"):
         try:
             faq_id = int(mensaje_usuario.replace("faq_", ""))
-            pregunta = PreguntaFrecuente.objects.get(
-                pregunta_frecuenta_id=faq_id, 
-                activo=True
+            pregunta = menu_faq.pregunta_por_id(faq_id)
+            if pregunta is None:
+                raise PreguntaFrecuente.DoesNotExist
+            logger.info(f"🔘 Botón FAQ presionado: {pregunta['pregunta_corta']}")
+            return preparar_respuesta_con_ia(
+                pregunta['respuesta'], mensaje_usuario, conversacion, armar=crear_respuesta_texto_segura
             )
-            logger.info(f"🔘 Botón FAQ presionado: {pregunta.pregunta_corta_boton}")
-            respuesta_final = procesar_respuesta_con_ia(pregunta.respuesta, mensaje_usuario, conversacion)
-            return crear_respuesta_texto_segura(respuesta_final)
         except (ValueError, PreguntaFrecuente.DoesNotExist):
             logger.error(f"❌ FAQ ID inválido: {mensaje_usuario}")
     
@@ -1418,10 +975,10 @@ def obtener_respuesta_del_agente(mensaje_usuario: str, cliente: Cliente, convers
                             
                             # Procesar respuesta con IA
                             respuesta_bd = pregunta.respuesta
-                            respuesta_final = procesar_respuesta_con_ia(
-                                respuesta_bd, mensaje_usuario, conversacion
+                            return preparar_respuesta_con_ia(
+                                respuesta_bd, mensaje_usuario, conversacion,
+                                armar=crear_respuesta_texto_segura
                             )
-                            return crear_respuesta_texto_segura(respuesta_final)
             
             logger.info("No se encontró coincidencia exacta en palabras_clave")
             
@@ -1473,10 +1030,10 @@ def obtener_respuesta_del_agente(mensaje_usuario: str, cliente: Cliente, convers
                 logger.info(f"   Pregunta seleccionada: {mejor_pregunta.pregunta_corta_boton}")
                 
                 respuesta_bd = mejor_pregunta.respuesta
-                respuesta_final = procesar_respuesta_con_ia(
-                    respuesta_bd, mensaje_usuario, conversacion
+                return preparar_respuesta_con_ia(
+                    respuesta_bd, mensaje_usuario, conversacion,
+                    armar=crear_respuesta_texto_segura
                 )
-                return crear_respuesta_texto_segura(respuesta_final)
             else:
                 logger.info(f"❌ No se alcanzó umbral mínimo (mejor puntaje: {mejor_puntaje}, requerido: {umbral_minimo})")
 
@@ -1494,186 +1051,42 @@ def obtener_respuesta_del_agente(mensaje_usuario: str, cliente: Cliente, convers
 
         if base_conocimiento:
             logger.info("✅ Información de Base de Conocimiento encontrada")
-            respuesta_final = procesar_respuesta_con_ia(base_conocimiento.respuesta, mensaje_usuario, conversacion)
-            return crear_respuesta_texto_segura(respuesta_final)
+            return preparar_respuesta_con_ia(
+                base_conocimiento.respuesta, mensaje_usuario, conversacion,
+                armar=crear_respuesta_texto_segura
+            )
 
     except Exception as e:
         logger.error(f"❌ Error buscando en BD de conocimiento: {e}")
 
     # --- 7. PROCESAR COMO PREGUNTA DESCONOCIDA ---
     logger.info("❓ Pregunta no encontrada. Procesando como desconocida...")
-    try:
-        PreguntaDesconocida.objects.create(
-            cliente=cliente,
-            texto_pregunta=mensaje_usuario,
-            fecha_recibida=timezone.now()
-        )
-    except Exception as e:
-        logger.error(f"❌ Error guardando pregunta desconocida: {e}")
-    
-    respuesta_desconocida = procesar_pregunta_desconocida_con_ia(mensaje_usuario, conversacion)
+    preguntas_desconocidas.registrar(mensaje_usuario, cliente.cliente_id if cliente else None)
     
     # Ofrecer ayuda con botones
-    botones_ayuda = [
-        {"type": "reply", "reply": {"id": "hacer_reserva", "title": "📅 Reservar"}},
-        {"type": "reply", "reply": {"id": "info_general", "title": "ℹ️ Info"}}
-    ]
-    
-    texto_con_ayuda = respuesta_desconocida + "\n\n¿Te gustaría hacer una reserva o necesitas más información?"
+    def armar_desconocida(respuesta_desconocida):
+        texto_con_ayuda = respuesta_desconocida + "\n\n¿Te gustaría hacer una reserva o necesitas más información?"
+        return payloads_whatsapp.menu(texto_con_ayuda, payloads_whatsapp.BOTONES_AYUDA)
     
     logger.info("--- FIN PROCESAMIENTO CEREBRO WHATSAPP ---\n")
-    return crear_respuesta_botones_ultra_segura(texto_con_ayuda, botones_ayuda)
+    return preparar_pregunta_desconocida_con_ia(mensaje_usuario, conversacion, armar=armar_desconocida)
 
-def crear_respuesta_texto_segura(texto):
-    """Crea una respuesta de texto validada para WhatsApp"""
-    try:
-        # Limpiar el texto
-        texto_limpio = str(texto).strip()
-        
-        # Remover caracteres problemáticos
-        caracteres_problematicos = ['\u2019', '\u201c', '\u201d', '\u2013', '\u2014']
-        for char in caracteres_problematicos:
-            texto_limpio = texto_limpio.replace(char, '')
-        
-        # Limitar longitud (máximo 4096 caracteres para WhatsApp)
-        if len(texto_limpio) > 4000:
-            texto_limpio = texto_limpio[:3997] + "..."
-        
-        # Validar que no esté vacío
-        if not texto_limpio:
-            texto_limpio = "Lo siento, no pude procesar tu mensaje correctamente."
-        
-        return {
-            "type": "text",
-            "text": {
-                "body": texto_limpio
-            }
-        }
-    except Exception as e:
-        logger.error(f"❌ Error creando respuesta de texto segura: {e}")
-        return {
-            "type": "text",
-            "text": {
-                "body": "Error interno. Por favor intenta nuevamente."
-            }
-        }
+crear_respuesta_texto_segura = payloads_whatsapp.texto
 
 # 3. FUNCIÓN CORREGIDA PARA BOTONES SEGUROS
-def crear_respuesta_botones_ultra_segura(texto_cuerpo, botones):
-    """Versión ultra segura para crear botones de WhatsApp"""
-    try:
-        # Limpiar texto del cuerpo
-        texto_limpio = str(texto_cuerpo).strip()
-        
-        # Remover caracteres especiales problemáticos
-        texto_limpio = texto_limpio.replace('\u2019', "'")  # Comilla curva
-        texto_limpio = texto_limpio.replace('\u201c', '"')  # Comilla doble izq
-        texto_limpio = texto_limpio.replace('\u201d', '"')  # Comilla doble der
-        texto_limpio = texto_limpio.replace('\u2013', '-')  # En dash
-        texto_limpio = texto_limpio.replace('\u2014', '-')  # Em dash
-        
-        # Limitar longitud del texto (máximo 1024 para botones interactivos)
-        if len(texto_limpio) > 900:
-            texto_limpio = texto_limpio[:897] + "..."
-        
-        # Validar y limpiar botones
-        botones_validos = []
-        
-        for i, boton in enumerate(botones[:3]):  # Máximo 3 botones
-            try:
-                if (boton.get("type") == "reply" and 
-                    boton.get("reply", {}).get("id") and 
-                    boton.get("reply", {}).get("title")):
-                    
-                    # Limpiar ID del botón
-                    id_boton = str(boton["reply"]["id"]).strip()[:50]  # Máximo 50 chars
-                    id_boton = ''.join(c for c in id_boton if c.isalnum() or c in ['_', '-'])
-                    
-                    # Limpiar título del botón
-                    titulo = str(boton["reply"]["title"]).strip()
-                    titulo = titulo.replace('\u2019', "'")
-                    titulo = titulo.replace('\u201c', '"')
-                    titulo = titulo.replace('\u201d', '"')
-                    
-                    # Limitar longitud del título (máximo 20 caracteres)
-                    if len(titulo) > 20:
-                        titulo = titulo[:17] + "..."
-                    
-                    # Validar que no esté vacío después de limpiar
-                    if titulo and id_boton:
-                        botones_validos.append({
-                            "type": "reply",
-                            "reply": {
-                                "id": id_boton,
-                                "title": titulo
-                            }
-                        })
-                        
-            except Exception as boton_error:
-                logger.error(f"❌ Error procesando botón {i}: {boton_error}")
-                continue
-        
-        # Si no hay botones válidos, usar texto simple
-        if not botones_validos:
-            logger.warning("⚠️ No se pudieron crear botones válidos - Usando texto simple")
-            return crear_respuesta_texto_segura(texto_limpio)
-        
-        # Crear respuesta final
-        respuesta = {
-            "type": "interactive",
-            "interactive": {
-                "type": "button",
-                "body": {
-                    "text": texto_limpio
-                },
-                "action": {
-                    "buttons": botones_validos
-                }
-            }
-        }
-        
-        # Log para debugging
-        logger.info(f"✅ Respuesta con botones creada:")
-        logger.info(f"   - Texto: {len(texto_limpio)} caracteres")
-        logger.info(f"   - Botones: {len(botones_validos)}")
-        for i, btn in enumerate(botones_validos):
-            logger.info(f"     {i+1}. ID: '{btn['reply']['id']}', Título: '{btn['reply']['title']}'")
-        
-        return respuesta
-        
-    except Exception as e:
-        logger.error(f"❌ Error creando respuesta con botones: {e}")
-        return crear_respuesta_texto_segura(texto_cuerpo)
+crear_respuesta_botones_ultra_segura = payloads_whatsapp.botones
     
 # 3. FUNCIÓN CORREGIDA PARA BOTONES SEGUROS
 def crear_respuesta_botones():
     """Crea una respuesta con botones interactivos de preguntas frecuentes - VERSIÓN CORREGIDA"""
     try:
-        logger.info("🔍 Buscando preguntas frecuentes para crear botones...")
-        preguntas_menu = PreguntaFrecuente.objects.filter(
-            activo=True
-        ).exclude(
-            es_saludo_inicial=True
-        ).order_by("pregunta_frecuenta_id")[:3]
+        # Menú en caché (ver menu_faq): sin consultas a la BD salvo tras un cambio en las FAQ
+        botones = menu_faq.botones_whatsapp(3)
+        logger.debug("📊 Preguntas frecuentes en el menú: %s", len(botones))
         
-        logger.info(f"📊 Preguntas frecuentes encontradas: {preguntas_menu.count()}")
-        
-        if not preguntas_menu.exists():
+        if not botones:
             logger.info("⚠️ No hay preguntas frecuentes disponibles")
             return crear_respuesta_texto_segura("¡Hola! Soy Pratsy, tu asistente virtual. ¿En qué puedo ayudarte hoy?")
-
-        botones = []
-        for p in preguntas_menu:
-            logger.info(f"🔹 Procesando pregunta ID {p.pregunta_frecuenta_id}: '{p.pregunta_corta_boton}'")
-            
-            if p.pregunta_corta_boton and len(p.pregunta_corta_boton.strip()) > 0:
-                botones.append({
-                    "type": "reply",
-                    "reply": {
-                        "id": f"faq_{p.pregunta_frecuenta_id}",
-                        "title": p.pregunta_corta_boton.strip()
-                    }
-                })
         
         # Agregar botón de reserva
         botones.append({
@@ -1694,42 +1107,46 @@ def crear_respuesta_botones():
     
 # 5. DEBUGGING PARA WHATSAPP
 def debug_whatsapp_payload(payload, to_number):
-    """Función para debuggear payloads de WhatsApp antes de enviar"""
-    logger.info("🔍 DEBUGGING WHATSAPP PAYLOAD:")
-    logger.info(f"   Destinatario: {to_number}")
-    logger.info(f"   Tipo: {payload.get('type')}")
+    """
+    Función para debuggear payloads de WhatsApp antes de enviar.
+    Recorre el texto carácter por carácter: llamar solo con DEBUG activo.
+    """
+    logger.debug("🔍 DEBUGGING WHATSAPP PAYLOAD:")
+    logger.debug(f"   Destinatario: {to_number}")
+    logger.debug(f"   Tipo: {payload.get('type')}")
     
     if payload.get('type') == 'text':
         texto = payload.get('text', {}).get('body', '')
-        logger.info(f"   Texto length: {len(texto)}")
-        logger.info(f"   Texto preview: {texto[:100]}...")
-        
-        # Buscar caracteres problemáticos
-        problematicos = []
-        for i, char in enumerate(texto):
-            if ord(char) > 127:  # Caracteres no ASCII
-                problematicos.append(f"'{char}' (pos: {i}, ord: {ord(char)})")
-        
-        if problematicos:
-            logger.warning(f"   ⚠️ Caracteres no ASCII encontrados: {problematicos[:5]}")
+        logger.debug(f"   Texto length: {len(texto)}")
+        logger.debug(f"   Texto preview: {texto[:100]}...")
+        
+        # Buscar caracteres problemáticos (solo los primeros 5)
+        if not texto.isascii():
+            problematicos = []
+            for i, char in enumerate(texto):
+                if ord(char) > 127:  # Caracteres no ASCII
+                    problematicos.append(f"'{char}' (pos: {i}, ord: {ord(char)})")
+                    if len(problematicos) == 5:
+                        break
+            logger.debug(f"   ⚠️ Caracteres no ASCII encontrados: {problematicos}")
     
     elif payload.get('type') == 'interactive':
         interactive = payload.get('interactive', {})
         body_text = interactive.get('body', {}).get('text', '')
         buttons = interactive.get('action', {}).get('buttons', [])
         
-        logger.info(f"   Body length: {len(body_text)}")
-        logger.info(f"   Botones: {len(buttons)}")
+        logger.debug(f"   Body length: {len(body_text)}")
+        logger.debug(f"   Botones: {len(buttons)}")
         
         for i, btn in enumerate(buttons):
             btn_id = btn.get('reply', {}).get('id', '')
             btn_title = btn.get('reply', {}).get('title', '')
-            logger.info(f"     Botón {i+1}: ID='{btn_id}', Title='{btn_title}' ({len(btn_title)} chars)")
+            logger.debug(f"     Botón {i+1}: ID='{btn_id}', Title='{btn_title}' ({len(btn_title)} chars)")
     
     # Serializar para verificar JSON válido
     try:
-        json_str = json.dumps(payload, ensure_ascii=False, indent=2)
-        logger.info("   ✅ JSON válido")
+        json.dumps(payload, ensure_ascii=False)
+        logger.debug("   ✅ JSON válido")
     except Exception as json_error:
         logger.error(f"   ❌ Error en JSON: {json_error}")
 
@@ -1828,21 +1245,33 @@ def detectar_consulta_disponibilidad(mensaje: str) -> bool:
     # Si tiene 2 o más palabras clave relacionadas, probablemente es consulta de disponibilidad
     return coincidencias >= 2
 
+def reservas_por_atender(limite):
+    """
+    Próximas reservas pendientes/confirmadas desde hoy (hora local), a lo sumo ``limite``.
+    Una sola consulta: cliente y habitación vienen en el mismo JOIN y el rango sobre
+    fecha_hora_inicio usa su índice (``__date`` no podría).
+    """
+    desde = timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+    return list(
+        Reserva.objects.select_related("cliente", "habitacion")
+        .filter(estado__in=["pendiente", "confirmada"], fecha_hora_inicio__gte=desde)
+        .order_by("fecha_hora_inicio")[:limite]
+    )
+
 def mostrar_todas_las_reservas_funcionario() -> dict:
     """Muestra todas las reservas pendientes y confirmadas."""
     try:
-        reservas = Reserva.objects.filter(
-            estado__in=["pendiente", "confirmada"],
-            fecha_hora_inicio__date__gte=date.today()
-        ).order_by("fecha_hora_inicio")[:10]  # Máximo 10
+        reservas = reservas_por_atender(11)  # Máximo 10; la 11 solo indica que hay más
         
-        if not reservas.exists():
+        if not reservas:
             return crear_respuesta_texto("No hay reservas pendientes.")
         
-        mensaje = f"📋 *TODAS LAS RESERVAS* ({reservas.count()})\n\n"
+        hay_mas = len(reservas) > 10
+        reservas = reservas[:10]
+        mensaje = f"📋 *TODAS LAS RESERVAS* ({len(reservas)}{'+' if hay_mas else ''})\n\n"
         
         for reserva in reservas:
-            fecha_str = reserva.fecha_hora_inicio.strftime("%d/%m %H:%M")
+            fecha_str = timezone.localtime(reserva.fecha_hora_inicio).strftime("%d/%m %H:%M")
             cliente = reserva.cliente.nombre_cliente if reserva.cliente else "Cliente"
             habitacion = reserva.habitacion.nombre_habitacion if reserva.habitacion else "Hab"
             
@@ -1865,19 +1294,8 @@ def activar_modo_funcionario(telefono: str) -> dict:
         # Por simplicidad, usaremos EstadoConversacion
         cliente = Cliente.objects.get(telefono=telefono)
         
-        estado_funcionario, created = EstadoConversacion.objects.get_or_create(
-            cliente=cliente,
-            tipo="funcionario",
-            defaults={
-                "paso_actual": "menu_principal",
-                "datos_reserva": {}
-            }
-        )
-        estado_funcionario.paso_actual = "menu_principal"
-        estado_funcionario.save()
-        
-        # Mostrar menú principal con primeras 3 reservas
-        return mostrar_menu_funcionario()
+        # Reemplaza cualquier otro flujo del cliente y muestra el menú principal con primeras 3 reservas
+        return FLUJO_FUNCIONARIO.iniciar(cliente)
         
     except FuncionarioHotel.DoesNotExist:
         return crear_respuesta_texto("❌ No tienes permisos de funcionario.")
@@ -1897,19 +1315,16 @@ def mostrar_menu_funcionario() -> dict:
     """Muestra el menú principal del funcionario con las primeras 3 reservas."""
     try:
         # Obtener las primeras 3 reservas pendientes/confirmadas de hoy en adelante
-        reservas = Reserva.objects.filter(
-            estado__in=["pendiente", "confirmada"],
-            fecha_hora_inicio__date__gte=date.today()
-        ).order_by("fecha_hora_inicio")[:3]
+        reservas = reservas_por_atender(3)
         
         mensaje = "👨‍💼 *PANEL DE FUNCIONARIO ACTIVADO*\n\n"
         mensaje += "📋 *PRIMERAS 3 RESERVAS:*\n\n"
         
         botones = []
         
-        if reservas.exists():
+        if reservas:
             for i, reserva in enumerate(reservas, 1):
-                fecha_str = reserva.fecha_hora_inicio.strftime("%d/%m %H:%M")
+                fecha_str = timezone.localtime(reserva.fecha_hora_inicio).strftime("%d/%m %H:%M")
                 cliente_nombre = reserva.cliente.nombre_cliente if reserva.cliente else "Cliente"
                 habitacion = reserva.habitacion.nombre_habitacion if reserva.habitacion else "Hab"
                 
@@ -1941,6 +1356,8 @@ def mostrar_menu_funcionario() -> dict:
         mensaje += "💬 *COMANDOS:*\n"
         mensaje += "• Escribe el # de reserva para buscarla\n"
         mensaje += "• 'TODAS' para ver todas las reservas\n"
+        mensaje += "• 'CONFIRMAR 101 102' o 'CONFIRMAR HOY' para confirmar varias\n"
+        mensaje += "• 'LLEGADAS 101 102' o 'LLEGADAS HOY' para registrar varias llegadas\n"
         mensaje += "• 'SALIR' para salir del modo funcionario"
         
         if botones:
@@ -1965,6 +1382,11 @@ def procesar_mensaje_funcionario_mejorado(telefono: str, mensaje: str) -> dict:
         if mensaje_clean == "todas":
             return mostrar_todas_las_reservas_funcionario()
         
+        # Comandos en lote: "confirmar 101 102 105", "llegadas hoy"
+        respuesta_lote = procesar_comando_lote(telefono, mensaje_clean)
+        if respuesta_lote:
+            return respuesta_lote
+        
         # Comando para confirmar reserva
         if mensaje.startswith("confirmar_"):
             reserva_id = mensaje.replace("confirmar_", "")
@@ -1999,15 +1421,24 @@ def salir_modo_funcionario(telefono: str) -> dict:
         return crear_respuesta_texto("❌ Error saliendo del modo funcionario.")
 
 
+def _leer_comando_funcionario(mensaje, estado_conv):
+    return flujos.Salida(procesar_mensaje_funcionario_mejorado(estado_conv.cliente.telefono, mensaje))
+
+
+FLUJO_FUNCIONARIO = flujos.registrar(flujos.Flujo("funcionario", (
+    flujos.Paso("menu_principal", _leer_comando_funcionario, lambda datos, encabezado: mostrar_menu_funcionario()),
+)))
+
+
 def confirmar_reserva_funcionario(reserva_id: str, telefono_funcionario: str) -> dict:
-    """Confirma una reserva y envía notificación al cliente."""
+    """Confirma una reserva pendiente y envía notificación al cliente."""
     try:
-        reserva = Reserva.objects.get(reserva_id=int(reserva_id))
-        reserva.estado = "confirmada"
-        reserva.save()
-        
-        # TODO: Aquí enviarías notificación al cliente
-        # send_whatsapp_message(reserva.telefono, {mensaje de confirmación})
+        # Solo si sigue pendiente (con la fila bloqueada): una reserva ya confirmada no se vuelve a avisar.
+        # El aviso al cliente sale en segundo plano (notificaciones.py): esta respuesta no lo espera
+        resultado = servicio_reservas.confirmar_varias([int(reserva_id)])
+        if not resultado.aplicadas:
+            return _respuesta_rechazada(reserva_id, resultado)
+        reserva = resultado.aplicadas[0]
         
         mensaje_funcionario = f"✅ *Reserva #{reserva_id} CONFIRMADA*\n\n"
         mensaje_funcionario += f"Cliente: {reserva.cliente.nombre_cliente if reserva.cliente else 'Cliente'}\n"
@@ -2017,8 +1448,6 @@ def confirmar_reserva_funcionario(reserva_id: str, telefono_funcionario: str) ->
         
         return crear_respuesta_texto(mensaje_funcionario)
         
-    except Reserva.DoesNotExist:
-        return crear_respuesta_texto(f"❌ No se encontró la reserva #{reserva_id}")
     except Exception as e:
         logger.error(f"Error confirmando reserva {reserva_id}: {e}")
         return crear_respuesta_texto(f"❌ Error confirmando la reserva.")
@@ -2027,14 +1456,12 @@ def confirmar_reserva_funcionario(reserva_id: str, telefono_funcionario: str) ->
 def marcar_llegada_funcionario(reserva_id: str, telefono_funcionario: str) -> dict:
     """Marca la llegada de un cliente y libera la habitación al terminar."""
     try:
-        reserva = Reserva.objects.get(reserva_id=int(reserva_id))
-        
-        if reserva.estado != "confirmada":
+        resultado = servicio_reservas.registrar_llegadas([int(reserva_id)], telefono_funcionario)
+        if not resultado.aplicadas:
+            if resultado.rechazadas.get(int(reserva_id)) == "no existe":
+                return crear_respuesta_texto(f"❌ No se encontró la reserva #{reserva_id}")
             return crear_respuesta_texto(f"❌ La reserva #{reserva_id} debe estar confirmada primero.")
-        
-        reserva.estado = "llegada_confirmada"
-        reserva.fecha_llegada = timezone.now()
-        reserva.save()
+        reserva = resultado.aplicadas[0]
         
         # Programar liberación automática de habitación (ver función siguiente)
         tiempo_liberacion = reserva.fecha_hora_fin
@@ -2042,25 +1469,83 @@ def marcar_llegada_funcionario(reserva_id: str, telefono_funcionario: str) -> di
         mensaje = f"🚪 *LLEGADA CONFIRMADA #{reserva_id}*\n\n"
         mensaje += f"Cliente: {reserva.cliente.nombre_cliente if reserva.cliente else 'Cliente'}\n"
         mensaje += f"Habitación: {reserva.habitacion.nombre_habitacion if reserva.habitacion else 'Habitación'}\n"
-        mensaje += f"⏰ Se liberará automáticamente: {tiempo_liberacion.strftime('%H:%M')}\n\n"
+        mensaje += f"⏰ Se liberará automáticamente: {timezone.localtime(tiempo_liberacion).strftime('%H:%M')}\n\n"
         mensaje += "¿Otro comando?"
         
         return crear_respuesta_texto(mensaje)
         
-    except Reserva.DoesNotExist:
-        return crear_respuesta_texto(f"❌ No se encontró la reserva #{reserva_id}")
     except Exception as e:
         logger.error(f"Error marcando llegada {reserva_id}: {e}")
         return crear_respuesta_texto(f"❌ Error marcando llegada.")
 
 
+# "confirmar 101, 102 y #105", "llegada 7 8", "llegadas hoy"
+_COMANDO_LOTE = re.compile(r'^(confirmar|llegadas?)\s+(hoy|[#\d\s,y]+)$')
+MAXIMO_RESERVAS_POR_COMANDO = 50
+
+def _reservas_de_hoy(estado):
+    """IDs de las reservas en ``estado`` que empiezan hoy (hora local)."""
+    desde = timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+    return list(
+        Reserva.objects.filter(
+            estado=estado, fecha_hora_inicio__gte=desde, fecha_hora_inicio__lt=desde + timedelta(days=1)
+        ).order_by("fecha_hora_inicio").values_list("reserva_id", flat=True)
+    )
+
+def procesar_comando_lote(telefono_funcionario: str, mensaje_clean: str):
+    """
+    Confirma o registra la llegada de varias reservas en un solo mensaje (un UPDATE,
+    ver servicio_reservas.confirmar_varias) y responde con un resumen. None si el
+    mensaje no es un comando en lote.
+    """
+    coincidencia = _COMANDO_LOTE.match(mensaje_clean)
+    if not coincidencia:
+        return None
+    accion, argumentos = coincidencia.groups()
+    confirmar = accion == "confirmar"
+
+    if argumentos == "hoy":
+        reserva_ids = _reservas_de_hoy("pendiente" if confirmar else "confirmada")
+        if not reserva_ids:
+            return crear_respuesta_texto(
+                "No hay reservas pendientes de confirmar hoy." if confirmar else "No hay llegadas por registrar hoy."
+            )
+    else:
+        reserva_ids = [int(numero) for numero in re.findall(r"\d+", argumentos)]
+        if not reserva_ids:
+            return None
+
+    excedentes = reserva_ids[MAXIMO_RESERVAS_POR_COMANDO:]
+    reserva_ids = reserva_ids[:MAXIMO_RESERVAS_POR_COMANDO]
+    if confirmar:
+        resultado = servicio_reservas.confirmar_varias(reserva_ids)
+        titulo = "CONFIRMADAS"
+    else:
+        resultado = servicio_reservas.registrar_llegadas(reserva_ids, telefono_funcionario)
+        titulo = "LLEGADAS REGISTRADAS"
+
+    mensaje = f"{'✅' if confirmar else '🚪'} *{len(resultado.aplicadas)} {titulo}*\n"
+    for reserva in resultado.aplicadas:
+        cliente = reserva.cliente.nombre_cliente if reserva.cliente else "Cliente"
+        mensaje += f"#{reserva.reserva_id} - {cliente}\n"
+    if resultado.rechazadas:
+        mensaje += "\n❌ *Sin cambios:*\n"
+        for reserva_id, motivo in resultado.rechazadas.items():
+            mensaje += f"#{reserva_id}: {motivo}\n"
+    if excedentes:
+        mensaje += f"\n⚠️ Máximo {MAXIMO_RESERVAS_POR_COMANDO} por mensaje: faltan {len(excedentes)} (desde #{excedentes[0]})\n"
+    if resultado.aplicadas:
+        mensaje += "\n📱 Se notificará a los clientes.\n"
+    mensaje += "\n¿Otro comando?"
+    return crear_respuesta_texto(mensaje)
+
 def buscar_reserva_manual(numero_reserva: str) -> dict:
     """Busca una reserva específica por número."""
     try:
-        reserva = Reserva.objects.get(reserva_id=int(numero_reserva))
+        reserva = Reserva.objects.select_related("cliente", "habitacion").get(reserva_id=int(numero_reserva))
         
-        fecha_str = reserva.fecha_hora_inicio.strftime("%d/%m/%Y %H:%M")
-        fecha_fin_str = reserva.fecha_hora_fin.strftime("%H:%M")
+        fecha_str = timezone.localtime(reserva.fecha_hora_inicio).strftime("%d/%m/%Y %H:%M")
+        fecha_fin_str = timezone.localtime(reserva.fecha_hora_fin).strftime("%H:%M")
         
         mensaje = f"🔍 *RESERVA #{numero_reserva}*\n\n"
         mensaje += f"👤 Cliente: {reserva.cliente.nombre_cliente if reserva.cliente else 'Cliente'}\n"
@@ -2099,44 +1584,30 @@ def buscar_reserva_manual(numero_reserva: str) -> dict:
         logger.error(f"Error buscando reserva {numero_reserva}: {e}")
         return crear_respuesta_texto("❌ Error buscando la reserva.")
 
-def debug_configuracion_completa():
-    """
-    Función para verificar TODA la configuración
-    LLAMAR UNA VEZ PARA DEBUGGING COMPLETO
-    """
-    logger.info("🔍 ===== DEBUGGING CONFIGURACIÓN COMPLETA =====")
-    
-    # 1. Verificar importaciones y SDK
-    logger.info(f"1. SDK Disponible: {GENAI_SDK_AVAILABLE}")
-    
-    # 2. Verificar API Key
-    api_key_status = "Sí" if GEMINI_API_KEY else "No"
-    logger.info(f"2. GEMINI_API_KEY: {api_key_status}")
-    
-    # 3. Test de datetime
-    logger.info("3. Testing métodos de fecha...")
-    try:
-        fecha_tz = timezone.now()
-        logger.info(f"   ✅ timezone.now(): {fecha_tz}")
-    except Exception as e:
-        logger.error(f"   ❌ timezone.now(): {e}")
-    try:
-        fecha_dt = datetime.now()
-        logger.info(f"   ✅ datetime.now(): {fecha_dt}")
-    except Exception as e:
-        logger.error(f"   ❌ datetime.now(): {e}")
-    
-    # 4. Test de modelos de IA (si disponible)
-    if GENAI_SDK_AVAILABLE == True and GEMINI_API_KEY:
-        logger.info("4. Testing nuevo Google GenAI SDK...")
-        try:
-            client = genai.Client(api_key=GEMINI_API_KEY)
-            logger.info("   ✅ Cliente creado correctamente")
-        except Exception as e:
-            logger.error(f"   ❌ Error creando cliente: {e}")
-        
-    logger.info("🔍 ===== FIN DEBUGGING =====")
-        
+def mensaje_usuario_de_evento(message):
+    """Texto (o ID de botón) que se le pasa al agente; vacío si el tipo no se procesa."""
+    tipo_mensaje = message.get("type")
+
+    if tipo_mensaje == "text":
+        mensaje_usuario = message["text"]["body"]
+        logger.info(f"📝 Mensaje de texto recibido: {mensaje_usuario}")
+        return mensaje_usuario
+
+    if tipo_mensaje == "interactive" and "button_reply" in message["interactive"]:
+        id_boton_presionado = message["interactive"]["button_reply"]["id"]
+        logger.info(f"🔘 Botón presionado: {id_boton_presionado}")
+        return id_boton_presionado # Usar el ID del botón como mensaje para el agente
+
+    return ""
+
+def texto_de_payload(payload_respuesta):
+    """Texto a guardar en BD para un payload de respuesta ya enviado."""
+    if payload_respuesta.get("type") == "text":
+        return payload_respuesta["text"]["body"]
+    elif payload_respuesta.get("type") == "interactive":
+        return payload_respuesta["interactive"]["body"]["text"]
+    return "Respuesta con formato especial"
+
 # --- WEBHOOK DE WHATSAPP ---
 @csrf_exempt
 def webhook_whatsapp(request):
@@ -2157,13 +1628,11 @@ def webhook_whatsapp(request):
             return HttpResponse("Fallo la verificación", status=403)
 
     elif request.method == "POST":
-        # Verificar conexión al inicio de cada request
-        if not test_whatsapp_connection():
-            logger.error("🚨 FALLO DE CONEXIÓN CON WHATSAPP - Revisa tu configuración")
-        
+        # La prueba de conexión con la Graph API ya no se hace en cada request:
+        # python manage.py diagnosticar_configuracion --probar-conexiones
         try:
             data = json.loads(request.body.decode("utf-8"))
-            logger.info(f"📨 Webhook recibido: {json.dumps(data, indent=2)}")
+            registrar_payload(logger, "📨 Webhook recibido:", data)
 
             if "object" in data and data["object"] == "whatsapp_business_account":
                 for entry in data["entry"]:
@@ -2192,18 +1661,7 @@ def webhook_whatsapp(request):
                                     )
                                     
                                     # Procesar el mensaje según su tipo
-                                    tipo_mensaje = message.get("type")
-                                    mensaje_usuario = ""
-                                    id_boton_presionado = None
-
-                                    if tipo_mensaje == "text":
-                                        mensaje_usuario = message["text"]["body"]
-                                        logger.info(f"📝 Mensaje de texto recibido: {mensaje_usuario}")
-                                        
-                                    elif tipo_mensaje == "interactive" and "button_reply" in message["interactive"]:
-                                        id_boton_presionado = message["interactive"]["button_reply"]["id"]
-                                        mensaje_usuario = id_boton_presionado # Usar el ID del botón como mensaje para el agente
-                                        logger.info(f"🔘 Botón presionado: {id_boton_presionado}")
+                                    mensaje_usuario = mensaje_usuario_de_evento(message)
                                     
                                     # Solo procesar si hay un mensaje válido (texto o botón)
                                     if mensaje_usuario:
@@ -2225,17 +1683,10 @@ def webhook_whatsapp(request):
                                         if mensaje_enviado:
                                             # Guardar la respuesta del agente si se envió exitosamente
                                             try:
-                                                if payload_respuesta.get("type") == "text":
-                                                    texto_respuesta = payload_respuesta["text"]["body"]
-                                                elif payload_respuesta.get("type") == "interactive":
-                                                    texto_respuesta = payload_respuesta["interactive"]["body"]["text"]
-                                                else:
-                                                    texto_respuesta = "Respuesta con formato especial"
-                                                
                                                 Mensaje.objects.create(
                                                     conversacion=conversacion,
                                                     remitente="agente",
-                                                    contenido=texto_respuesta
+                                                    contenido=texto_de_payload(payload_respuesta)
                                                 )
                                                 logger.info(f"💾 Respuesta guardada en BD")
                                             except Exception as e:
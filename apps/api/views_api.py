@@ -0,0 +1,241 @@
+# apps/api/views_api.py
+"""
+API REST para el dashboard (Django REST Framework), solo para staff.
+
+- ``/api/estadisticas/``: estadísticas del dashboard (EstadisticasSerializer).
+- ``/api/reservas/``: reservas ordenadas por (fecha_hora_inicio, reserva_id),
+  paginadas con cursor. Parámetros:
+    ``cursor``          enlace ``next``/``previous`` de la respuesta anterior
+    ``tamano``          reservas por página (máx. 200)
+    ``campos``          campos parciales, ej. ``campos=reserva_id,estado,habitacion_nombre``
+    ``estado``, ``habitacion``, ``desde``, ``hasta`` (fecha_hora_inicio, ISO 8601)
+  Cada página lleva un ETag; con ``If-None-Match`` igual se responde 304 sin cuerpo,
+  así la pantalla de recepción puede consultar cada pocos segundos.
+- ``/api/disponibilidad/?duracion=4``: próximos horarios libres (ver
+  apps/api/disponibilidad.py). Opcionales: ``desde``, ``hasta`` (ISO 8601),
+  ``n`` (máx. 50) y ``habitacion`` (repetible).
+"""
+import base64
+import hashlib
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework import mixins, status, viewsets
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
+
+from . import disponibilidad
+from .estadisticas import obtener_estadisticas
+from .models import Reserva
+from .serializers import EstadisticasSerializer, ReservaCreateSerializer, ReservaSerializer
+
+
+class EstadisticasView(APIView):
+    """GET: estadísticas del dashboard desde los totales diarios (sin recorrer reservas ni clientes)."""
+
+    def get(self, request):
+        return Response(EstadisticasSerializer(obtener_estadisticas()).data)
+
+
+class DisponibilidadView(APIView):
+    """GET: próximas ventanas libres (habitación, inicio, duración) para una duración en horas."""
+
+    def get(self, request):
+        parametros = request.query_params
+        try:
+            duracion = int(parametros.get('duracion', ''))
+            n = min(int(parametros.get('n', 5)), 50)
+            habitaciones = [int(h) for h in parametros.getlist('habitacion')] or None
+        except ValueError:
+            raise ValidationError("duracion, n y habitacion deben ser enteros")
+        if not 1 <= duracion <= 24:
+            raise ValidationError({'duracion': "Entre 1 y 24 horas"})
+
+        fechas = {}
+        for parametro in ('desde', 'hasta'):
+            if parametros.get(parametro):
+                fechas[parametro] = parse_datetime(parametros[parametro])
+                if fechas[parametro] is None:
+                    raise ValidationError({parametro: "Fecha y hora ISO 8601 inválida"})
+
+        ventanas = disponibilidad.buscar_ventanas(duracion, n=n, habitaciones=habitaciones, **fechas)
+        return Response([
+            {
+                'habitacion': v.habitacion_id,
+                'habitacion_nombre': v.habitacion_nombre,
+                'inicio': v.inicio,
+                'fin': v.fin,
+                'duracion': v.duracion,
+                'precio_total': str(v.precio_total),
+            }
+            for v in ventanas
+        ])
+
+
+class PaginacionCursorCompuesto(BasePagination):
+    """
+    Paginación por keyset sobre un orden de dos campos (el segundo único), ej.
+    ``(fecha_hora_inicio, reserva_id)``: cada página es
+    ``WHERE (a, b) > (ultimo_a, ultimo_b) ORDER BY a, b LIMIT n`` y usa el índice,
+    sin OFFSET ni COUNT. A diferencia de CursorPagination de DRF, el cursor guarda
+    los dos valores, así muchas reservas a la misma hora no degradan la paginación.
+    """
+    orden = ('fecha_hora_inicio', 'reserva_id')
+    page_size = 50
+    page_size_query_param = 'tamano'
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+
+    def _codificar(self, valores, atras):
+        datos = json.dumps({'v': valores, 'a': atras}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(datos.encode()).decode().rstrip('=')
+
+    def _decodificar(self, cursor, queryset):
+        try:
+            datos = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            campos = [queryset.model._meta.get_field(c) for c in self.orden]
+            valores = [campo.to_python(v) for campo, v in zip(campos, datos['v'])]
+            if len(valores) != len(self.orden):
+                raise ValueError
+            return valores, bool(datos['a'])
+        except Exception:
+            raise NotFound("Cursor inválido")
+
+    def _valores(self, objeto):
+        valores = [getattr(objeto, c) for c in self.orden]
+        return [v.isoformat() if hasattr(v, 'isoformat') else v for v in valores]
+
+    def _tamano(self, request):
+        try:
+            tamano = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            tamano = self.page_size
+        return max(1, min(tamano, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        tamano = self._tamano(request)
+        primero, segundo = self.orden
+        cursor = request.query_params.get(self.cursor_query_param)
+        valores, atras = self._decodificar(cursor, queryset) if cursor else (None, False)
+
+        if valores:
+            op = 'lt' if atras else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{primero}__{op}': valores[0]}) | Q(**{primero: valores[0], f'{segundo}__{op}': valores[1]})
+            )
+        orden = [f'-{c}' for c in self.orden] if atras else list(self.orden)
+        pagina = list(queryset.order_by(*orden)[:tamano + 1])
+        hay_mas = len(pagina) > tamano
+        pagina = pagina[:tamano]
+        if atras:
+            pagina.reverse()
+
+        # Hacia adelante: hay siguiente si sobró una fila y anterior si se vino con cursor;
+        # hacia atrás, al revés.
+        self.siguiente = self.anterior = None
+        if pagina:
+            if hay_mas or atras:
+                self.siguiente = self._codificar(self._valores(pagina[-1]), False)
+            if (hay_mas and atras) or (cursor and not atras):
+                self.anterior = self._codificar(self._valores(pagina[0]), True)
+        elif cursor:
+            # Página vacía: se puede volver (o avanzar) desde el mismo punto
+            crudos = [v.isoformat() if hasattr(v, 'isoformat') else v for v in valores]
+            if atras:
+                self.siguiente = self._codificar(crudos, False)
+            else:
+                self.anterior = self._codificar(crudos, True)
+        return pagina
+
+    def _enlace(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self._enlace(self.siguiente),
+            'previous': self._enlace(self.anterior),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+def _etag(datos):
+    return '"%s"' % hashlib.md5(
+        json.dumps(datos, sort_keys=True, default=str).encode(), usedforsecurity=False
+    ).hexdigest()
+
+
+class ReservaViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, mixins.CreateModelMixin,
+                     viewsets.GenericViewSet):
+    """Reservas para el dashboard: lista paginada por cursor, detalle y alta (ReservaCreateSerializer)."""
+    queryset = Reserva.objects.all()
+    serializer_class = ReservaSerializer
+    pagination_class = PaginacionCursorCompuesto
+
+    # Campos del serializer que necesitan cada relación
+    _CAMPOS_CLIENTE = {'cliente_nombre', 'cliente_telefono'}
+    _CAMPOS_HABITACION = {'habitacion_nombre'}
+
+    def get_serializer_class(self):
+        return ReservaCreateSerializer if self.action == 'create' else ReservaSerializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        parametros = self.request.query_params
+
+        # select_related solo de las relaciones que se van a mostrar
+        campos = self.get_serializer().fields.keys()
+        relaciones = []
+        if self._CAMPOS_CLIENTE & set(campos):
+            relaciones.append('cliente')
+        if self._CAMPOS_HABITACION & set(campos):
+            relaciones.append('habitacion')
+        if relaciones:
+            queryset = queryset.select_related(*relaciones)
+
+        if parametros.get('estado'):
+            queryset = queryset.filter(estado=parametros['estado'])
+        if parametros.get('habitacion'):
+            if not parametros['habitacion'].isdigit():
+                raise ValidationError({'habitacion': "Debe ser un id numérico"})
+            queryset = queryset.filter(habitacion_id=parametros['habitacion'])
+        for parametro, lookup in (('desde', 'fecha_hora_inicio__gte'), ('hasta', 'fecha_hora_inicio__lt')):
+            if parametros.get(parametro):
+                valor = parse_datetime(parametros[parametro])
+                if valor is None:
+                    raise ValidationError({parametro: "Fecha y hora ISO 8601 inválida"})
+                queryset = queryset.filter(**{lookup: valor})
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        respuesta = super().list(request, *args, **kwargs)
+        etag = _etag(respuesta.data)
+        if etag in [e.strip() for e in request.headers.get('If-None-Match', '').split(',')]:
+            respuesta = Response(status=status.HTTP_304_NOT_MODIFIED)
+        respuesta['ETag'] = etag
+        respuesta['Cache-Control'] = 'private, no-cache'
+        return respuesta
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        reserva = serializer.save()
+        datos = ReservaSerializer(reserva, context=self.get_serializer_context()).data
+        return Response(datos, status=status.HTTP_201_CREATED)
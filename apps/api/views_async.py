@@ -0,0 +1,292 @@
+# apps/api/views_async.py
+"""
+Versiones asíncronas (ASGI) del webhook de WhatsApp y del chat web.
+
+El "cerebro" del bot sigue siendo síncrono (ORM + reglas) y se ejecuta con
+``sync_to_async``; lo que cambia es que la espera al LLM y a la Graph API se
+hace con ``await``, sin ocupar un hilo por conversación. Así un solo proceso
+puede mantener cientos de conversaciones esperando a Gemini al mismo tiempo.
+
+Las llamadas síncronas (ORM, y la IA cuando el cerebro la completa por su cuenta)
+van con ``en_hilo_propio``: ``thread_sensitive=False`` las reparte en el pool de
+hilos del event loop. Con el valor por defecto de ``sync_to_async`` todas las
+requests pasarían por un único hilo compartido y se atenderían de a una.
+
+Se activan con ``VISTAS_ASYNC=True`` (rutas principales) o directamente en
+``/api/async/whatsapp/`` y ``/api/async/web-chat/``.
+"""
+import asyncio
+import json
+import logging
+import weakref
+from collections import defaultdict
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+
+from . import views, views_web_chat
+from .llm import RespuestaPendienteIA
+from .models import Cliente, Conversacion, Mensaje
+from .registro import registrar_payload
+
+logger = logging.getLogger(__name__)
+
+
+def en_hilo_propio(funcion):
+    """
+    ``sync_to_async(funcion, thread_sensitive=False)``. Cada hilo del pool abre su
+    propia conexión a la BD; se cierra al terminar según CONN_MAX_AGE, como al
+    final de una request.
+    """
+    def ejecutar(*args, **kwargs):
+        try:
+            return funcion(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(ejecutar, thread_sensitive=False)
+
+# Un cliente HTTP por event loop: reutiliza conexiones keep-alive con la Graph API
+_clientes_http = weakref.WeakKeyDictionary()
+
+
+def _cliente_http():
+    loop = asyncio.get_running_loop()
+    cliente = _clientes_http.get(loop)
+    if cliente is None:
+        cliente = httpx.AsyncClient(
+            timeout=30,
+            limits=httpx.Limits(max_connections=200, max_keepalive_connections=50),
+        )
+        _clientes_http[loop] = cliente
+    return cliente
+
+
+async def cerrar_clientes_http():
+    """Cierra el cliente HTTP del event loop actual (al apagar el servidor o en benchmarks)."""
+    cliente = _clientes_http.pop(asyncio.get_running_loop(), None)
+    if cliente is not None:
+        await cliente.aclose()
+
+
+async def completar_respuesta(respuesta):
+    """Espera a la IA si el cerebro dejó la respuesta pendiente."""
+    if isinstance(respuesta, RespuestaPendienteIA):
+        return await respuesta.acompletar()
+    return respuesta
+
+
+# --- ENVÍO DE MENSAJES (ASYNC) ---
+async def asend_whatsapp_message(to_number, message_payload):
+    """Versión async de send_whatsapp_message (mismo payload y mismo manejo de errores)."""
+    if not views.validar_configuracion_whatsapp():
+        return False
+
+    url, headers, final_payload = views.preparar_envio_whatsapp(to_number, message_payload)
+
+    try:
+        response = await _cliente_http().post(url, headers=headers, json=final_payload)
+        return views.interpretar_respuesta_whatsapp(response.status_code, response.text, to_number)
+    except httpx.TimeoutException:
+        logger.error("⏰ Timeout enviando mensaje a WhatsApp")
+        return False
+    except httpx.HTTPError as e:
+        logger.error(f"🌐 Error de conexión con WhatsApp: {e}")
+        return False
+    except Exception as e:
+        logger.error(f"💥 Error inesperado enviando mensaje: {e}")
+        return False
+
+
+# --- WEBHOOK DE WHATSAPP (ASYNC) ---
+async def procesar_mensaje_whatsapp_async(message):
+    """Procesa un mensaje entrante: guarda, consulta al cerebro, envía y guarda la respuesta."""
+    try:
+        from_number = message["from"]
+
+        # Crear o obtener cliente
+        cliente, created = await Cliente.objects.aget_or_create(
+            telefono=from_number,
+            defaults={
+                "nombre_cliente": f"Cliente {from_number}",
+                "fecha_registro": timezone.now()
+            }
+        )
+        if created:
+            logger.info(f"👤 Nuevo cliente creado: {from_number}")
+
+        # Crear o obtener conversación
+        conversacion, _ = await Conversacion.objects.aget_or_create(
+            cliente=cliente,
+            activo=True
+        )
+
+        mensaje_usuario = views.mensaje_usuario_de_evento(message)
+        if not mensaje_usuario:
+            return
+
+        await Mensaje.objects.acreate(
+            conversacion=conversacion,
+            remitente="cliente",
+            contenido=mensaje_usuario
+        )
+
+        respuesta = await en_hilo_propio(views.resolver_respuesta_del_agente)(
+            mensaje_usuario, cliente, conversacion
+        )
+        payload_respuesta = await completar_respuesta(respuesta)
+
+        if await asend_whatsapp_message(from_number, payload_respuesta):
+            try:
+                await Mensaje.objects.acreate(
+                    conversacion=conversacion,
+                    remitente="agente",
+                    contenido=views.texto_de_payload(payload_respuesta)
+                )
+                logger.info(f"💾 Respuesta guardada en BD")
+            except Exception as e:
+                logger.error(f"❌ Error guardando respuesta del agente: {e}")
+        else:
+            logger.error(f"❌ No se pudo enviar respuesta a {from_number}")
+
+    except Exception as e:
+        logger.error(f"💥 Error procesando mensaje individual: {e}")
+
+
+async def _procesar_mensajes_de_un_remitente(mensajes):
+    # En orden: el segundo mensaje de un cliente depende del estado que dejó el primero
+    for message in mensajes:
+        await procesar_mensaje_whatsapp_async(message)
+
+
+@csrf_exempt
+async def webhook_whatsapp_async(request):
+    """
+    Webhook de WhatsApp para ASGI.
+    Los mensajes de distintos clientes del mismo lote se procesan en paralelo;
+    los de un mismo cliente, en orden.
+    """
+    if request.method == "GET":
+        return views.webhook_whatsapp(request)
+
+    if request.method != "POST":
+        return HttpResponse("Método no permitido", status=405)
+
+    try:
+        data = json.loads(request.body.decode("utf-8"))
+    except json.JSONDecodeError as e:
+        logger.error(f"📝 Error decodificando JSON: {e}")
+        return HttpResponse("JSON inválido", status=400)
+
+    registrar_payload(logger, "📨 Webhook recibido:", data)
+
+    try:
+        if data.get("object") != "whatsapp_business_account":
+            return HttpResponse("OK", status=200)
+
+        por_remitente = defaultdict(list)
+        for entry in data["entry"]:
+            for change in entry["changes"]:
+                value = change.get("value", {})
+                if "messages" in value:
+                    for message in value["messages"]:
+                        por_remitente[message.get("from")].append(message)
+                elif "statuses" in value:
+                    for status in value["statuses"]:
+                        logger.info(f"📊 Actualización de estado: Mensaje {status['id']} ahora está '{status['status']}'")
+
+        if por_remitente:
+            await asyncio.gather(*(
+                _procesar_mensajes_de_un_remitente(mensajes) for mensajes in por_remitente.values()
+            ))
+
+        return HttpResponse("OK", status=200)
+
+    except Exception as e:
+        logger.error(f"💥 Error inesperado en el webhook: {e}", exc_info=True)
+        return HttpResponse("Error interno del servidor", status=500)
+
+
+# --- VISTA API PARA CHAT WEB (ASYNC) ---
+@method_decorator(csrf_exempt, name='dispatch')
+class WebChatAsyncView(View):
+    async def post(self, request):
+        try:
+            data = json.loads(request.body)
+            mensaje = data.get('mensaje', '').strip()
+            session_id = data.get('session_id', 'anonymous')
+
+            if not mensaje:
+                return JsonResponse({'error': 'Mensaje vacío'}, status=400)
+
+            conversacion_id, historial = await en_hilo_propio(views_web_chat.cargar_historial_web)(session_id)
+
+            resultado = await en_hilo_propio(views_web_chat.resolver_respuesta_agente_web)(
+                mensaje, session_id, historial
+            )
+            resultado = await completar_respuesta(resultado)
+
+            await en_hilo_propio(views_web_chat.guardar_turno_web)(
+                session_id, conversacion_id, mensaje, resultado['respuesta']
+            )
+
+            logger.info(f"✅ Respuesta web generada para sesión {session_id}")
+            return JsonResponse({'success': True, 'data': resultado})
+
+        except json.JSONDecodeError:
+            return JsonResponse({'error': 'JSON inválido'}, status=400)
+        except Exception as e:
+            logger.error(f"💥 Error en chat web: {e}")
+            return JsonResponse({'error': 'Error interno del servidor'}, status=500)
+
+
+async def aeventos_chat_web(mensaje, session_id):
+    """Versión async de views_web_chat.eventos_chat_web."""
+    evento_sse = views_web_chat.evento_sse
+    yield ": inicio\n\n"
+    try:
+        conversacion_id, historial = await en_hilo_propio(views_web_chat.cargar_historial_web)(session_id)
+        resultado = await en_hilo_propio(views_web_chat.resolver_respuesta_agente_web)(
+            mensaje, session_id, historial
+        )
+
+        if isinstance(resultado, RespuestaPendienteIA):
+            fragmentos = []
+            async for fragmento in resultado.astream():
+                fragmentos.append(fragmento)
+                yield evento_sse('delta', {'texto': fragmento})
+            resultado = resultado.armar(''.join(fragmentos).strip())
+        else:
+            yield evento_sse('delta', {'texto': resultado['respuesta']})
+
+        await en_hilo_propio(views_web_chat.guardar_turno_web)(
+            session_id, conversacion_id, mensaje, resultado['respuesta']
+        )
+        logger.info(f"✅ Respuesta web (stream) generada para sesión {session_id}")
+        yield evento_sse('fin', resultado)
+
+    except Exception as e:
+        logger.error(f"💥 Error en chat web (stream): {e}")
+        yield evento_sse('error', {'error': 'Error interno del servidor'})
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class WebChatStreamAsyncView(View):
+    async def post(self, request):
+        try:
+            data = json.loads(request.body)
+        except json.JSONDecodeError:
+            return JsonResponse({'error': 'JSON inválido'}, status=400)
+
+        mensaje = data.get('mensaje', '').strip()
+        session_id = data.get('session_id', 'anonymous')
+        if not mensaje:
+            return JsonResponse({'error': 'Mensaje vacío'}, status=400)
+
+        return views_web_chat.respuesta_sse(aeventos_chat_web(mensaje, session_id))
@@ -1,90 +1,54 @@
 # backend/api/views_web_chat.py
+import gzip
+import hashlib
 import json
 import os
 import logging
-from django.http import JsonResponse
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.template.loader import get_template
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.utils.decorators import method_decorator
 from django.views import View
 from django.utils import timezone
-from google import genai
 from django.db.models import Q
 from .models import (
     Cliente, Conversacion, Mensaje, TipoHabitacion,
-    PreguntaFrecuente, PreguntaDesconocida
+    PreguntaFrecuente
 )
+from . import historial_web, llm, menu_faq, preguntas_desconocidas
+from .llm import RespuestaPendienteIA
 
 logger = logging.getLogger(__name__)
 
-# --- CONFIGURACIÓN PARA GEMINI ---
-GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
-print("="*60)
-if GEMINI_API_KEY and len(GEMINI_API_KEY) > 10:
-    print(f"✅ DIAGNÓSTICO: Clave de API de Gemini encontrada y cargada.")
-    print(f"   - La clave empieza con: {GEMINI_API_KEY[:5]}...")
-    print(f"   - La clave termina con: ...{GEMINI_API_KEY[-4:]}")
-    # genai.configure(api_key=GEMINI_API_KEY)
-    logger.info("✅ Configuración de Google Gemini válida")
-else:
-    print("❌ DIAGNÓSTICO: NO se encontró o es inválida la API Key de Gemini.")
-    print("   - Asegúrate de que la variable GEMINI_API_KEY esté en tu archivo .env")
-    logger.warning("⚠️ No se encontró API Key de Gemini. La funcionalidad de IA estará deshabilitada.")
-print("="*60)
-
-# === 2. IMPORTACIÓN DEL SDK (CÓDIGO NUEVO QUE AGREGAMOS) ===
-# IMPORTAR EL NUEVO SDK DE GOOGLE GENAI
-try:
-    GENAI_SDK_AVAILABLE = True
-    logger.info("✅ Google GenAI SDK (nuevo) importado correctamente")
-except ImportError as e:
-    genai = None
-    GENAI_SDK_AVAILABLE = False
-    logger.error(f"❌ No se pudo importar Google GenAI SDK: {e}")
-    logger.info("💡 Para instalar: pip install google-genai")
-
 # --- FUNCIÓN PARA PROCESAR RESPUESTA CON IA (REUTILIZADA) ---
-def procesar_respuesta_con_ia_web(respuesta_bd, mensaje_usuario, historial_conversacion):
-    """
-    Procesa la respuesta de la BD a través de la IA para hacerla más amigable
-    ADAPTADO DEL CÓDIGO FUNCIONAL DE views.py
-    """
-    logger.info("🤖 Procesando respuesta web con IA...")
-    
-    if not GEMINI_API_KEY:
-        logger.warning("⚠️ No hay API Key de Gemini - Devolviendo respuesta original")
-        return respuesta_bd
-    
-    # Verificar si el SDK está disponible
-    try:
-        import google.generativeai as genai
-        SDK_DISPONIBLE = True
-    except ImportError:
-        logger.warning("⚠️ SDK de Gemini no disponible")
-        return respuesta_bd
-    
-    try:
-        # Configurar cliente con el nuevo SDK
-        client = genai.Client(api_key=GEMINI_API_KEY)
-        
-        # Modelos disponibles (del más reciente al más antiguo)
-        MODELOS_DISPONIBLES = [
-            "models/gemini-2.0-flash-exp",
-            "models/gemini-1.5-flash",
-            "models/gemini-1.5-pro",
-        ]
-        
-        # Construir contexto del historial
-        historial_context = ""
-        for msg in historial_conversacion[-4:]:  # Últimos 4 mensajes
-            role = 'Cliente' if msg.get('remitente') == 'cliente' else 'Pratsy'
-            historial_context += f"{role}: {msg.get('contenido', '')}\n"
-        
-        prompt = f"""
+RESPUESTA_DESCONOCIDA_WEB = "Lo siento, no tengo información específica sobre eso. ¿Podrías reformular tu pregunta o consultar sobre nuestros servicios principales?"
+
+def _contexto_historial_web(historial_conversacion):
+    """Últimos 4 mensajes del historial web, formateados para el prompt."""
+    historial_context = ""
+    for msg in historial_conversacion[-4:]:
+        role = 'Cliente' if msg.get('remitente') == 'cliente' else 'Pratsy'
+        historial_context += f"{role}: {msg.get('contenido', '')}\n"
+    return historial_context
+
+def preparar_respuesta_con_ia_web(respuesta_bd, mensaje_usuario, historial_conversacion, armar=None):
+    """Arma el prompt de reformulación para el chat web sin llamar todavía a la IA."""
+    logger.info("🤖 Preparando respuesta web para la IA...")
+
+    if not llm.disponible():
+        logger.warning("⚠️ No hay API Key de Gemini - Se usará la respuesta original")
+        return RespuestaPendienteIA(None, respuesta_bd, armar)
+
+    prompt = f"""
 Eres Pratsy, un asistente virtual amigable y profesional de un motel. Estás conversando por chat web con un cliente.
 
 CONTEXTO DE LA CONVERSACIÓN:
-{historial_context}
+{_contexto_historial_web(historial_conversacion)}
 
 PREGUNTA DEL CLIENTE: {mensaje_usuario}
 RESPUESTA TÉCNICA DE LA BASE DE DATOS: {respuesta_bd}
@@ -100,78 +64,20 @@ INSTRUCCIONES:
 
 Reformula la respuesta:
 """
-        
-        # Intentar con cada modelo hasta que uno funcione
-        for modelo in MODELOS_DISPONIBLES:
-            try:
-                logger.info(f"🔄 Intentando con modelo: {modelo}")
-                
-                response = client.models.generate_content(
-                    model=modelo,
-                    contents=prompt,
-                    config={
-                        "max_output_tokens": 500,
-                        "temperature": 0.7,
-                    }
-                )
-                
-                if response:
-                    texto_respuesta = response.text if hasattr(response, 'text') else str(response)
-                    
-                    if texto_respuesta and texto_respuesta.strip():
-                        logger.info(f"✅ Respuesta web reformulada exitosamente con {modelo}")
-                        return texto_respuesta.strip()
-                    
-            except Exception as e:
-                logger.warning(f"⚠️ Error con modelo {modelo}: {e}")
-                continue
-        
-        # Si ningún modelo funcionó, devolver respuesta original
-        logger.warning("⚠️ Ningún modelo funcionó - Usando respuesta original")
-        return respuesta_bd
-            
-    except Exception as e:
-        logger.error(f"❌ Error procesando con IA: {e}")
-        return respuesta_bd
+    return RespuestaPendienteIA(prompt, respuesta_bd, armar)
 
-def procesar_pregunta_desconocida_con_ia_web(mensaje_usuario, historial_conversacion):
-    """
-    Procesa preguntas desconocidas con IA para el chat web
-    ADAPTADO DEL CÓDIGO FUNCIONAL DE views.py
-    """
-    logger.info("🤖 Procesando pregunta desconocida web con IA...")
-    
-    # Respuesta por defecto
-    respuesta_default = "Lo siento, no tengo información específica sobre eso. ¿Podrías reformular tu pregunta o consultar sobre nuestros servicios principales?"
-    
-    if not GEMINI_API_KEY:
-        return respuesta_default
-    
-    try:
-        import google.generativeai as genai
-    except ImportError:
-        return respuesta_default
-    
-    try:
-        client = genai.Client(api_key=GEMINI_API_KEY)
-        
-        MODELOS_DISPONIBLES = [
-            "models/gemini-2.0-flash-exp",
-            "models/gemini-1.5-flash",
-            "models/gemini-1.5-pro",
-        ]
-        
-        # Construir contexto
-        historial_context = ""
-        for msg in historial_conversacion[-4:]:
-            role = 'Cliente' if msg.get('remitente') == 'cliente' else 'Pratsy'
-            historial_context += f"{role}: {msg.get('contenido', '')}\n"
-        
-        prompt = f"""
+def preparar_pregunta_desconocida_con_ia_web(mensaje_usuario, historial_conversacion, armar=None):
+    """Arma el prompt empático para una pregunta desconocida del chat web."""
+    logger.info("🤖 Preparando pregunta desconocida web para la IA...")
+
+    if not llm.disponible():
+        return RespuestaPendienteIA(None, RESPUESTA_DESCONOCIDA_WEB, armar)
+
+    prompt = f"""
 Eres Pratsy, un asistente virtual amigable de un motel. Un cliente te hizo una pregunta por chat web que no está en tu base de conocimiento.
 
 CONTEXTO DE LA CONVERSACIÓN:
-{historial_context}
+{_contexto_historial_web(historial_conversacion)}
 
 PREGUNTA DEL CLIENTE: {mensaje_usuario}
 
@@ -187,37 +93,44 @@ INSTRUCCIONES:
 
 Responde de manera empática:
 """
-        
-        for modelo in MODELOS_DISPONIBLES:
-            try:
-                response = client.models.generate_content(
-                    model=modelo,
-                    contents=prompt,
-                    config={
-                        "max_output_tokens": 500,
-                        "temperature": 0.7,
-                    }
-                )
-                
-                if response:
-                    texto_respuesta = response.text if hasattr(response, 'text') else str(response)
-                    if texto_respuesta and texto_respuesta.strip():
-                        return texto_respuesta.strip()
-                        
-            except Exception as e:
-                logger.warning(f"⚠️ Error con modelo {modelo}: {e}")
-                continue
-        
-        return respuesta_default
-            
+    return RespuestaPendienteIA(prompt, RESPUESTA_DESCONOCIDA_WEB, armar)
+
+def procesar_respuesta_con_ia_web(respuesta_bd, mensaje_usuario, historial_conversacion):
+    """
+    Procesa la respuesta de la BD a través de la IA para hacerla más amigable
+    ADAPTADO DEL CÓDIGO FUNCIONAL DE views.py
+    """
+    try:
+        return preparar_respuesta_con_ia_web(respuesta_bd, mensaje_usuario, historial_conversacion).completar()
+    except Exception as e:
+        logger.error(f"❌ Error procesando con IA: {e}")
+        return respuesta_bd
+
+def procesar_pregunta_desconocida_con_ia_web(mensaje_usuario, historial_conversacion):
+    """
+    Procesa preguntas desconocidas con IA para el chat web
+    ADAPTADO DEL CÓDIGO FUNCIONAL DE views.py
+    """
+    try:
+        return preparar_pregunta_desconocida_con_ia_web(mensaje_usuario, historial_conversacion).completar()
     except Exception as e:
         logger.error(f"❌ Error procesando pregunta desconocida: {e}")
-        return respuesta_default
+        return RESPUESTA_DESCONOCIDA_WEB
 
 # --- CEREBRO DEL BOT PARA WEB ---
 def obtener_respuesta_agente_web(mensaje_usuario, session_id, historial_conversacion):
     """
-    Cerebro del bot adaptado para chat web
+    Cerebro del bot adaptado para chat web (versión síncrona)
+    """
+    resultado = resolver_respuesta_agente_web(mensaje_usuario, session_id, historial_conversacion)
+    if isinstance(resultado, RespuestaPendienteIA):
+        return resultado.completar()
+    return resultado
+
+def resolver_respuesta_agente_web(mensaje_usuario, session_id, historial_conversacion):
+    """
+    Cerebro del bot adaptado para chat web.
+    Devuelve el dict de respuesta o una RespuestaPendienteIA si falta pasar por la IA.
     """
     logger.info(f"\n--- PROCESAMIENTO CEREBRO WEB ---")
     logger.info(f"💬 Mensaje: '{mensaje_usuario}' | Sesión: {session_id}")
@@ -230,40 +143,24 @@ def obtener_respuesta_agente_web(mensaje_usuario, session_id, historial_conversa
     if palabras.intersection(PALABRAS_DE_SALUDO) and len(historial_conversacion) <= 1:
         logger.info("👋 Detectado saludo inicial web")
         
-        saludo_configurado = PreguntaFrecuente.objects.filter(
-            es_saludo_inicial=True, 
-            activo=True
-        ).first()
+        # Saludo y botones desde el menú en caché (el mismo que usa WhatsApp)
+        menu = menu_faq.obtener_menu()
+        saludo_configurado = menu["saludo"]
         
         if saludo_configurado:
-            respuesta_amigable = procesar_respuesta_con_ia_web(
-                saludo_configurado.respuesta, 
-                mensaje_usuario, 
-                historial_conversacion
-            )
-            
-            # Obtener botones de preguntas frecuentes
-            preguntas_menu = PreguntaFrecuente.objects.filter(
-                activo=True
-            ).exclude(
-                es_saludo_inicial=True
-            ).order_by('pregunta_frecuenta_id')[:5]
+            botones = menu_faq.botones_web(5, menu)
             
-            botones = []
-            for p in preguntas_menu:
-                if p.pregunta_corta_boton:
-                    botones.append({
-                        'id': f'faq_{p.pregunta_frecuenta_id}',
-                        'texto': p.pregunta_corta_boton,
-                        'pregunta_completa': p.pregunta_larga
-                    })
-            
-            return {
-                'respuesta': respuesta_amigable,
-                'tipo': 'saludo',
-                'botones': botones,
-                'avatar_habla': True
-            }
+            return preparar_respuesta_con_ia_web(
+                saludo_configurado,
+                mensaje_usuario,
+                historial_conversacion,
+                armar=lambda respuesta_amigable: {
+                    'respuesta': respuesta_amigable,
+                    'tipo': 'saludo',
+                    'botones': botones,
+                    'avatar_habla': True
+                }
+            )
 
     # 2. BÚSQUEDA EN BASE DE DATOS
     logger.info("🧠 Buscando en BD...")
@@ -283,17 +180,16 @@ def obtener_respuesta_agente_web(mensaje_usuario, session_id, historial_conversa
         if pregunta_coincidente:
             logger.info(f"✅ Encontrada FAQ: {pregunta_coincidente.pregunta_corta_boton}")
             
-            respuesta_amigable = procesar_respuesta_con_ia_web(
+            return preparar_respuesta_con_ia_web(
                 pregunta_coincidente.respuesta,
                 mensaje_usuario,
-                historial_conversacion
+                historial_conversacion,
+                armar=lambda respuesta_amigable: {
+                    'respuesta': respuesta_amigable,
+                    'tipo': 'faq',
+                    'avatar_habla': True
+                }
             )
-            
-            return {
-                'respuesta': respuesta_amigable,
-                'tipo': 'faq',
-                'avatar_habla': True
-            }
 
         # Búsqueda en Tipos de Habitación
         q_habitaciones = Q()
@@ -314,17 +210,16 @@ def obtener_respuesta_agente_web(mensaje_usuario, session_id, historial_conversa
                 f"💰 Precio por noche: ${habitacion_coincidente.precio_por_noche:,.0f} CLP"
             )
             
-            respuesta_amigable = procesar_respuesta_con_ia_web(
+            return preparar_respuesta_con_ia_web(
                 respuesta_habitacion,
                 mensaje_usuario,
-                historial_conversacion
+                historial_conversacion,
+                armar=lambda respuesta_amigable: {
+                    'respuesta': respuesta_amigable,
+                    'tipo': 'habitacion',
+                    'avatar_habla': True
+                }
             )
-            
-            return {
-                'respuesta': respuesta_amigable,
-                'tipo': 'habitacion',
-                'avatar_habla': True
-            }
 
     except Exception as e:
         logger.error(f"❌ Error en búsqueda BD: {e}")
@@ -339,25 +234,32 @@ def obtener_respuesta_agente_web(mensaje_usuario, session_id, historial_conversa
             defaults={'nombre_cliente': f'Cliente Web {session_id}'}
         )
         
-        # Guardar pregunta desconocida
-        if not PreguntaDesconocida.objects.filter(
-            cliente=cliente, 
-            texto_pregunta=mensaje_usuario
-        ).exists():
-            PreguntaDesconocida.objects.create(
-                texto_pregunta=mensaje_usuario, 
-                cliente=cliente
-            )
+        # Guardar pregunta desconocida (por lotes y deduplicada)
+        preguntas_desconocidas.registrar(mensaje_usuario, cliente.cliente_id)
     except Exception as e:
         logger.error(f"❌ Error guardando pregunta desconocida: {e}")
     
-    respuesta_desconocida = procesar_pregunta_desconocida_con_ia_web(mensaje_usuario, historial_conversacion)
-    
-    return {
-        'respuesta': respuesta_desconocida,
-        'tipo': 'desconocida',
-        'avatar_habla': True
-    }
+    return preparar_pregunta_desconocida_con_ia_web(
+        mensaje_usuario,
+        historial_conversacion,
+        armar=lambda respuesta_desconocida: {
+            'respuesta': respuesta_desconocida,
+            'tipo': 'desconocida',
+            'avatar_habla': True
+        }
+    )
+
+# --- HISTORIAL DE LA SESIÓN WEB ---
+def cargar_historial_web(session_id):
+    """
+    Devuelve (conversacion_id, historial) de la sesión web, desde la caché de sesión.
+    Si el cliente web todavía no existe, la conversación es None y el historial vacío.
+    """
+    return historial_web.obtener_historial(session_id)
+
+def guardar_turno_web(session_id, conversacion_id, mensaje, respuesta):
+    """Agrega el turno al historial en caché y encola los dos Mensaje para guardarlos en lote."""
+    historial_web.registrar_turno(session_id, conversacion_id, mensaje, respuesta)
 
 # --- VISTA API PARA CHAT WEB ---
 @method_decorator(csrf_exempt, name='dispatch')
@@ -374,47 +276,13 @@ class WebChatView(View):
                 }, status=400)
             
             # Obtener historial de la sesión (simulado con últimos mensajes de BD)
-            try:
-                cliente = Cliente.objects.get(telefono=f"web_{session_id}")
-                conversacion, _ = Conversacion.objects.get_or_create(
-                    cliente=cliente,
-                    activo=True
-                )
-                
-                # Obtener historial reciente
-                mensajes_recientes = Mensaje.objects.filter(
-                    conversacion=conversacion
-                ).order_by('-timestamp')[:10]
-                
-                historial = []
-                for msg in reversed(mensajes_recientes):
-                    historial.append({
-                        'remitente': msg.remitente,
-                        'contenido': msg.contenido,
-                        'timestamp': msg.timestamp.isoformat()
-                    })
-            except Cliente.DoesNotExist:
-                historial = []
-                conversacion = None
+            conversacion_id, historial = cargar_historial_web(session_id)
             
             # Procesar mensaje con el cerebro del bot
             resultado = obtener_respuesta_agente_web(mensaje, session_id, historial)
             
             # Guardar mensajes en BD si hay conversación activa
-            if conversacion:
-                # Guardar mensaje del cliente
-                Mensaje.objects.create(
-                    conversacion=conversacion,
-                    remitente='cliente',
-                    contenido=mensaje
-                )
-                
-                # Guardar respuesta del agente
-                Mensaje.objects.create(
-                    conversacion=conversacion,
-                    remitente='agente',
-                    contenido=resultado['respuesta']
-                )
+            guardar_turno_web(session_id, conversacion_id, mensaje, resultado['respuesta'])
             
             logger.info(f"✅ Respuesta web generada para sesión {session_id}")
             
@@ -433,29 +301,180 @@ class WebChatView(View):
                 'error': 'Error interno del servidor'
             }, status=500)
 
+# --- STREAMING (SERVER-SENT EVENTS) PARA CHAT WEB ---
+def evento_sse(evento, datos):
+    """Formatea un evento Server-Sent Events con datos JSON."""
+    return f"event: {evento}\ndata: {json.dumps(datos, ensure_ascii=False)}\n\n"
+
+def respuesta_sse(eventos):
+    """StreamingHttpResponse para SSE sin buffering en proxies."""
+    response = StreamingHttpResponse(eventos, content_type='text/event-stream; charset=utf-8')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx / Render: no acumular el stream
+    return response
+
+def eventos_chat_web(mensaje, session_id):
+    """
+    Genera los eventos SSE de una respuesta del chat web:
+    ``delta`` por cada fragmento de texto y ``fin`` con el resultado completo (botones incluidos).
+    """
+    # Comentario inicial: obliga a enviar los headers de inmediato
+    yield ": inicio\n\n"
+    try:
+        conversacion_id, historial = cargar_historial_web(session_id)
+        resultado = resolver_respuesta_agente_web(mensaje, session_id, historial)
+
+        if isinstance(resultado, RespuestaPendienteIA):
+            fragmentos = []
+            for fragmento in resultado.stream():
+                fragmentos.append(fragmento)
+                yield evento_sse('delta', {'texto': fragmento})
+            resultado = resultado.armar(''.join(fragmentos).strip())
+        else:
+            yield evento_sse('delta', {'texto': resultado['respuesta']})
+
+        guardar_turno_web(session_id, conversacion_id, mensaje, resultado['respuesta'])
+        logger.info(f"✅ Respuesta web (stream) generada para sesión {session_id}")
+        yield evento_sse('fin', resultado)
+
+    except Exception as e:
+        logger.error(f"💥 Error en chat web (stream): {e}")
+        yield evento_sse('error', {'error': 'Error interno del servidor'})
+
+@method_decorator(csrf_exempt, name='dispatch')
+class WebChatStreamView(View):
+    """
+    Igual que WebChatView, pero entrega la respuesta como Server-Sent Events.
+
+    Servida por ASGI (config/asgi.py) usa el generador async: Django junta un
+    iterador síncrono completo en una lista antes de enviarlo, y el stream llegaría
+    de una sola vez al final.
+    """
+    def post(self, request):
+        try:
+            data = json.loads(request.body)
+        except json.JSONDecodeError:
+            return JsonResponse({'error': 'JSON inválido'}, status=400)
+
+        mensaje = data.get('mensaje', '').strip()
+        session_id = data.get('session_id', 'anonymous')
+        if not mensaje:
+            return JsonResponse({'error': 'Mensaje vacío'}, status=400)
+
+        if isinstance(request, ASGIRequest):
+            from .views_async import aeventos_chat_web  # views_async importa este módulo
+
+            return respuesta_sse(aeventos_chat_web(mensaje, session_id))
+        return respuesta_sse(eventos_chat_web(mensaje, session_id))
+
+# --- CACHÉ HTTP (PREGUNTAS FRECUENTES Y PÁGINA DEL CHAT) ---
+def _cabeceras_cache(respuesta, etag, ultima_modificacion=None):
+    """
+    ETag/Last-Modified y ``Cache-Control: no-cache``: el navegador guarda la respuesta
+    pero la revalida en cada visita, que cuesta un 304 sin cuerpo.
+    """
+    respuesta['ETag'] = etag
+    if ultima_modificacion:
+        respuesta['Last-Modified'] = http_date(ultima_modificacion)
+    patch_cache_control(respuesta, public=True, no_cache=True)
+    return respuesta
+
+
+class PaginaPrecomprimida:
+    """HTML ya renderizado, con sus variantes gzip (y brotli si está instalado) y ETag."""
+
+    def __init__(self, contenido, ultima_modificacion):
+        self.ultima_modificacion = ultima_modificacion
+        huella = hashlib.sha256(contenido).hexdigest()[:20]
+        self.variantes = {'identity': (contenido, f'"{huella}"')}
+        self.variantes['gzip'] = (gzip.compress(contenido, compresslevel=9, mtime=0), f'"{huella}-gz"')
+        brotli = _modulo_brotli()
+        if brotli is not None:
+            self.variantes['br'] = (brotli.compress(contenido, quality=11), f'"{huella}-br"')
+
+    def variante(self, accept_encoding):
+        """Devuelve (codificación, bytes, etag) según lo que acepta el cliente (br > gzip > sin comprimir)."""
+        for codificacion in ('br', 'gzip'):
+            if codificacion in self.variantes and _acepta_codificacion(accept_encoding, codificacion):
+                return (codificacion, *self.variantes[codificacion])
+        return ('identity', *self.variantes['identity'])
+
+
+def _modulo_brotli():
+    try:
+        import brotli
+        return brotli
+    except ImportError:
+        return None
+
+
+def _acepta_codificacion(accept_encoding, codificacion):
+    for parte in accept_encoding.split(','):
+        nombre, _, parametros = parte.strip().partition(';')
+        if nombre.strip() == codificacion:
+            return parametros.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000')
+    return False
+
+
+PLANTILLA_CHAT = 'chat/avatar-chat-page.html'
+_pagina_chat = None
+
+
+def _pagina_chat_precomprimida():
+    """La plantilla del chat es estática: se renderiza y comprime una vez por proceso (siempre en DEBUG)."""
+    global _pagina_chat
+    if _pagina_chat is None or settings.DEBUG:
+        plantilla = get_template(PLANTILLA_CHAT)
+        contenido = plantilla.render().encode('utf-8')
+        ultima_modificacion = int(os.path.getmtime(plantilla.origin.name))
+        _pagina_chat = PaginaPrecomprimida(contenido, ultima_modificacion)
+        logger.info(f"📄 Página del chat precomprimida: {', '.join(_pagina_chat.variantes)}")
+    return _pagina_chat
+
+
+def chat_view(request):
+    """Página del chat con avatar: bytes precomprimidos y 304 si el navegador ya la tiene."""
+    pagina = _pagina_chat_precomprimida()
+    codificacion, contenido, etag = pagina.variante(request.headers.get('Accept-Encoding', ''))
+
+    respuesta = get_conditional_response(request, etag=etag, last_modified=pagina.ultima_modificacion)
+    if respuesta is None:
+        respuesta = HttpResponse(contenido, content_type='text/html; charset=utf-8')
+        if codificacion != 'identity':
+            respuesta['Content-Encoding'] = codificacion
+        respuesta['Content-Length'] = str(len(contenido))
+    patch_vary_headers(respuesta, ('Accept-Encoding',))
+    return _cabeceras_cache(respuesta, etag, pagina.ultima_modificacion)
+
+
 # --- VISTA PARA OBTENER PREGUNTAS FRECUENTES ---
 class PreguntasFrecuentesView(View):
+    """Preguntas del menú en caché; responde 304 si el cliente ya tiene la versión actual (ETag)."""
     def get(self, request):
         try:
-            preguntas = PreguntaFrecuente.objects.filter(
-                activo=True
-            ).exclude(
-                es_saludo_inicial=True
-            ).order_by('pregunta_frecuenta_id')[:10]
-            
-            datos = []
-            for p in preguntas:
-                datos.append({
-                    'id': p.pregunta_frecuenta_id,
-                    'pregunta_corta': p.pregunta_corta_boton,
-                    'pregunta_larga': p.pregunta_larga,
-                    'respuesta': p.respuesta
-                })
+            menu = menu_faq.obtener_menu()
+            etag = menu_faq.etag_menu(menu)
+            no_modificado = get_conditional_response(
+                request, etag=etag, last_modified=menu['ultima_modificacion']
+            )
+            if no_modificado is not None:
+                return _cabeceras_cache(no_modificado, etag, menu['ultima_modificacion'])
+
+            datos = [
+                {
+                    'id': p['id'],
+                    'pregunta_corta': p['pregunta_corta'],
+                    'pregunta_larga': p['pregunta_larga'],
+                    'respuesta': p['respuesta']
+                }
+                for p in menu['preguntas']
+            ]
             
-            return JsonResponse({
+            respuesta = JsonResponse({
                 'success': True,
                 'preguntas': datos
             })
+            return _cabeceras_cache(respuesta, etag, menu['ultima_modificacion'])
         except Exception as e:
             logger.error(f"Error obteniendo FAQs: {e}")
             return JsonResponse({
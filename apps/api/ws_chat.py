@@ -0,0 +1,314 @@
+# apps/api/ws_chat.py
+"""
+Canal WebSocket del chat web con avatar, servido por la misma app ASGI.
+
+Protocolo (frames de texto JSON):
+
+Cliente -> servidor
+    {"tipo": "mensaje", "mensaje": "hola"}
+    {"tipo": "ping"}
+
+Servidor -> cliente (todos con "seq" creciente por sesión, salvo "pong")
+    {"seq": 1, "tipo": "bienvenida", "session_id": "...", "token": "..."}
+    {"seq": 2, "tipo": "delta", "texto": "¡Hola"}
+    {"seq": 3, "tipo": "respuesta", "data": {...mismo dict que /api/web-chat/...}}
+    {"seq": 4, "tipo": "aviso", "texto": "..."}          (mensajes iniciados por el servidor)
+    {"tipo": "resincronizar"}                             (se perdieron frames: recargar)
+
+Sesiones: el servidor elige el ``session_id`` (aleatorio, ``secrets``) y lo entrega
+firmado como ``token`` en la bienvenida; el cliente nunca propone su id.
+Reconexión: ``/ws/chat/?token=<token>&desde=<último seq recibido>``; el servidor
+reenvía los frames guardados con seq mayor. Un token ausente o con firma inválida
+abre una sesión nueva, sin reenvío.
+
+La sesión queda en memoria recién con su primer mensaje (una conexión que solo
+recibe la bienvenida no ocupa nada al cerrarse), y como mucho MAXIMO_SESIONES:
+al pasarse se descartan las menos usadas que no tengan conexiones abiertas.
+
+El handshake se rechaza (403) si el header Origin no corresponde a ALLOWED_HOSTS
+ni a CSRF_TRUSTED_ORIGINS: otra página no puede abrir el canal con el navegador
+del visitante.
+
+El estado de la sesión (conversación e historial) vive en memoria del proceso,
+por lo que cada turno no vuelve a consultar el historial en la BD. Con varios
+procesos, el balanceador debe mantener afinidad por sesión.
+"""
+import asyncio
+import json
+import logging
+import secrets
+import time
+from collections import OrderedDict, deque
+from urllib.parse import parse_qs, urlsplit
+
+from django.conf import settings
+from django.core import signing
+from django.http.request import split_domain_port, validate_host
+from django.utils.http import is_same_domain
+
+from . import views_web_chat
+from .llm import RespuestaPendienteIA
+from .views_async import en_hilo_propio
+
+logger = logging.getLogger(__name__)
+
+RUTA_WEBSOCKET = "/ws/chat/"
+
+# Frames que se guardan por sesión para reenviar tras una reconexión
+FRAMES_REENVIO = 100
+# Mensajes del historial que se mantienen en memoria (los mismos que carga la vista HTTP)
+MAXIMO_HISTORIAL = 10
+# Sesiones sin conexiones y sin actividad se descartan pasado este tiempo
+SEGUNDOS_EXPIRACION_SESION = 30 * 60
+# Sesiones en memoria por proceso (LRU)
+MAXIMO_SESIONES = 5000
+
+# 16 caracteres: "web_<session_id>" cabe en Cliente.telefono (max_length=20)
+_BYTES_SESSION_ID = 12
+_firmador = signing.Signer(salt="apps.api.ws_chat.sesion")
+
+
+def nuevo_session_id():
+    return secrets.token_urlsafe(_BYTES_SESSION_ID)
+
+
+def token_de(session_id):
+    return _firmador.sign(session_id)
+
+
+def session_id_de(token):
+    """session_id del token firmado por este servidor, o None si no es válido."""
+    try:
+        return _firmador.unsign(token)
+    except signing.BadSignature:
+        return None
+
+
+def origen_permitido(scope):
+    """True si el header Origin del handshake es un host de ALLOWED_HOSTS o un origen de CSRF_TRUSTED_ORIGINS."""
+    origen = dict(scope.get("headers") or []).get(b"origin", b"").decode("latin-1")
+    if not origen:
+        return False
+    partes = urlsplit(origen)
+    for confiable in settings.CSRF_TRUSTED_ORIGINS:
+        if origen == confiable:
+            return True
+        if "*" in confiable:
+            esperado = urlsplit(confiable)
+            # Como CsrfViewMiddleware: "https://*.ejemplo.cl" -> subdominios de ".ejemplo.cl"
+            if esperado.scheme == partes.scheme and is_same_domain(partes.netloc, esperado.netloc.lstrip("*")):
+                return True
+    dominio, _ = split_domain_port(partes.netloc)
+    hosts = settings.ALLOWED_HOSTS
+    if settings.DEBUG and not hosts:
+        # Igual que HttpRequest.get_host() en desarrollo
+        hosts = ['.localhost', '127.0.0.1', '[::1]']
+    return bool(dominio) and validate_host(dominio, hosts)
+
+
+class SesionChat:
+    """Estado en memoria de una sesión del chat web."""
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.conversacion_id = None
+        self.historial = []
+        self.historial_cargado = False
+        self.seq = 0
+        self.frames = deque(maxlen=FRAMES_REENVIO)
+        self.conexiones = set()
+        self.lock_turno = asyncio.Lock()
+        self.ultima_actividad = time.monotonic()
+
+    async def cargar_historial(self):
+        """Carga conversación e historial desde la BD (solo al crear la sesión)."""
+        self.conversacion_id, self.historial = await en_hilo_propio(views_web_chat.cargar_historial_web)(
+            self.session_id
+        )
+        self.historial_cargado = True
+
+    def agregar_al_historial(self, remitente, contenido):
+        self.historial.append({'remitente': remitente, 'contenido': contenido})
+        del self.historial[:-MAXIMO_HISTORIAL]
+
+    async def enviar(self, tipo, **datos):
+        """Numera el frame, lo guarda para reenvío y lo envía a todas las conexiones de la sesión."""
+        self.seq += 1
+        frame = json.dumps({"seq": self.seq, "tipo": tipo, **datos}, ensure_ascii=False)
+        self.frames.append((self.seq, frame))
+        self.ultima_actividad = time.monotonic()
+        for enviar in list(self.conexiones):
+            try:
+                await enviar({"type": "websocket.send", "text": frame})
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudo enviar frame {self.seq} a la sesión {self.session_id}: {e}")
+                self.conexiones.discard(enviar)
+
+    async def reenviar_desde(self, enviar, desde):
+        """Reenvía los frames posteriores a ``desde``. Devuelve False si hay un hueco."""
+        if self.frames and self.frames[0][0] > desde + 1:
+            return False
+        for seq, frame in self.frames:
+            if seq > desde:
+                await enviar({"type": "websocket.send", "text": frame})
+        return True
+
+
+# session_id -> SesionChat, de la usada hace más tiempo a la más reciente
+_sesiones = OrderedDict()
+
+
+def _limpiar_sesiones():
+    """Descarta las sesiones expiradas y, sobre MAXIMO_SESIONES, las menos usadas (sin conexiones)."""
+    limite = time.monotonic() - SEGUNDOS_EXPIRACION_SESION
+    sobrantes = len(_sesiones) - MAXIMO_SESIONES
+    for session_id, sesion in list(_sesiones.items()):
+        if sesion.conexiones:
+            continue
+        if sobrantes > 0 or sesion.ultima_actividad < limite:
+            del _sesiones[session_id]
+            sobrantes -= 1
+
+
+def obtener_sesion(token=None):
+    """
+    Sesión en memoria del token, o una sesión nueva todavía sin registrar (con el
+    id del token si la firma es válida, si no uno elegido por el servidor).
+    Devuelve (sesion, nueva).
+    """
+    session_id = session_id_de(token) if token else None
+    sesion = _sesiones.get(session_id) if session_id else None
+    if sesion is not None:
+        _sesiones.move_to_end(session_id)
+        return sesion, False
+    return SesionChat(session_id or nuevo_session_id()), True
+
+
+def registrar_sesion(sesion):
+    """
+    Guarda la sesión en memoria (reenvío tras reconectar, enviar_a_sesion) y la marca
+    como la más reciente. Si otra conexión ya registró el mismo id, devuelve esa.
+    """
+    registrada = _sesiones.get(sesion.session_id)
+    if registrada is None:
+        registrada = _sesiones[sesion.session_id] = sesion
+        _limpiar_sesiones()
+    elif registrada is not sesion:
+        registrada.conexiones |= sesion.conexiones
+    _sesiones.move_to_end(registrada.session_id)
+    return registrada
+
+
+async def enviar_a_sesion(session_id, texto, **extra):
+    """
+    Empuja un mensaje iniciado por el servidor a una sesión del chat web.
+    Devuelve False si la sesión no existe en este proceso.
+    """
+    sesion = _sesiones.get(session_id)
+    if sesion is None:
+        return False
+    await sesion.enviar("aviso", texto=texto, **extra)
+    return True
+
+
+async def procesar_turno(sesion, mensaje):
+    """Un turno del chat: mismo cerebro que /api/web-chat/, con el historial en memoria."""
+    async with sesion.lock_turno:
+        if not sesion.historial_cargado:
+            await sesion.cargar_historial()
+
+        try:
+            resultado = await en_hilo_propio(views_web_chat.resolver_respuesta_agente_web)(
+                mensaje, sesion.session_id, list(sesion.historial)
+            )
+
+            if isinstance(resultado, RespuestaPendienteIA):
+                fragmentos = []
+                async for fragmento in resultado.astream():
+                    fragmentos.append(fragmento)
+                    await sesion.enviar("delta", texto=fragmento)
+                resultado = resultado.armar(''.join(fragmentos).strip())
+
+            await en_hilo_propio(views_web_chat.guardar_turno_web)(
+                sesion.session_id, sesion.conversacion_id, mensaje, resultado['respuesta']
+            )
+            sesion.agregar_al_historial('cliente', mensaje)
+            sesion.agregar_al_historial('agente', resultado['respuesta'])
+
+            # El cliente web se crea recién con su primera pregunta desconocida
+            if sesion.conversacion_id is None:
+                await sesion.cargar_historial()
+
+            await sesion.enviar("respuesta", data=resultado)
+            logger.info(f"✅ Respuesta web (websocket) generada para sesión {sesion.session_id}")
+
+        except Exception as e:
+            logger.error(f"💥 Error en chat web (websocket): {e}")
+            await sesion.enviar("error", error="Error interno del servidor")
+
+
+async def aplicacion_websocket(scope, receive, send):
+    """Aplicación ASGI para conexiones ``websocket`` (ver config/asgi.py)."""
+    if scope["path"] != RUTA_WEBSOCKET:
+        await send({"type": "websocket.close", "code": 4404})
+        return
+
+    parametros = parse_qs(scope.get("query_string", b"").decode())
+    token = (parametros.get("token") or [""])[0][:200]
+    try:
+        desde = int((parametros.get("desde") or ["0"])[0])
+    except ValueError:
+        desde = 0
+
+    evento = await receive()
+    if evento["type"] != "websocket.connect":
+        return
+    if not origen_permitido(scope):
+        logger.warning("🚫 WebSocket rechazado: Origin no permitido")
+        # Cerrar antes de aceptar responde 403 al handshake
+        await send({"type": "websocket.close", "code": 4403})
+        return
+    await send({"type": "websocket.accept"})
+
+    sesion, nueva = obtener_sesion(token)
+    session_id = sesion.session_id
+    sesion.conexiones.add(send)
+    logger.info(f"🔌 WebSocket conectado: sesión {session_id} (desde seq {desde})")
+
+    tareas = set()
+    try:
+        if desde and not nueva:
+            if not await sesion.reenviar_desde(send, desde):
+                await send({"type": "websocket.send", "text": json.dumps({"tipo": "resincronizar"})})
+        else:
+            await sesion.enviar("bienvenida", session_id=session_id, token=token_de(session_id))
+
+        while True:
+            evento = await receive()
+            if evento["type"] == "websocket.disconnect":
+                break
+            if evento["type"] != "websocket.receive":
+                continue
+
+            try:
+                datos = json.loads(evento.get("text") or evento.get("bytes") or b"")
+            except (json.JSONDecodeError, TypeError):
+                await send({"type": "websocket.send", "text": json.dumps({"tipo": "error", "error": "JSON inválido"})})
+                continue
+
+            tipo = datos.get("tipo")
+            if tipo == "ping":
+                await send({"type": "websocket.send", "text": json.dumps({"tipo": "pong"})})
+            elif tipo == "mensaje":
+                mensaje = str(datos.get("mensaje", "")).strip()
+                if not mensaje:
+                    continue
+                sesion = registrar_sesion(sesion)
+                sesion.ultima_actividad = time.monotonic()
+                # En segundo plano: se siguen recibiendo pings mientras la IA responde
+                tarea = asyncio.create_task(procesar_turno(sesion, mensaje))
+                tareas.add(tarea)
+                tarea.add_done_callback(tareas.discard)
+    finally:
+        sesion.conexiones.discard(send)
+        logger.info(f"🔌 WebSocket desconectado: sesión {session_id}")
@@ -2,42 +2,17 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
-from django.utils import timezone
 from .models import ReservaWhatsApp, FuncionarioHotel, ProcesoReserva, Habitacion, EstadoConversacion
-from apps.api.models import Reserva
+from apps.api.admin_rendimiento import AdminTablaGrande
 
 # ELIMINAR TODAS LAS VERIFICACIONES DE SISTEMA - CAUSAN CONFLICTOS
 
-@admin.action(description='Marcar como llegada confirmada')
-def confirmar_llegada(modeladmin, request, queryset):
-    """Acción para confirmar llegada de múltiples reservas"""
-    count = queryset.filter(
-        estado__in=['pendiente', 'confirmada']
-    ).update(
-        estado='llegada_confirmada',
-        fecha_hora_llegada=timezone.now()
-    )
-    modeladmin.message_user(request, f"{count} reservas marcadas como llegada confirmada.")
-
-@admin.action(description='Marcar como completadas')
-def completar_reservas(modeladmin, request, queryset):
-    """Acción para completar múltiples reservas"""
-    count = queryset.filter(
-        estado__in=['llegada_confirmada', 'en_proceso']
-    ).update(estado='completada')
-    modeladmin.message_user(request, f"{count} reservas marcadas como completadas.")
-
-@admin.action(description='Cancelar reservas seleccionadas')
-def cancelar_reservas(modeladmin, request, queryset):
-    """Acción para cancelar múltiples reservas"""
-    count = queryset.filter(
-        estado__in=['pendiente', 'confirmada']
-    ).update(estado='cancelada')
-    modeladmin.message_user(request, f"{count} reservas canceladas.")
-
 @admin.register(ReservaWhatsApp)
-class ReservaWhatsAppAdmin(admin.ModelAdmin):
-    """Administración avanzada para reservas de WhatsApp"""
+class ReservaWhatsAppAdmin(AdminTablaGrande):
+    """
+    Histórico de reservas_whatsapp, solo lectura: desde la migración api 0016 las
+    reservas de WhatsApp se guardan en api.Reserva (ReservaAdmin).
+    """
     
     list_display = (
         'reserva_id',
@@ -55,13 +30,15 @@ class ReservaWhatsAppAdmin(admin.ModelAdmin):
         'fecha_creacion',
         'habitacion__nombre_habitacion'
     )
+
+    list_select_related = ('cliente', 'habitacion')
     
     search_fields = (
-        'cliente__telefono',
+        '=cliente__telefono',
         'cliente__nombre_cliente',
         'nombre_contacto',
         'habitacion__nombre_habitacion',
-        'reserva_id'
+        '=reserva_id'
     )
     
     readonly_fields = (
@@ -72,11 +49,11 @@ class ReservaWhatsAppAdmin(admin.ModelAdmin):
         'conversacion_id'
     )
     
-    actions = [confirmar_llegada, completar_reservas, cancelar_reservas]
-    
     date_hierarchy = 'fecha_reserva'
-    
-    ordering = ['-fecha_creacion']
+
+    raw_id_fields = ('cliente',)
+
+    campo_cursor = 'fecha_creacion'
     
     fieldsets = (
         ('Información Básica', {
@@ -125,6 +102,12 @@ class ReservaWhatsAppAdmin(admin.ModelAdmin):
         })
     )
 
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
     def cliente_info(self, obj):
         """Muestra información del cliente"""
         if obj.cliente:
@@ -169,10 +152,6 @@ class ReservaWhatsAppAdmin(admin.ModelAdmin):
         return f"{obj.duracion_horas:.1f} horas"
     duracion_calculada.short_description = "Duración"
 
-    def get_queryset(self, request):
-        """Optimiza las consultas con select_related"""
-        return super().get_queryset(request).select_related('cliente', 'habitacion')
-
 @admin.register(FuncionarioHotel)
 class FuncionarioHotelAdmin(admin.ModelAdmin):
     """Administración para funcionarios del hotel"""
@@ -226,7 +205,7 @@ class FuncionarioHotelAdmin(admin.ModelAdmin):
     permisos_resumen.short_description = "Permisos"
 
 @admin.register(ProcesoReserva)
-class ProcesoReservaAdmin(admin.ModelAdmin):
+class ProcesoReservaAdmin(AdminTablaGrande):
     """Administración para procesos de reserva"""
     
     list_display = (
@@ -244,12 +223,18 @@ class ProcesoReservaAdmin(admin.ModelAdmin):
         'paso_actual',
         'fecha_inicio'
     )
+
+    list_select_related = ('cliente', 'reserva_creada')
     
     search_fields = (
-        'cliente__telefono',
-        'conversacion_id',
-        'proceso_id'
+        '=cliente__telefono',
+        '=conversacion_id',
+        '=proceso_id'
     )
+
+    raw_id_fields = ('cliente', 'reserva_creada')
+
+    campo_cursor = 'fecha_inicio'
     
     readonly_fields = (
         'proceso_id',
@@ -276,7 +261,7 @@ class ProcesoReservaAdmin(admin.ModelAdmin):
     def reserva_asociada(self, obj):
         """Muestra la reserva asociada si existe"""
         if obj.reserva_creada:
-            url = reverse('admin:reservas_reservawhatsapp_change', args=[obj.reserva_creada.pk])
+            url = reverse('admin:api_reserva_change', args=[obj.reserva_creada.pk])
             return format_html('<a href="{}">Reserva #{}</a>', url, obj.reserva_creada.reserva_id)
         return "Sin reserva"
     reserva_asociada.short_description = "Reserva"
@@ -288,20 +273,12 @@ class HabitacionAdmin(admin.ModelAdmin):
     list_filter = ("disponible",)
     search_fields = ("nombre_habitacion", "descripcion")
 
-# Solo registrar Reserva si no está ya registrado en api/admin.py
-# COMENTAR ESTA PARTE SI YA ESTÁ REGISTRADO EN apps/api/admin.py
-"""
-@admin.register(Reserva)
-class ReservaAdmin(admin.ModelAdmin):
-    list_display = ("reserva_id", "cliente", "habitacion", "fecha", "fecha_hora_inicio", "fecha_hora_fin", "estado", "fecha_creacion")
-    list_filter = ("estado", "fecha")
-    search_fields = ("habitacion__nombre_habitacion", "cliente__nombre_cliente", "cliente__telefono")
-    date_hierarchy = "fecha"
-"""
+# Reserva (apps.api) se registra en apps/api/admin.py (ReservaAdmin)
 
 @admin.register(EstadoConversacion)
 class EstadoConversacionAdmin(admin.ModelAdmin):
     list_display = ("estado_conversacion_id", "cliente", "tipo", "paso_actual", "created_at", "updated_at")
+    list_select_related = ("cliente",)
     list_filter = ("tipo", "paso_actual", "created_at", "updated_at")
     search_fields = ("cliente__nombre_cliente", "cliente__telefono", "tipo", "paso_actual")
     readonly_fields = ("created_at", "updated_at", "datos_reserva")
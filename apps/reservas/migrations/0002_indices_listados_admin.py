@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-19 08:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_indices_listados_admin'),
+        ('reservas', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='procesoreserva',
+            index=models.Index(fields=['fecha_inicio', 'proceso_id'], name='procesos_inicio_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservawhatsapp',
+            index=models.Index(fields=['fecha_creacion', 'reserva_id'], name='reservas_wa_creacion_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservawhatsapp',
+            index=models.Index(fields=['estado', 'fecha_reserva'], name='reservas_wa_estado_fecha_idx'),
+        ),
+    ]
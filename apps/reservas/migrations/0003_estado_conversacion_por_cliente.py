@@ -0,0 +1,40 @@
+# Generated by Django 5.2.5 on 2026-10-19 09:07
+# Editada a mano: antes de la restricción única se borran las filas repetidas de
+# cada cliente (una de reserva y otra de funcionario, p. ej.); se conserva la
+# actualizada más recientemente, que es la del flujo en curso.
+
+from django.db import migrations, models
+
+
+def conservar_mas_reciente(apps, schema_editor):
+    EstadoConversacion = apps.get_model('reservas', 'EstadoConversacion')
+    vistos = set()
+    borrar = []
+    for estado_id, cliente_id in (
+        EstadoConversacion.objects.filter(cliente__isnull=False)
+        .order_by('cliente_id', '-updated_at', '-estado_conversacion_id')
+        .values_list('estado_conversacion_id', 'cliente_id')
+        .iterator(chunk_size=2000)
+    ):
+        if cliente_id in vistos:
+            borrar.append(estado_id)
+        vistos.add(cliente_id)
+
+    for i in range(0, len(borrar), 1000):
+        EstadoConversacion.objects.filter(estado_conversacion_id__in=borrar[i:i + 1000]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_reservas_indice_inicio'),
+        ('reservas', '0002_indices_listados_admin'),
+    ]
+
+    operations = [
+        migrations.RunPython(conservar_mas_reciente, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='estadoconversacion',
+            constraint=models.UniqueConstraint(fields=('cliente',), name='estados_conversacion_cliente_unico'),
+        ),
+    ]
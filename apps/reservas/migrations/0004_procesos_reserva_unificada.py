@@ -0,0 +1,62 @@
+# Generated by Django 5.2.5 on 2026-10-19 09:09
+# Editada a mano: reserva_creada pasa de reservas_whatsapp a reservas. Los ids no
+# coinciden, así que se agrega la columna nueva, se llena con la copia de cada
+# reserva (api 0016: Reserva.reserva_whatsapp) y después reemplaza a la anterior.
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def enlazar_reservas(apps, schema_editor):
+    ProcesoReserva = apps.get_model('reservas', 'ProcesoReserva')
+    Reserva = apps.get_model('api', 'Reserva')
+    copias = dict(
+        Reserva.objects.filter(reserva_whatsapp__isnull=False).values_list('reserva_whatsapp_id', 'reserva_id')
+    )
+    procesos = list(ProcesoReserva.objects.filter(reserva_creada__isnull=False).only('proceso_id', 'reserva_creada_id'))
+    for proceso in procesos:
+        proceso.reserva_id = copias.get(proceso.reserva_creada_id)
+    ProcesoReserva.objects.bulk_update(procesos, ['reserva'], batch_size=1000)
+
+
+def enlazar_reservas_whatsapp(apps, schema_editor):
+    ProcesoReserva = apps.get_model('reservas', 'ProcesoReserva')
+    Reserva = apps.get_model('api', 'Reserva')
+    originales = dict(
+        Reserva.objects.filter(reserva_whatsapp__isnull=False).values_list('reserva_id', 'reserva_whatsapp_id')
+    )
+    procesos = list(ProcesoReserva.objects.filter(reserva__isnull=False).only('proceso_id', 'reserva_id'))
+    for proceso in procesos:
+        proceso.reserva_creada_id = originales.get(proceso.reserva_id)
+    ProcesoReserva.objects.bulk_update(procesos, ['reserva_creada'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_reservas_unificadas'),
+        ('reservas', '0003_estado_conversacion_por_cliente'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='procesoreserva',
+            name='reserva',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.reserva'),
+        ),
+        migrations.RunPython(enlazar_reservas, enlazar_reservas_whatsapp),
+        migrations.RemoveField(
+            model_name='procesoreserva',
+            name='reserva_creada',
+        ),
+        migrations.RenameField(
+            model_name='procesoreserva',
+            old_name='reserva',
+            new_name='reserva_creada',
+        ),
+        migrations.AlterField(
+            model_name='procesoreserva',
+            name='reserva_creada',
+            field=models.ForeignKey(blank=True, help_text='Reserva creada al completar el proceso', null=True, on_delete=django.db.models.deletion.SET_NULL, to='api.reserva'),
+        ),
+    ]
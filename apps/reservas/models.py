@@ -141,6 +141,10 @@ class ReservaWhatsApp(models.Model):
         verbose_name = 'Reserva WhatsApp'
         verbose_name_plural = 'Reservas WhatsApp'
         ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['fecha_creacion', 'reserva_id'], name='reservas_wa_creacion_id_idx'),
+            models.Index(fields=['estado', 'fecha_reserva'], name='reservas_wa_estado_fecha_idx'),
+        ]
 
     def __str__(self):
         return f"Reserva {self.reserva_id} - {self.cliente.telefono} - {self.fecha_reserva} {self.hora_inicio}"
@@ -300,7 +304,7 @@ class ProcesoReserva(models.Model):
     
     # Reserva resultante
     reserva_creada = models.ForeignKey(
-        ReservaWhatsApp,
+        'api.Reserva',
         on_delete=models.SET_NULL,
         null=True,
         blank=True,
@@ -321,6 +325,9 @@ class ProcesoReserva(models.Model):
         verbose_name = 'Proceso de Reserva'
         verbose_name_plural = 'Procesos de Reserva'
         ordering = ['-fecha_inicio']
+        indexes = [
+            models.Index(fields=['fecha_inicio', 'proceso_id'], name='procesos_inicio_id_idx'),
+        ]
 
     def __str__(self):
         estado = "Completado" if self.completado else "Cancelado" if self.cancelado else "En Proceso"
@@ -359,4 +366,8 @@ class EstadoConversacion(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
-        db_table = 'estados_conversacion'
\ No newline at end of file
+        db_table = 'estados_conversacion'
+        # Una fila por cliente con el flujo activo (ver apps/api/flujos.py)
+        constraints = [
+            models.UniqueConstraint(fields=['cliente'], name='estados_conversacion_cliente_unico'),
+        ]
\ No newline at end of file
@@ -6,9 +6,10 @@ import json
 import logging
 from datetime import datetime, timedelta, time
 from django.utils import timezone
-from django.db.models import Q
-from .models import ReservaWhatsApp, FuncionarioHotel, ProcesoReserva, EstadoReserva
-from apps.api.models import Habitacion, Cliente, Conversacion
+from .models import FuncionarioHotel, ProcesoReserva, EstadoReserva
+from apps.api.fechas_naturales import interpretar
+from apps.api import disponibilidad, servicio_reservas
+from apps.api.models import Habitacion, Cliente, Conversacion, Reserva
 
 logger = logging.getLogger(__name__)
 
@@ -111,19 +112,8 @@ class ReservaManager:
     def _procesar_fecha(cls, proceso, mensaje_usuario):
         """Procesa la selección de fecha"""
         try:
-            # Intentar parsear la fecha
-            fecha_str = mensaje_usuario.strip()
-            
-            # Formatos aceptados
-            formatos = ['%d/%m/%Y', '%d-%m-%Y', '%d/%m/%y', '%d-%m-%y']
-            fecha_reserva = None
-            
-            for formato in formatos:
-                try:
-                    fecha_reserva = datetime.strptime(fecha_str, formato).date()
-                    break
-                except ValueError:
-                    continue
+            # DD/MM/AAAA, DD-MM-AA, "mañana", "viernes", "25 de diciembre"... (ver fechas_naturales)
+            fecha_reserva = interpretar(mensaje_usuario).fecha
             
             if not fecha_reserva:
                 return {
@@ -179,22 +169,8 @@ class ReservaManager:
     def _procesar_hora_inicio(cls, proceso, mensaje_usuario):
         """Procesa la selección de hora de inicio"""
         try:
-            hora_str = mensaje_usuario.strip()
-            
-            # Intentar parsear la hora
-            formatos_hora = ['%H:%M', '%H.%M', '%H %M', '%H']
-            hora_inicio = None
-            
-            for formato in formatos_hora:
-                try:
-                    if formato == '%H':
-                        # Si solo se proporciona la hora, agregar :00
-                        hora_inicio = datetime.strptime(hora_str + ':00', '%H:%M').time()
-                    else:
-                        hora_inicio = datetime.strptime(hora_str, formato).time()
-                    break
-                except ValueError:
-                    continue
+            # HH:MM, HH.MM, HH MM, un número solo ("20" = 20:00), "22hrs", "10 de la noche"...
+            hora_inicio = interpretar(mensaje_usuario, numero_suelto='hora').hora
             
             if not hora_inicio:
                 return {
@@ -467,8 +443,8 @@ class ReservaManager:
                         "text": {
                             "body": f"🎉 ¡Reserva confirmada exitosamente!\n\n"
                                    f"📋 Número de reserva: #{reserva.reserva_id}\n"
-                                   f"📅 Fecha: {reserva.fecha_reserva.strftime('%d/%m/%Y')}\n"
-                                   f"⏰ Horario: {reserva.hora_inicio.strftime('%H:%M')} - {reserva.hora_fin.strftime('%H:%M')}\n"
+                                   f"📅 Fecha: {timezone.localtime(reserva.fecha_hora_inicio).strftime('%d/%m/%Y')}\n"
+                                   f"⏰ Horario: {timezone.localtime(reserva.fecha_hora_inicio).strftime('%H:%M')} - {timezone.localtime(reserva.fecha_hora_fin).strftime('%H:%M')}\n"
                                    f"🏠 Habitación: {reserva.habitacion.nombre_habitacion}\n"
                                    f"💰 Total: ${reserva.precio_total:,.0f}\n\n"
                                    "Te esperamos en la fecha y hora indicadas. "
@@ -542,21 +518,21 @@ class ReservaManager:
             logger.error(f"Error verificando disponibilidad: {e}")
             return False
     
+    @classmethod
+    def _intervalo(cls, fecha, hora_inicio, hora_fin):
+        """Inicio y fin con zona horaria; un fin menor o igual al inicio es del día siguiente"""
+        inicio = timezone.make_aware(datetime.combine(fecha, hora_inicio))
+        fin = timezone.make_aware(datetime.combine(fecha, hora_fin))
+        if fin <= inicio:
+            fin += timedelta(days=1)
+        return inicio, fin
+    
     @classmethod
     def _verificar_disponibilidad_habitacion_especifica(cls, habitacion, fecha, hora_inicio, hora_fin):
         """Verifica disponibilidad de una habitación específica en fecha y horario dados"""
         try:
-            # Buscar reservas que se solapen con el horario solicitado
-            reservas_solapadas = ReservaWhatsApp.objects.filter(
-                habitacion=habitacion,
-                fecha_reserva=fecha,
-                estado__in=[EstadoReserva.PENDIENTE, EstadoReserva.CONFIRMADA, EstadoReserva.EN_PROCESO],
-                activo=True
-            ).filter(
-                Q(hora_inicio__lt=hora_fin) & Q(hora_fin__gt=hora_inicio)
-            )
-            
-            return not reservas_solapadas.exists()
+            inicio, fin = cls._intervalo(fecha, hora_inicio, hora_fin)
+            return not disponibilidad.hay_conflicto(habitacion.habitacion_id, inicio, fin)
             
         except Exception as e:
             logger.error(f"Error verificando disponibilidad específica: {e}")
@@ -578,23 +554,22 @@ class ReservaManager:
             habitacion = Habitacion.objects.get(habitacion_id=habitacion_id)
             
             # Crear la reserva
-            reserva = ReservaWhatsApp.objects.create(
-                cliente=proceso.cliente,
-                habitacion=habitacion,
-                fecha_reserva=fecha_reserva,
-                hora_inicio=hora_inicio,
-                hora_fin=hora_fin,
-                numero_personas=2,  # Default
+            inicio, _ = cls._intervalo(fecha_reserva, hora_inicio, hora_fin)
+            reserva = servicio_reservas.crear_reserva(
+                proceso.cliente,
+                habitacion,
+                inicio,
+                duracion_horas,
+                'whatsapp',
                 precio_total=precio_total,
-                precio_por_hora=habitacion.precio_por_hora,
-                horas_reservadas=duracion_horas,
-                conversacion_id=proceso.conversacion_id,
-                estado=EstadoReserva.PENDIENTE
             )
             
             logger.info(f"Reserva creada exitosamente: {reserva.reserva_id}")
             return reserva
             
+        except servicio_reservas.HorarioOcupado as e:
+            logger.warning(f"⚠️ {e}")
+            return None
         except Exception as e:
             logger.error(f"Error creando reserva desde proceso: {e}")
             return None
@@ -639,11 +614,11 @@ class FuncionarioManager:
     @classmethod
     def obtener_reservas_pendientes(cls):
         """Obtiene las reservas pendientes de llegada"""
-        return ReservaWhatsApp.objects.filter(
+        hoy = timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+        return Reserva.objects.filter(
             estado__in=[EstadoReserva.PENDIENTE, EstadoReserva.CONFIRMADA],
-            activo=True,
-            fecha_reserva__gte=timezone.now().date()
-        ).select_related('cliente', 'habitacion').order_by('fecha_reserva', 'hora_inicio')
+            fecha_hora_inicio__gte=hoy
+        ).select_related('cliente', 'habitacion').order_by('fecha_hora_inicio')
     
     @classmethod
     def crear_mensaje_reservas_pendientes(cls):
@@ -661,12 +636,13 @@ class FuncionarioManager:
         mensaje = "📋 *RESERVAS PENDIENTES DE LLEGADA*\n\n"
         
         for reserva in reservas[:10]:  # Máximo 10 reservas
-            cliente_nombre = reserva.nombre_contacto or reserva.cliente.nombre_cliente or "Sin nombre"
+            cliente_nombre = (reserva.cliente and reserva.cliente.nombre_cliente) or "Sin nombre"
+            inicio = timezone.localtime(reserva.fecha_hora_inicio)
             mensaje += f"🔹 *Reserva #{reserva.reserva_id}*\n"
             mensaje += f"👤 {cliente_nombre}\n"
-            mensaje += f"📱 {reserva.cliente.telefono}\n"
-            mensaje += f"📅 {reserva.fecha_reserva.strftime('%d/%m/%Y')}\n"
-            mensaje += f"⏰ {reserva.hora_inicio.strftime('%H:%M')} - {reserva.hora_fin.strftime('%H:%M')}\n"
+            mensaje += f"📱 {reserva.telefono}\n"
+            mensaje += f"📅 {inicio.strftime('%d/%m/%Y')}\n"
+            mensaje += f"⏰ {inicio.strftime('%H:%M')} - {timezone.localtime(reserva.fecha_hora_fin).strftime('%H:%M')}\n"
             mensaje += f"🏠 {reserva.habitacion.nombre_habitacion}\n"
             mensaje += f"💰 ${reserva.precio_total:,.0f}\n\n"
         
@@ -712,12 +688,11 @@ class FuncionarioManager:
             
             # Buscar la reserva
             try:
-                reserva = ReservaWhatsApp.objects.get(
+                reserva = Reserva.objects.select_related('cliente', 'habitacion').get(
                     reserva_id=reserva_id,
-                    estado__in=[EstadoReserva.PENDIENTE, EstadoReserva.CONFIRMADA],
-                    activo=True
+                    estado__in=[EstadoReserva.PENDIENTE, EstadoReserva.CONFIRMADA]
                 )
-            except ReservaWhatsApp.DoesNotExist:
+            except Reserva.DoesNotExist:
                 return {
                     "type": "text",
                     "text": {
@@ -726,9 +701,9 @@ class FuncionarioManager:
                 }
             
             # Confirmar llegada
-            reserva.marcar_llegada(funcionario.telefono)
+            servicio_reservas.registrar_llegada(reserva, funcionario.telefono)
             
-            cliente_nombre = reserva.nombre_contacto or reserva.cliente.nombre_cliente or "Sin nombre"
+            cliente_nombre = (reserva.cliente and reserva.cliente.nombre_cliente) or "Sin nombre"
             
             return {
                 "type": "text",
@@ -736,10 +711,10 @@ class FuncionarioManager:
                     "body": f"✅ *LLEGADA CONFIRMADA*\n\n"
                            f"🔹 Reserva #{reserva.reserva_id}\n"
                            f"👤 {cliente_nombre}\n"
-                           f"📱 {reserva.cliente.telefono}\n"
+                           f"📱 {reserva.telefono}\n"
                            f"🏠 {reserva.habitacion.nombre_habitacion}\n"
                            f"💰 ${reserva.precio_total:,.0f}\n\n"
-                           f"⏰ Confirmado: {timezone.now().strftime('%d/%m/%Y %H:%M')}\n"
+                           f"⏰ Confirmado: {timezone.localtime(reserva.fecha_llegada).strftime('%d/%m/%Y %H:%M')}\n"
                            f"👨‍💼 Por: {funcionario.nombre}"
                 }
             }
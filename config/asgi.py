@@ -13,4 +13,15 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django_asgi_app = get_asgi_application()
+
+# Se importa después de inicializar Django (usa modelos y settings)
+from apps.api.ws_chat import aplicacion_websocket  # noqa: E402
+
+
+async def application(scope, receive, send):
+    """HTTP y lifespan van a Django; las conexiones websocket al chat del avatar."""
+    if scope["type"] == "websocket":
+        await aplicacion_websocket(scope, receive, send)
+    else:
+        await django_asgi_app(scope, receive, send)
@@ -46,7 +46,8 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'corsheaders',
-    'apps.api',
+    'rest_framework',
+    'apps.api.apps_api.ApiConfig',
     'apps.reservas',
 ]
 
@@ -79,6 +80,11 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+ASGI_APPLICATION = 'config.asgi.application'
+
+# Usar las vistas async del webhook y del chat web en las rutas principales
+# (requiere servir con ASGI, ej: uvicorn config.asgi:application)
+VISTAS_ASYNC = env.bool('VISTAS_ASYNC', default=False)
 
 # Database
 DATABASES = {
@@ -95,6 +101,73 @@ DATABASES = {
 #     }
 # }
 
+# Caché (historial del chat web). En producción con varios workers usar una
+# caché compartida, ej: CACHE_URL=redis://localhost:6379/1
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
+# Escritura por lotes de los mensajes del chat web (ver apps/api/historial_web.py)
+MENSAJES_WEB_LOTE = env.int('MENSAJES_WEB_LOTE', default=50)
+MENSAJES_WEB_INTERVALO_S = env.float('MENSAJES_WEB_INTERVALO_S', default=2.0)
+
+# Registro por lotes de preguntas desconocidas (ver apps/api/preguntas_desconocidas.py)
+PREGUNTAS_DESCONOCIDAS_LOTE = env.int('PREGUNTAS_DESCONOCIDAS_LOTE', default=100)
+PREGUNTAS_DESCONOCIDAS_INTERVALO_S = env.float('PREGUNTAS_DESCONOCIDAS_INTERVALO_S', default=5.0)
+
+# Retención del historial (ver apps/api/archivo_mensajes.py y manage.py archivar_mensajes)
+CONVERSACION_INACTIVA_HORAS = env.int('CONVERSACION_INACTIVA_HORAS', default=24)
+RETENCION_MENSAJES_DIAS = env.int('RETENCION_MENSAJES_DIAS', default=90)
+ARCHIVO_MENSAJES_DIR = env('ARCHIVO_MENSAJES_DIR', default=os.path.join(BASE_DIR, 'archivo_mensajes'))
+
+# Tabla mensajes particionada por mes en PostgreSQL (ver apps/api/particiones_mensajes.py).
+# Se aplica al migrar (0013) o con manage.py particiones_mensajes --convertir
+MENSAJES_PARTICIONADOS = env.bool('MENSAJES_PARTICIONADOS', default=False)
+MENSAJES_PARTICIONES_FUTURAS = env.int('MENSAJES_PARTICIONES_FUTURAS', default=3)
+
+# Búsqueda de horarios libres (ver apps/api/disponibilidad.py)
+DISPONIBILIDAD_PASO_MINUTOS = env.int('DISPONIBILIDAD_PASO_MINUTOS', default=30)
+DISPONIBILIDAD_CACHE_S = env.int('DISPONIBILIDAD_CACHE_S', default=300)
+
+# Avisos al huésped al confirmar, registrar llegada y liberar la habitación,
+# enviados en segundo plano (ver apps/api/notificaciones.py)
+NOTIFICAR_HUESPEDES = env.bool('NOTIFICAR_HUESPEDES', default=True)
+# Envíos simultáneos a la Graph API (avisos de los comandos en lote)
+NOTIFICACIONES_HILOS = env.int('NOTIFICACIONES_HILOS', default=4)
+
+# API REST del dashboard (apps/api/views_api.py): solo staff, con sesión del admin o Basic
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+    'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.IsAdminUser'],
+}
+
+# Logging (ver apps/api/registro.py). LOG_FORMATO=json para una línea JSON por registro;
+# LOG_MUESTREO_PAYLOADS es la fracción de requests cuyo payload completo se vuelca
+# (con LOG_LEVEL=DEBUG se vuelcan todos).
+LOG_LEVEL = env('LOG_LEVEL', default='INFO')
+LOG_MUESTREO_PAYLOADS = env.float('LOG_MUESTREO_PAYLOADS', default=0.01)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'texto': {'format': '%(asctime)s %(levelname)s %(name)s %(message)s'},
+        'json': {'()': 'apps.api.registro.FormateadorJSON'},
+    },
+    'handlers': {
+        'consola': {
+            'class': 'logging.StreamHandler',
+            'formatter': env('LOG_FORMATO', default='texto'),
+        },
+    },
+    'loggers': {
+        'apps': {'handlers': ['consola'], 'level': LOG_LEVEL, 'propagate': False},
+    },
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {